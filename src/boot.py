@@ -0,0 +1,42 @@
+# SenseOS Boot - Storage
+#
+# Runs before code.py and before the computer mounts the CIRCUITPY drive,
+# remounting the flash writable for the firmware, so the offline queue of
+# SynapseLink and the files written by the firmware survive outages and
+# reboots. CIRCUITPY can only be writable for one side at a time: while the
+# firmware writes it, the computer sees the drive read-only
+#
+# Holding the key 1 of the keypad while the board resets leaves the drive
+# writable for the computer instead, to copy a new firmware to it; the
+# firmware then keeps the offline queue in memory only
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# Platform-specific Libraries (circuitpython)
+import board
+import digitalio
+import storage
+
+KEY_ROW = board.GP15
+"""Row pin of the key 1 of the keypad, read with a pull-up"""
+KEY_COL = board.GP11
+"""Column pin of the key 1 of the keypad, driven low while the row is read"""
+
+# ---------------------------------------------------------------------
+#                              Storage
+# ---------------------------------------------------------------------
+
+row = digitalio.DigitalInOut(KEY_ROW)
+row.switch_to_input(pull=digitalio.Pull.UP)
+col = digitalio.DigitalInOut(KEY_COL)
+col.switch_to_output(value=False)
+
+key_held = not row.value
+
+row.deinit()
+col.deinit()
+
+if not key_held:
+    storage.remount("/", readonly=False)
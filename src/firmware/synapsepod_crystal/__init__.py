@@ -85,17 +85,19 @@ while progress_status <= 100:
 
 os.display.primary_display.screen = None
 
+# Screens are kept by the screen cache, so a flapping radio swaps them instead of building them again
+# The network remembered is tried before showing the wifi setup screen, and again in the background while it
+# is shown and nobody is using it, so the device recovers on its own from long outages
 while True:
-    if not radio.connected:
-        os.display.primary_display.screen = None
-        os.display.primary_display.screen = SenseWifiSetupScreen()
+    if not radio.connected and not os.network.reconnect():
+        os.display.screens.show("wifisetup", lambda: SenseWifiSetupScreen(scanner=os.network.scanner,
+                                                                          profile=os.network.profile))
         while not os.display.primary_display.screen.connected:
             os.display.primary_display.screen.tick(keypad)
             os.display.primary_display.refresh()
+            os.network.retry(os.display.primary_display.screen.interacting)
 
-    os.display.primary_display.screen = None
-
-    os.display.primary_display.screen = SenseMainScreen()
+    os.display.screens.show("main", SenseMainScreen)
     os.display.primary_display.screen.senseos = os
     while radio.connected:
         os.display.primary_display.screen.tick(keypad)
@@ -14,6 +14,7 @@ from senseos.acpi import SenseACPISubsystem
 from senseos.display import SenseDisplaySubsystem
 from senseos.hardware import SenseHardwareSubsystem
 from senseos.memory import SenseMemorySubsystem
+from senseos.network import SenseNetworkSubsystem
 from senseos.synapselink import SenseSynapseLinkSubsystem
 
 # ---------------------------------------------------------------------
@@ -46,6 +47,9 @@ class SenseOS:
     __display: SenseDisplaySubsystem = None
     """Internal field that represents the display subsystem of the operating system"""
 
+    __network: SenseNetworkSubsystem = None
+    """Internal field that represents the network subsystem of the operating system"""
+
     __synapselink: SenseSynapseLinkSubsystem = None
     """Internal field that represents the SynapseLink subsystem of the operating system"""
 
@@ -73,6 +77,11 @@ class SenseOS:
         """Display subsystem of the operating system"""
         return self.__display
 
+    @property
+    def network(self):
+        """Network subsystem of the operating system"""
+        return self.__network
+
     @property
     def synapselink(self):
         """SynapseLink subsystem of the operating system"""
@@ -90,6 +99,7 @@ class SenseOS:
         self.__memory.initialize()
         self.__hardware.initialize()
         self.__display.initialize()
+        self.__network.initialize()
         self.__synapselink.initialize()
 
     def deinitialize(self):
@@ -97,6 +107,7 @@ class SenseOS:
         Deinitializes the SenseOS operating system
         """
         self.__synapselink.deinitialize()
+        self.__network.deinitialize()
         self.__display.deinitialize()
         self.__hardware.deinitialize()
         self.__memory.deinitialize()
@@ -104,6 +115,7 @@ class SenseOS:
 
     def __del__(self):
         del self.__synapselink
+        del self.__network
         del self.__display
         del self.__hardware
         del self.__memory
@@ -118,4 +130,5 @@ class SenseOS:
         self.__memory = SenseMemorySubsystem()
         self.__hardware = SenseHardwareSubsystem(self)
         self.__display = SenseDisplaySubsystem(self)
+        self.__network = SenseNetworkSubsystem(self)
         self.__synapselink = SenseSynapseLinkSubsystem(self)
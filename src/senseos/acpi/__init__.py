@@ -4,6 +4,9 @@
 # This allows the implementation of power management features
 # regardless of the device hosting the operating system
 #
+# It also keeps the wall clock, disciplined by the time synchronization of
+# SynapseLink: a reference pair of monotonic and wall time plus the drift of
+# the local oscillator, so reading it is a few integer operations
 # Miguel Lopes <miguellopes2004.ml@hotmail.com>
 
 # ---------------------------------------------------------------------
@@ -41,6 +44,15 @@ class SenseACPISubsystem:
     __initialised = False
     """Internal field that indicates if the ACPI subsystem has been initialised"""
 
+    __clock_reference_ns: int = None
+    """Internal field that contains the monotonic time the wall clock was last disciplined at, None if it never was"""
+
+    __clock_wall_ns: int = 0
+    """Internal field that contains the wall time at the reference, in nanoseconds since the epoch"""
+
+    __clock_drift_ppb: int = 0
+    """Internal field that contains how fast the monotonic clock runs behind the wall clock, in parts per billion"""
+
     # ---------------------------------------------------------------
     #                         Properties
     # ---------------------------------------------------------------
@@ -61,6 +73,42 @@ class SenseACPISubsystem:
         """
         return monotonic_ns()
 
+    @property
+    def time_ns(self) -> int:
+        """
+        Returns the wall clock, disciplined by the time synchronization
+        :return: Integer number of nanoseconds since the epoch, None if the clock was never synchronized
+        """
+        if self.__clock_reference_ns is None:
+            return None
+        elapsed = monotonic_ns() - self.__clock_reference_ns
+        return self.__clock_wall_ns + elapsed + elapsed * self.__clock_drift_ppb // 1000000000
+
+    @property
+    def time(self) -> float:
+        """
+        Returns the wall clock, disciplined by the time synchronization
+        :return: Floating-point number of seconds since the epoch, None if the clock was never synchronized
+        """
+        time_ns = self.time_ns
+        return time_ns / 1000000000 if time_ns is not None else None
+
+    @property
+    def synchronized(self) -> bool:
+        """
+        Returns whether the wall clock has been synchronized
+        :return: Boolean indicating if the wall clock is synchronized
+        """
+        return self.__clock_reference_ns is not None
+
+    @property
+    def clock_drift_ppb(self) -> int:
+        """
+        Returns how fast the monotonic clock runs behind the wall clock
+        :return: Drift in parts per billion
+        """
+        return self.__clock_drift_ppb
+
     @property
     def initialized(self) -> bool:
         """
@@ -85,6 +133,17 @@ class SenseACPISubsystem:
         """
         self.__initialised = False
 
+    def discipline(self, reference_ns: int, wall_ns: int, drift_ppb: int = 0):
+        """
+        Sets the wall clock from a time synchronization
+        :param reference_ns: Monotonic time of the estimate, in nanoseconds
+        :param wall_ns: Wall time at the reference, in nanoseconds since the epoch
+        :param drift_ppb: How fast the monotonic clock runs behind the wall clock, in parts per billion
+        """
+        self.__clock_reference_ns = reference_ns
+        self.__clock_wall_ns = wall_ns
+        self.__clock_drift_ppb = drift_ppb
+
     def reboot(self):
         """
         Resets the SenseOS operating system, performing a software based reboot of the system
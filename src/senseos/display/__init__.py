@@ -13,6 +13,8 @@
 
 # SenseOS Libraries
 from senseos.hardware.display import SenseDeviceDisplay, SenseDeviceType
+from senseos.display.screen.cache import SenseScreenCache
+from senseos.display.style import SenseStyleRegistry, SenseStyles
 
 
 # ---------------------------------------------------------------------
@@ -30,6 +32,9 @@ class SenseDisplaySubsystem:
     __primary_display: SenseDeviceDisplay = None
     """Internal field that contains the primary display of the system"""
 
+    __screens: SenseScreenCache = None
+    """Internal field that contains the screens kept to be shown again"""
+
     __initialised = False
     """Internal field that indicates if the ACPI subsystem has been initialised"""
 
@@ -61,6 +66,22 @@ class SenseDisplaySubsystem:
         """
         self.__primary_display = self.__senseos.hardware.find(display)
 
+    @property
+    def screens(self) -> SenseScreenCache:
+        """
+        Returns the screen cache, used to show screens without building them again every time
+        :return: The screen cache
+        """
+        return self.__screens
+
+    @property
+    def styles(self) -> SenseStyleRegistry:
+        """
+        Returns the style registry, which shares the palettes of the elements of every screen
+        :return: The style registry
+        """
+        return SenseStyles
+
     @property
     def displays(self) -> list[SenseDeviceDisplay]:
         """
@@ -84,6 +105,7 @@ class SenseDisplaySubsystem:
         """
         Deinitializes the display subsystem
         """
+        self.__screens.clear()
         self.__initialised = False
 
     def __init__(self, senseos):
@@ -92,3 +114,4 @@ class SenseDisplaySubsystem:
         :param senseos: The SenseOS instance that owns this subsystem
         """
         self.__senseos = senseos
+        self.__screens = SenseScreenCache(senseos)
@@ -22,6 +22,18 @@ from adafruit_button import Button
 from adafruit_progressbar.horizontalprogressbar import HorizontalProgressBar, HorizontalFillDirection
 from adafruit_progressbar.verticalprogressbar import VerticalProgressBar, VerticalFillDirection
 
+from senseos.display.font import SenseFont
+
+BITMAPTOOLS_AVAILABLE = False
+"""Indicates if the bitmaptools module is available, used to write pixels straight into bitmaps"""
+
+try:
+    import bitmaptools
+except ImportError:
+    pass
+else:
+    BITMAPTOOLS_AVAILABLE = True
+
 
 class SenseGuiElement:
     pass
@@ -126,6 +138,364 @@ class SenseGuiElementVerticalFillDirection(VerticalFillDirection):
     pass
 
 
+class SenseGuiElementCanvas(SenseGuiElementTileGrid):
+    """
+    Palette-indexed bitmap drawn remotely, updated by rectangular regions decoded straight into the bitmap
+    """
+
+    def __init__(self, width: int, height: int, colors: int = 16, **kwargs):
+        """
+        :param width: Width of the canvas in pixels
+        :param height: Height of the canvas in pixels
+        :param colors: Number of colors of the palette
+        """
+        palette = Palette(colors)
+        palette[1 % colors] = 0xFFFFFF
+        super().__init__(Bitmap(width, height, colors), pixel_shader=palette, **kwargs)
+
+    def set_colors(self, start: int, colors: list):
+        """
+        Changes colors of the palette
+        :param start: Index of the first color changed
+        :param colors: RGB888 colors
+        """
+        if start < 0 or start + len(colors) > len(self.pixel_shader):
+            raise ValueError(start)
+        for index, color in enumerate(colors):
+            self.pixel_shader[start + index] = color
+
+    def clear(self, value: int = 0):
+        """
+        Fills the whole canvas
+        :param value: Palette index
+        """
+        self.bitmap.fill(value)
+
+    def blit(self, x: int, y: int, width: int, height: int, data):
+        """
+        Writes a region, one palette index per byte, row by row
+        :param x: Left of the region
+        :param y: Top of the region
+        :param width: Width of the region
+        :param height: Height of the region
+        :param data: Buffer with at least width * height bytes
+        """
+        self.__check_region(x, y, width, height)
+        if len(data) < width * height:
+            raise ValueError(len(data))
+        if BITMAPTOOLS_AVAILABLE:
+            bitmaptools.arrayblit(self.bitmap, data, x, y, x + width, y + height)
+            return
+        index = 0
+        for row in range(y, y + height):
+            for column in range(x, x + width):
+                self.bitmap[column, row] = data[index]
+                index += 1
+
+    def blit_rle(self, x: int, y: int, width: int, height: int, data):
+        """
+        Writes a region encoded as runs, pairs of a count of 1 to 255 and a palette index, row by row; runs may
+        continue on the next row
+        :param x: Left of the region
+        :param y: Top of the region
+        :param width: Width of the region
+        :param height: Height of the region
+        :param data: Buffer with the runs, covering exactly width * height pixels
+        """
+        self.__check_region(x, y, width, height)
+        if len(data) % 2 or sum(data[index] for index in range(0, len(data), 2)) != width * height:
+            raise ValueError(len(data))
+        column = 0
+        row = y
+        for index in range(0, len(data), 2):
+            count = data[index]
+            value = data[index + 1]
+            while count:
+                length = min(count, width - column)
+                if BITMAPTOOLS_AVAILABLE:
+                    bitmaptools.fill_region(self.bitmap, x + column, row, x + column + length, row + 1, value)
+                else:
+                    for offset in range(x + column, x + column + length):
+                        self.bitmap[offset, row] = value
+                count -= length
+                column += length
+                if column == width:
+                    column = 0
+                    row += 1
+
+    def __check_region(self, x: int, y: int, width: int, height: int):
+        if x < 0 or y < 0 or width <= 0 or height <= 0 or x + width > self.bitmap.width or \
+                y + height > self.bitmap.height:
+            raise ValueError((x, y, width, height))
+
+
+class SenseGuiElementVirtualList(SenseGuiElementGroup):
+    """
+    List of items with a selection cursor that draws only the rows in view, with a fixed set of labels reused as
+    the list scrolls, so scrolling and changing the items cost the same for a handful of items or for hundreds
+
+    A row is laid out again only when its text changes, and items are inserted, moved and removed one at a time
+    without laying out the whole list, such as the networks streamed in by a wifi scan. It follows the interface of SenseGuiElementListSelect, with a fixed size as the
+    labels do not grow with the items
+    """
+
+    def __init__(self, items: list = None, font=SenseFont, visible_items: int = 8, width: int = 200,
+                 color: int = 0xFFFFFF, background_color: int = None, cursor_char: str = ">", line_spacing: int = 1,
+                 x: int = 0, y: int = 0, scale: int = 1):
+        """
+        :param items: Items listed, as strings
+        :param font: Font of the rows
+        :param visible_items: Number of rows in view
+        :param width: Width of the list in pixels before scaling, used to anchor it
+        :param color: Color of the text
+        :param background_color: Color behind the text, None for transparent
+        :param cursor_char: Character marking the selected item
+        :param line_spacing: Pixels between the rows before scaling
+        """
+        if visible_items <= 0:
+            raise ValueError(visible_items)
+        super().__init__(x=x, y=y, scale=scale)
+        self.__items = list(items) if items else []
+        self.__top = 0
+        self.__selected = 0
+        self.__cursor = cursor_char
+        self.__blank = " " * len(cursor_char)
+        self.__row_height = font.get_bounding_box()[1] + line_spacing
+        self.__width = width
+        self.__anchor_point = (0, 0)
+        self.__texts = [""] * visible_items
+        self.__rows = []
+        for row in range(visible_items):
+            label = SenseGuiElementLabel(font, text="", color=color, background_color=background_color)
+            label.anchor_point = (0, 0)
+            label.anchored_position = (0, row * self.__row_height)
+            self.__rows.append(label)
+            super().append(label)
+        self.__render()
+
+    @property
+    def items(self) -> list:
+        """Items listed, as a copy, changed with the items setter or the item methods"""
+        return list(self.__items)
+
+    @items.setter
+    def items(self, value: list):
+        """Replaces the items listed, keeping the selection within them"""
+        self.__items = list(value)
+        self.__selected = min(self.__selected, max(0, len(self.__items) - 1))
+        self.__scroll()
+
+    @property
+    def item_count(self) -> int:
+        """Number of items listed"""
+        return len(self.__items)
+
+    @property
+    def selected_index(self) -> int:
+        """Index of the selected item"""
+        return self.__selected
+
+    @selected_index.setter
+    def selected_index(self, value: int):
+        """Selects an item, scrolling it into view"""
+        if self.__items and not 0 <= value < len(self.__items):
+            raise IndexError(value)
+        self.__selected = value if self.__items else 0
+        self.__scroll()
+
+    @property
+    def selected_item(self) -> str:
+        """Selected item, None when the list is empty"""
+        return self.__items[self.__selected] if self.__items else None
+
+    @property
+    def visible_items(self) -> int:
+        """Number of rows in view"""
+        return len(self.__rows)
+
+    @property
+    def width(self) -> int:
+        """Width of the list in pixels"""
+        return self.__width * self.scale
+
+    @property
+    def height(self) -> int:
+        """Height of the list in pixels"""
+        return len(self.__rows) * self.__row_height * self.scale
+
+    @property
+    def anchor_point(self) -> tuple:
+        """Point of the list placed at the anchored position, as fractions of its width and height"""
+        return self.__anchor_point
+
+    @anchor_point.setter
+    def anchor_point(self, value: tuple):
+        position = self.anchored_position
+        self.__anchor_point = value
+        self.anchored_position = position
+
+    @property
+    def anchored_position(self) -> tuple:
+        """Position of the anchor point of the list"""
+        return (int(self.x + self.__anchor_point[0] * self.width),
+                int(self.y + self.__anchor_point[1] * self.height))
+
+    @anchored_position.setter
+    def anchored_position(self, value: tuple):
+        self.x = int(value[0] - self.__anchor_point[0] * self.width)
+        self.y = int(value[1] - self.__anchor_point[1] * self.height)
+
+    def insert_item(self, index: int, item: str):
+        """
+        Inserts an item, keeping the same item selected and the rows in view on the same items where possible
+        :param index: Index the item is inserted at
+        :param item: Item inserted
+        """
+        index = max(0, min(index, len(self.__items)))
+        self.__items.insert(index, item)
+        if len(self.__items) > 1 and index <= self.__selected:
+            self.__selected += 1
+        if index < self.__top:
+            self.__top += 1
+        self.__scroll()
+
+    def append_item(self, item: str):
+        """
+        Adds an item at the end of the list
+        :param item: Item added
+        """
+        self.insert_item(len(self.__items), item)
+
+    def remove_item(self, index: int) -> str:
+        """
+        Removes an item, keeping the same item selected unless it is the one removed
+        :param index: Index of the item
+        :return: The item removed
+        """
+        item = self.__items.pop(index)
+        if index < self.__selected or self.__selected >= len(self.__items):
+            self.__selected = max(0, self.__selected - 1)
+        if index < self.__top:
+            self.__top -= 1
+        self.__scroll()
+        return item
+
+    def move_item(self, index: int, to: int):
+        """
+        Moves an item, such as a network whose signal changed, keeping the same item selected, the moved one
+        included
+        :param index: Index of the item
+        :param to: Index the item is moved to
+        """
+        item = self.__items.pop(index)
+        to = max(0, min(to, len(self.__items)))
+        self.__items.insert(to, item)
+        if self.__selected == index:
+            self.__selected = to
+        else:
+            if index < self.__selected:
+                self.__selected -= 1
+            if to <= self.__selected:
+                self.__selected += 1
+        self.__scroll()
+
+    def move_selection_up(self, wrap: bool = False):
+        """
+        Selects the previous item
+        :param wrap: Should the last item be selected after the first one
+        """
+        if self.__selected > 0:
+            self.selected_index = self.__selected - 1
+        elif wrap and self.__items:
+            self.selected_index = len(self.__items) - 1
+
+    def move_selection_down(self, wrap: bool = False):
+        """
+        Selects the next item
+        :param wrap: Should the first item be selected after the last one
+        """
+        if self.__selected < len(self.__items) - 1:
+            self.selected_index = self.__selected + 1
+        elif wrap and self.__items:
+            self.selected_index = 0
+
+    def __scroll(self):
+        """
+        Scrolls the selected item into view, keeping the rows filled, and draws the rows that changed
+        """
+        rows = len(self.__rows)
+        if self.__selected < self.__top:
+            self.__top = self.__selected
+        elif self.__selected >= self.__top + rows:
+            self.__top = self.__selected - rows + 1
+        self.__top = max(0, min(self.__top, len(self.__items) - rows))
+        self.__render()
+
+    def __render(self):
+        """
+        Draws the rows in view, laying out again only the labels whose text changed
+        """
+        for row, label in enumerate(self.__rows):
+            index = self.__top + row
+            if index < len(self.__items):
+                text = (self.__cursor if index == self.__selected else self.__blank) + self.__items[index]
+            else:
+                text = ""
+            if text != self.__texts[row]:
+                self.__texts[row] = text
+                label.text = text
+
+
+class SenseGuiElementIndicator(SenseGuiElementTileGrid):
+    """
+    Filled circle showing the state of something, such as a connection, in the color of that state
+
+    The circle is drawn once for each state, in the color of the state in its palette, so changing the state shows
+    another drawing instead of changing the colors of the palette, which can be shared with other indicators, see
+    SenseStyleRegistry.color_set
+    """
+
+    def __init__(self, x0: int, y0: int, r: int, palette: Palette, state: int = 0):
+        """
+        :param x0: X coordinate of the center
+        :param y0: Y coordinate of the center
+        :param r: Radius of the circle
+        :param palette: Palette with a transparent first color followed by the color of each state
+        :param state: Initial state
+        """
+        states = len(palette) - 1
+        if r <= 0 or states <= 0:
+            raise ValueError((r, states))
+        size = 2 * r + 1
+        bitmap = SenseGuiElementBitmap(size * states, size, len(palette))
+        for state_index in range(states):
+            for y in range(size):
+                for x in range(size):
+                    if (x - r) * (x - r) + (y - r) * (y - r) <= r * r + r:
+                        bitmap[state_index * size + x, y] = state_index + 1
+        super().__init__(bitmap, pixel_shader=palette, tile_width=size, tile_height=size, x=x0 - r, y=y0 - r)
+        self.__states = states
+        self.state = state
+
+    @property
+    def state(self) -> int:
+        """State shown, the index of its color in the palette minus one"""
+        return self[0]
+
+    @state.setter
+    def state(self, value: int):
+        """Shows a state, only refreshing the indicator when it changes"""
+        if not 0 <= value < self.__states:
+            raise ValueError(value)
+        if self[0] != value:
+            self[0] = value
+
+    @property
+    def states(self) -> int:
+        """Number of states of the indicator"""
+        return self.__states
+
+
 __all__ = [
 
     "SenseGuiElement",
@@ -153,5 +523,8 @@ __all__ = [
     "SenseGuiElementHorizontalFillDirection",
     "SenseGuiElementVerticalProgressBar",
     "SenseGuiElementVerticalFillDirection",
-    "SenseGuiElementListSelect"
+    "SenseGuiElementListSelect",
+    "SenseGuiElementCanvas",
+    "SenseGuiElementVirtualList",
+    "SenseGuiElementIndicator"
 ]
\ No newline at end of file
@@ -0,0 +1,478 @@
+# SenseOS Display Rasterizer
+#
+# This module contains a software rasterizer for displayio element trees
+# Allows SenseOS to draw the elements of a screen into an in-memory RGB565
+# buffer, without depending on a display controller to do the composition
+#
+# Rendering is done in Python, pixel by pixel, so a band of a large display
+# takes longer than a refresh of the main loop on microcontrollers. Bands
+# are captured row by row within a time budget, resuming on the next call
+# where the last one stopped, so the loop is never held for much longer
+# than the budget
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# Platform-specific Libraries (circuitpython)
+
+DISPLAYIO_AVAILABLE = False
+"""Indicates if the displayio module is available, used for element type detection"""
+
+try:
+    import displayio
+except ImportError:
+    pass
+else:
+    DISPLAYIO_AVAILABLE = True
+
+
+# External Libraries
+from binascii import crc32
+from time import monotonic_ns
+
+
+# ---------------------------------------------------------------------
+#                          Color Conversion
+# ---------------------------------------------------------------------
+
+def rgb888_to_rgb565(color: int) -> int:
+    """
+    Converts a 24-bit RGB888 color into a 16-bit RGB565 color
+    :param color: 24-bit color (0xRRGGBB)
+    :return: 16-bit color (RRRRRGGGGGGBBBBB)
+    """
+    return ((color >> 8) & 0xF800) | ((color >> 5) & 0x07E0) | ((color >> 3) & 0x001F)
+
+
+def rgb565_to_rgb888(color: int) -> int:
+    """
+    Converts a 16-bit RGB565 color into a 24-bit RGB888 color
+    :param color: 16-bit color (RRRRRGGGGGGBBBBB)
+    :return: 24-bit color (0xRRGGBB)
+    """
+    r = (color >> 11) & 0x1F
+    g = (color >> 5) & 0x3F
+    b = color & 0x1F
+    return (((r << 3) | (r >> 2)) << 16) | (((g << 2) | (g >> 4)) << 8) | ((b << 3) | (b >> 2))
+
+
+# ---------------------------------------------------------------------
+#                          Run-Length Encoding
+# ---------------------------------------------------------------------
+
+def encode_rle565(buffer, length: int, limit: int = None) -> bytearray:
+    """
+    Run-length encodes RGB565 pixels as runs of three bytes, a count of 1 to 255 followed by the color in
+    big-endian order
+    :param buffer: Buffer with the RGB565 pixels, two bytes per pixel in big-endian order
+    :param length: Number of bytes of the buffer to encode
+    :param limit: Largest size of the encoded pixels, the encoding stops once it is exceeded
+    :return: The encoded pixels, None if they exceed the limit
+    """
+    encoded = bytearray()
+    offset = 0
+    while offset < length:
+        high = buffer[offset]
+        low = buffer[offset + 1]
+        run = 1
+        offset += 2
+        while run < 255 and offset < length and buffer[offset] == high and buffer[offset + 1] == low:
+            run += 1
+            offset += 2
+        encoded.append(run)
+        encoded.append(high)
+        encoded.append(low)
+        if limit is not None and len(encoded) > limit:
+            return None
+    return encoded
+
+
+def decode_rle565(data) -> bytearray:
+    """
+    Decodes RGB565 pixels encoded by encode_rle565
+    :param data: The encoded pixels
+    :return: The RGB565 pixels, two bytes per pixel in big-endian order
+    """
+    decoded = bytearray()
+    for offset in range(0, len(data) - 2, 3):
+        decoded.extend(bytes((data[offset + 1], data[offset + 2])) * data[offset])
+    return decoded
+
+
+# ---------------------------------------------------------------------
+#                            Rasterizer
+# ---------------------------------------------------------------------
+
+class SenseRasterizer:
+    """
+    Renders a displayio element tree (groups and tile grids) into a RGB565
+    buffer, two bytes per pixel in big-endian order, the same layout that is
+    sent over the wire to SPI display controllers such as the ILI9341
+    """
+
+    # ---------------------------------------------------------------
+    #                         Internal Fields
+    # ---------------------------------------------------------------
+
+    __width: int = 0
+    """Internal field that represents the width of the rendered area in pixels"""
+
+    __height: int = 0
+    """Internal field that represents the height of the rendered area in pixels"""
+
+    __background: int = 0x0000
+    """Internal field that represents the RGB565 color used where no element is drawn"""
+
+    # ---------------------------------------------------------------
+    #                           Properties
+    # ---------------------------------------------------------------
+
+    @property
+    def width(self) -> int:
+        """Width of the rendered area in pixels"""
+        return self.__width
+
+    @property
+    def height(self) -> int:
+        """Height of the rendered area in pixels"""
+        return self.__height
+
+    @property
+    def stride(self) -> int:
+        """Number of bytes used by a single row of pixels"""
+        return self.__width * 2
+
+    # ---------------------------------------------------------------
+    #                           Methods
+    # ---------------------------------------------------------------
+
+    def render(self, group, buffer, y: int = 0, rows: int = None) -> int:
+        """
+        Renders a band of rows of the element tree into the specified buffer
+        :param group: Root group (or tile grid) to be rendered, None renders only the background
+        :param buffer: Writable buffer with at least stride * rows bytes
+        :param y: First row of the band to be rendered
+        :param rows: Number of rows of the band, defaults to the remaining rows of the area
+        :return: Number of rows rendered into the buffer
+        """
+        if rows is None:
+            rows = self.__height - y
+        rows = max(0, min(rows, self.__height - y))
+
+        # Fill the band with the background color
+        length = self.stride * rows
+        if self.__background == 0:
+            buffer[0:length] = bytes(length)
+        else:
+            buffer[0:length] = bytes((self.__background >> 8, self.__background & 0xFF)) * (length // 2)
+
+        if group is not None and rows > 0:
+            self.__render_element(group, 0, 0, 1, buffer, y, y + rows)
+
+        return rows
+
+    def __render_element(self, element, origin_x: int, origin_y: int, scale: int, buffer, top: int, bottom: int):
+        """
+        Renders an element and all of its children into the band [top, bottom)
+        """
+        if getattr(element, "hidden", False):
+            return
+
+        x = origin_x + element.x * scale
+        y = origin_y + element.y * scale
+
+        if DISPLAYIO_AVAILABLE and isinstance(element, displayio.TileGrid):
+            self.__render_tilegrid(element, x, y, scale, buffer, top, bottom)
+        elif DISPLAYIO_AVAILABLE and isinstance(element, displayio.Group):
+            scale *= self.__native(element, displayio.Group, "scale", 1)
+            for index in range(len(element)):
+                self.__render_element(element[index], x, y, scale, buffer, top, bottom)
+
+    def __render_tilegrid(self, grid, origin_x: int, origin_y: int, scale: int, buffer, top: int, bottom: int):
+        """
+        Renders the tiles of a tile grid into the band [top, bottom)
+        """
+        bitmap = grid.bitmap
+        shader = grid.pixel_shader
+        tile_width = grid.tile_width
+        tile_height = grid.tile_height
+        columns = self.__native(grid, displayio.TileGrid, "width", 1)
+        rows = self.__native(grid, displayio.TileGrid, "height", 1)
+        pixel_width = columns * tile_width * scale
+        pixel_height = rows * tile_height * scale
+        if grid.transpose_xy:
+            pixel_width, pixel_height = pixel_height, pixel_width
+
+        # Skip tile grids outside of the band or the visible area
+        if origin_y >= bottom or origin_y + pixel_height <= top:
+            return
+        if origin_x >= self.__width or origin_x + pixel_width <= 0:
+            return
+
+        # Build a lookup table from bitmap values into RGB565, None for transparency
+        if DISPLAYIO_AVAILABLE and isinstance(shader, displayio.Palette):
+            lut = []
+            for index in range(len(shader)):
+                if shader.is_transparent(index):
+                    lut.append(None)
+                else:
+                    lut.append(rgb888_to_rgb565(shader[index]))
+            convert = None
+        else:
+            lut = None
+            convert = shader.convert if hasattr(shader, "convert") else None
+
+        tiles_per_row = bitmap.width // tile_width
+        flip_x = grid.flip_x
+        flip_y = grid.flip_y
+        transpose = grid.transpose_xy
+        width = self.__width
+        stride = self.stride
+
+        # Rows and columns of the visible (clipped) area, in screen coordinates
+        first_row = max(top, origin_y)
+        last_row = min(bottom, origin_y + pixel_height)
+        first_col = max(0, origin_x)
+        last_col = min(width, origin_x + pixel_width)
+
+        # Single tile grids (shapes, labels, progress bars) map directly into the bitmap
+        simple = columns == 1 and rows == 1 and not (flip_x or flip_y or transpose)
+        if simple:
+            tile = grid[0]
+            base_x = (tile % tiles_per_row) * tile_width
+            base_y = (tile // tiles_per_row) * tile_height
+
+        for screen_y in range(first_row, last_row):
+            offset_y = (screen_y - origin_y) // scale
+            row_offset = (screen_y - top) * stride
+            for screen_x in range(first_col, last_col):
+                offset_x = (screen_x - origin_x) // scale
+
+                if simple:
+                    value = bitmap[base_x + offset_x, base_y + offset_y]
+                else:
+                    # Map the grid coordinates back into tile coordinates
+                    gx, gy = (offset_y, offset_x) if transpose else (offset_x, offset_y)
+                    tile_x, px = divmod(gx, tile_width)
+                    tile_y, py = divmod(gy, tile_height)
+                    if flip_x:
+                        px = tile_width - 1 - px
+                    if flip_y:
+                        py = tile_height - 1 - py
+
+                    tile = grid[tile_x, tile_y]
+                    value = bitmap[(tile % tiles_per_row) * tile_width + px, (tile // tiles_per_row) * tile_height + py]
+
+                if lut is not None:
+                    if value >= len(lut):
+                        continue
+                    color = lut[value]
+                    if color is None:
+                        continue
+                elif convert is not None:
+                    color = rgb888_to_rgb565(convert(value))
+                else:
+                    color = value & 0xFFFF
+
+                offset = row_offset + screen_x * 2
+                buffer[offset] = color >> 8
+                buffer[offset + 1] = color & 0xFF
+
+    @staticmethod
+    def __native(element, base, name: str, default):
+        """
+        Reads a property of a displayio element as implemented by displayio itself
+        Labels and shapes override properties such as scale, width and height to
+        report their own measurements, which differ from the ones used for rendering
+        """
+        native = getattr(base, name, None)
+        if getattr(type(element), name, None) is native:
+            return getattr(element, name)
+        if hasattr(native, "fget"):
+            return native.fget(element)
+        return default
+
+    # ---------------------------------------------------------------
+    #                           Constructor
+    # ---------------------------------------------------------------
+
+    def __init__(self, width: int, height: int, background: int = 0x000000):
+        """
+        Creates a new rasterizer for an area with the specified size
+        :param width: Width of the rendered area in pixels
+        :param height: Height of the rendered area in pixels
+        :param background: RGB888 color used where no element is drawn
+        """
+        self.__width = width
+        self.__height = height
+        self.__background = rgb888_to_rgb565(background)
+
+
+# ---------------------------------------------------------------------
+#                              Band
+# ---------------------------------------------------------------------
+
+class SenseBand:
+    """
+    Captures a band of rows of an element tree in steps bounded by a time
+    budget: the rows are rendered one at a time, checksummed as they are
+    rendered, then run-length encoded one row at a time, so a step never
+    exceeds the budget by more than the work of a single row
+    """
+
+    # ---------------------------------------------------------------
+    #                         Internal Fields
+    # ---------------------------------------------------------------
+
+    __rasterizer: SenseRasterizer = None
+    """Internal field that contains the rasterizer of the area the bands are captured from"""
+
+    __buffer: bytearray = None
+    """Internal field that contains the pixels of the band, sized for the largest band"""
+
+    __y: int = 0
+    """Internal field that contains the first row of the band"""
+
+    __rows: int = 0
+    """Internal field that contains the number of rows of the band"""
+
+    __rendered: int = 0
+    """Internal field that contains the number of rows of the band rendered so far"""
+
+    __checksum: int = 0
+    """Internal field that contains the checksum of the rows rendered so far"""
+
+    __encoded: bytearray = None
+    """Internal field that contains the run-length encoded rows so far, None once it exceeds the raw pixels"""
+
+    __offset: int = 0
+    """Internal field that contains the bytes of the band encoded so far"""
+
+    # ---------------------------------------------------------------
+    #                           Properties
+    # ---------------------------------------------------------------
+
+    @property
+    def y(self) -> int:
+        """First row of the band"""
+        return self.__y
+
+    @property
+    def rows(self) -> int:
+        """Number of rows of the band, clipped to the area"""
+        return self.__rows
+
+    @property
+    def length(self) -> int:
+        """Number of bytes of the pixels of the band"""
+        return self.__rasterizer.stride * self.__rows
+
+    @property
+    def rendered(self) -> bool:
+        """Indicates if every row of the band was rendered"""
+        return self.__rendered >= self.__rows
+
+    @property
+    def encoded(self) -> bool:
+        """Indicates if every row of the band was encoded, or the encoding was given up for the raw pixels"""
+        return self.__encoded is None or self.__offset >= self.length
+
+    @property
+    def checksum(self) -> int:
+        """CRC-32 of the pixels of the band, once rendered"""
+        return self.__checksum
+
+    @property
+    def encoding(self) -> str:
+        """Encoding of the pixels of the band once encoded, rle unless it is larger than the raw pixels"""
+        return "raw" if self.__encoded is None else "rle"
+
+    @property
+    def data(self):
+        """Pixels of the band once encoded, in its encoding"""
+        if self.__encoded is None:
+            return memoryview(self.__buffer)[:self.length]
+        return self.__encoded
+
+    # ---------------------------------------------------------------
+    #                           Methods
+    # ---------------------------------------------------------------
+
+    def start(self, y: int, rows: int):
+        """
+        Starts capturing a band, clipped to the area
+        :param y: First row of the band
+        :param rows: Number of rows of the band, at most the rows the band was created for
+        """
+        self.__y = y
+        self.__rows = max(0, min(rows, self.__rasterizer.height - y, len(self.__buffer) // self.__rasterizer.stride))
+        self.__rendered = 0
+        self.__checksum = 0
+        self.__encoded = bytearray()
+        self.__offset = 0
+
+    def render(self, group, deadline: int) -> bool:
+        """
+        Renders the next rows of the band until the deadline, always at least one
+        :param group: Root group (or tile grid) to be rendered
+        :param deadline: Time the rendering stops, as returned by monotonic_ns
+        :return: True once every row of the band was rendered, False otherwise
+        """
+        stride = self.__rasterizer.stride
+        view = memoryview(self.__buffer)
+        while self.__rendered < self.__rows:
+            offset = self.__rendered * stride
+            self.__rasterizer.render(group, view[offset:], self.__y + self.__rendered, 1)
+            self.__checksum = crc32(view[offset:offset + stride], self.__checksum)
+            self.__rendered += 1
+            if monotonic_ns() >= deadline:
+                break
+        return self.rendered
+
+    def encode(self, deadline: int) -> bool:
+        """
+        Run-length encodes the next rows of the band until the deadline, always at least one, runs never span two
+        rows so the rows are encoded independently
+        :param deadline: Time the encoding stops, as returned by monotonic_ns
+        :return: True once the band was encoded, False otherwise
+        """
+        stride = self.__rasterizer.stride
+        length = self.length
+        view = memoryview(self.__buffer)
+        while not self.encoded:
+            row = encode_rle565(view[self.__offset:self.__offset + stride], stride)
+            self.__encoded.extend(row)
+            self.__offset += stride
+            if len(self.__encoded) > length:
+                self.__encoded = None
+            if monotonic_ns() >= deadline:
+                break
+        return self.encoded
+
+    # ---------------------------------------------------------------
+    #                           Constructor
+    # ---------------------------------------------------------------
+
+    def __init__(self, rasterizer: SenseRasterizer, rows: int):
+        """
+        Creates a new band, allocating the pixels of its largest size once
+        :param rasterizer: Rasterizer of the area the bands are captured from
+        :param rows: Largest number of rows of a band
+        """
+        self.__rasterizer = rasterizer
+        self.__buffer = bytearray(rasterizer.stride * rows)
+
+
+# ---------------------------------------------------------------------
+#                             Exports
+# ---------------------------------------------------------------------
+
+__all__ = [
+    "SenseRasterizer",
+    "SenseBand",
+    "rgb888_to_rgb565",
+    "rgb565_to_rgb888",
+    "encode_rle565",
+    "decode_rle565"
+]
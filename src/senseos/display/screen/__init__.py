@@ -55,6 +55,12 @@ class SenseDisplayScreen:
         Initializes the current display screen, preparing the layout and the elements to be drawn
         """
 
+    def activate(self):
+        """
+        Prepares the screen to be shown again, called by the screen cache when it reactivates the screen instead of
+        building it
+        """
+
     def tick(self, *args, **kwargs):
         """
         Performs a tick on the screen, updating the state of the screen
@@ -12,6 +12,7 @@
 from senseos.display.screen import SenseDisplayioScreen
 from senseos.display.font import SenseFont
 from senseos.display.elements import SenseGuiElementLabel, SenseGuiElementRect, SenseGuiElementHorizontalProgressBar, SenseGuiElementHorizontalFillDirection
+from senseos.display.style import SenseStyles, BLUE
 
 # Platform-specific Libraries (circuitpython)
 
@@ -50,13 +51,13 @@ class SenseBootScreen(SenseDisplayioScreen):
         """
 
         # Border of the screen
-        self.border = SenseGuiElementRect(0, 0, 320, 240, outline=0x0000FF, stroke=1)
+        self.border = SenseStyles.share(SenseGuiElementRect(0, 0, 320, 240, outline=BLUE, stroke=1))
 
         # Branding of SenseOS
-        self.branding = SenseGuiElementLabel(
-            SenseFont, text="SenseOS", scale=4, color=0x0000FF, anchor_point=(0.5, 0.5),
+        self.branding = SenseStyles.share(SenseGuiElementLabel(
+            SenseFont, text="SenseOS", scale=4, color=BLUE, anchor_point=(0.5, 0.5),
             anchored_position=(160, 120)
-        )
+        ))
 
         # Progress bar representing the boot progress
         self.progress = SenseGuiElementHorizontalProgressBar(
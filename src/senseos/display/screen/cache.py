@@ -0,0 +1,181 @@
+# SenseOS Display Screen - Screen Cache
+#
+# Keeps the screens built by the operating system, so a screen shown again,
+# such as the wifi setup screen each time the radio disconnects, is
+# reactivated instead of having every one of its elements built again
+#
+# Screens are kept while there is memory to spare. When the free memory of
+# the memory subsystem falls below the threshold, the least recently shown
+# screens are dropped and their memory reclaimed, never the screen being
+# shown. Platforms that do not report their free memory keep at most the
+# capacity of the cache
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# SenseOS Libraries
+from senseos.display.screen import SenseDisplayScreen
+
+
+# ---------------------------------------------------------------------
+#                            Screen Cache
+# ---------------------------------------------------------------------
+
+class SenseScreenCache:
+    # ---------------------------------------------------------------
+    #                         Internal Fields
+    # ---------------------------------------------------------------
+
+    __senseos = None
+    """Internal field that contains access to the SenseOS operating system"""
+
+    __screens: dict = None
+    """Internal field that contains the screens kept, as key to [last use, screen]"""
+
+    __clock: int = 0
+    """Internal field that orders the uses of the screens, increasing every time a screen is returned"""
+
+    __low_memory: int = 16384
+    """Internal field that contains the free memory below which screens are dropped, in bytes"""
+
+    __capacity: int = 4
+    """Internal field that contains the number of screens kept when the free memory is not reported"""
+
+    __hits: int = 0
+    """Internal field that contains the number of screens reactivated"""
+
+    __misses: int = 0
+    """Internal field that contains the number of screens built"""
+
+    __evictions: int = 0
+    """Internal field that contains the number of screens dropped"""
+
+    # ---------------------------------------------------------------
+    #                         Properties
+    # ---------------------------------------------------------------
+
+    @property
+    def keys(self) -> list:
+        """
+        Keys of the screens kept
+        :return: List of keys, from the least to the most recently shown
+        """
+        return sorted(self.__screens.keys(), key=lambda key: self.__screens[key][0])
+
+    @property
+    def statistics(self) -> dict:
+        """
+        Counters of the cache
+        :return: Dictionary with the screens kept, reactivated, built and dropped
+        """
+        return {
+            "screens": len(self.__screens),
+            "hits": self.__hits,
+            "misses": self.__misses,
+            "evictions": self.__evictions,
+        }
+
+    # ---------------------------------------------------------------
+    #                         Methods
+    # ---------------------------------------------------------------
+
+    def get(self, key: str, factory) -> SenseDisplayScreen:
+        """
+        Returns a screen, building it only if it is not kept
+        :param key: Key of the screen
+        :param factory: Function building the screen, such as its class, called without arguments
+        :return: The screen, reactivated if kept
+        """
+        self.__clock += 1
+        entry = self.__screens.get(key)
+        if entry is not None:
+            entry[0] = self.__clock
+            self.__hits += 1
+            entry[1].activate()
+            return entry[1]
+
+        # Memory is made for the screen before it is built, as building it is when the heap is the fullest
+        self.__evict()
+        screen = factory()
+        self.__screens[key] = [self.__clock, screen]
+        self.__misses += 1
+        self.__evict()
+        return screen
+
+    def show(self, key: str, factory, refresh: bool = True, display=None) -> SenseDisplayScreen:
+        """
+        Shows a screen on a display, building it only if it is not kept
+        :param key: Key of the screen
+        :param factory: Function building the screen, such as its class, called without arguments
+        :param refresh: Should the display be refreshed after showing the screen
+        :param display: Display the screen is shown on, defaults to the primary display
+        :return: The screen shown
+        """
+        if display is None:
+            display = self.__senseos.display.primary_display
+        screen = self.get(key, factory)
+        if display.screen is not screen:
+            display.set_screen(screen, refresh)
+        return screen
+
+    def discard(self, key: str) -> bool:
+        """
+        Drops a screen, so it is built again the next time it is shown
+        :param key: Key of the screen
+        :return: True if the screen was kept, False otherwise
+        """
+        return self.__screens.pop(key, None) is not None
+
+    def clear(self):
+        """
+        Drops every screen and reclaims their memory
+        """
+        self.__screens.clear()
+        self.__senseos.memory.reclaim()
+
+    def __evict(self):
+        """
+        Drops the least recently shown screens while the free memory is below the threshold, keeping the most
+        recently shown one
+        """
+        memory = self.__senseos.memory
+        free = memory.free
+        if free < 0:
+            while len(self.__screens) > self.__capacity:
+                self.__drop()
+            return
+
+        if free >= self.__low_memory:
+            return
+        # Collecting the garbage may be enough, without dropping any screen
+        memory.reclaim()
+        while len(self.__screens) > 1 and memory.free < self.__low_memory:
+            self.__drop()
+            memory.reclaim()
+
+    def __drop(self):
+        """
+        Drops the least recently shown screen, a linear scan as few screens are kept
+        """
+        oldest = None
+        for key, entry in self.__screens.items():
+            if oldest is None or entry[0] < self.__screens[oldest][0]:
+                oldest = key
+        del self.__screens[oldest]
+        self.__evictions += 1
+
+    # ---------------------------------------------------------------
+    #                         Constructor
+    # ---------------------------------------------------------------
+
+    def __init__(self, senseos, low_memory: int = 16384, capacity: int = 4):
+        """
+        :param senseos: The SenseOS instance that owns this cache
+        :param low_memory: Free memory below which screens are dropped, in bytes
+        :param capacity: Number of screens kept when the platform does not report its free memory
+        """
+        self.__senseos = senseos
+        self.__screens = {}
+        self.__low_memory = low_memory
+        self.__capacity = capacity
@@ -13,7 +13,8 @@ import time
 from senseos.display.screen import SenseDisplayioScreen
 from senseos.display.font import SenseFont
 from senseos.display.elements import SenseGuiElementLabel, SenseGuiElementRect, SenseGuiElementHorizontalProgressBar, \
-    SenseGuiElementHorizontalFillDirection, SenseGuiElementCircle
+    SenseGuiElementHorizontalFillDirection, SenseGuiElementIndicator, SenseGuiElementCanvas
+from senseos.display.style import SenseStyles, BLUE, WHITE, GREEN, RED, YELLOW
 from senseos.synapselink import SenseSynapseLinkSubsystem
 from time import monotonic
 import wifi
@@ -31,9 +32,19 @@ else:
     DISPLAYIO_AVAILABLE = True
 
 
-GREEN = 0x06EA743
-RED = 0xE11A00
-YELLOW = 0xFFD300
+STATE_OFFLINE = 0
+"""State of the connection indicators while disconnected, shown in red"""
+STATE_ONLINE = 1
+"""State of the connection indicators while connected, shown in green"""
+STATE_CONNECTING = 2
+"""State of the connection indicators while connecting, shown in yellow"""
+
+CANVAS_WIDTH = 128
+"""Width of the remote canvas in pixels"""
+CANVAS_HEIGHT = 64
+"""Height of the remote canvas in pixels"""
+CANVAS_COLORS = 16
+"""Number of colors of the palette of the remote canvas"""
 
 # ---------------------------------------------------------------------
 #                           Boot Screen
@@ -44,7 +55,8 @@ class SenseMainScreen(SenseDisplayioScreen):
     #                        Elements
     # ---------------------------------------------------------------
 
-    network_state: SenseGuiElementCircle = None
+    network_state: SenseGuiElementIndicator = None
+    mqtt_state: SenseGuiElementIndicator = None
     border: SenseGuiElementRect = None
     branding: SenseGuiElementLabel = None
     progress: SenseGuiElementHorizontalProgressBar = None
@@ -65,18 +77,19 @@ class SenseMainScreen(SenseDisplayioScreen):
 
 
         # Border of the screen
-        self.border = SenseGuiElementRect(0, 0, 320, 240, outline=0x0000FF, stroke=1)
+        self.border = SenseStyles.share(SenseGuiElementRect(0, 0, 320, 240, outline=BLUE, stroke=1))
 
         # Branding of SenseOS
-        self.branding = SenseGuiElementLabel(
-            SenseFont, text="EvoluxIoT: Ready", scale=2, color=0x0000FF, anchor_point=(0.5, 0.5),
+        self.branding = SenseStyles.share(SenseGuiElementLabel(
+            SenseFont, text="EvoluxIoT: Ready", scale=2, color=BLUE, anchor_point=(0.5, 0.5),
             anchored_position=(160, 40)
-        )
+        ))
 
-        # Circle shape
-        self.network_state = SenseGuiElementCircle(50, 95, 5, fill=RED, outline=RED, stroke=1)
+        # Connection indicators, sharing the palette of their states
+        states = SenseStyles.color_set(RED, GREEN, YELLOW)
+        self.network_state = SenseGuiElementIndicator(50, 95, 5, states, STATE_OFFLINE)
 
-        self.mqtt_state = SenseGuiElementCircle(50, 125, 5, fill=RED, outline=RED, stroke=1)
+        self.mqtt_state = SenseGuiElementIndicator(50, 125, 5, states, STATE_OFFLINE)
 
 
 
@@ -84,23 +97,26 @@ class SenseMainScreen(SenseDisplayioScreen):
         #    SenseFont, text=f"Hostname: PWRSynapse", scale=1, color=0xFFFFFF, x=30, y=75
         #)
 
-        self.ip = SenseGuiElementLabel(
-            SenseFont, text=f"WIFI Network", scale=1, color=0xFFFFFF, x=70, y=95
-        )
+        self.ip = SenseStyles.share(SenseGuiElementLabel(
+            SenseFont, text=f"WIFI Network", scale=1, color=WHITE, x=70, y=95
+        ))
 
-        self.mqtt_ip = SenseGuiElementLabel(
-            SenseFont, text=f"EvoluxIoT MQTT", scale=1, color=0xFFFFFF, x=70, y=125
-        )
+        self.mqtt_ip = SenseStyles.share(SenseGuiElementLabel(
+            SenseFont, text=f"EvoluxIoT MQTT", scale=1, color=WHITE, x=70, y=125
+        ))
 
-        self.uptime = SenseGuiElementLabel(
-            SenseFont, text=f"Uptime: 0 seconds", scale=1, color=0xFFFFFF, anchor_point=(0.5, 0.5),
+        self.uptime = SenseStyles.share(SenseGuiElementLabel(
+            SenseFont, text=f"Uptime: 0 seconds", scale=1, color=WHITE, anchor_point=(0.5, 0.5),
             anchored_position=(160, 155)
-        )
+        ))
 
-        self.remote_text = SenseGuiElementLabel(
-            SenseFont, text=f"", scale=1, color=0xFFFFFF, anchor_point=(0.5, 0.5),
+        self.remote_text = SenseStyles.share(SenseGuiElementLabel(
+            SenseFont, text=f"", scale=1, color=WHITE, anchor_point=(0.5, 0.5),
             anchored_position=(160, 185)
-        )
+        ))
+
+        # Canvas drawn remotely through SynapseLink
+        self.remote_canvas = SenseGuiElementCanvas(CANVAS_WIDTH, CANVAS_HEIGHT, CANVAS_COLORS, x=182, y=72)
 
         # Add elements to the display
         self.append(self.branding)
@@ -111,6 +127,7 @@ class SenseMainScreen(SenseDisplayioScreen):
         self.append(self.mqtt_ip)
         self.append(self.uptime)
         self.append(self.remote_text)
+        self.append(self.remote_canvas)
 
     def display(self, value):
         self.remote_text.text = f"{value}"
@@ -120,15 +137,13 @@ class SenseMainScreen(SenseDisplayioScreen):
         Performs a tick on the screen, updating the state of the screen
         """
         
-        self.network_state.fill = RED if not self.synapselink.network_connected else GREEN
-        self.network_state.outline = RED if not self.synapselink.network_connected else GREEN
-        self.mqtt_state.fill = RED if not self.synapselink.connected else GREEN
-        self.mqtt_state.outline = RED if not self.synapselink.connected else GREEN
+        self.network_state.state = STATE_ONLINE if self.synapselink.network_connected else STATE_OFFLINE
+        self.mqtt_state.state = STATE_ONLINE if self.synapselink.connected else STATE_OFFLINE
 
         self.uptime.text = f"Uptime: {int(monotonic())} seconds"
 
         if not self.synapselink.connected:
-            self.mqtt_state.fill = YELLOW
+            self.mqtt_state.state = STATE_CONNECTING
             self.branding.text = f"EvoluxIoT: Connecting..."
             self.synapselink.deinitialize()
             
@@ -137,7 +152,7 @@ class SenseMainScreen(SenseDisplayioScreen):
                 self.branding.text = f"EvoluxIoT: Ready"
             else:
                 self.branding.text = f"EvoluxIoT: Offline"
-                time.sleep(2)
+                self.synapselink.wait(2)
 
         elif not self.synapselink.poll():
             self.branding.text = f"EvoluxIoT: Offline"
@@ -12,10 +12,13 @@
 from senseos.display.screen import SenseDisplayioScreen
 from senseos.display.font import SenseFont
 from senseos.display.elements import SenseGuiElementLabel, SenseGuiElementRect, SenseGuiElementHorizontalProgressBar, \
-    SenseGuiElementHorizontalFillDirection, SenseGuiElementListSelect
+    SenseGuiElementHorizontalFillDirection, SenseGuiElementVirtualList
+from senseos.display.style import SenseStyles, BLUE
 from senseos.hardware.keypad.matrix_button_4x4 import Sense4x4MatrixButtonKeypad
+from senseos.network.scanner import SenseWifiScanner
+from senseos.network.profile import SenseWifiProfile
 import wifi
-from time import sleep
+from time import monotonic, sleep
 
 # Platform-specific Libraries (circuitpython)
 
@@ -29,6 +32,9 @@ except ImportError:
 else:
     DISPLAYIO_AVAILABLE = True
 
+INTERACTION_IDLE = 30.0
+"""Time after the last keypress the user is still considered to be using the screen, in seconds"""
+
 
 # ---------------------------------------------------------------------
 #                           Boot Screen
@@ -42,48 +48,95 @@ class SenseWifiSetupScreen(SenseDisplayioScreen):
     border: SenseGuiElementRect = None
     branding: SenseGuiElementLabel = None
     progress: SenseGuiElementHorizontalProgressBar = None
-    wifi_selector: SenseGuiElementListSelect = None
+    wifi_selector: SenseGuiElementVirtualList = None
+
+    __scanner: SenseWifiScanner = None
+    """Scans the networks in the background, keeping the ones found by previous scans while fresh"""
 
-    __networks: dict[str, wifi.Network] = {}
-    """All the networks found by the wifi module"""
+    __version: int = -1
+    """Version of the networks of the scanner shown by the selector"""
 
-    __scanning = False
-    """Indicates if the wifi module is scanning for networks"""
+    __profile: SenseWifiProfile = None
+    """Remembers the network connected to, so the device reconnects to it on its own, None when not remembered"""
 
     __connecting = False
     """Indicates if the wifi module is connecting to a network"""
 
+    __last_input: float = None
+    """Time of the last keypress, None if no key was pressed"""
+
     __s = False
 
     @property
     def selected_network(self) -> wifi.Network:
-        return self.__networks[self.wifi_selector.selected_item]
+        if self.wifi_selector.selected_item is None:
+            return None
+        return self.__scanner.find(self.wifi_selector.selected_item)
 
     @property
     def connected(self):
         return wifi.radio.connected
 
+    @property
+    def interacting(self) -> bool:
+        """
+        Indicates if the user is using the screen, so background work blocking the loop, such as retrying the
+        network remembered, waits until the user is done
+        :return: True if a key was pressed recently or a connection is being made, False otherwise
+        """
+        if self.__connecting:
+            return True
+        return self.__last_input is not None and monotonic() - self.__last_input < INTERACTION_IDLE
+
     # ---------------------------------------------------------------
     #                         Methods
     # ---------------------------------------------------------------
 
-    def scan_networks(self, save_in_selector= True):
-        self.__scanning = True
-        self.branding.text = "Scanning Networks..."
-        for network in self.__networks.values():
-            del network
-        self.__networks.clear()
-        for network in wifi.radio.start_scanning_networks():
-            self.__networks[network.ssid] = network
-        wifi.radio.stop_scanning_networks()
-        if save_in_selector:
-            self.wifi_selector.items = list(self.__networks.keys())
-            self.wifi_selector.selected_index = 0
+    def scan_networks(self, force: bool = True):
+        """
+        Starts scanning the networks in the background, the selector lists them as they are found
+        :param force: Should the networks be scanned even if the ones found by the last scan are still fresh
+        """
+        if self.__scanner.start(force):
+            self.branding.text = "Scanning Networks..."
 
-        self.branding.text = "Choose network:"
-        self.__scanning = False
+    def update_networks(self):
+        """
+        Takes the next networks found by the scan in progress, updating the selector when the networks changed
+        and keeping the network selected
+        """
+        self.__scanner.step()
+        if self.__version != self.__scanner.version:
+            self.__version = self.__scanner.version
+            self.__show_networks(self.__scanner.ssids)
 
+        if not self.__scanner.scanning and self.branding.text == "Scanning Networks...":
+            self.branding.text = "Choose network:"
 
+    def __show_networks(self, ssids: list):
+        """
+        Streams the networks into the selector, removing the ones gone, moving the ones whose signal changed and
+        inserting the ones found one at a time, so only the rows that changed are drawn again and the network
+        selected stays selected
+        """
+        selector = self.wifi_selector
+        wanted = set(ssids)
+        items = selector.items
+        for index in range(len(items) - 1, -1, -1):
+            if items[index] not in wanted:
+                selector.remove_item(index)
+                del items[index]
+
+        for index, ssid in enumerate(ssids):
+            if index < len(items) and items[index] == ssid:
+                continue
+            if ssid in items:
+                moved = items.index(ssid, index)
+                selector.move_item(moved, index)
+                items.insert(index, items.pop(moved))
+            else:
+                selector.insert_item(index, ssid)
+                items.insert(index, ssid)
 
     def try_connect(self):
         self.__connecting = True
@@ -94,6 +147,14 @@ class SenseWifiSetupScreen(SenseDisplayioScreen):
             self.branding.text = "Connected"
             self.__connecting = False
 
+        if self.selected_network is None:
+            self.branding.text = "No network selected"
+            self.__connecting = False
+            return False
+
+        # The radio cannot connect while scanning
+        self.__scanner.stop()
+
         self.branding.text = "Checking network security..."
         authentication_required = wifi.AuthMode.OPEN not in self.selected_network.authmode
         
@@ -113,12 +174,14 @@ class SenseWifiSetupScreen(SenseDisplayioScreen):
             self.branding.text = f"Retrying {retry+1}/5..."
             if wifi.radio.connected:
                 self.branding.text = "Connected"
+                self.__remember(password)
                 self.__connecting = False
                 return True
             sleep(0.2)
 
         if wifi.radio.connected:
             self.branding.text = "Connected"
+            self.__remember(password)
             self.__connecting = False
             return True
         else:
@@ -129,31 +192,42 @@ class SenseWifiSetupScreen(SenseDisplayioScreen):
 
 
 
+    def __remember(self, password: str):
+        """
+        Remembers the network connected to with the access point and channel used, so the device reconnects to it
+        without scanning
+        """
+        if self.__profile is None:
+            return
+        access_point = wifi.radio.ap_info
+        network = access_point if access_point is not None else self.selected_network
+        self.__profile.remember(network.ssid, password, network.bssid, network.channel)
+
     def initialize(self):
         """
         Initializes the current display screen, preparing the layout and the elements to be drawn
         """
 
         # Border of the screen
-        self.border = SenseGuiElementRect(0, 0, 320, 240, outline=0x0000FF, stroke=1)
+        self.border = SenseStyles.share(SenseGuiElementRect(0, 0, 320, 240, outline=BLUE, stroke=1))
 
         # Branding of SenseOS
-        self.branding = SenseGuiElementLabel(
-            SenseFont, text="Select Network:", scale=2, color=0x0000FF, anchor_point=(0.5, 0.5),
+        self.branding = SenseStyles.share(SenseGuiElementLabel(
+            SenseFont, text="Select Network:", scale=2, color=BLUE, anchor_point=(0.5, 0.5),
             anchored_position=(160, 20)
-        )
+        ))
 
         if self.connected:
             self.branding.text = "Connected"
 
-
-
-        self.scan_networks(False)
-
-        self.wifi_selector = SenseGuiElementListSelect(
-            scale=1,
-            items=list(self.__networks.keys()),
-        )
+        # The networks found by previous scans are listed at once, the scan only runs once they are stale
+        # Only the rows in view are drawn, so long lists of networks scroll as fast as short ones
+        self.wifi_selector = SenseStyles.share(SenseGuiElementVirtualList(
+            items=self.__scanner.ssids,
+            visible_items=10,
+            width=200,
+        ))
+        self.__version = self.__scanner.version
 
         self.wifi_selector.anchor_point = (0.5, 0.5)
         self.wifi_selector.anchored_position = (320 // 2, 240 // 2)
@@ -163,18 +237,32 @@ class SenseWifiSetupScreen(SenseDisplayioScreen):
         self.append(self.border)
         self.append(self.wifi_selector)
 
+        if not self.connected:
+            self.scan_networks(False)
+
+    def activate(self):
+        """
+        Scans the networks again once the ones found when the screen was last shown are stale
+        """
+        self.scan_networks(False)
+
     def tick(self, *args, **kwargs):
-        if self.connected or self.__scanning or self.__connecting:
+        if self.connected or self.__connecting:
             return
 
+        self.update_networks()
+
         keypad: Sense4x4MatrixButtonKeypad = args[0]
         keypad.read()
+        if keypad.pressed:
+            self.__last_input = monotonic()
+
+        if (keypad.pressed_key_2 or keypad.pressed_key_10) and not self.wifi_selector.item_count:
+            # Nothing to select until the scan finds a network
+            return
 
         if keypad.pressed_key_2:
-            if self.wifi_selector.selected_index == 0:
-                self.wifi_selector.selected_index = len(self.wifi_selector.items) - 1
-            else:
-                self.wifi_selector.selected_index -= 1
+            self.wifi_selector.move_selection_up(wrap=True)
 
         elif keypad.pressed_key_5:
             self.scan_networks(True)
@@ -183,13 +271,10 @@ class SenseWifiSetupScreen(SenseDisplayioScreen):
             if self.try_connect():
                 return
             else:
-                self.scan_networks()
+                self.scan_networks(True)
 
         elif keypad.pressed_key_10:
-            if self.wifi_selector.selected_index == len(self.wifi_selector.items) - 1:
-                self.wifi_selector.selected_index = 0
-            else:
-                self.wifi_selector.selected_index += 1
+            self.wifi_selector.move_selection_down(wrap=True)
 
 
 
@@ -204,3 +289,18 @@ class SenseWifiSetupScreen(SenseDisplayioScreen):
         self.remove(self.border)
         del self.branding
         del self.border
+
+    # ---------------------------------------------------------------
+    #                         Constructor
+    # ---------------------------------------------------------------
+
+    def __init__(self, scanner: SenseWifiScanner = None, profile: SenseWifiProfile = None, **kwargs):
+        """
+        :param scanner: Wifi scanner shared with the operating system, such as the one of the network subsystem,
+                        so the networks found outlive the screen, a scanner of its own otherwise
+        :param profile: Wifi profile remembering the network connected to, such as the one of the network
+                        subsystem, None to not remember it
+        """
+        self.__scanner = SenseWifiScanner() if scanner is None else scanner
+        self.__profile = profile
+        super().__init__(**kwargs)
@@ -0,0 +1,185 @@
+# SenseOS Display - Style Registry
+#
+# Keeps a single palette for each set of colors used by the elements of the
+# screens, such as the blue border and branding or the white labels, so the
+# elements and screens using the same colors share one palette instead of
+# each holding its own
+#
+# Color sets are palettes with a transparent first color followed by the
+# colors of each state of an element, such as the red, green and yellow of
+# the connection indicators, which change state by showing another color
+# of the same palette instead of rewriting its colors
+#
+# The palettes shared must not be changed through the elements using them,
+# such as with the color setter of a label, as that changes every element
+# sharing them
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# External Libraries
+from displayio import Group, TileGrid, Palette
+
+PALETTE_BYTES = 32
+"""Estimated size of a palette without its colors, in bytes, used to report the memory saved"""
+COLOR_BYTES = 16
+"""Estimated size of each color of a palette, in bytes, used to report the memory saved"""
+
+BLUE = 0x0000FF
+"""Blue of the borders and branding of the screens"""
+WHITE = 0xFFFFFF
+"""White of the text of the screens"""
+GREEN = 0x6EA743
+"""Green of the indicators of connections established"""
+RED = 0xE11A00
+"""Red of the indicators of connections lost"""
+YELLOW = 0xFFD300
+"""Yellow of the indicators of connections in progress"""
+
+
+# ---------------------------------------------------------------------
+#                           Style Registry
+# ---------------------------------------------------------------------
+
+class SenseStyleRegistry:
+    # ---------------------------------------------------------------
+    #                         Internal Fields
+    # ---------------------------------------------------------------
+
+    __palettes: dict = None
+    """Internal field that contains the palettes shared, as (colors, transparent indexes) to palette"""
+
+    __requests: int = 0
+    """Internal field that contains the number of palettes asked for or shared"""
+
+    __saved: int = 0
+    """Internal field that contains the estimated memory saved by sharing palettes, in bytes"""
+
+    # ---------------------------------------------------------------
+    #                         Properties
+    # ---------------------------------------------------------------
+
+    @property
+    def statistics(self) -> dict:
+        """
+        Counters of the registry
+        :return: Dictionary with the palettes kept, the palettes asked for or shared and the estimated memory saved
+                 in bytes
+        """
+        return {
+            "palettes": len(self.__palettes),
+            "requests": self.__requests,
+            "saved_bytes": self.__saved,
+        }
+
+    # ---------------------------------------------------------------
+    #                         Methods
+    # ---------------------------------------------------------------
+
+    def palette(self, *colors: int, transparent: tuple = ()) -> Palette:
+        """
+        Returns the palette of a set of colors, creating it only the first time it is asked for
+        :param colors: Colors of the palette, in order
+        :param transparent: Indexes of the colors that are transparent
+        :return: The palette shared
+        """
+        if not colors:
+            raise ValueError(colors)
+        return self.__intern(self.__key(colors, transparent))
+
+    def color_set(self, *colors: int) -> Palette:
+        """
+        Returns the palette of the states of an element, with a transparent first color followed by the color of
+        each state, the color of state n being at index n + 1
+        :param colors: Color of each state
+        :return: The palette shared
+        """
+        return self.palette(0, *colors, transparent=(0,))
+
+    def share(self, element):
+        """
+        Replaces the palettes of an element and of the elements it holds, such as the glyphs of a label, by the
+        shared palettes with the same colors, so the palettes of the element can be collected
+        :param element: Element created with its own palettes, such as a rectangle, a circle or a label
+        :return: The element, so it can be shared when created
+        """
+        replaced = {}
+        self.__share(element, replaced)
+        return element
+
+    def clear(self):
+        """
+        Forgets the palettes shared, the elements using them keep them
+        """
+        self.__palettes = {}
+
+    def __share(self, element, replaced: dict):
+        """
+        Replaces the palettes of an element and of its children, reusing the replacements already made
+        """
+        if isinstance(element, TileGrid):
+            shader = element.pixel_shader
+            if isinstance(shader, Palette):
+                element.pixel_shader = self.__shared(shader, replaced)
+
+        # Shapes and labels keep their palettes to change their colors, which must change the shared ones
+        for name in ("_palette", "_background_palette"):
+            palette = getattr(element, name, None)
+            if isinstance(palette, Palette):
+                setattr(element, name, self.__shared(palette, replaced))
+
+        if isinstance(element, Group):
+            for child in element:
+                self.__share(child, replaced)
+
+    def __shared(self, palette: Palette, replaced: dict) -> Palette:
+        """
+        Returns the shared palette with the colors of a palette, the palette itself if none has them yet
+        """
+        shared = replaced.get(id(palette))
+        if shared is None:
+            colors = [palette[index] for index in range(len(palette))]
+            transparent = [index for index in range(len(palette)) if palette.is_transparent(index)]
+            shared = self.__intern(self.__key(colors, transparent), palette)
+            replaced[id(palette)] = shared
+        return shared
+
+    def __intern(self, key: tuple, palette: Palette = None) -> Palette:
+        """
+        Returns the palette shared for a key, keeping the palette given, or a new one, when there is none
+        """
+        self.__requests += 1
+        shared = self.__palettes.get(key)
+        if shared is not None:
+            if shared is not palette:
+                self.__saved += PALETTE_BYTES + COLOR_BYTES * len(key[0])
+            return shared
+
+        if palette is None:
+            palette = Palette(len(key[0]))
+            for index, color in enumerate(key[0]):
+                palette[index] = color
+            for index in key[1]:
+                palette.make_transparent(index)
+        self.__palettes[key] = palette
+        return palette
+
+    @staticmethod
+    def __key(colors, transparent) -> tuple:
+        """
+        Returns the key of a set of colors, the transparent colors being the same whatever their value
+        """
+        transparent = tuple(sorted(transparent))
+        return tuple(0 if index in transparent else int(color) for index, color in enumerate(colors)), transparent
+
+    # ---------------------------------------------------------------
+    #                         Constructor
+    # ---------------------------------------------------------------
+
+    def __init__(self):
+        self.__palettes = {}
+
+
+SenseStyles = SenseStyleRegistry()
+"""Style registry shared by the elements of every screen"""
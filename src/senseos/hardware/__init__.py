@@ -97,7 +97,7 @@ class SenseHardwareSubsystem:
     #                         Internal Fields
     # ---------------------------------------------------------------
 
-    __devices: dict[str, SenseDevice] = {}
+    __devices: dict[str, SenseDevice] = None
     """Internal field that contains all the devices connected to the system"""
 
     __senseos = None
@@ -133,7 +133,7 @@ class SenseHardwareSubsystem:
         self.__initialized = True
 
     def deinitialize(self):
-        for device in self.__devices:
+        for device in list(self.__devices):
             self.disconnect(device)
 
         self.__senseos.memory.reclaim()
@@ -209,3 +209,4 @@ class SenseHardwareSubsystem:
 
     def __init__(self, senseos):
         self.__senseos = senseos
+        self.__devices = {}
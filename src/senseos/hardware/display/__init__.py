@@ -63,6 +63,9 @@ class SenseDeviceDisplay(SenseDevice):
     __brightness_level: float = None
     """Internal field that represents current brightness level of the display"""
 
+    __refresh_listeners: list = None
+    """Internal field that represents the functions called after every refresh"""
+
     # ---------------------------------------------------------------
     #                           Properties
     # ---------------------------------------------------------------
@@ -122,8 +125,30 @@ class SenseDeviceDisplay(SenseDevice):
         pass
 
     def refresh(self) -> bool:
-        """Refreshes the display"""
-        pass
+        """
+        Refreshes the display, implementations call it once refreshed to notify the refresh listeners
+        """
+        for listener in self.__refresh_listeners:
+            listener()
+
+    def add_refresh_listener(self, listener):
+        """
+        Calls a function after every refresh, such as the display mirror of SynapseLink
+        The function must return quickly, as it runs within the refresh
+
+        :param listener: Function called without arguments
+        """
+        if listener not in self.__refresh_listeners:
+            self.__refresh_listeners.append(listener)
+
+    def remove_refresh_listener(self, listener):
+        """
+        Stops calling a function after every refresh
+
+        :param listener: Function added as refresh listener
+        """
+        if listener in self.__refresh_listeners:
+            self.__refresh_listeners.remove(listener)
 
     # ---------------------------------------------------------------------
     #                           Constructor
@@ -133,6 +158,7 @@ class SenseDeviceDisplay(SenseDevice):
         super().__init__(name, SenseDeviceType.DISPLAY)
         self.__width = width
         self.__height = height
+        self.__refresh_listeners = []
 
 
 # -------------------------------------------------------------------------
@@ -147,7 +173,7 @@ class SenseDisplayioDisplay(SenseDeviceDisplay):
     #                         Internal Fields
     # ---------------------------------------------------------------
 
-    __display: displayio.Display = None
+    __display = None
     """Internal field that represents the displayio display"""
 
     __screen: SenseDisplayioScreen = None
@@ -178,9 +204,11 @@ class SenseDisplayioDisplay(SenseDeviceDisplay):
         :param refresh: Should the display be refreshed after setting the screen
         :param screen: Screen to be displayed
         """
+        # The screen replaced is detached without collecting the garbage, as the screen cache keeps it to be
+        # shown again, see SenseScreenCache
         if DISPLAYIO_AVAILABLE:
             if self.__display.root_group is not None:
-                self.clear(False)
+                self.__display.root_group = None
 
         self.__screen = screen
         self.__display.root_group = self.__screen
@@ -204,7 +232,23 @@ class SenseDisplayioDisplay(SenseDeviceDisplay):
         """
         Refreshes the display
         """
-        return self.__display.refresh()
+        refreshed = self.__display.refresh()
+        super().refresh()
+        return refreshed
+
+    # ---------------------------------------------------------------------
+    #                           Constructor
+    # ---------------------------------------------------------------------
+
+    def __init__(self, name: str, width: int, height: int, display=None):
+        """
+        :param name: Name of the display device
+        :param width: Width of the display, in pixels
+        :param height: Height of the display, in pixels
+        :param display: Displayio display used to render the screens
+        """
+        super().__init__(name, width, height)
+        self.__display = display
 
 
 # -------------------------------------------------------------------------
@@ -0,0 +1,330 @@
+# SenseOS Hardware Subsystem - Framebuffer Display
+#
+# This module provides access to a headless display, which renders
+# the screens into an in-memory RGB565 framebuffer instead of a
+# display controller. Allows the operating system to run, measure
+# and capture its screens without any display attached to the system
+
+# -------------------------------------------------------------------
+#                    Libraries and references
+# -------------------------------------------------------------------
+
+# SenseOS Libraries
+from senseos.hardware.display import SenseDeviceDisplay
+from senseos.display.screen import SenseDisplayioScreen
+from senseos.display.raster import SenseRasterizer, rgb565_to_rgb888
+
+# External Libraries
+from time import monotonic_ns
+
+# Platform-specific Libraries (circuitpython)
+
+ZLIB_AVAILABLE = False
+"""Indicates if the zlib module is available, used for PNG compression"""
+
+try:
+    import zlib
+except ImportError:
+    pass
+else:
+    ZLIB_AVAILABLE = hasattr(zlib, "compress") and hasattr(zlib, "crc32")
+
+SPI_REGION_OVERHEAD = 11
+"""Number of bytes needed to address a region of a SPI display controller (CASET, RASET and RAMWR commands)"""
+
+DIRTY_BAND_HEIGHT = 16
+"""Number of rows compared at once when looking for dirty regions"""
+
+
+# -------------------------------------------------------------------
+#                         Framebuffer Display
+# -------------------------------------------------------------------
+
+class SenseFramebufferDisplay(SenseDeviceDisplay):
+    """
+    Represents a headless display, used by the operating system to render
+    screens into an in-memory RGB565 framebuffer. Tracks the regions changed
+    by every refresh and the number of bytes that would have been sent to a
+    SPI display controller to update them
+    """
+
+    # ---------------------------------------------------------------
+    #                         Internal Fields
+    # ---------------------------------------------------------------
+
+    __screen: SenseDisplayioScreen = None
+    """Internal field that represents the current screen"""
+
+    __rasterizer: SenseRasterizer = None
+    """Internal field that represents the rasterizer used to render the screens"""
+
+    __front: bytearray = None
+    """Internal field that represents the framebuffer with the last refreshed frame, allocated on first use"""
+
+    __back: bytearray = None
+    """Internal field that represents the framebuffer used to render the next frame, allocated on first use"""
+
+    __brightness_level: float = 1.0
+    """Internal field that represents current brightness level of the display"""
+
+    __frames: int = 0
+    """Internal field that represents the number of frames refreshed"""
+
+    __spi_bytes: int = 0
+    """Internal field that represents the number of bytes that would have been sent over SPI"""
+
+    __render_ns: int = 0
+    """Internal field that represents the time spent rendering frames, in nanoseconds"""
+
+    __dirty_regions: list = None
+    """Internal field that represents the regions changed by the last refresh"""
+
+    # ---------------------------------------------------------------
+    #                           Properties
+    # ---------------------------------------------------------------
+
+    @property
+    def screen(self) -> SenseDisplayioScreen:
+        """Current screen being displayed"""
+        return self.__screen
+
+    @screen.setter
+    def screen(self, value: SenseDisplayioScreen):
+        """Sets the screen to be displayed"""
+        self.set_screen(value)
+
+    @property
+    def brightness_level(self) -> float:
+        """Current brightness level of the display"""
+        return self.__brightness_level
+
+    @brightness_level.setter
+    def brightness_level(self, value):
+        """Sets the brightness level of the display"""
+        self.set_brightness(value)
+
+    @property
+    def framebuffer(self) -> memoryview:
+        """
+        Returns the last refreshed frame
+        :return: View of the RGB565 (big-endian) framebuffer
+        """
+        self.__allocate()
+        return memoryview(self.__front)
+
+    @property
+    def frames(self) -> int:
+        """Number of frames refreshed since the statistics were reset"""
+        return self.__frames
+
+    @property
+    def spi_bytes(self) -> int:
+        """Number of bytes that would have been sent over SPI since the statistics were reset"""
+        return self.__spi_bytes
+
+    @property
+    def render_ns(self) -> int:
+        """Time spent rendering frames since the statistics were reset, in nanoseconds"""
+        return self.__render_ns
+
+    @property
+    def dirty_regions(self) -> list[tuple[int, int, int, int]]:
+        """
+        Returns the regions changed by the last refresh
+        :return: List of (x, y, width, height) tuples
+        """
+        return list(self.__dirty_regions)
+
+    # ---------------------------------------------------------------
+    #                           Methods
+    # ---------------------------------------------------------------
+
+    def set_brightness(self, value: float = 1.0):
+        """
+        Set the brightness level of the display
+        :param value: Value between 0 and 1
+        """
+        self.__brightness_level = max(0.0, min(1.0, value))
+
+    def set_screen(self, screen: SenseDisplayioScreen, refresh: bool = True):
+        """
+        Sets the screen to be displayed
+
+        :param refresh: Should the display be refreshed after setting the screen
+        :param screen: Screen to be displayed
+        """
+        self.__screen = screen
+
+        if refresh:
+            self.refresh()
+
+    def clear(self, refresh: bool = True):
+        """
+        Clears the display
+        """
+        self.__screen = None
+
+        if refresh:
+            self.refresh()
+
+    def refresh(self) -> bool:
+        """
+        Renders the current screen into the framebuffer and computes the dirty regions
+        :return: True if any pixel changed, False otherwise
+        """
+        self.__allocate()
+
+        start = monotonic_ns()
+        self.__rasterizer.render(self.__screen, self.__back)
+        self.__render_ns += monotonic_ns() - start
+
+        self.__dirty_regions = self.__find_dirty_regions(self.__back, self.__front)
+        for x, y, width, height in self.__dirty_regions:
+            self.__spi_bytes += SPI_REGION_OVERHEAD + width * height * 2
+
+        self.__front, self.__back = self.__back, self.__front
+        self.__frames += 1
+        super().refresh()
+
+        return len(self.__dirty_regions) > 0
+
+    def reset_statistics(self):
+        """
+        Resets the frame, SPI and rendering statistics of the display
+        """
+        self.__frames = 0
+        self.__spi_bytes = 0
+        self.__render_ns = 0
+
+    def pixel(self, x: int, y: int) -> int:
+        """
+        Reads a pixel of the last refreshed frame
+        :param x: Column of the pixel
+        :param y: Row of the pixel
+        :return: RGB565 color of the pixel
+        """
+        self.__allocate()
+        offset = (y * self.width + x) * 2
+        return (self.__front[offset] << 8) | self.__front[offset + 1]
+
+    def dump_ppm(self, path: str):
+        """
+        Writes the last refreshed frame into a binary PPM (P6) image
+        :param path: Path of the image file
+        """
+        with open(path, "wb") as file:
+            file.write("P6\n{} {}\n255\n".format(self.width, self.height).encode())
+            for y in range(self.height):
+                file.write(self.__rgb888_row(y))
+
+    def dump_png(self, path: str):
+        """
+        Writes the last refreshed frame into a PNG image
+        :param path: Path of the image file
+        """
+        if not ZLIB_AVAILABLE:
+            raise NotImplementedError("PNG output requires zlib compression support, use dump_ppm instead")
+
+        raw = bytearray()
+        for y in range(self.height):
+            raw.append(0)
+            raw.extend(self.__rgb888_row(y))
+
+        header = self.width.to_bytes(4, "big") + self.height.to_bytes(4, "big") + bytes((8, 2, 0, 0, 0))
+
+        with open(path, "wb") as file:
+            file.write(b"\x89PNG\r\n\x1a\n")
+            self.__png_chunk(file, b"IHDR", header)
+            self.__png_chunk(file, b"IDAT", zlib.compress(bytes(raw)))
+            self.__png_chunk(file, b"IEND", b"")
+
+    def __allocate(self):
+        """
+        Allocates the framebuffers, deferred until the first frame so displays that are never
+        refreshed do not hold them
+        """
+        if self.__front is None:
+            self.__front = bytearray(self.width * self.height * 2)
+            self.__back = bytearray(self.width * self.height * 2)
+
+    def __rgb888_row(self, y: int) -> bytearray:
+        """
+        Converts a row of the last refreshed frame into RGB888
+        """
+        self.__allocate()
+        row = bytearray(self.width * 3)
+        offset = y * self.width * 2
+        for x in range(self.width):
+            color = rgb565_to_rgb888((self.__front[offset] << 8) | self.__front[offset + 1])
+            row[x * 3] = color >> 16
+            row[x * 3 + 1] = (color >> 8) & 0xFF
+            row[x * 3 + 2] = color & 0xFF
+            offset += 2
+        return row
+
+    @staticmethod
+    def __png_chunk(file, kind: bytes, data: bytes):
+        """
+        Writes a single chunk of a PNG image
+        """
+        file.write(len(data).to_bytes(4, "big"))
+        file.write(kind)
+        file.write(data)
+        file.write((zlib.crc32(kind + data) & 0xFFFFFFFF).to_bytes(4, "big"))
+
+    def __find_dirty_regions(self, new: bytearray, old: bytearray) -> list[tuple[int, int, int, int]]:
+        """
+        Compares two frames band by band, returning the regions that changed
+        Contiguous dirty bands are merged into a single region, as a display
+        controller would be addressed once for all of them
+        """
+        stride = self.width * 2
+        regions = []
+        current = None
+
+        for band in range(0, self.height, DIRTY_BAND_HEIGHT):
+            rows = min(DIRTY_BAND_HEIGHT, self.height - band)
+            start = band * stride
+            end = start + rows * stride
+
+            if new[start:end] == old[start:end]:
+                if current is not None:
+                    regions.append(current)
+                    current = None
+                continue
+
+            # Find the horizontal extent of the changes within the band
+            left = self.width
+            right = 0
+            for row in range(start, end, stride):
+                if new[row:row + stride] == old[row:row + stride]:
+                    continue
+                for x in range(0, left):
+                    if new[row + x * 2] != old[row + x * 2] or new[row + x * 2 + 1] != old[row + x * 2 + 1]:
+                        left = x
+                        break
+                for x in range(self.width - 1, right - 1, -1):
+                    if new[row + x * 2] != old[row + x * 2] or new[row + x * 2 + 1] != old[row + x * 2 + 1]:
+                        right = x + 1
+                        break
+
+            if current is None:
+                current = (left, band, right - left, rows)
+            else:
+                x = min(current[0], left)
+                current = (x, current[1], max(current[0] + current[2], right) - x, current[3] + rows)
+
+        if current is not None:
+            regions.append(current)
+
+        return regions
+
+    # ---------------------------------------------------------------------
+    #                           Constructor
+    # ---------------------------------------------------------------------
+
+    def __init__(self, name: str, width: int = 320, height: int = 240, brightness_level: float = 1):
+        super().__init__(name, width, height)
+        self.__rasterizer = SenseRasterizer(width, height)
+        self.__dirty_regions = []
+        self.set_brightness(brightness_level)
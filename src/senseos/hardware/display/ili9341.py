@@ -121,9 +121,6 @@ class SenseILI9341Display(SenseDisplayioDisplay):
     def __init__(self, name: str, cs_pin: Pin, dc_pin: Pin, rst_pin: Pin, clk_pin: Pin, mosi_pin: Pin,
                  miso_pin: Pin = None, bl_pin: Pin = None, width: int = 320, height: int = 240,
                  brightness_level: float = 1):
-        # Device Initialization
-        super().__init__(name, width, height)
-
         # Pin Initialization
         self.__cs_pin = cs_pin
         self.__dc_pin = dc_pin
@@ -142,6 +139,9 @@ class SenseILI9341Display(SenseDisplayioDisplay):
                                                 reset=self.__reset_pin)
         self.__display = ILI9341(self.__display_bus, width=width, height=height)
 
+        # Device Initialization
+        super().__init__(name, width, height, self.__display)
+
     def set_brightness(self, value: float = 1.0):
         """
         Sets the brightness of the display to the specified level
@@ -6,7 +6,6 @@
 # 4x4 matrix of buttons
 #
 # Miguel Lopes <miguellopes2004.ml@hotmail.com>
-import microcontroller
 
 # ---------------------------------------------------------------------
 #                     Libraries and References
@@ -50,10 +49,10 @@ class Sense4x4MatrixButtonKeypad(SenseDeviceKeypad):
     #                         Internal Fields
     # ---------------------------------------------------------------
 
-    __row_pins: list[microcontroller.Pin] = []
+    __row_pins: list[Pin] = []
     """Internal field that represents the pins used to read the button state"""
 
-    __col_pins: list[microcontroller.Pin] = []
+    __col_pins: list[Pin] = []
     """Internal field that represents the pins used to read the button state"""
 
     __io_rows: list[digitalio.DigitalInOut] = []
@@ -349,7 +348,7 @@ class Sense4x4MatrixButtonKeypad(SenseDeviceKeypad):
         return (0, 0) in self.released
 
 
-    def __init__(self, name: str, rows: list[microcontroller.Pin], cols: list[microcontroller.Pin]):
+    def __init__(self, name: str, rows: list[Pin], cols: list[Pin]):
         """
         Creates a new instance of the 4x4 Matrix Button Keypad
         :param name: The name of the device
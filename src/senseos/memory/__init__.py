@@ -23,6 +23,9 @@ else:
     GARBAGE_COLLECTOR_AVAILABLE = True
     gc.enable()
 
+MEMORY_STATISTICS_AVAILABLE = GARBAGE_COLLECTOR_AVAILABLE and hasattr(gc, "mem_free") and hasattr(gc, "mem_alloc")
+"""Indicates if the gc module reports the free and allocated heap memory (circuitpython only)"""
+
 
 # ---------------------------------------------------------------------
 #                          Memory Management
@@ -49,7 +52,7 @@ class SenseMemorySubsystem:
         Returns the amount of free memory in bytes
         :return: The amount of free memory in bytes, or -1 if the current platform does not support this feature
         """
-        if GARBAGE_COLLECTOR_AVAILABLE:
+        if MEMORY_STATISTICS_AVAILABLE:
             return gc.mem_free()
         else:
             return -1
@@ -60,7 +63,7 @@ class SenseMemorySubsystem:
         Returns the amount of used memory in bytes
         :return: The amount of used memory in bytes, or -1 if the current platform does not support this feature
         """
-        if GARBAGE_COLLECTOR_AVAILABLE:
+        if MEMORY_STATISTICS_AVAILABLE:
             return gc.mem_alloc()
         else:
             return -1
@@ -71,7 +74,7 @@ class SenseMemorySubsystem:
         Returns the total amount of memory in bytes
         :return: The total amount of memory in bytes, or -1 if the current platform does not support this feature
         """
-        if GARBAGE_COLLECTOR_AVAILABLE:
+        if MEMORY_STATISTICS_AVAILABLE:
             return self.free + self.used
         else:
             return -1
@@ -0,0 +1,347 @@
+# SenseOS Network Subsystem - Network Management
+#
+# This module contains the network management implementation for SenseOS
+# Keeps the state of the wifi connection shared by the screens and the
+# services of the operating system, such as the networks found by the
+# last scan, regardless of the screen showing them
+#
+# After a disconnect, the network the device last connected to is tried
+# first, straight to the access point it used, so an unattended device
+# recovers on its own without scanning or waiting for a keypress. While
+# the network stays down, it is tried again in the background of the wifi
+# setup screen, one attempt at a time with a growing backoff, so the
+# device also recovers from outages longer than the first reconnection.
+# An attempt blocks the loop and stops the radio from scanning, so it waits
+# while someone uses the screen or a scan is running
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# External Libraries
+from time import monotonic
+
+# SenseOS Libraries
+from senseos.network.scanner import SenseWifiScanner
+from senseos.network.profile import SenseWifiProfile
+
+# Platform-specific Libraries (circuitpython)
+
+WIFI_AVAILABLE = False
+"""Indicates if the wifi module is available, used to reconnect to the network remembered"""
+
+try:
+    import wifi
+except ImportError:
+    pass
+else:
+    WIFI_AVAILABLE = True
+
+MICROCONTROLLER_AVAILABLE = False
+"""Indicates if the microcontroller module is available, used for the non-volatile memory keeping the profile"""
+
+try:
+    import microcontroller
+except (ImportError, NotImplementedError):
+    pass
+else:
+    MICROCONTROLLER_AVAILABLE = True
+
+PROFILE_PATH = "/wifi.profile"
+"""Path of the profile of the network remembered on the CIRCUITPY flash, used when the non-volatile memory is not
+available"""
+PROFILE_OFFSET = 256
+"""Start of the region of the non-volatile memory keeping the profile, after the record of the last reboot command,
+in bytes"""
+PROFILE_SIZE = 256
+"""Size of the region of the non-volatile memory keeping the profile, in bytes"""
+RECONNECT_ATTEMPTS = 3
+"""Number of attempts to reconnect to the network remembered, the first one straight to its access point"""
+RECONNECT_TIMEOUT = 4.0
+"""Time each attempt to reconnect waits for the access point, in seconds"""
+RECONNECT_HISTORY = 8
+"""Number of attempts to reconnect kept with their timings"""
+RETRY_BACKOFF_MIN = 60.0
+"""Time before the first retry after a failed reconnection, doubled after each failed retry, in seconds"""
+RETRY_BACKOFF_MAX = 300.0
+"""Longest time between retries, in seconds"""
+
+
+# ---------------------------------------------------------------------
+#                        Network Management
+# ---------------------------------------------------------------------
+
+class SenseNetworkSubsystem:
+    # ---------------------------------------------------------------
+    #                         Internal Fields
+    # ---------------------------------------------------------------
+
+    __senseos = None
+    """Internal field that contains access to the SenseOS operating system"""
+
+    __scanner: SenseWifiScanner = None
+    """Internal field that contains the wifi scanner, kept so the networks found outlive the screens showing them"""
+
+    __profile: SenseWifiProfile = None
+    """Internal field that contains the network remembered, tried first after a disconnect"""
+
+    __profile_path: str = PROFILE_PATH
+    """Internal field that contains the path of the profile of the network remembered"""
+
+    __profile_storage = None
+    """Internal field that contains the non-volatile memory keeping the profile, None to use the path"""
+
+    __history: list = None
+    """Internal field that contains the last attempts to reconnect, as (direct, seconds, connected) tuples"""
+
+    __reconnect_time: float = None
+    """Internal field that contains the time the last reconnection took, in seconds, None if it failed or never ran"""
+
+    __reconnects: int = 0
+    """Internal field that contains the number of reconnections to the network remembered"""
+
+    __failures: int = 0
+    """Internal field that contains the number of reconnections that failed every attempt"""
+
+    __retries: int = 0
+    """Internal field that contains the number of retries since the last failed reconnection"""
+
+    __retry_at: float = None
+    """Internal field that contains the time of the next retry, None when no reconnection failed"""
+
+    __backoff: float = RETRY_BACKOFF_MIN
+    """Internal field that contains the time between the last retry and the next one, in seconds"""
+
+    __initialised = False
+    """Internal field that indicates if the network subsystem has been initialised"""
+
+    # ---------------------------------------------------------------
+    #                         Properties
+    # ---------------------------------------------------------------
+
+    @property
+    def initialized(self) -> bool:
+        """
+        Returns whether the network subsystem has been initialized
+        :return: Boolean indicating if the network subsystem is initialized
+        """
+        return self.__initialised
+
+    @property
+    def scanner(self) -> SenseWifiScanner:
+        """
+        Returns the wifi scanner
+        :return: The wifi scanner
+        """
+        return self.__scanner
+
+    @property
+    def profile(self) -> SenseWifiProfile:
+        """
+        Returns the network remembered, loaded when the subsystem is initialized
+        :return: The wifi profile
+        """
+        return self.__profile
+
+    @property
+    def profile_path(self) -> str:
+        """
+        Path of the profile of the network remembered on the flash
+        :return: The path, None when the profile is kept in memory only
+        """
+        return self.__profile_path
+
+    @profile_path.setter
+    def profile_path(self, value: str):
+        """
+        Sets the path of the profile of the network remembered, applied when the subsystem is next initialized
+        :param value: The path, None to keep the profile in memory only
+        """
+        self.__profile_path = value
+
+    @property
+    def profile_storage(self):
+        """
+        Non-volatile memory keeping the profile of the network remembered, out of the CIRCUITPY drive
+        :return: The memory, such as microcontroller.nvm, None when the profile is kept at the path
+        """
+        return self.__profile_storage
+
+    @profile_storage.setter
+    def profile_storage(self, value):
+        """
+        Sets the non-volatile memory keeping the profile of the network remembered, applied when the subsystem is
+        next initialized
+        :param value: The memory, None to keep the profile at the path
+        """
+        self.__profile_storage = value
+
+    @property
+    def attempts(self) -> list:
+        """
+        Last attempts to reconnect to the network remembered
+        :return: List of (direct, seconds, connected) tuples, from the oldest, direct when the attempt went straight
+                 to the access point remembered
+        """
+        return list(self.__history)
+
+    @property
+    def reconnect_ms(self) -> int:
+        """
+        Time the last reconnection took
+        :return: The time in milliseconds, None if the last reconnection failed or none ran
+        """
+        return None if self.__reconnect_time is None else int(self.__reconnect_time * 1000)
+
+    @property
+    def statistics(self) -> dict:
+        """
+        Counters of the reconnections
+        :return: Dictionary with the reconnections, the ones that failed and the time the last one took in
+                 milliseconds
+        """
+        return {
+            "reconnects": self.__reconnects,
+            "failures": self.__failures,
+            "retries": self.__retries,
+            "last_ms": self.reconnect_ms,
+        }
+
+    @property
+    def retry_in(self) -> float:
+        """
+        Time until the next retry to reconnect to the network remembered
+        :return: The time in seconds, 0 when due, None when no retry is pending
+        """
+        if self.__retry_at is None:
+            return None
+        return max(0.0, self.__retry_at - monotonic())
+
+    # ---------------------------------------------------------------
+    #                         Methods
+    # ---------------------------------------------------------------
+
+    def initialize(self):
+        """
+        Initializes the network subsystem, loading the network remembered
+        """
+        if self.__profile is None or self.__profile.path != self.__profile_path or \
+                self.__profile.storage is not self.__profile_storage:
+            self.__profile = SenseWifiProfile(self.__profile_path, self.__profile_storage, PROFILE_OFFSET, PROFILE_SIZE)
+            self.__profile.load()
+        self.__initialised = True
+
+    def deinitialize(self):
+        """
+        Deinitializes the network subsystem
+        """
+        self.__scanner.stop()
+        self.__initialised = False
+
+    def reconnect(self, attempts: int = RECONNECT_ATTEMPTS) -> bool:
+        """
+        Reconnects to the network remembered, the first attempt straight to the access point the device last used
+        and the next ones letting the radio find the network, in case the access point changed its channel or was
+        replaced; the access point found is remembered for the next time
+        :param attempts: Number of attempts
+        :return: True if connected, False if no network is remembered or every attempt failed
+        """
+        if not WIFI_AVAILABLE or self.__profile is None or not self.__profile.known:
+            return False
+        if wifi.radio.connected:
+            return True
+
+        start = monotonic()
+        for attempt in range(attempts):
+            if self.__attempt(attempt == 0):
+                self.__reconnected(start)
+                return True
+
+        self.__failures += 1
+        self.__reconnect_time = None
+        self.__retries = 0
+        self.__backoff = RETRY_BACKOFF_MIN
+        self.__retry_at = monotonic() + self.__backoff
+        return False
+
+    def retry(self, interacting: bool = False) -> bool:
+        """
+        Tries once more to reconnect to the network remembered after a failed reconnection, when the backoff
+        elapsed, called from the loop of the wifi setup screen; a single attempt is made per call, alternating
+        between the access point remembered and any access point of the network, and the backoff doubles after
+        every failed attempt; a retry due waits while the user is interacting or a scan is running, as the attempt
+        blocks the loop and stops the scan
+        :param interacting: Is the user using the screen, such as SenseWifiSetupScreen.interacting
+        :return: True if connected, False otherwise
+        """
+        if not WIFI_AVAILABLE:
+            return False
+        if wifi.radio.connected:
+            self.__retry_at = None
+            return True
+        if self.__retry_at is None or monotonic() < self.__retry_at or self.__profile is None or \
+                not self.__profile.known or interacting or self.__scanner.scanning:
+            return False
+
+        # The radio cannot connect while scanning
+        self.__scanner.stop()
+        start = monotonic()
+        direct = self.__retries % 2 == 0
+        self.__retries += 1
+        if self.__attempt(direct):
+            self.__reconnected(start)
+            return True
+
+        self.__backoff = min(self.__backoff * 2, RETRY_BACKOFF_MAX)
+        self.__retry_at = monotonic() + self.__backoff
+        return False
+
+    def __attempt(self, direct: bool) -> bool:
+        """
+        Makes an attempt to connect to the network remembered, straight to its access point if direct and known
+        """
+        profile = self.__profile
+        direct = direct and profile.bssid is not None and profile.channel > 0
+        start = monotonic()
+        try:
+            wifi.radio.enabled = True
+            if direct:
+                wifi.radio.connect(profile.ssid, profile.password, channel=profile.channel, bssid=profile.bssid,
+                                   timeout=RECONNECT_TIMEOUT)
+            else:
+                wifi.radio.connect(profile.ssid, profile.password, timeout=RECONNECT_TIMEOUT)
+        except OSError:
+            # Raised as ConnectionError when the network is not found or rejects the password
+            pass
+        self.__record(direct, monotonic() - start, wifi.radio.connected)
+        return wifi.radio.connected
+
+    def __reconnected(self, start: float):
+        """
+        Records a reconnection, remembering the access point found for the next time
+        """
+        self.__reconnects += 1
+        self.__reconnect_time = monotonic() - start
+        self.__retry_at = None
+        access_point = wifi.radio.ap_info
+        if access_point is not None:
+            profile = self.__profile
+            profile.remember(profile.ssid, profile.password, access_point.bssid, access_point.channel)
+
+    def __record(self, direct: bool, elapsed: float, connected: bool):
+        """
+        Records an attempt to reconnect, keeping the last ones
+        """
+        self.__history.append((direct, elapsed, connected))
+        if len(self.__history) > RECONNECT_HISTORY:
+            self.__history.pop(0)
+
+    def __init__(self, senseos):
+        """
+        Initializes the network subsystem
+        :param senseos: The SenseOS instance that owns this subsystem
+        """
+        self.__senseos = senseos
+        self.__scanner = SenseWifiScanner()
+        self.__profile_storage = getattr(microcontroller, "nvm", None) if MICROCONTROLLER_AVAILABLE else None
+        self.__history = []
@@ -0,0 +1,296 @@
+# SenseOS Network - Wifi Profile
+#
+# Remembers the last wifi network the device connected to, with the bssid
+# and channel of its access point, so the device reconnects straight to
+# that access point after a disconnect or a reboot, without scanning the
+# channels or waiting for someone to choose the network again
+#
+# The profile is written only when it changes, to save wear, and is kept
+# in memory only when it cannot be written, such as while the flash is
+# mounted by a computer
+#
+# The profile holds the password of the network, so it is kept in the
+# non-volatile memory of the microcontroller, which is not part of the
+# CIRCUITPY drive. Only when that memory is not available is it written to
+# a file on the flash, which anyone with a USB cable can read, with the
+# password masked so it does not show in plain text. The mask is only an
+# obfuscation, not an encryption: it stops a casual look at the file, not
+# someone who knows how it is made. A profile written in plain text by an
+# older firmware is moved to the non-volatile memory and its file removed
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# External Libraries
+import json
+from binascii import hexlify, unhexlify
+
+# Platform-specific Libraries (circuitpython)
+
+OS_AVAILABLE = False
+"""Indicates if the os module is available, used to remove a profile written in plain text"""
+
+try:
+    import os
+except ImportError:
+    pass
+else:
+    OS_AVAILABLE = True
+
+PROFILE_MAGIC = b"SW"
+"""Marker at the start of the region of a valid profile"""
+PROFILE_HEADER = 4
+"""Size of the marker and of the length of the profile, in bytes"""
+PASSWORD_MASK = b"SenseOS Wifi Profile"
+"""Mask of the password, mixed with the ssid, so the password does not show in plain text"""
+
+
+# ---------------------------------------------------------------------
+#                            Wifi Profile
+# ---------------------------------------------------------------------
+
+class SenseWifiProfile:
+    # ---------------------------------------------------------------
+    #                         Internal Fields
+    # ---------------------------------------------------------------
+
+    __path: str = None
+    """Internal field that contains the path of the profile on the flash, used when there is no storage"""
+
+    __storage = None
+    """Internal field that contains the non-volatile memory, such as microcontroller.nvm, None when not available"""
+
+    __offset: int = 256
+    """Internal field that contains the start of the region of the profile, in bytes"""
+
+    __size: int = 256
+    """Internal field that contains the size of the region of the profile, in bytes"""
+
+    __ssid: str = None
+    """Internal field that contains the name of the network, None when no network is known"""
+
+    __password: str = ""
+    """Internal field that contains the password of the network, empty for open networks"""
+
+    __bssid: bytes = None
+    """Internal field that contains the MAC address of the access point, None if unknown"""
+
+    __channel: int = 0
+    """Internal field that contains the channel of the access point, 0 if unknown"""
+
+    # ---------------------------------------------------------------
+    #                         Properties
+    # ---------------------------------------------------------------
+
+    @property
+    def known(self) -> bool:
+        """
+        Indicates if a network is remembered
+        :return: True if a network is remembered, False otherwise
+        """
+        return self.__ssid is not None
+
+    @property
+    def ssid(self) -> str:
+        """
+        Name of the network remembered
+        :return: The ssid, None when no network is known
+        """
+        return self.__ssid
+
+    @property
+    def password(self) -> str:
+        """
+        Password of the network remembered
+        :return: The password, empty for open networks
+        """
+        return self.__password
+
+    @property
+    def bssid(self) -> bytes:
+        """
+        MAC address of the access point the device last connected to
+        :return: The bssid, None if unknown
+        """
+        return self.__bssid
+
+    @property
+    def channel(self) -> int:
+        """
+        Channel of the access point the device last connected to
+        :return: The channel, 0 if unknown
+        """
+        return self.__channel
+
+    @property
+    def path(self) -> str:
+        """
+        Path of the profile on the flash
+        :return: The path, None when the profile is kept in memory only
+        """
+        return self.__path
+
+    @property
+    def storage(self):
+        """
+        Non-volatile memory keeping the profile, before the path
+        :return: The memory, None when not available
+        """
+        return self.__storage
+
+    # ---------------------------------------------------------------
+    #                         Methods
+    # ---------------------------------------------------------------
+
+    def remember(self, ssid: str, password: str = "", bssid: bytes = None, channel: int = 0):
+        """
+        Remembers the network the device connected to, writing the profile only if it changed
+        :param ssid: Name of the network
+        :param password: Password of the network, empty for open networks
+        :param bssid: MAC address of the access point, None if unknown
+        :param channel: Channel of the access point, 0 if unknown
+        """
+        bssid = bytes(bssid) if bssid else None
+        channel = channel or 0
+        if (ssid, password, bssid, channel) == (self.__ssid, self.__password, self.__bssid, self.__channel):
+            return
+        self.__ssid = ssid
+        self.__password = password
+        self.__bssid = bssid
+        self.__channel = channel
+        self.__save()
+
+    def forget(self):
+        """
+        Forgets the network remembered, such as when its password changed
+        """
+        self.__ssid = None
+        self.__password = ""
+        self.__bssid = None
+        self.__channel = 0
+        self.__save()
+
+    def load(self) -> bool:
+        """
+        Reads the profile from the non-volatile memory, or from the flash when the memory is not available
+        :return: True if a network is remembered, False otherwise
+        """
+        if self.__storage is not None:
+            self.__apply(self.__read_storage())
+            if not self.known and self.__path is not None:
+                # Moves a profile written in plain text by an older firmware out of the drive
+                self.__apply(self.__read_file())
+                if self.known:
+                    self.__save()
+                    self.__remove_file()
+        elif self.__path is not None:
+            self.__apply(self.__read_file())
+        return self.known
+
+    def __apply(self, profile: dict):
+        """
+        Takes the network of a profile read, a missing or corrupt profile being as good as none
+        """
+        try:
+            self.__ssid = profile["ssid"]
+            if "secret" in profile:
+                self.__password = self.__mask(unhexlify(profile["secret"]), self.__ssid).decode()
+            else:
+                self.__password = profile.get("password", "")
+            self.__bssid = unhexlify(profile["bssid"]) if profile.get("bssid") else None
+            self.__channel = int(profile.get("channel", 0))
+        except (ValueError, KeyError, TypeError, UnicodeError):
+            self.__ssid = None
+
+    def __read_storage(self) -> dict:
+        """
+        Reads the profile from the region of the non-volatile memory, None if there is none
+        """
+        start = self.__offset
+        header = bytes(self.__storage[start:start + PROFILE_HEADER])
+        if header[:2] != PROFILE_MAGIC:
+            return None
+        length = int.from_bytes(header[2:], "little")
+        if PROFILE_HEADER + length > self.__size:
+            return None
+        try:
+            return json.loads(bytes(self.__storage[start + PROFILE_HEADER:start + PROFILE_HEADER + length]).decode())
+        except (ValueError, UnicodeError):
+            return None
+
+    def __read_file(self) -> dict:
+        """
+        Reads the profile from the flash, None if there is none
+        """
+        try:
+            with open(self.__path) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def __remove_file(self):
+        """
+        Removes the profile from the flash, left in place if the flash cannot be written
+        """
+        if not OS_AVAILABLE:
+            return
+        try:
+            os.remove(self.__path)
+        except OSError:
+            pass
+
+    def __save(self):
+        """
+        Writes the profile to the non-volatile memory, or to the flash when the memory is not available, kept in
+        memory only if neither can be written
+        """
+        profile = {
+            "ssid": self.__ssid,
+            "secret": hexlify(self.__mask(self.__password.encode(), self.__ssid)).decode(),
+            "bssid": hexlify(self.__bssid).decode() if self.__bssid else None,
+            "channel": self.__channel,
+        }
+        if self.__storage is not None:
+            payload = json.dumps(profile).encode()
+            if PROFILE_HEADER + len(payload) > self.__size:
+                # Too long for the region, a stale profile would be worse than none
+                payload = b""
+            data = PROFILE_MAGIC + len(payload).to_bytes(2, "little") + payload
+            start = self.__offset
+            if bytes(self.__storage[start:start + len(data)]) != data:
+                self.__storage[start:start + len(data)] = data
+            return
+        if self.__path is None:
+            return
+        try:
+            with open(self.__path, "w") as file:
+                json.dump(profile, file)
+        except OSError:
+            pass
+
+    @staticmethod
+    def __mask(data: bytes, ssid: str) -> bytes:
+        """
+        Masks or unmasks the password, the same mask undoing itself
+        """
+        mask = PASSWORD_MASK + (ssid or "").encode()
+        return bytes(value ^ mask[index % len(mask)] for index, value in enumerate(data))
+
+    # ---------------------------------------------------------------
+    #                         Constructor
+    # ---------------------------------------------------------------
+
+    def __init__(self, path: str = None, storage=None, offset: int = 256, size: int = 256):
+        """
+        :param path: Path of the profile on the flash, used when there is no storage, None keeps it in memory only
+        :param storage: Non-volatile memory, such as microcontroller.nvm, None writes the profile to the path
+        :param offset: Start of the region of the profile, in bytes
+        :param size: Size of the region of the profile, in bytes
+        """
+        if storage is not None and offset + size > len(storage):
+            storage = None
+        self.__path = path
+        self.__storage = storage
+        self.__offset = offset
+        self.__size = size
@@ -0,0 +1,259 @@
+# SenseOS Network - Wifi Scanner
+#
+# Scans the wifi networks in the background of the main loop, one channel
+# at a time, so the screens keep responding while the radio scans and show
+# the networks of each channel as soon as it is scanned
+#
+# Taking the next network of a scan blocks until the radio is done with the
+# channel it is on, and the wifi module has no way to tell whether results
+# are ready, so each scan covers a single channel: a step waits at most for
+# one channel, and the networks of a channel scanned are taken at once
+#
+# Networks are kept by ssid, with the strongest access point seen for each,
+# and listed from the strongest to the weakest signal. The results of the
+# last scan are kept until they expire, so a screen opened again shows them
+# at once and only scans again once they are stale
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# External Libraries
+from time import monotonic
+
+# Platform-specific Libraries (circuitpython)
+
+WIFI_AVAILABLE = False
+"""Indicates if the wifi module is available, used to scan the networks"""
+
+try:
+    import wifi
+except ImportError:
+    pass
+else:
+    WIFI_AVAILABLE = True
+
+FIRST_CHANNEL = 1
+"""First wifi channel scanned"""
+LAST_CHANNEL = 11
+"""Last wifi channel scanned, the default of the wifi module"""
+
+# ---------------------------------------------------------------------
+#                            Wifi Scanner
+# ---------------------------------------------------------------------
+
+class SenseWifiScanner:
+    # ---------------------------------------------------------------
+    #                         Internal Fields
+    # ---------------------------------------------------------------
+
+    __ttl: float = 30.0
+    """Internal field that contains the time the networks found stay fresh, in seconds"""
+
+    __max_networks: int = 64
+    """Internal field that contains the number of networks kept, the weakest ones are left out"""
+
+    __networks: dict = None
+    """Internal field that contains the networks found, as ssid to the strongest network seen"""
+
+    __seen: set = None
+    """Internal field that contains the ssids found by the scan in progress"""
+
+    __channel: int = None
+    """Internal field that contains the channel being scanned, None when not scanning"""
+
+    __scan = None
+    """Internal field that contains the iterator of the scan of the channel, None until the channel is scanned"""
+
+    __scanned_at: float = None
+    """Internal field that contains the time the last scan completed, None if no scan completed"""
+
+    __version: int = 0
+    """Internal field that contains the number of changes to the networks found"""
+
+    __sorted: list = None
+    """Internal field that contains the networks found, sorted by signal strength, None when changed"""
+
+    # ---------------------------------------------------------------
+    #                         Properties
+    # ---------------------------------------------------------------
+
+    @property
+    def networks(self) -> list:
+        """
+        Networks found, including the ones found so far by the scan in progress
+        :return: List of networks, from the strongest to the weakest signal
+        """
+        if self.__sorted is None:
+            self.__sorted = sorted(self.__networks.values(), key=lambda network: network.rssi, reverse=True)
+        return self.__sorted
+
+    @property
+    def ssids(self) -> list:
+        """
+        Names of the networks found
+        :return: List of ssids, from the strongest to the weakest signal
+        """
+        return [network.ssid for network in self.networks]
+
+    @property
+    def scanning(self) -> bool:
+        """
+        Indicates if a scan is in progress
+        :return: True if scanning, False otherwise
+        """
+        return self.__channel is not None
+
+    @property
+    def fresh(self) -> bool:
+        """
+        Indicates if the networks found are recent enough not to be scanned again
+        :return: True if the last scan completed within the time to live, False otherwise
+        """
+        return self.__scanned_at is not None and monotonic() - self.__scanned_at < self.__ttl
+
+    @property
+    def version(self) -> int:
+        """
+        Number of changes to the networks found, used to update the lists showing them only when they change
+        :return: The number of changes
+        """
+        return self.__version
+
+    # ---------------------------------------------------------------
+    #                         Methods
+    # ---------------------------------------------------------------
+
+    def find(self, ssid: str):
+        """
+        Finds a network by name
+        :param ssid: Name of the network
+        :return: The strongest access point seen for the network, None if not found
+        """
+        return self.__networks.get(ssid)
+
+    def start(self, force: bool = False) -> bool:
+        """
+        Starts a scan, unless one is in progress or the networks found are still fresh
+        The networks found stay listed while scanning, the ones not found again are dropped once the scan completes
+
+        :param force: Should the networks be scanned even if fresh
+        :return: True if a scan is in progress, False otherwise
+        """
+        if self.__channel is not None:
+            return True
+        if not WIFI_AVAILABLE or (self.fresh and not force):
+            return False
+        self.__channel = FIRST_CHANNEL
+        self.__scan = None
+        self.__seen = set()
+        return True
+
+    def step(self, budget: float = 0) -> bool:
+        """
+        Takes the next networks found by the scan in progress, called from the main loop
+        Only the first network of a channel waits for the radio, for one channel at most, the others are taken at
+        once, so a step never waits for more than one channel
+
+        :param budget: Time the step may go on taking networks, in seconds, 0 takes a single network
+        :return: True if the networks found changed, False otherwise
+        """
+        if self.__channel is None:
+            return False
+
+        deadline = monotonic() + budget
+        changed = False
+        while True:
+            if self.__scan is None:
+                try:
+                    self.__scan = iter(wifi.radio.start_scanning_networks(start_channel=self.__channel,
+                                                                          stop_channel=self.__channel))
+                except RuntimeError:
+                    # The radio is scanning for someone else, the channel is scanned on a later step
+                    break
+            try:
+                network = next(self.__scan)
+            except StopIteration:
+                wifi.radio.stop_scanning_networks()
+                self.__scan = None
+                self.__channel += 1
+                if self.__channel > LAST_CHANNEL:
+                    changed = self.__complete() or changed
+                    break
+            else:
+                changed = self.__add(network) or changed
+            if monotonic() >= deadline:
+                break
+        if changed:
+            self.__changed()
+        return changed
+
+    def stop(self):
+        """
+        Stops the scan in progress, keeping the networks found so far
+        """
+        if self.__scan is not None:
+            wifi.radio.stop_scanning_networks()
+        self.__scan = None
+        self.__channel = None
+
+    def clear(self):
+        """
+        Forgets the networks found, so the next scan starts from an empty list
+        """
+        self.stop()
+        self.__networks = {}
+        self.__scanned_at = None
+        self.__changed()
+
+    def __add(self, network) -> bool:
+        """
+        Keeps a network found, replacing the one with the same ssid if the signal is stronger
+        """
+        if not network.ssid:
+            return False
+        # The first access point of the scan replaces the one of the previous scan, which may be gone
+        first = network.ssid not in self.__seen
+        self.__seen.add(network.ssid)
+        current = self.__networks.get(network.ssid)
+        if current is not None and not first and current.rssi >= network.rssi:
+            return False
+        self.__networks[network.ssid] = network
+        if len(self.__networks) > self.__max_networks:
+            weakest = min(self.__networks.values(), key=lambda kept: kept.rssi)
+            del self.__networks[weakest.ssid]
+            if weakest is network:
+                return False
+        return current is None or current.rssi != network.rssi or current.bssid != network.bssid
+
+    def __complete(self) -> bool:
+        """
+        Ends the scan in progress, dropping the networks it did not find
+        """
+        self.stop()
+        self.__scanned_at = monotonic()
+        gone = [ssid for ssid in self.__networks if ssid not in self.__seen]
+        for ssid in gone:
+            del self.__networks[ssid]
+        self.__seen = None
+        return len(gone) > 0
+
+    def __changed(self):
+        """
+        Notes the networks found changed
+        """
+        self.__sorted = None
+        self.__version += 1
+
+    # ---------------------------------------------------------------
+    #                         Constructor
+    # ---------------------------------------------------------------
+
+    def __init__(self, ttl: float = 30.0, max_networks: int = 64):
+        """
+        :param ttl: Time the networks found stay fresh, in seconds
+        :param max_networks: Number of networks kept, the weakest ones are left out
+        """
+        self.__ttl = ttl
+        self.__max_networks = max_networks
+        self.__networks = {}
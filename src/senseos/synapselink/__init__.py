@@ -9,34 +9,143 @@
 #                      Libraries and References
 # ---------------------------------------------------------------------
 
-# Network Libraries
+# External Libraries
 import adafruit_minimqtt.adafruit_minimqtt
-import wifi
-import socketpool
-
-# I/O Libraries
-import board
-import digitalio
-import analogio
-import pwmio
-import gc
+from binascii import a2b_base64, b2a_base64
+from time import monotonic, monotonic_ns, sleep
+
+# SenseOS Libraries
+from senseos.synapselink.eventcache import SynapseLinkEventCache, SENDER_SEPARATOR
+from senseos.synapselink.eventrecord import SynapseLinkEventRecord
+from senseos.synapselink.offlinequeue import SynapseLinkOfflineQueue
+from senseos.synapselink.lanes import SynapseLinkLane
+from senseos.synapselink.keepalive import SynapseLinkKeepAlive
+from senseos.synapselink.sequencer import SynapseLinkSequence, SynapseLinkSequencer
+from senseos.synapselink.rules import SynapseLinkRules, RULE_DIGITAL, RULE_TIMER, ACTION_EVENT
+from senseos.synapselink.aggregator import SynapseLinkAggregator
+from senseos.synapselink.timesync import SynapseLinkTimeSync, TIME_SEPARATOR
+from senseos.synapselink.readcache import SynapseLinkReadCache
+from senseos.synapselink.mirror import SynapseLinkMirror
+from senseos.synapselink.compression import SynapseLinkCompression, CODEC_SEPARATOR
+from senseos.synapselink.schema import decode_request
+from senseos.synapselink.transport import SynapseLinkSocketPool
+from senseos.display.raster import SenseBand, SenseRasterizer
+
+# Platform-specific Libraries (circuitpython)
+# Adafruit Blinka provides some of these modules on regular computers, raising
+# NotImplementedError when the board does not support them
+
+WIFI_AVAILABLE = False
+"""Indicates if the wifi module is available, used for network connectivity"""
+
+try:
+    import wifi
+except (ImportError, NotImplementedError):
+    pass
+else:
+    WIFI_AVAILABLE = True
+
+SOCKETPOOL_AVAILABLE = False
+"""Indicates if the socketpool module is available, used for the MQTT connection"""
+
+try:
+    import socketpool
+except (ImportError, NotImplementedError):
+    pass
+else:
+    SOCKETPOOL_AVAILABLE = True
+
+BOARD_AVAILABLE = False
+"""Indicates if the board module is available, used for pin identification"""
+
+try:
+    import board
+except (ImportError, NotImplementedError):
+    pass
+else:
+    BOARD_AVAILABLE = True
+
+DIGITALIO_AVAILABLE = False
+"""Indicates if the digitalio module is available, used for digital input/output commands"""
+
+try:
+    import digitalio
+except (ImportError, NotImplementedError):
+    pass
+else:
+    DIGITALIO_AVAILABLE = True
+
+ANALOGIO_AVAILABLE = False
+"""Indicates if the analogio module is available, used for analog input commands"""
+
+try:
+    import analogio
+except (ImportError, NotImplementedError):
+    pass
+else:
+    ANALOGIO_AVAILABLE = True
+
+MICROCONTROLLER_AVAILABLE = False
+"""Indicates if the microcontroller module is available, used for the unique id of the processor"""
+
+try:
+    import microcontroller
+except (ImportError, NotImplementedError):
+    pass
+else:
+    MICROCONTROLLER_AVAILABLE = True
+
+STORAGE_AVAILABLE = False
+"""Indicates if the storage module is available, used to check the flash is writable for the offline queue"""
+
+try:
+    import storage
+except (ImportError, NotImplementedError):
+    pass
+else:
+    STORAGE_AVAILABLE = True
+
+GARBAGE_COLLECTOR_AVAILABLE = False
+"""Indicates if the gc module is available, used for garbage collection"""
+
+try:
+    import gc
+except ImportError:
+    pass
+else:
+    GARBAGE_COLLECTOR_AVAILABLE = True
 
 # ---------------------------------------------------------------------
 #                           Global Variables
 # ---------------------------------------------------------------------
 
-pins = [
-    digitalio.DigitalInOut(board.GP16),
-    digitalio.DigitalInOut(board.GP17),
-    digitalio.DigitalInOut(board.GP18),
-    digitalio.DigitalInOut(board.GP19),
-    digitalio.DigitalInOut(board.GP0),
-    digitalio.DigitalInOut(board.GP1),
-    digitalio.DigitalInOut(board.GP20),
-    digitalio.DigitalInOut(board.GP21),
-    analogio.AnalogIn(board.A0),
-    analogio.AnalogIn(board.A1),
-]
+pins = []
+"""Pins exposed to SynapseLink commands, indexed by their SynapseLink pin number"""
+
+if BOARD_AVAILABLE and DIGITALIO_AVAILABLE and ANALOGIO_AVAILABLE:
+    pins = [
+        digitalio.DigitalInOut(board.GP16),
+        digitalio.DigitalInOut(board.GP17),
+        digitalio.DigitalInOut(board.GP18),
+        digitalio.DigitalInOut(board.GP19),
+        digitalio.DigitalInOut(board.GP0),
+        digitalio.DigitalInOut(board.GP1),
+        digitalio.DigitalInOut(board.GP20),
+        digitalio.DigitalInOut(board.GP21),
+        analogio.AnalogIn(board.A0),
+        analogio.AnalogIn(board.A1),
+    ]
+
+DEVICE_ID_PREFIX = "synapsepod-"
+"""Prefix of the device ids derived from the unique id of the processor"""
+DEFAULT_DEVICE_ID = "synapsepod-crystal"
+"""Device id used when the processor has no unique id and no device id is configured"""
+GROUP_TOPIC = "synapselink/group/{}"
+"""Topic of a group of devices, such as a site, commands published there reach every member"""
+BROADCAST_TOPIC = "synapselink/broadcast"
+"""Topic reaching every device connected to the broker"""
+TIME_TOPIC = "synapselink/time"
+"""Topic of the time server of the backend, answering on the topic of the device asking"""
 
 COMMAND_HELLO = 0x00
 """Hello command sent by the Synapse Device to present itself as online to the other node"""
@@ -60,6 +169,125 @@ COMMAND_DISPLAYREAD = 0x0A
 """Writes a message to the display"""
 COMMAND_DISPLAYWRITE = 0x0B
 """Writes a message to the display"""
+COMMAND_BUSY = 0x0C
+"""Synapse Device rejects a command because the lane of the command is over its rate limit"""
+COMMAND_SEQUENCE = 0x0D
+"""Executes a timed sequence of digital pin writes on the device, replying once it completes with its timing error"""
+COMMAND_RULES = 0x0E
+"""Replaces the condition -> action rules evaluated on the device, also sent by the device when a rule reports firing"""
+COMMAND_AGGREGATE = 0x0F
+"""Configures the aggregation of the analog pins, also sent by the device with the summary of every window"""
+COMMAND_TIMESYNC = 0x10
+"""Time synchronization exchange with the time server, also starts a synchronization and replies the device time"""
+COMMAND_CANVAS = 0x11
+"""Draws on the remote canvas of the display: palette colors, fills and rectangular regions, raw or run-length encoded"""
+COMMAND_SCREENSHOT = 0x12
+"""Reads a band of rows of the pixels shown by the display, RGB565 raw or run-length encoded"""
+COMMAND_MIRROR = 0x13
+"""Starts, renews or stops mirroring the display, also sent by the device with the bands that changed"""
+
+LANE_CONTROL = "control"
+"""Lane of the commands managing the device, which must keep working while the other lanes are flooded"""
+LANE_IO = "io"
+"""Lane of the pin input/output commands"""
+LANE_UI = "ui"
+"""Lane of the display commands"""
+
+COMMAND_LANES = {
+    COMMAND_MAXVERSION: LANE_CONTROL,
+    COMMAND_HEARTBEAT: LANE_CONTROL,
+    COMMAND_ACKNOWLEDGE: LANE_CONTROL,
+    COMMAND_REBOOT: LANE_CONTROL,
+    COMMAND_TIMESYNC: LANE_CONTROL,
+    COMMAND_DIGITALREAD: LANE_IO,
+    COMMAND_DIGITALWRITE: LANE_IO,
+    COMMAND_ANALOGREAD: LANE_IO,
+    COMMAND_SEQUENCE: LANE_IO,
+    COMMAND_RULES: LANE_IO,
+    COMMAND_AGGREGATE: LANE_IO,
+    COMMAND_DISPLAYREAD: LANE_UI,
+    COMMAND_DISPLAYWRITE: LANE_UI,
+    COMMAND_CANVAS: LANE_UI,
+    COMMAND_SCREENSHOT: LANE_UI,
+    COMMAND_MIRROR: LANE_UI,
+}
+"""Lane of each inbound command"""
+LANE_LIMITS = {
+    LANE_CONTROL: (20.0, 20),
+    LANE_IO: (20.0, 40),
+    LANE_UI: (5.0, 10),
+}
+"""Default limit of each lane, as (commands per second, commands at once)"""
+KEEP_ALIVE_MINIMUM = 15
+"""Shortest interval between MQTT pings, used on flaky links, in seconds"""
+KEEP_ALIVE_MAXIMUM = 120
+"""Longest interval between MQTT pings, used on stable links and negotiated on each connection, in seconds"""
+KEEP_ALIVE_INITIAL = 60
+"""Interval between MQTT pings of the first connection, in seconds"""
+SEQUENCE_MAX_STEPS = 64
+"""Maximum number of steps of a sequence"""
+SEQUENCE_YIELD_NS = 20000000
+"""Shortest wait between the steps of a sequence that returns control to the main loop, in nanoseconds, twice the
+service interval, so the main loop runs the sequence again before its next step is due"""
+RULES_MAX = 16
+"""Maximum number of rules"""
+AGGREGATE_PINS = (8, 9)
+"""Analog pins sampled by the aggregator"""
+AGGREGATE_WINDOW = 60
+"""Length of an aggregation window, in seconds"""
+AGGREGATE_INTERVAL = 0.1
+"""Time between the samples of the aggregator, in seconds"""
+TIMESYNC_ROUNDS = 8
+"""Exchanges with the time server per synchronization, the one with the shortest round trip is used"""
+TIMESYNC_INTERVAL = 900
+"""Time between synchronizations, in seconds"""
+READ_FRESHNESS = 0.1
+"""How long a pin value is reused to answer reads, in seconds"""
+SCREENSHOT_ROWS = 16
+"""Largest band of rows of a screenshot reply, bounding the memory used to render it"""
+SCREENSHOT_PENDING = 4
+"""Screenshot bands waiting to be rendered, further requests are answered busy"""
+RENDER_BUDGET = 0.005
+"""Time each poll may spend rendering the screenshot and the display mirror, in seconds, as rendering in Python
+takes longer than a refresh of the main loop"""
+MIRROR_ROWS = 16
+"""Number of rows of the bands of the display mirror"""
+MIRROR_MIN_FPS = 0.2
+"""Frame rate of the display mirror while the display does not refresh"""
+MIRROR_MAX_FPS = 5.0
+"""Highest frame rate of the display mirror"""
+MIRROR_BANDWIDTH = 8192
+"""Bytes per second the display mirror may use"""
+MIRROR_LEASE = 30
+"""Time the display is mirrored unless the console renews the lease, in seconds"""
+COMPRESSION_THRESHOLD = 256
+"""Smallest size of the parameters of a message compressed, in bytes"""
+COMPRESSION_LIMIT = 8192
+"""Largest size of the decompressed parameters of a message, in bytes"""
+PACKET_TIMEOUT = 1
+"""Shortest wait for the rest of a packet already started, in seconds, the default socket timeout of the MQTT
+client, so a large message arriving slowly never drops the session"""
+POLL_TIMEOUT = 1
+"""Time spent waiting for messages on each poll, in seconds"""
+SERVICE_INTERVAL = 0.01
+"""Longest time between runs of the sequence and the rules while polling or waiting, in seconds, bounding the
+reaction time of the rules"""
+
+NON_IDEMPOTENT_COMMANDS = (COMMAND_REBOOT, COMMAND_DIGITALWRITE, COMMAND_DISPLAYWRITE, COMMAND_SEQUENCE)
+"""Commands that must not run twice for the same event, a repeated event is answered with the cached reply"""
+EVENT_CACHE_CAPACITY = 16
+"""Event ids of non-idempotent commands remembered per sender"""
+EVENT_RECORD_OFFSET = 0
+"""Start of the region of the non-volatile memory recording the last reboot command, in bytes"""
+EVENT_RECORD_SIZE = 256
+"""Size of the region of the non-volatile memory recording the last reboot command, in bytes"""
+QUEUE_PATH = "/synapselink.queue"
+"""Path of the offline queue log on the CIRCUITPY flash, writable for the firmware once boot.py remounts it, the
+queue is kept in memory only while the flash is read-only and on regular computers"""
+QUEUE_MAX_BYTES = 64 * 1024
+"""Maximum size of the offline queue, the oldest messages are dropped beyond it"""
+QUEUE_DRAIN_RATE = 5.0
+"""Messages of the offline queue published per second once back online"""
 
 # ---------------------------------------------------------------------
 #                          SynapseLink Connector
@@ -69,15 +297,18 @@ class SynapseLink:
     __mqtt: adafruit_minimqtt.adafruit_minimqtt.MQTT = None
     """The MQTT Client"""
 
-    __pool: socketpool.SocketPool = None
+    __pool = None
     """The Socket Pool"""
 
     __counter: int = 0
     """Used for event id counting"""
 
-    __device_id: str = "synapsepod-crystal"
+    __device_id: str = DEFAULT_DEVICE_ID
     """The device id"""
 
+    __groups: list = None
+    """Groups joined by the device"""
+
     __max_version: int = 1
     """The maximum version of the protocol supported by this client"""
 
@@ -87,12 +318,121 @@ class SynapseLink:
     __senseos = None
     """SenseOS"""
 
+    __statistics: dict = None
+    """Handling statistics of each command, as [count, total time, maximum time] in nanoseconds"""
+
+    __events: SynapseLinkEventCache = None
+    """Non-idempotent events handled recently, with their replies, by the topic they were received on"""
+
+    __event_record: SynapseLinkEventRecord = None
+    """Records the last reboot command in the non-volatile memory, so the event cache knows it after the reboot"""
+
+    __last_reply: str = None
+    """Last reply published by a command handler"""
+
+    __queue: SynapseLinkOfflineQueue = None
+    """Messages sent while offline, published once back online"""
+
+    __lanes: dict = None
+    """Priority lanes limiting the inbound commands, by name"""
+
+    __keep_alive: SynapseLinkKeepAlive = None
+    """Adaptive keep alive, also scheduling the heartbeats sent by the device"""
+
+    __sequencer: SynapseLinkSequencer = None
+    """Executes the timed sequences of pin writes"""
+
+    __rules: SynapseLinkRules = None
+    """Condition -> action rules evaluated on every poll"""
+
+    __aggregator: SynapseLinkAggregator = None
+    """Reduces the samples of the analog pins to a summary per window"""
+
+    __time_sync: SynapseLinkTimeSync = None
+    """Estimates the wall clock from exchanges with the time server, disciplining the clock of ACPI"""
+
+    __read_cache: SynapseLinkReadCache = None
+    """Reuses the values read from the pins for a short window"""
+
+    __mirror: SynapseLinkMirror = None
+    """Streams the bands of the display that changed while a console is watching"""
+
+    __compression: SynapseLinkCompression = None
+    """Compresses and decompresses the parameters of large messages"""
+
+    __screenshots: list = None
+    """Screenshot bands waiting to be rendered, as [first row, rows, event id]"""
+
+    __screenshot: SenseBand = None
+    """Screenshot band being rendered, None when none is"""
+
+    __screenshot_ns: int = 0
+    """Longest time spent rendering a screenshot band in a single poll, in nanoseconds"""
+
+    __sender: str = None
+    """Topic the command being handled was received on"""
+
     input_subscription = []
 
-    def __init__(self, senseos):
+    def __init__(self, senseos, device_id: str = None, groups: list = None, events: SynapseLinkEventCache = None,
+                 queue: SynapseLinkOfflineQueue = None, lanes: dict = None, keep_alive: SynapseLinkKeepAlive = None,
+                 rules: SynapseLinkRules = None, aggregator: SynapseLinkAggregator = None,
+                 time_sync: SynapseLinkTimeSync = None, read_cache: SynapseLinkReadCache = None,
+                 mirror: SynapseLinkMirror = None, compression: SynapseLinkCompression = None,
+                 event_record: SynapseLinkEventRecord = None):
         self.__senseos = senseos
+        self.__statistics = {}
+        self.__events = events if events is not None else SynapseLinkEventCache(EVENT_CACHE_CAPACITY)
+        self.__event_record = event_record if event_record is not None else SynapseLinkEventRecord()
+        self.__queue = queue if queue is not None else SynapseLinkOfflineQueue(max_bytes=QUEUE_MAX_BYTES,
+                                                                               drain_rate=QUEUE_DRAIN_RATE)
+        if lanes is None:
+            lanes = {name: SynapseLinkLane(name, *limit) for name, limit in LANE_LIMITS.items()}
+        self.__lanes = lanes
+        self.__keep_alive = keep_alive if keep_alive is not None else SynapseLinkKeepAlive(
+            KEEP_ALIVE_MINIMUM, KEEP_ALIVE_MAXIMUM, KEEP_ALIVE_INITIAL
+        )
+        self.__sequencer = SynapseLinkSequencer(self.__write_pin, SEQUENCE_YIELD_NS)
+        self.__rules = rules if rules is not None else SynapseLinkRules()
+        self.__aggregator = aggregator if aggregator is not None else SynapseLinkAggregator(
+            [pin for pin in AGGREGATE_PINS if self.__analog_pin(pin)], AGGREGATE_WINDOW, AGGREGATE_INTERVAL
+        )
+        self.__time_sync = time_sync if time_sync is not None else SynapseLinkTimeSync(TIMESYNC_ROUNDS,
+                                                                                       TIMESYNC_INTERVAL)
+        self.__read_cache = read_cache if read_cache is not None else SynapseLinkReadCache(READ_FRESHNESS)
+        self.__mirror = mirror if mirror is not None else SynapseLinkMirror(MIRROR_ROWS, MIRROR_MIN_FPS,
+                                                                            MIRROR_MAX_FPS, MIRROR_BANDWIDTH,
+                                                                            RENDER_BUDGET)
+        self.__screenshots = []
+        self.__compression = compression if compression is not None else SynapseLinkCompression(
+            COMPRESSION_THRESHOLD, COMPRESSION_LIMIT
+        )
+        self.__groups = list(groups) if groups else []
+
+        hardware_id = self.__hardware_id()
+        if hardware_id is not None:
+            self.__device_id = hardware_id
+        elif device_id is not None:
+            self.__device_id = device_id
+
+        # A reboot command redelivered after the reboot it caused must not reboot the device again
+        self.__event_record.restore(self.__events, self.__device_id)
+
         self.initialize()
 
+    @staticmethod
+    def __hardware_id():
+        """
+        Derives the device id from the unique id of the processor
+        :return: The device id, None if the processor has no unique id
+        """
+        if not MICROCONTROLLER_AVAILABLE:
+            return None
+        uid = getattr(microcontroller.cpu, "uid", None)
+        if not uid:
+            return None
+        return DEVICE_ID_PREFIX + "".join("{:02x}".format(byte) for byte in uid)
+
     @property
     def mqtt(self) -> adafruit_minimqtt.adafruit_minimqtt.MQTT:
         """
@@ -108,6 +448,74 @@ class SynapseLink:
         :return: The MQTT topic
         """
         return self.__device_id
+
+    @property
+    def groups(self) -> list:
+        """
+        Returns the groups joined by the device
+        :return: List of group names
+        """
+        return list(self.__groups)
+
+    @property
+    def statistics(self) -> dict:
+        """
+        Returns the handling statistics of each command received by the device
+        :return: Dictionary of command to [count, total time, maximum time], times in nanoseconds
+        """
+        return self.__statistics
+
+    @property
+    def duplicates(self) -> int:
+        """
+        Returns the number of repeated non-idempotent commands answered from the event cache instead of executed
+        :return: The number of repeated commands
+        """
+        return self.__events.hits
+
+    @property
+    def lanes(self) -> dict:
+        """
+        Returns the priority lanes limiting the inbound commands
+        :return: Dictionary of lane name to lane
+        """
+        return self.__lanes
+
+    @property
+    def keep_alive(self) -> SynapseLinkKeepAlive:
+        """
+        Returns the adaptive keep alive
+        :return: The adaptive keep alive
+        """
+        return self.__keep_alive
+
+    @property
+    def health(self) -> dict:
+        """
+        Returns the health summary sent with the heartbeats
+        :return: Dictionary with the uptime in seconds, free memory in bytes (-1 if unknown), signal strength in dBm
+                 (None if unknown), keep alive in seconds, offline queue size in bytes and where it is kept (flash or
+                 memory), commands rejected as busy,
+                 repeated commands, connections lost, the time the last wifi reconnection took in milliseconds
+                 (None if unknown) and the longest time a poll spent rendering the screenshot or the display
+                 mirror in milliseconds, to check the render budget on the device itself
+        """
+        rssi = None
+        if WIFI_AVAILABLE and wifi.radio.ap_info is not None:
+            rssi = wifi.radio.ap_info.rssi
+        return {
+            "up": int(self.__senseos.acpi.uptime),
+            "mem": self.__senseos.memory.free,
+            "rssi": rssi,
+            "ka": self.__keep_alive.interval,
+            "q": self.__queue.size,
+            "qm": self.__queue.mode,
+            "busy": sum(lane.rejected for lane in self.__lanes.values()),
+            "dup": self.__events.hits,
+            "loss": self.__keep_alive.losses,
+            "wifi": self.__senseos.network.reconnect_ms,
+            "render": max(self.__screenshot_ns, self.__mirror.statistics["step_ns"]) // 1000000,
+        }
     
     
     @property
@@ -116,6 +524,8 @@ class SynapseLink:
         Returns the network connection status
         :return: True if connected, False otherwise
         """
+        if not WIFI_AVAILABLE:
+            return False
         return wifi.radio.connected
 
     @property
@@ -132,16 +542,91 @@ class SynapseLink:
 
         if self.connected:
             try:
-                self.__mqtt.loop(timeout=1)
+                # Messages are waited for in short slices, so the rules react within milliseconds
+                deadline = monotonic() + POLL_TIMEOUT
+                while True:
+                    self.__mqtt.loop(timeout=SERVICE_INTERVAL)
+                    self.run_local()
+                    self.__synchronize_time()
+                    self.__capture_screenshot()
+                    self.__mirror.step(self.__senseos.display.primary_display, self.__publish_mirror)
+                    if monotonic() >= deadline:
+                        break
+                self.__queue.drain(self.__publish)
+                self.__mqtt.keep_alive = self.__keep_alive.adapt()
+                if self.__keep_alive.heartbeat_due:
+                    self.pulse()
             except adafruit_minimqtt.adafruit_minimqtt.MMQTTException as e:
+                self.__keep_alive.lost()
                 return False
             except OSError:
+                self.__keep_alive.lost()
                 self.initialize(force=True)
             except KeyboardInterrupt:
                 self.__senseos.acpi.reboot()
                 return False
             else:
                 return True
+
+        self.run_local()
+        self.__queue.maintain()
+        return False
+
+    def run_local(self):
+        """
+        Runs the work the device does on its own, online or offline: the due steps of the sequence, the rules and
+        the samples of the aggregator
+        """
+        self.__run_sequence()
+        self.__rules.evaluate(self.__read_pin, self.__write_pin, self.__fire_rule)
+        summary = self.__aggregator.sample(self.__read_pin)
+        if summary is not None:
+            self.send(COMMAND_AGGREGATE, "summary", summary[0],
+                      *["{},{},{},{},{},{}".format(*pin) for pin in summary[1:]])
+
+    def wait(self, seconds: float):
+        """
+        Waits without the network, running the sequence, the rules and the aggregator meanwhile
+        :param seconds: Time to wait, in seconds
+        """
+        deadline = monotonic() + seconds
+        while True:
+            self.run_local()
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                return
+            if len(self.__rules) or self.__sequencer.running:
+                remaining = min(remaining, SERVICE_INTERVAL)
+            elif self.__aggregator.enabled:
+                remaining = min(remaining, max(self.__aggregator.next_due, SERVICE_INTERVAL))
+            sleep(remaining)
+
+    def __synchronize_time(self):
+        """
+        Sends the next time synchronization request, if one is due
+        """
+        t1 = self.__time_sync.request()
+        if t1 is not None:
+            self.__publish(TIME_TOPIC, self.__build_command(COMMAND_TIMESYNC, self.__device_id, t1))
+
+    def send(self, command: int, *args) -> bool:
+        """
+        Sends telemetry or an event to the backend on the device topic, queued while offline and published once
+        back online, in the order sent
+        :param command: The command
+        :param args: The parameters of the command
+        :return: True if published now, False if queued
+        """
+        message = self.__build_command(command, *args)
+        if self.connected and not self.__queue.pending:
+            try:
+                self.__publish(self.__device_id, message)
+            except (adafruit_minimqtt.adafruit_minimqtt.MMQTTException, OSError):
+                pass
+            else:
+                return True
+
+        self.__queue.append(self.__device_id, message)
         return False
     
     def __on_mqtt_connect(self, client: adafruit_minimqtt.adafruit_minimqtt.MQTT, userdata, flags, rc):
@@ -153,8 +638,14 @@ class SynapseLink:
         :param rc: The return code
         """
         self.__connected = True
-        client.subscribe(topic=self.__device_id)
-        self.__mqtt.publish(self.__device_id,self.__build_command(COMMAND_HELLO))
+        self.__keep_alive.connected()
+        # The maximum is negotiated, the client pings at the adaptive interval
+        client.keep_alive = self.__keep_alive.interval
+        topics = [(self.__device_id, 0), (BROADCAST_TOPIC, 0)]
+        for group in self.__groups:
+            topics.append((GROUP_TOPIC.format(group), 0))
+        client.subscribe(topics)
+        self.__publish(self.__device_id, self.__build_command(COMMAND_HELLO))
         self.__counter += 1
 
     def __on_mqtt_message(self, client: adafruit_minimqtt.adafruit_minimqtt.MQTT, topic: str, message: str):
@@ -167,8 +658,77 @@ class SynapseLink:
         if message.startswith("!"):
             return
         else:
+            start = monotonic_ns()
             c = self.__parse_command(message)
-            self.__handle_commands(c[0], c[1], c[2])
+
+            # Answers of the time server are timestamped on arrival and not acknowledged, as the acknowledgement
+            # would only delay the next exchange
+            if c[0] == COMMAND_TIMESYNC and len(c[1]) == 3:
+                estimate = self.__time_sync.response(int(c[1][0]), int(c[1][1]), int(c[1][2]), start)
+                if estimate is not None:
+                    self.__senseos.acpi.discipline(*estimate)
+                self.__record_command(c[0], monotonic_ns() - start)
+                return
+
+            # Commands carry the id of their sender with their event id, older senders are told apart by topic
+            sender = self.__sender_of(topic, c[2])
+
+            # Redelivered non-idempotent commands are answered again without running them again
+            if c[0] in NON_IDEMPOTENT_COMMANDS:
+                reply = self.__events.get(sender, c[2])
+                if reply is not None:
+                    self.acknowledge(c[0], c[1], c[2])
+                    self.__publish(self.__device_id, reply)
+                    self.__record_command(c[0], monotonic_ns() - start)
+                    return
+
+            # Commands over the limit of their lane are rejected before any work is done for them
+            lane = self.__lanes.get(COMMAND_LANES.get(c[0]))
+            if lane is not None and not lane.admit():
+                self.busy(c[0], lane, c[2])
+                self.__record_command(c[0], monotonic_ns() - start)
+                return
+
+            # Compressed parameters are only expanded once the command is admitted
+            try:
+                parameters = self.__compression.expand(c[3], c[1])
+            except ValueError:
+                self.__publish(self.__device_id, self.__build_command(c[0], "error", "compression", event_id=c[2]))
+                self.__record_command(c[0], monotonic_ns() - start)
+                return
+
+            self.__last_reply = None
+            self.__sender = sender
+            self.__handle_commands(c[0], parameters, c[2])
+            if c[0] in NON_IDEMPOTENT_COMMANDS and self.__last_reply is not None:
+                self.__events.put(sender, c[2], self.__last_reply)
+            self.__record_command(c[0], monotonic_ns() - start)
+
+    def __record_command(self, command: int, elapsed: int):
+        """
+        Records the time spent handling a command
+        :param command: The command handled
+        :param elapsed: Time spent parsing, handling and replying to the command, in nanoseconds
+        """
+        statistics = self.__statistics.get(command)
+        if statistics is None:
+            self.__statistics[command] = [1, elapsed, elapsed]
+        else:
+            statistics[0] += 1
+            statistics[1] += elapsed
+            if elapsed > statistics[2]:
+                statistics[2] = elapsed
+
+    def reset_statistics(self):
+        """
+        Resets the handling statistics of the commands, the counters of the lanes and of the read cache and the cost
+        of the rules
+        """
+        self.__statistics = {}
+        for lane in self.__lanes.values():
+            lane.reset_statistics()
+        self.__rules.reset_statistics()
+        self.__read_cache.reset_statistics()
     
     def __on_mqtt_disconnect(self, client: adafruit_minimqtt.adafruit_minimqtt.MQTT, userdata, rc):
         """
@@ -178,6 +738,7 @@ class SynapseLink:
         :param rc: The return code
         """
         self.__connected = False
+        self.__keep_alive.lost()
     
     def initialize(self, force: bool = False):
         if (self.__mqtt != None or self.__pool) and not force:
@@ -185,9 +746,11 @@ class SynapseLink:
         
         self.__connected = False
         
-        gc.collect()
+        if GARBAGE_COLLECTOR_AVAILABLE:
+            gc.collect()
         
-        self.__pool = socketpool.SocketPool(wifi.radio)
+        # Messages are waited for in slices of the service interval, the rest of a packet already started is not
+        self.__pool = SynapseLinkSocketPool(socketpool.SocketPool(wifi.radio), SERVICE_INTERVAL, PACKET_TIMEOUT)
         self.__mqtt = adafruit_minimqtt.adafruit_minimqtt.MQTT(
             socket_pool=self.__pool,
             broker="mqtt.evoluxiot.pt",
@@ -195,7 +758,7 @@ class SynapseLink:
             password="evoluxiot",
             client_id=self.__device_id,
             is_ssl=False,
-            keep_alive=15,
+            keep_alive=self.__keep_alive.negotiated,
         )
 
         self.__mqtt.on_connect = self.__on_mqtt_connect
@@ -214,19 +777,44 @@ class SynapseLink:
             return False
         
         try:
-            self.__mqtt.connect()
-        except adafruit_minimqtt.adafruit_minimqtt.MMQTTException:
+            self.__mqtt.connect(keep_alive=self.__keep_alive.negotiated)
+        except (adafruit_minimqtt.adafruit_minimqtt.MMQTTException, OSError):
             return False
         else:
             self.__connected = True
             return True
 
     
+    def join(self, group: str):
+        """
+        Joins a group, receiving the commands published to it
+        :param group: Name of the group
+        """
+        if group in self.__groups:
+            return
+        self.__groups.append(group)
+        if self.connected:
+            self.__mqtt.subscribe(GROUP_TOPIC.format(group))
+
+    def leave(self, group: str):
+        """
+        Leaves a group
+        :param group: Name of the group
+        """
+        if group not in self.__groups:
+            return
+        self.__groups.remove(group)
+        if self.connected:
+            self.__mqtt.unsubscribe(GROUP_TOPIC.format(group))
+
     def disconnect(self):
         if not self.connected:
+            # Asked to disconnect an already broken connection, the link was lost
+            self.__keep_alive.lost()
             return
         
-        self.__mqtt.publish(self.__device_id, self.__build_command(COMMAND_GOODBYE))
+        self.__keep_alive.closed()
+        self.__publish(self.__device_id, self.__build_command(COMMAND_GOODBYE))
         
         self.__mqtt.disconnect()
 
@@ -246,24 +834,51 @@ class SynapseLink:
     #                          Commands
     # -----------------------------------------------------------------
 
-    def __parse_command(self, message: str) -> tuple[int, list[str], int]:
+    def __parse_command(self, message: str) -> tuple[int, list[str], int, str]:
 
         # Don't parse sent messages
         if message[0] == "!":
-            return (-1, [],-1)
+            return (-1, [], -1, None)
 
         # Split message into command parts
         data = message.split(":,:")
 
         # Command must have at least 3 parts (command and event_id)
         if len(data) < 2:
-            return (-1, [],-1)
+            return (-1, [], -1, None)
+
+        # Compressed parameters are named by their codec after the command
+        command, _, codec = data[0].partition(CODEC_SEPARATOR)
+
         # Parameterless command
-        elif len(data) == 2:
-            return (int(data[0]), [], int(data[1]))
+        if len(data) == 2:
+            return (int(command), [], self.__parse_event_id(data[1]), codec or None)
         # Command with parameters
         else:
-            return (int(data[0]), data[1:-1], int(data[-1]))
+            return (int(command), data[1:-1], self.__parse_event_id(data[-1]), codec or None)
+
+    @staticmethod
+    def __parse_event_id(value: str):
+        """
+        Parses the event id of a command, kept with the id of its sender, if any, so replies echo both
+        :param value: The event id, such as 42 or 42@backend
+        :return: The event id, as int, or as string when it carries the id of its sender
+        """
+        event_id, separator, sender = value.partition(SENDER_SEPARATOR)
+        int(event_id)
+        return value if separator and sender else int(event_id)
+
+    @staticmethod
+    def __sender_of(topic: str, event_id) -> str:
+        """
+        Returns the sender of a command, the id carried with its event id, the topic it arrived on otherwise
+        :param topic: Topic the command arrived on
+        :param event_id: Event id of the command
+        :return: The sender
+        """
+        if isinstance(event_id, str):
+            return event_id.partition(SENDER_SEPARATOR)[2]
+        return topic
     
     def __before_command(self, command: int, parameters: list = [], event_id = None):
         self.__counter += 2
@@ -274,10 +889,18 @@ class SynapseLink:
         
     def __handle_commands(self, command: int, parameters: list = [], event_id = None):
         self.__before_command(command, parameters, event_id)
-        
+
+        # Arguments are converted by the protocol schema, so the handlers receive typed values
+        try:
+            arguments = decode_request(command, parameters)
+        except ValueError:
+            self.__reply(self.__build_command(command, "error", "parameters", event_id=event_id))
+            self.__after_command(command, parameters, event_id)
+            return
+
         if command == COMMAND_MAXVERSION:
             self.__counter += 1
-            self.maxversion(event_id)
+            self.maxversion(arguments, event_id)
         elif command == COMMAND_HEARTBEAT:
             self.__counter += 1
             self.heartbeat(event_id)
@@ -288,19 +911,40 @@ class SynapseLink:
             self.reboot(event_id)
         elif command == COMMAND_DIGITALREAD:
             self.__counter += 1
-            self.digitalread(int(parameters[0]), event_id)
+            self.digitalread(arguments[0], event_id)
         elif command == COMMAND_DIGITALWRITE:
             self.__counter += 1
-            self.digitalwrite(int(parameters[0]), int(parameters[1]), event_id)
+            self.digitalwrite(arguments[0], arguments[1], event_id)
         elif command == COMMAND_ANALOGREAD:
             self.__counter += 1
-            self.analogread(int(parameters[0]), event_id)
+            self.analogread(arguments[0], event_id)
         elif command == COMMAND_DISPLAYREAD:
             self.__counter += 1
             self.displayread(event_id)
         elif command == COMMAND_DISPLAYWRITE:
             self.__counter += 1
-            self.displaywrite(parameters[0], event_id)
+            self.displaywrite(arguments[0], event_id)
+        elif command == COMMAND_SEQUENCE:
+            self.__counter += 1
+            self.sequence(arguments, event_id)
+        elif command == COMMAND_RULES:
+            self.__counter += 1
+            self.rules(arguments, event_id)
+        elif command == COMMAND_AGGREGATE:
+            self.__counter += 1
+            self.aggregate(arguments, event_id)
+        elif command == COMMAND_TIMESYNC:
+            self.__counter += 1
+            self.timesync(event_id)
+        elif command == COMMAND_CANVAS:
+            self.__counter += 1
+            self.canvas(arguments, event_id)
+        elif command == COMMAND_SCREENSHOT:
+            self.__counter += 1
+            self.screenshot(arguments, event_id)
+        elif command == COMMAND_MIRROR:
+            self.__counter += 1
+            self.mirror(arguments, event_id)
 
 
         self.__after_command(command, parameters, event_id)
@@ -311,46 +955,108 @@ class SynapseLink:
 
         result = "!{}".format(command)
 
+        if self.__compression.enabled:
+            codec, args = self.__compression.shrink([str(arg) for arg in args])
+            if codec is not None:
+                result += CODEC_SEPARATOR + codec
         for arg in args:
             result += ":,:{}".format(arg)
 
-        result += ":,:{}".format(self.__counter)
+        # Stamped with the wall clock, so the backend orders and correlates the messages of every device
+        time_ns = self.__senseos.acpi.time_ns
+        if time_ns is None:
+            result += ":,:{}".format(event_id)
+        else:
+            result += ":,:{}{}{}".format(event_id, TIME_SEPARATOR, time_ns)
 
         self.__counter += 1
 
         return "{}".format(result)
+
+    def __reply(self, message: str):
+        """
+        Publishes the reply of a command handler, remembered for the event cache
+        :param message: The reply
+        """
+        self.__last_reply = message
+        self.__publish(self.__device_id, message)
+
+    def __publish(self, topic: str, message: str, qos: int = 0):
+        """
+        Publishes a message
+        :param topic: The topic
+        :param message: The message
+        :param qos: The quality of service
+        """
+        self.__mqtt.publish(topic, message, qos=qos)
+
+    def __publish_mirror(self, *args):
+        """
+        Publishes a message of the display mirror, never queued as frames are worthless once late
+        :param args: The parameters of the message
+        """
+        self.__publish(self.__device_id, self.__build_command(COMMAND_MIRROR, *args))
+
+    def __encode_health(self) -> list:
+        """
+        Encodes the health summary as heartbeat parameters
+        :return: List of key=value parameters
+        """
+        return ["{}={}".format(key, "" if value is None else value) for key, value in self.health.items()]
     
-    def maxversion(self, event_id: int = None):
+    def maxversion(self, parameters: list = None, event_id: int = None):
         """
-        Maximum version of the protocol supported by this client
+        Maximum version of the protocol supported by this client, the parameters are the codecs the backend
+        decompresses, replies the version followed by the codecs the device decompresses
         """
-        self.__mqtt.publish(self.__device_id, self.__build_command(COMMAND_MAXVERSION, self.__max_version))
+        if parameters:
+            self.__compression.negotiate(parameters)
+        self.__reply(self.__build_command(COMMAND_MAXVERSION, self.__max_version, *self.__compression.codecs,
+                                          event_id=event_id))
 
     def heartbeat(self, event_id: int = None):
         """
         Heartbeat command
         """
-        self.__mqtt.publish(self.__device_id, self.__build_command(COMMAND_HEARTBEAT))
+        self.__reply(self.__build_command(COMMAND_HEARTBEAT, *self.__encode_health(), event_id=event_id))
+        self.__keep_alive.beat()
+
+    def pulse(self):
+        """
+        Heartbeat sent by the device on its own with its health summary, once every health interval
+        """
+        self.__publish(self.__device_id, self.__build_command(COMMAND_HEARTBEAT, *self.__encode_health()))
+        self.__keep_alive.beat()
 
     def acknowledge(self, command: str, params: list[str], event_id: int = None):
         """
         Acknowledge command
         """
-        self.__mqtt.publish(self.__device_id, self.__build_command(COMMAND_ACKNOWLEDGE,command,*params))
+        self.__publish(self.__device_id, self.__build_command(COMMAND_ACKNOWLEDGE, command, *params, event_id=event_id))
     
+    def busy(self, command: int, lane: SynapseLinkLane, event_id: int = None):
+        """
+        Busy reply, rejecting a command over the limit of its lane
+        """
+        self.__publish(self.__device_id, self.__build_command(COMMAND_BUSY, command, lane.name, lane.retry_after, event_id=event_id))
+
     def reboot(self, event_id: int = None):
         """
         Reboot command
         """
-        self.__mqtt.publish(self.__device_id, self.__build_command(COMMAND_REBOOT))
+        reply = self.__build_command(COMMAND_REBOOT, event_id=event_id)
+        # The reboot never returns to put the event in the cache, which does not survive it anyway
+        self.__events.put(self.__sender, event_id, reply)
+        self.__event_record.save(self.__device_id, self.__sender, event_id, reply)
+        self.__reply(reply)
         self.__senseos.acpi.reboot()
     
     def digitalread(self, pin: int, event_id: int = None):
         """
-        Digital Read command
+        Digital Read command, answered from the read cache while the last value is fresh
         """
-        pins[pin].switch_to_input(pull=digitalio.Pull.UP)
-        self.__mqtt.publish(self.__device_id, self.__build_command(COMMAND_DIGITALREAD, pin, int(pins[pin].value)))
+        value = self.__read_cache.read(pin, self.__sample_digital)
+        self.__reply(self.__build_command(COMMAND_DIGITALREAD, pin, value, event_id=event_id))
 
     def digitalwrite(self, pin: int, value: int, event_id: int = None):
         """
@@ -358,27 +1064,327 @@ class SynapseLink:
         """
         pins[pin].switch_to_output()
         pins[pin].value = value
-        self.__mqtt.publish(self.__device_id, self.__build_command(COMMAND_DIGITALWRITE, pin, int(value)))
+        self.__read_cache.invalidate(pin)
+        self.__reply(self.__build_command(COMMAND_DIGITALWRITE, pin, int(value), event_id=event_id))
     
     def analogread(self, pin: int, event_id: int = None):
         """
-        Analog Read command
+        Analog Read command, answered from the read cache while the last value is fresh
         """
         if (pin in [8, 9]):
-            self.__mqtt.publish(self.__device_id, self.__build_command(COMMAND_ANALOGREAD, pin, pins[pin].value))
+            value = self.__read_cache.read(pin, self.__read_pin)
+            self.__reply(self.__build_command(COMMAND_ANALOGREAD, pin, value, event_id=event_id))
     
-    def displayread(self, text: str, event_id: int = None):
+    def displayread(self, event_id: int = None):
         """
-        Display Write command
+        Display Read command
         """
-        self.__mqtt.publish(self.__device_id, self.__build_command(COMMAND_DISPLAYREAD, self.__senseos.display.primary_display.screen.remote_text.text ))
+        self.__reply(self.__build_command(COMMAND_DISPLAYREAD, self.__senseos.display.primary_display.screen.remote_text.text, event_id=event_id))
     
+    def sequence(self, parameters: list, event_id: int = None):
+        """
+        Sequence command, the parameters are the number of runs, 0 repeating until stopped, once when empty,
+        followed by the steps as pin,value,delay in microseconds; a sequence without steps stops the one being
+        executed
+        """
+        current = self.__sequencer.sequence
+        if current is not None and current.sender == self.__sender and current.event_id == event_id:
+            # Redelivered while still being executed
+            return
+
+        try:
+            runs = 1 if parameters[0] is None else parameters[0]
+            steps = []
+            for pin, value, delay in parameters[1:]:
+                if not self.__digital_pin(pin) or value not in (0, 1) or delay < 0:
+                    raise ValueError((pin, value, delay))
+                steps.append((pin, value, delay * 1000))
+            if runs < 0 or len(steps) > SEQUENCE_MAX_STEPS or (steps and runs == 0 and not sum(s[2] for s in steps)):
+                raise ValueError(runs)
+        except (ValueError, IndexError):
+            self.__reply(self.__build_command(COMMAND_SEQUENCE, "error", 0, 0, 0, 0, event_id=event_id))
+            return
+
+        if not steps:
+            stopped = self.__sequencer.stop()
+            if stopped is not None:
+                self.__finish_sequence(stopped)
+            self.__reply(self.__build_command(COMMAND_SEQUENCE, "idle", 0, 0, 0, 0, event_id=event_id))
+            return
+
+        for pin in set(step[0] for step in steps):
+            pins[pin].switch_to_output()
+            self.__read_cache.invalidate(pin)
+
+        # The steps are executed by the main loop, see run_local, never from the message callback
+        stopped = self.__sequencer.start(SynapseLinkSequence(steps, runs, self.__sender, event_id))
+        if stopped is not None:
+            self.__finish_sequence(stopped)
+
+    def __run_sequence(self):
+        """
+        Executes the steps of the sequence that are due, reporting it once completed
+        """
+        if self.__sequencer.running:
+            finished = self.__sequencer.run()
+            if finished is not None:
+                self.__finish_sequence(finished)
+
+    def __finish_sequence(self, sequence: SynapseLinkSequence):
+        """
+        Reports a completed or stopped sequence with its timing error in microseconds, remembered for the event cache
+        :param sequence: The sequence
+        """
+        message = self.__build_command(COMMAND_SEQUENCE, sequence.status, sequence.run, sequence.executed,
+                                       sequence.error_max // 1000, sequence.error_mean // 1000,
+                                       event_id=sequence.event_id)
+        self.__events.put(sequence.sender, sequence.event_id, message)
+        if self.connected:
+            self.__publish(self.__device_id, message)
+        else:
+            self.__queue.append(self.__device_id, message)
+
+    def rules(self, parameters: list, event_id: int = None):
+        """
+        Rules command, the parameters are the rules replacing the loaded ones, no rules clear them; a rule may not
+        write a pin read by any rule
+        """
+        inputs = set()
+        outputs = set()
+        for index, source in enumerate(parameters):
+            try:
+                condition, pin, threshold, actions = SynapseLinkRules.compile(source)
+                if index >= RULES_MAX:
+                    raise ValueError(index)
+                if condition == RULE_DIGITAL and not self.__digital_pin(pin):
+                    raise ValueError(pin)
+                if condition != RULE_DIGITAL and condition != RULE_TIMER and not self.__analog_pin(pin):
+                    raise ValueError(pin)
+                if condition != RULE_TIMER:
+                    inputs.add(pin)
+                for action, action_pin, value in actions:
+                    if action != ACTION_EVENT:
+                        if not self.__digital_pin(action_pin):
+                            raise ValueError(action_pin)
+                        outputs.add(action_pin)
+                if inputs & outputs:
+                    raise ValueError(source)
+            except (ValueError, IndexError):
+                self.__reply(self.__build_command(COMMAND_RULES, "error", index, event_id=event_id))
+                return
+
+        for pin in inputs:
+            if self.__digital_pin(pin):
+                pins[pin].switch_to_input(pull=digitalio.Pull.UP)
+        for pin in outputs:
+            pins[pin].switch_to_output()
+        self.__read_cache.invalidate()
+
+        self.__rules.load(parameters)
+        self.__reply(self.__build_command(COMMAND_RULES, "loaded", len(self.__rules), event_id=event_id))
+
+    def aggregate(self, parameters: list, event_id: int = None):
+        """
+        Aggregate command, the parameters are the window in seconds, 0 disabling aggregation, and the time between
+        samples in milliseconds, both optional; without a window the current configuration is replied
+        """
+        window, interval = parameters
+        if window is not None:
+            try:
+                self.__aggregator.configure(window, self.__aggregator.interval if interval is None else interval / 1000)
+            except ValueError:
+                self.__reply(self.__build_command(COMMAND_AGGREGATE, "error", window,
+                                                  "" if interval is None else interval, event_id=event_id))
+                return
+
+        self.__reply(self.__build_command(COMMAND_AGGREGATE, "config", self.__aggregator.window,
+                                          int(self.__aggregator.interval * 1000), *self.__aggregator.pins,
+                                          event_id=event_id))
+
+    def timesync(self, event_id: int = None):
+        """
+        Time Sync command, starts a synchronization with the time server and replies the wall clock of the device
+        in nanoseconds since the epoch, empty if it was never synchronized
+        """
+        self.__time_sync.start()
+        time_ns = self.__senseos.acpi.time_ns
+        self.__reply(self.__build_command(COMMAND_TIMESYNC, "" if time_ns is None else time_ns, event_id=event_id))
+
+    def __fire_rule(self, index: int):
+        """
+        Reports a rule fired, queued while offline
+        :param index: Index of the rule
+        """
+        self.send(COMMAND_RULES, "fired", index)
+
+    @staticmethod
+    def __digital_pin(pin: int) -> bool:
+        """
+        Indicates if a pin number is a digital pin
+        :param pin: SynapseLink pin number
+        :return: True if the pin is a digital pin, False otherwise
+        """
+        return DIGITALIO_AVAILABLE and 0 <= pin < len(pins) and isinstance(pins[pin], digitalio.DigitalInOut)
+
+    @staticmethod
+    def __analog_pin(pin: int) -> bool:
+        """
+        Indicates if a pin number is an analog pin
+        :param pin: SynapseLink pin number
+        :return: True if the pin is an analog pin, False otherwise
+        """
+        return ANALOGIO_AVAILABLE and 0 <= pin < len(pins) and isinstance(pins[pin], analogio.AnalogIn)
+
+    @staticmethod
+    def __sample_digital(pin: int) -> int:
+        """
+        Switches a digital pin to input with a pull up and reads it
+        :param pin: SynapseLink pin number
+        :return: The value
+        """
+        pins[pin].switch_to_input(pull=digitalio.Pull.UP)
+        return int(pins[pin].value)
+
+    @staticmethod
+    def __read_pin(pin: int):
+        """
+        Reads the value of a pin
+        :param pin: SynapseLink pin number
+        :return: The value, a boolean for digital pins and an integer for analog pins
+        """
+        return pins[pin].value
+
+    def __write_pin(self, pin: int, value: int):
+        """
+        Writes a value to a digital pin already switched to output, for the sequence and the rules, forgetting the
+        value cached for reads
+        :param pin: SynapseLink pin number
+        :param value: The value
+        """
+        pins[pin].value = value
+        self.__read_cache.invalidate(pin)
+
     def displaywrite(self, text: str, event_id: int = None):
         """
         Display Write command
         """
         self.__senseos.display.primary_display.screen.remote_text.text = text
-        self.__mqtt.publish(self.__device_id, self.__build_command(COMMAND_DISPLAYWRITE, text))
+        self.__reply(self.__build_command(COMMAND_DISPLAYWRITE, text, event_id=event_id))
+
+    def canvas(self, parameters: list, event_id: int = None):
+        """
+        Canvas command, the parameters are an operation and its arguments:
+        info replies the width, height and number of colors of the canvas;
+        palette, the first index and RRGGBB hex colors, changes the palette;
+        fill and a palette index fills the canvas;
+        raw or rle, the region as x,y,width,height and the base64 pixels, writes a region, raw with a palette index
+        per byte and rle with pairs of count and palette index
+        """
+        operation = parameters[0] or "info"
+        canvas = getattr(self.__senseos.display.primary_display.screen, "remote_canvas", None)
+        try:
+            if canvas is None:
+                raise ValueError(operation)
+            if operation == "info":
+                self.__reply(self.__build_command(COMMAND_CANVAS, "info", canvas.bitmap.width, canvas.bitmap.height,
+                                                  len(canvas.pixel_shader), event_id=event_id))
+                return
+            elif operation == "palette":
+                canvas.set_colors(parameters[1], parameters[2:])
+            elif operation == "fill":
+                canvas.clear(parameters[1])
+            elif operation == "raw" or operation == "rle":
+                x, y, width, height = parameters[1]
+                data = a2b_base64(parameters[2])
+                if operation == "raw":
+                    canvas.blit(x, y, width, height, data)
+                else:
+                    canvas.blit_rle(x, y, width, height, data)
+            else:
+                raise ValueError(operation)
+        except (ValueError, IndexError):
+            self.__reply(self.__build_command(COMMAND_CANVAS, "error", operation, event_id=event_id))
+            return
+
+        self.__reply(self.__build_command(COMMAND_CANVAS, "ok", operation, event_id=event_id))
+
+    def screenshot(self, parameters: list, event_id: int = None):
+        """
+        Screenshot command, the parameters are the first row and the number of rows of the band, replies the width
+        and height of the display, the first row and number of rows of the band, the encoding, raw or rle, and the
+        base64 RGB565 pixels of the band; rle pixels are runs of a count and a color
+        The band is rendered by the following polls within the render budget, never by the handler
+        """
+        display = self.__senseos.display.primary_display
+        y, rows = parameters
+        y = 0 if y is None else y
+        rows = SCREENSHOT_ROWS if rows is None else min(rows, SCREENSHOT_ROWS)
+        if y < 0 or y >= display.height or rows <= 0:
+            self.__reply(self.__build_command(COMMAND_SCREENSHOT, "error", event_id=event_id))
+            return
+        if len(self.__screenshots) >= SCREENSHOT_PENDING:
+            self.busy(COMMAND_SCREENSHOT, self.__lanes[COMMAND_LANES[COMMAND_SCREENSHOT]], event_id)
+            return
+
+        self.__screenshots.append([y, rows, event_id])
+
+    def __capture_screenshot(self):
+        """
+        Renders and encodes the next rows of the oldest screenshot band waiting within the render budget, replying
+        once it is captured
+        """
+        if not self.__screenshots:
+            return
+        display = self.__senseos.display.primary_display
+        y, rows, event_id = self.__screenshots[0]
+
+        # Only the band is rendered, so the memory used does not depend on the size of the display
+        if self.__screenshot is None:
+            self.__screenshot = SenseBand(SenseRasterizer(display.width, display.height), rows)
+            self.__screenshot.start(y, rows)
+
+        band = self.__screenshot
+        start = monotonic_ns()
+        deadline = start + int(RENDER_BUDGET * 1000000000)
+        captured = band.render(display.screen, deadline) and band.encode(deadline)
+        self.__screenshot_ns = max(self.__screenshot_ns, monotonic_ns() - start)
+        if not captured:
+            return
+
+        self.__screenshots.pop(0)
+        self.__screenshot = None
+        self.__publish(self.__device_id, self.__build_command(
+            COMMAND_SCREENSHOT, display.width, display.height, band.y, band.rows, band.encoding,
+            b2a_base64(band.data, newline=False).decode(), event_id=event_id
+        ))
+
+    def mirror(self, parameters: list, event_id: int = None):
+        """
+        Mirror command, the parameters are an operation and its arguments:
+        start, with the lease in seconds, the highest frame rate and the bytes per second, all optional or empty,
+        starts watching and sends the whole display on the next frame;
+        renew, with the same arguments, extends the lease without sending the whole display;
+        stop ends the lease;
+        replies the operation, the width and height of the display, the lease and the number of rows of the bands
+        """
+        operation, lease, max_fps, bandwidth = parameters
+        operation = operation or "start"
+        try:
+            if operation == "start" or operation == "renew":
+                lease = MIRROR_LEASE if lease is None else lease
+                self.__mirror.start(lease, max_fps, bandwidth, keyframe=operation == "start")
+            elif operation == "stop":
+                lease = 0
+                self.__mirror.stop()
+            else:
+                raise ValueError(operation)
+        except ValueError:
+            self.__reply(self.__build_command(COMMAND_MIRROR, "error", operation, event_id=event_id))
+            return
+
+        display = self.__senseos.display.primary_display
+        self.__reply(self.__build_command(COMMAND_MIRROR, operation, display.width, display.height, lease,
+                                          self.__mirror.rows, event_id=event_id))
 
 class SenseSynapseLinkSubsystem:
     # ---------------------------------------------------------------
@@ -394,6 +1400,49 @@ class SenseSynapseLinkSubsystem:
     __synapselink: SynapseLink = None
     """Internal field that contains the SynapseLink client"""
 
+    __device_id: str = None
+    """Internal field that contains the configured device id, used when the processor has no unique id"""
+
+    __groups: list = None
+    """Internal field that contains the groups joined by the device"""
+
+    __events: SynapseLinkEventCache = None
+    """Internal field that contains the event cache, kept across reconnections as the broker redelivers on them"""
+
+    __event_record: SynapseLinkEventRecord = None
+    """Internal field that contains the record of the last reboot command, kept in the non-volatile memory"""
+
+    __queue_path: str = QUEUE_PATH if STORAGE_AVAILABLE else None
+    """Internal field that contains the path of the offline queue log, None keeps the queue in memory only"""
+
+    __queue: SynapseLinkOfflineQueue = None
+    """Internal field that contains the offline queue, kept across reconnections"""
+
+    __lanes: dict = None
+    """Internal field that contains the priority lanes, kept across reconnections with their counters"""
+
+    __keep_alive: SynapseLinkKeepAlive = None
+    """Internal field that contains the adaptive keep alive, kept across reconnections as it learns from them"""
+
+    __rules: SynapseLinkRules = None
+    """Internal field that contains the rules engine, kept across reconnections as the rules keep running offline"""
+
+    __aggregator: SynapseLinkAggregator = None
+    """Internal field that contains the aggregator, kept across reconnections so windows span them"""
+
+    __time_sync: SynapseLinkTimeSync = None
+    """Internal field that contains the time synchronization, kept across reconnections as the drift is estimated
+    over many synchronizations"""
+
+    __read_cache: SynapseLinkReadCache = None
+    """Internal field that contains the read cache, kept across reconnections with its counters"""
+
+    __mirror: SynapseLinkMirror = None
+    """Internal field that contains the display mirror, kept across reconnections with the lease of the consoles"""
+
+    __compression: SynapseLinkCompression = None
+    """Internal field that contains the payload compression, kept across reconnections with the codecs negotiated"""
+
     # ---------------------------------------------------------------
     #                         Properties
     # ---------------------------------------------------------------
@@ -407,6 +1456,140 @@ class SenseSynapseLinkSubsystem:
         """
         return self.__initialised
 
+    @property
+    def device_id(self) -> str:
+        """
+        Device id used as MQTT client id and SynapseLink topic, derived from the unique id of the processor
+        :return: The device id, the configured one when not initialized
+        """
+        if self.__synapselink is not None:
+            return self.__synapselink.topic
+        return self.__device_id
+
+    @device_id.setter
+    def device_id(self, value: str):
+        """
+        Configures the device id used when the processor has no unique id, applied when the subsystem is next
+        initialized
+        :param value: The device id
+        """
+        self.__device_id = value
+
+    @property
+    def groups(self) -> list:
+        """
+        Groups joined by the device, commands published to a group reach all of its members
+        :return: List of group names
+        """
+        return list(self.__groups)
+
+    @groups.setter
+    def groups(self, value: list):
+        """
+        Sets the groups joined by the device, applied when the subsystem is next initialized
+        :param value: List of group names
+        """
+        self.__groups = list(value)
+
+    @property
+    def queue_path(self) -> str:
+        """
+        Path of the offline queue log on the flash
+        :return: The path, None when the queue is kept in memory only
+        """
+        return self.__queue_path
+
+    @queue_path.setter
+    def queue_path(self, value: str):
+        """
+        Sets the path of the offline queue log, applied when the subsystem is next initialized
+        :param value: The path, None to keep the queue in memory only
+        """
+        if value != self.__queue_path and self.__queue is not None:
+            self.__queue.flush()
+            self.__queue = None
+        self.__queue_path = value
+
+    @property
+    def queue(self) -> SynapseLinkOfflineQueue:
+        """
+        Offline queue holding the messages sent while offline
+        :return: The offline queue, None before the subsystem is first initialized
+        """
+        return self.__queue
+
+    @property
+    def lanes(self) -> dict:
+        """
+        Priority lanes limiting the inbound commands, with their counters
+        :return: Dictionary of lane name to lane
+        """
+        return self.__lanes
+
+    @property
+    def keep_alive(self) -> int:
+        """
+        Interval the MQTT client pings the broker at, adapted to the stability of the link
+        :return: The interval, in seconds
+        """
+        return self.__keep_alive.interval
+
+    @property
+    def rules(self) -> SynapseLinkRules:
+        """
+        Condition -> action rules evaluated on the device, with the cost of evaluating them
+        :return: The rules engine
+        """
+        return self.__rules
+
+    @property
+    def aggregator(self) -> SynapseLinkAggregator:
+        """
+        Aggregator reducing the samples of the analog pins to a summary per window
+        :return: The aggregator
+        """
+        return self.__aggregator
+
+    @property
+    def time_sync(self) -> SynapseLinkTimeSync:
+        """
+        Time synchronization with the time server of the backend, disciplining the wall clock of ACPI
+        :return: The time synchronization
+        """
+        return self.__time_sync
+
+    @property
+    def read_cache(self) -> SynapseLinkReadCache:
+        """
+        Read cache answering the reads of the pins from a fresh sample, with its hit and miss counters
+        :return: The read cache
+        """
+        return self.__read_cache
+
+    @property
+    def mirror(self) -> SynapseLinkMirror:
+        """
+        Display mirror streaming the bands of the display that changed while a console is watching
+        :return: The display mirror
+        """
+        return self.__mirror
+
+    @property
+    def compression(self) -> SynapseLinkCompression:
+        """
+        Payload compression of the large messages, with its counters
+        :return: The payload compression
+        """
+        return self.__compression
+
+    @property
+    def health(self) -> dict:
+        """
+        Health summary sent with the heartbeats of the device
+        :return: Dictionary of health values, see SynapseLink.health
+        """
+        return self.__synapselink.health
+
     @property
     def mqtt_connected(self) -> bool:
         """
@@ -431,12 +1614,28 @@ class SenseSynapseLinkSubsystem:
         """
         return self.__synapselink.connected
 
+    @property
+    def statistics(self) -> dict:
+        """
+        Handling statistics of each command received by the SynapseLink client
+        :return: Dictionary of command to [count, total time, maximum time], times in nanoseconds
+        """
+        return self.__synapselink.statistics
+
+    @property
+    def duplicates(self) -> int:
+        """
+        Number of repeated non-idempotent commands answered from the event cache instead of executed
+        :return: The number of repeated commands
+        """
+        return self.__synapselink.duplicates
+
     # ---------------------------------------------------------------
     #                         Methods
     # ---------------------------------------------------------------
 
     def connect(self):
-        if wifi.radio.connected and not self.__synapselink.connected:
+        if self.__synapselink.network_connected and not self.__synapselink.connected:
             return self.__synapselink.connect()
 
         return self.__synapselink.connected
@@ -450,19 +1649,100 @@ class SenseSynapseLinkSubsystem:
     def poll(self):
         return self.__synapselink.poll()
 
+    def wait(self, seconds: float):
+        """
+        Waits while offline, still running the sequence, the rules and the aggregator
+        :param seconds: Time to wait, in seconds
+        """
+        self.__synapselink.wait(seconds)
+
+    def join(self, group: str):
+        """
+        Joins a group, receiving the commands published to it
+        :param group: Name of the group
+        """
+        if group not in self.__groups:
+            self.__groups.append(group)
+        if self.__synapselink is not None:
+            self.__synapselink.join(group)
+
+    def leave(self, group: str):
+        """
+        Leaves a group
+        :param group: Name of the group
+        """
+        if group in self.__groups:
+            self.__groups.remove(group)
+        if self.__synapselink is not None:
+            self.__synapselink.leave(group)
+
+    def send(self, command: int, *args) -> bool:
+        """
+        Sends telemetry or an event to the backend, queued while offline and published once back online
+        :param command: The command
+        :param args: The parameters of the command
+        :return: True if published now, False if queued
+        """
+        return self.__synapselink.send(command, *args)
+
+    def configure_lane(self, name: str, rate: float, burst: float = None):
+        """
+        Changes the limit of a priority lane
+        :param name: Name of the lane, such as LANE_UI
+        :param rate: Commands admitted per second
+        :param burst: Commands admitted at once, defaults to one second of commands
+        """
+        self.__lanes[name].configure(rate, burst)
+
+    def reset_statistics(self):
+        """
+        Resets the handling statistics of the commands received by the SynapseLink client, the lane and read cache
+        counters and the cost of the rules
+        """
+        self.__synapselink.reset_statistics()
+
     def initialize(self):
 
-        self.__synapselink = SynapseLink(self.__senseos)
+        if self.__queue is None:
+            # The log is only written once boot.py remounted CIRCUITPY writable for the firmware
+            queue_path = self.__queue_path
+            if STORAGE_AVAILABLE and queue_path is not None and storage.getmount("/").readonly:
+                queue_path = None
+            self.__queue = SynapseLinkOfflineQueue(queue_path, max_bytes=QUEUE_MAX_BYTES,
+                                                   drain_rate=QUEUE_DRAIN_RATE)
+
+        self.__synapselink = SynapseLink(self.__senseos, self.__device_id, self.__groups, self.__events,
+                                         self.__queue, self.__lanes, self.__keep_alive, self.__rules,
+                                         self.__aggregator, self.__time_sync, self.__read_cache, self.__mirror,
+                                         self.__compression, self.__event_record)
         self.__initialised = True
 
     def deinitialize(self):
         
         self.disconnect()
+        # The main screen reinitializes the subsystem on every offline tick, so the buffer is written in batches
+        self.__queue.maintain()
 
         del self.__synapselink
         self.__initialised = False
 
     def __init__(self, senseos):
         self.__senseos = senseos
+        self.__groups = []
+        self.__events = SynapseLinkEventCache(EVENT_CACHE_CAPACITY)
+        self.__event_record = SynapseLinkEventRecord(
+            getattr(microcontroller, "nvm", None) if MICROCONTROLLER_AVAILABLE else None,
+            EVENT_RECORD_OFFSET, EVENT_RECORD_SIZE
+        )
+        self.__lanes = {name: SynapseLinkLane(name, *limit) for name, limit in LANE_LIMITS.items()}
+        self.__keep_alive = SynapseLinkKeepAlive(KEEP_ALIVE_MINIMUM, KEEP_ALIVE_MAXIMUM, KEEP_ALIVE_INITIAL)
+        self.__rules = SynapseLinkRules()
+        self.__aggregator = SynapseLinkAggregator([pin for pin in AGGREGATE_PINS if pin < len(pins)],
+                                                  AGGREGATE_WINDOW, AGGREGATE_INTERVAL)
+        self.__time_sync = SynapseLinkTimeSync(TIMESYNC_ROUNDS, TIMESYNC_INTERVAL)
+        self.__read_cache = SynapseLinkReadCache(READ_FRESHNESS)
+        self.__mirror = SynapseLinkMirror(MIRROR_ROWS, MIRROR_MIN_FPS, MIRROR_MAX_FPS, MIRROR_BANDWIDTH,
+                                          RENDER_BUDGET)
+        self.__compression = SynapseLinkCompression(COMPRESSION_THRESHOLD, COMPRESSION_LIMIT)
 
 
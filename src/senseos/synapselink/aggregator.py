@@ -0,0 +1,193 @@
+# SenseOS SynapseLink - Edge Aggregator
+#
+# Samples the analog pins continuously and reduces the samples of every
+# window to its minimum, maximum, mean and RMS, so the cloud receives one
+# compact summary per window instead of a stream of raw reads
+#
+# Each pin keeps a fixed-size accumulator of the sample count, minimum,
+# maximum, sum and sum of squares, updated in place on every sample, so the
+# memory used does not depend on the length of the window
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# External Libraries
+from math import sqrt
+from time import monotonic
+
+# ---------------------------------------------------------------------
+#                          Edge Aggregator
+# ---------------------------------------------------------------------
+
+class SynapseLinkAggregator:
+    # ---------------------------------------------------------------
+    #                         Internal Fields
+    # ---------------------------------------------------------------
+
+    __pins: tuple = ()
+    """Internal field that contains the pins sampled"""
+
+    __window: float = 60.0
+    """Internal field that contains the length of a window, in seconds, 0 when aggregation is disabled"""
+
+    __interval: float = 0.1
+    """Internal field that contains the time between samples, in seconds"""
+
+    __accumulators: list = None
+    """Internal field that contains the accumulator of each pin, as [count, minimum, maximum, sum, sum of squares]"""
+
+    __window_start: float = None
+    """Internal field that contains the time the current window started, None before the first sample"""
+
+    __next_sample: float = 0.0
+    """Internal field that contains the time the next sample is due"""
+
+    __windows: int = 0
+    """Internal field that contains the number of windows summarized"""
+
+    # ---------------------------------------------------------------
+    #                         Properties
+    # ---------------------------------------------------------------
+
+    @property
+    def pins(self) -> tuple:
+        """
+        Pins sampled
+        :return: Tuple of pin numbers
+        """
+        return self.__pins
+
+    @property
+    def window(self) -> float:
+        """
+        Length of a window
+        :return: The length, in seconds, 0 when aggregation is disabled
+        """
+        return self.__window
+
+    @property
+    def interval(self) -> float:
+        """
+        Time between samples
+        :return: The time, in seconds
+        """
+        return self.__interval
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Indicates if the pins are being sampled
+        :return: True if aggregation is enabled, False otherwise
+        """
+        return self.__window > 0 and len(self.__pins) > 0
+
+    @property
+    def windows(self) -> int:
+        """
+        Number of windows summarized
+        :return: The number of windows
+        """
+        return self.__windows
+
+    @property
+    def next_due(self) -> float:
+        """
+        Time until the next sample is due
+        :return: Time in seconds, 0 if a sample is due now, None when aggregation is disabled
+        """
+        if not self.enabled:
+            return None
+        return max(0.0, self.__next_sample - monotonic())
+
+    # ---------------------------------------------------------------
+    #                         Methods
+    # ---------------------------------------------------------------
+
+    def configure(self, window: float, interval: float):
+        """
+        Changes the window and the sampling interval, starting a new window
+        :param window: Length of a window, in seconds, 0 disables aggregation
+        :param interval: Time between samples, in seconds
+        :raises ValueError: When the window is negative or the interval is not positive or longer than the window
+        """
+        if window < 0 or interval <= 0 or (window and interval > window):
+            raise ValueError((window, interval))
+        self.__window = window
+        self.__interval = interval
+        self.reset()
+
+    def reset(self):
+        """
+        Discards the samples of the current window
+        """
+        self.__accumulators = [[0, 0, 0, 0, 0] for _ in self.__pins]
+        self.__window_start = None
+        self.__next_sample = monotonic()
+
+    def sample(self, read) -> list:
+        """
+        Samples the pins if a sample is due, closing the window once it is over
+        :param read: Function reading a pin, called with the pin number
+        :return: Summary of the window if it closed, see summary, None otherwise
+        """
+        if not self.enabled:
+            return None
+        now = monotonic()
+        if now < self.__next_sample:
+            return None
+
+        summary = None
+        if self.__window_start is None:
+            self.__window_start = now
+        elif now - self.__window_start >= self.__window:
+            summary = self.summary(now)
+            self.__accumulators = [[0, 0, 0, 0, 0] for _ in self.__pins]
+            self.__window_start = now
+            self.__windows += 1
+
+        for accumulator, pin in zip(self.__accumulators, self.__pins):
+            value = read(pin)
+            if accumulator[0] == 0 or value < accumulator[1]:
+                accumulator[1] = value
+            if accumulator[0] == 0 or value > accumulator[2]:
+                accumulator[2] = value
+            accumulator[0] += 1
+            accumulator[3] += value
+            accumulator[4] += value * value
+
+        # Samples keep their cadence when the main loop runs late, skipping the ones missed
+        self.__next_sample += self.__interval * (int((now - self.__next_sample) / self.__interval) + 1)
+        return summary
+
+    def summary(self, now: float = None) -> list:
+        """
+        Summarizes the current window
+        :param now: Time the window closes, defaults to now
+        :return: List with the length of the window in milliseconds followed by a (pin, count, minimum, maximum,
+                 mean, RMS) tuple per pin
+        """
+        if now is None:
+            now = monotonic()
+        duration = int((now - self.__window_start) * 1000) if self.__window_start is not None else 0
+        summary = [duration]
+        for accumulator, pin in zip(self.__accumulators, self.__pins):
+            count, minimum, maximum, total, squares = accumulator
+            if count:
+                summary.append((pin, count, minimum, maximum, total // count, int(sqrt(squares // count))))
+            else:
+                summary.append((pin, 0, 0, 0, 0, 0))
+        return summary
+
+    # ---------------------------------------------------------------
+    #                         Constructor
+    # ---------------------------------------------------------------
+
+    def __init__(self, pins: tuple, window: float = 60.0, interval: float = 0.1):
+        """
+        :param pins: Pins sampled
+        :param window: Length of a window, in seconds, 0 disables aggregation
+        :param interval: Time between samples, in seconds
+        """
+        self.__pins = tuple(pins)
+        self.configure(window, interval)
@@ -0,0 +1,327 @@
+# SenseOS SynapseLink - Payload Compression
+#
+# Compresses the parameters of large SynapseLink messages, once both ends
+# advertised a codec with COMMAND_MAXVERSION
+#
+# The codec is named in the command field, after the command number, such
+# as 17/lz, never in the parameters, so a parameter that merely looks
+# compressed is never mistaken for one, and the command and the event id
+# stay as they are, so lanes, acknowledgements and the event cache work
+# without decompressing anything. The parameters of a compressed message
+# are the size of the parameters as sent and the base64 compressed stream.
+# Messages smaller than the threshold, or which do not shrink, are sent as
+# they are
+#
+# Two codecs are known. zlib compresses best, but circuitpython only
+# decompresses a whole zlib stream at once, growing its buffer past any
+# size given, so zlib is only advertised where it can be decompressed up
+# to a bounded size, and only used to send where zlib can compress. lz is
+# a small LZ77 codec written in Python, so every port compresses and
+# decompresses it, checking the size limit on every token, so a large
+# message cannot exhaust the heap
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# External Libraries
+from binascii import a2b_base64, b2a_base64
+from io import BytesIO
+
+# Platform-specific Libraries (circuitpython)
+
+ZLIB_AVAILABLE = False
+"""Indicates if a zlib stream can be decompressed up to a bounded size, used to decompress the messages"""
+
+ZLIB_COMPRESS_AVAILABLE = False
+"""Indicates if the zlib module can compress, used to compress the messages sent"""
+
+try:
+    import zlib
+except ImportError:
+    pass
+else:
+    ZLIB_AVAILABLE = hasattr(zlib, "decompressobj") or hasattr(zlib, "DecompIO")
+    ZLIB_COMPRESS_AVAILABLE = hasattr(zlib, "compress")
+
+DEFLATE_AVAILABLE = False
+"""Indicates if the deflate module of micropython is available, used to decompress the messages"""
+
+try:
+    import deflate
+except ImportError:
+    pass
+else:
+    DEFLATE_AVAILABLE = hasattr(deflate, "DeflateIO")
+    ZLIB_AVAILABLE = ZLIB_AVAILABLE or DEFLATE_AVAILABLE
+
+CODEC_ZLIB = "zlib"
+"""Name of the zlib codec, as advertised with COMMAND_MAXVERSION"""
+CODEC_LZ = "lz"
+"""Name of the lz codec, as advertised with COMMAND_MAXVERSION"""
+CODEC_SEPARATOR = "/"
+"""Separator of the command number and of the codec of its compressed parameters, such as 17/lz"""
+SEPARATOR = ":,:"
+"""Separator of the fields of a SynapseLink message"""
+LZ_MIN_MATCH = 3
+"""Shortest repeated sequence encoded as a match by the lz codec, in bytes"""
+LZ_MAX_MATCH = 130
+"""Longest repeated sequence encoded as a single match by the lz codec, in bytes"""
+LZ_MAX_LITERALS = 128
+"""Longest run of bytes copied as they are by a single token of the lz codec"""
+LZ_WINDOW = 0xFFFF
+"""Farthest distance of a match of the lz codec, in bytes"""
+
+
+# ---------------------------------------------------------------------
+#                              lz Codec
+# ---------------------------------------------------------------------
+
+def lz_compress(data: bytes) -> bytes:
+    """
+    Compresses bytes with the lz codec, a stream of tokens: a byte below 0x80 followed by that many bytes plus one,
+    copied as they are, or a byte from 0x80 followed by a 2 byte big endian distance, repeating the bytes that far
+    back for 3 bytes plus the low bits of the token
+    :param data: Bytes to compress
+    :return: The compressed bytes
+    """
+    data = bytes(data)
+    output = bytearray()
+    table = {}
+    size = len(data)
+    index = 0
+    literals = 0
+    while index + LZ_MIN_MATCH <= size:
+        key = data[index:index + LZ_MIN_MATCH]
+        candidate = table.get(key)
+        table[key] = index
+        if candidate is None or index - candidate > LZ_WINDOW:
+            index += 1
+            continue
+
+        length = LZ_MIN_MATCH
+        longest = min(LZ_MAX_MATCH, size - index)
+        while length < longest and data[candidate + length] == data[index + length]:
+            length += 1
+        lz_literals(output, data, literals, index)
+        output.append(0x80 | (length - LZ_MIN_MATCH))
+        output.append((index - candidate) >> 8)
+        output.append((index - candidate) & 0xFF)
+        index += length
+        literals = index
+    lz_literals(output, data, literals, size)
+    return bytes(output)
+
+
+def lz_decompress(data: bytes, limit: int) -> bytes:
+    """
+    Decompresses bytes compressed with the lz codec, checking the size limit before each token is expanded
+    :param data: Compressed bytes
+    :param limit: Largest size of the decompressed bytes
+    :return: The decompressed bytes
+    :raises ValueError: When the bytes are corrupt or decompress past the limit
+    """
+    output = bytearray()
+    size = len(data)
+    index = 0
+    while index < size:
+        token = data[index]
+        index += 1
+        if token < 0x80:
+            count = token + 1
+            if index + count > size or len(output) + count > limit:
+                raise ValueError(index)
+            output += data[index:index + count]
+            index += count
+            continue
+
+        length = (token & 0x7F) + LZ_MIN_MATCH
+        if index + 2 > size:
+            raise ValueError(index)
+        distance = data[index] << 8 | data[index + 1]
+        index += 2
+        start = len(output) - distance
+        if not distance or start < 0 or len(output) + length > limit:
+            raise ValueError(index)
+        if distance >= length:
+            output += output[start:start + length]
+        else:
+            # Overlapping matches repeat the bytes they are copying, such as runs of the same byte
+            for offset in range(length):
+                output.append(output[start + offset])
+    return bytes(output)
+
+
+def lz_literals(output: bytearray, data: bytes, start: int, end: int):
+    """
+    Appends the bytes copied as they are to a stream of the lz codec, in runs of at most 128 bytes
+    """
+    while start < end:
+        count = min(LZ_MAX_LITERALS, end - start)
+        output.append(count - 1)
+        output += data[start:start + count]
+        start += count
+
+
+# ---------------------------------------------------------------------
+#                         Payload Compression
+# ---------------------------------------------------------------------
+
+class SynapseLinkCompression:
+    # ---------------------------------------------------------------
+    #                         Internal Fields
+    # ---------------------------------------------------------------
+
+    __threshold: int = 256
+    """Internal field that contains the smallest size of the parameters compressed, in bytes"""
+
+    __limit: int = 8192
+    """Internal field that contains the largest size of decompressed parameters, in bytes"""
+
+    __codec: str = None
+    """Internal field that contains the codec the messages sent are compressed with, None until the backend
+    advertised one the device compresses"""
+
+    __expanded: int = 0
+    """Internal field that contains the number of messages decompressed"""
+
+    __compressed: int = 0
+    """Internal field that contains the number of messages compressed"""
+
+    __saved: int = 0
+    """Internal field that contains the bytes saved by compressing the messages sent"""
+
+    __rejected: int = 0
+    """Internal field that contains the number of compressed messages rejected as corrupt or too large"""
+
+    # ---------------------------------------------------------------
+    #                         Properties
+    # ---------------------------------------------------------------
+
+    @property
+    def codecs(self) -> list:
+        """
+        Codecs the device decompresses, advertised with COMMAND_MAXVERSION
+        :return: List of codec names, the preferred one first
+        """
+        return [CODEC_ZLIB, CODEC_LZ] if ZLIB_AVAILABLE else [CODEC_LZ]
+
+    @property
+    def codec(self) -> str:
+        """
+        Codec the messages sent are compressed with
+        :return: The codec name, None until the backend advertised one the device compresses
+        """
+        return self.__codec
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Indicates if the messages sent are compressed
+        :return: True if the backend decompresses a codec the device compresses, False otherwise
+        """
+        return self.__codec is not None and self.__threshold > 0
+
+    @property
+    def statistics(self) -> dict:
+        """
+        Counters of the compression
+        :return: Dictionary with the messages decompressed, compressed and rejected and the bytes saved
+        """
+        return {
+            "expanded": self.__expanded,
+            "compressed": self.__compressed,
+            "rejected": self.__rejected,
+            "saved": self.__saved,
+        }
+
+    # ---------------------------------------------------------------
+    #                         Methods
+    # ---------------------------------------------------------------
+
+    def negotiate(self, codecs: list):
+        """
+        Records the codecs the backend decompresses, as advertised with COMMAND_MAXVERSION, choosing the codec of
+        the messages sent
+        :param codecs: List of codec names
+        """
+        if CODEC_ZLIB in codecs and ZLIB_COMPRESS_AVAILABLE:
+            self.__codec = CODEC_ZLIB
+        elif CODEC_LZ in codecs:
+            self.__codec = CODEC_LZ
+        else:
+            self.__codec = None
+
+    def expand(self, codec: str, parameters: list) -> list:
+        """
+        Decompresses the parameters of a message, if compressed
+        :param codec: Codec named in the command field of the message, None if not compressed
+        :param parameters: Parameters of the message, the size and the compressed stream when compressed
+        :return: The parameters as sent
+        :raises ValueError: When the codec is unknown or the compressed parameters are corrupt or larger than the
+                            limit
+        """
+        if codec is None:
+            return parameters
+        try:
+            if len(parameters) != 2 or codec not in self.codecs:
+                raise ValueError(codec)
+            size = int(parameters[0])
+            if size < 0 or size > self.__limit:
+                raise ValueError(size)
+            data = a2b_base64(parameters[1])
+            if codec == CODEC_LZ:
+                raw = lz_decompress(data, size)
+            else:
+                raw = self.__decompress(data, size)
+            if len(raw) != size:
+                raise ValueError(len(raw))
+            text = raw.decode()
+        except (ValueError, OSError, UnicodeError):
+            self.__rejected += 1
+            raise ValueError(codec)
+        self.__expanded += 1
+        return text.split(SEPARATOR)
+
+    def shrink(self, parameters: list) -> tuple:
+        """
+        Compresses the parameters of a message, if enabled, large enough and worth it
+        :param parameters: Parameters of the message, as strings
+        :return: The codec to name in the command field, None if not compressed, and the parameters to send
+        """
+        if not self.enabled:
+            return None, parameters
+        text = SEPARATOR.join(parameters)
+        if len(text) < self.__threshold:
+            return None, parameters
+        raw = text.encode()
+        packed = zlib.compress(raw) if self.__codec == CODEC_ZLIB else lz_compress(raw)
+        packed = [str(len(raw)), b2a_base64(packed, newline=False).decode()]
+        length = len(packed[0]) + len(SEPARATOR) + len(packed[1]) + len(CODEC_SEPARATOR) + len(self.__codec)
+        if length >= len(text):
+            return None, parameters
+        self.__compressed += 1
+        self.__saved += len(text) - length
+        return self.__codec, packed
+
+    def __decompress(self, data: bytes, size: int) -> bytes:
+        """
+        Decompresses a zlib stream, producing at most one byte over the expected size
+        """
+        if DEFLATE_AVAILABLE:
+            return deflate.DeflateIO(BytesIO(data), deflate.ZLIB).read(size + 1)
+        if hasattr(zlib, "decompressobj"):
+            return zlib.decompressobj().decompress(data, size + 1)
+        return zlib.DecompIO(BytesIO(data)).read(size + 1)
+
+    # ---------------------------------------------------------------
+    #                         Constructor
+    # ---------------------------------------------------------------
+
+    def __init__(self, threshold: int = 256, limit: int = 8192):
+        """
+        :param threshold: Smallest size of the parameters compressed, in bytes, 0 never compresses
+        :param limit: Largest size of decompressed parameters, in bytes
+        """
+        self.__threshold = threshold
+        self.__limit = limit
@@ -0,0 +1,151 @@
+# SenseOS SynapseLink - Event Cache
+#
+# Remembers the event ids recently handled from each sender, with the reply
+# sent for them, so commands sent again, such as a request retried by the
+# backend after a timeout, are answered again instead of executed again
+#
+# Senders are told apart by the sender id carried with the event id, as
+# every backend and dashboard publishes on the topic of the device, and
+# only senders that do not carry it are told apart by topic
+#
+# Memory is bounded: each sender keeps at most a fixed number of event ids,
+# evicting the least recently used one, and only a fixed number of senders
+# are tracked, evicting the least recently active one
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+SENDER_SEPARATOR = "@"
+"""Separator of the event id and of the sender id of a command, such as 42@backend, so the senders publishing on
+the same topic keep their own event ids"""
+
+
+# ---------------------------------------------------------------------
+#                            Event Cache
+# ---------------------------------------------------------------------
+
+class SynapseLinkEventCache:
+    # ---------------------------------------------------------------
+    #                         Internal Fields
+    # ---------------------------------------------------------------
+
+    __capacity: int = 16
+    """Internal field that contains the number of event ids remembered per sender"""
+
+    __max_senders: int = 8
+    """Internal field that contains the number of senders tracked"""
+
+    __senders: dict = None
+    """Internal field that contains the entries of each sender, as event id to [last use, reply]"""
+
+    __activity: dict = None
+    """Internal field that contains the last use of each sender"""
+
+    __clock: int = 0
+    """Internal field that orders the uses of the entries, increasing on every lookup and insertion"""
+
+    __hits: int = 0
+    """Internal field that contains the number of repeated events found"""
+
+    # ---------------------------------------------------------------
+    #                         Properties
+    # ---------------------------------------------------------------
+
+    @property
+    def capacity(self) -> int:
+        """
+        Number of event ids remembered per sender
+        :return: The capacity
+        """
+        return self.__capacity
+
+    @property
+    def hits(self) -> int:
+        """
+        Number of repeated events found since the cache was created or cleared
+        :return: The number of repeated events
+        """
+        return self.__hits
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self.__senders.values())
+
+    # ---------------------------------------------------------------
+    #                         Methods
+    # ---------------------------------------------------------------
+
+    def get(self, sender: str, event_id: int):
+        """
+        Looks up an event already handled, marking it as recently used
+        :param sender: Sender of the event, its sender id or the topic it was received on
+        :param event_id: Event id
+        :return: The reply sent for the event, None if the event was not handled recently
+        """
+        entries = self.__senders.get(sender)
+        if entries is None:
+            return None
+        entry = entries.get(event_id)
+        if entry is None:
+            return None
+
+        self.__clock += 1
+        entry[0] = self.__clock
+        self.__activity[sender] = self.__clock
+        self.__hits += 1
+        return entry[1]
+
+    def put(self, sender: str, event_id: int, reply: str):
+        """
+        Remembers an event handled, evicting the least recently used one when the sender is full
+        :param sender: Sender of the event, its sender id or the topic it was received on
+        :param event_id: Event id
+        :param reply: Reply sent for the event
+        """
+        entries = self.__senders.get(sender)
+        if entries is None:
+            if len(self.__senders) >= self.__max_senders:
+                oldest = self.__oldest(self.__activity)
+                del self.__activity[oldest]
+                del self.__senders[oldest]
+            entries = self.__senders[sender] = {}
+        elif event_id not in entries and len(entries) >= self.__capacity:
+            del entries[self.__oldest({key: entry[0] for key, entry in entries.items()})]
+
+        self.__clock += 1
+        entries[event_id] = [self.__clock, reply]
+        self.__activity[sender] = self.__clock
+
+    def clear(self):
+        """
+        Forgets every event
+        """
+        self.__senders = {}
+        self.__activity = {}
+        self.__hits = 0
+
+    @staticmethod
+    def __oldest(uses: dict):
+        """
+        Finds the least recently used key, a linear scan as the dictionaries are small
+        :param uses: Dictionary of key to last use
+        :return: The least recently used key
+        """
+        oldest = None
+        for key, use in uses.items():
+            if oldest is None or use < uses[oldest]:
+                oldest = key
+        return oldest
+
+    # ---------------------------------------------------------------
+    #                         Constructor
+    # ---------------------------------------------------------------
+
+    def __init__(self, capacity: int = 16, max_senders: int = 8):
+        """
+        :param capacity: Number of event ids remembered per sender
+        :param max_senders: Number of senders tracked
+        """
+        self.__capacity = max(1, capacity)
+        self.__max_senders = max(1, max_senders)
+        self.clear()
@@ -0,0 +1,149 @@
+# SenseOS SynapseLink - Event Record
+#
+# Remembers across a reset the last event handled right before resetting
+# the device, such as a reboot command, so the event cache knows it again
+# after the reset and a redelivery of the same event is answered again
+# instead of resetting the device again
+#
+# The event cache only lives in memory, and a reset never returns to store
+# the event in it, so the event is written to a small region of the
+# non-volatile memory of the microcontroller before the reset. The region
+# is only written when its contents change, to save wear, and holds the
+# device id, so the record of another device is never restored, such as
+# when the simulator runs a fleet sharing the same memory
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# SenseOS Libraries
+from senseos.synapselink.eventcache import SynapseLinkEventCache, SENDER_SEPARATOR
+
+RECORD_MAGIC = b"SE"
+"""Marker at the start of the region of a valid record"""
+RECORD_HEADER = 4
+"""Size of the marker and of the length of the record, in bytes"""
+
+
+# ---------------------------------------------------------------------
+#                            Event Record
+# ---------------------------------------------------------------------
+
+class SynapseLinkEventRecord:
+    # ---------------------------------------------------------------
+    #                         Internal Fields
+    # ---------------------------------------------------------------
+
+    __storage = None
+    """Internal field that contains the non-volatile memory, such as microcontroller.nvm, None when not available"""
+
+    __offset: int = 0
+    """Internal field that contains the start of the region of the record, in bytes"""
+
+    __size: int = 256
+    """Internal field that contains the size of the region of the record, in bytes"""
+
+    __restored: bool = False
+    """Internal field that indicates if the record was restored into the event cache since the device started"""
+
+    # ---------------------------------------------------------------
+    #                         Properties
+    # ---------------------------------------------------------------
+
+    @property
+    def available(self) -> bool:
+        """
+        Indicates if events can be recorded
+        :return: True if the non-volatile memory is available, False otherwise
+        """
+        return self.__storage is not None
+
+    # ---------------------------------------------------------------
+    #                         Methods
+    # ---------------------------------------------------------------
+
+    def save(self, device_id: str, sender: str, event_id: int, reply: str) -> bool:
+        """
+        Records an event handled, replacing the one recorded
+        :param device_id: Device id of the device handling the event
+        :param sender: Sender of the event, its sender id or the topic it was received on
+        :param event_id: Event id
+        :param reply: Reply sent for the event
+        :return: True if recorded, False if the memory is not available or the event does not fit in the region
+        """
+        if self.__storage is None:
+            return False
+        payload = "\n".join((device_id or "", sender or "", str(event_id), reply)).encode()
+        if RECORD_HEADER + len(payload) > self.__size:
+            return False
+
+        data = RECORD_MAGIC + len(payload).to_bytes(2, "little") + payload
+        start = self.__offset
+        if bytes(self.__storage[start:start + len(data)]) != data:
+            self.__storage[start:start + len(data)] = data
+        return True
+
+    def load(self, device_id: str) -> tuple:
+        """
+        Reads the event recorded
+        :param device_id: Device id of the device, the record of another device is ignored
+        :return: The (sender, event id, reply) of the event, None if no event of the device is recorded
+        """
+        if self.__storage is None:
+            return None
+        start = self.__offset
+        header = bytes(self.__storage[start:start + RECORD_HEADER])
+        if header[:2] != RECORD_MAGIC:
+            return None
+        length = int.from_bytes(header[2:], "little")
+        if RECORD_HEADER + length > self.__size:
+            return None
+        try:
+            fields = bytes(self.__storage[start + RECORD_HEADER:start + RECORD_HEADER + length]).decode().split("\n")
+            if len(fields) != 4 or fields[0] != (device_id or ""):
+                return None
+            # Event ids carrying the id of their sender are kept as they were received
+            event_id = fields[2] if SENDER_SEPARATOR in fields[2] else int(fields[2])
+            return fields[1], event_id, fields[3]
+        except (UnicodeError, ValueError):
+            # A corrupt record is as good as none
+            return None
+
+    def restore(self, cache: SynapseLinkEventCache, device_id: str) -> bool:
+        """
+        Puts the event recorded into the event cache, once after the device starts
+        :param cache: The event cache
+        :param device_id: Device id of the device
+        :return: True if an event was restored, False otherwise
+        """
+        if self.__restored:
+            return False
+        self.__restored = True
+        record = self.load(device_id)
+        if record is None:
+            return False
+        cache.put(*record)
+        return True
+
+    def clear(self):
+        """
+        Forgets the event recorded
+        """
+        if self.__storage is not None and bytes(self.__storage[self.__offset:self.__offset + 2]) == RECORD_MAGIC:
+            self.__storage[self.__offset:self.__offset + 2] = b"\x00\x00"
+
+    # ---------------------------------------------------------------
+    #                         Constructor
+    # ---------------------------------------------------------------
+
+    def __init__(self, storage=None, offset: int = 0, size: int = 256):
+        """
+        :param storage: Non-volatile memory, such as microcontroller.nvm, None records nothing
+        :param offset: Start of the region of the record, in bytes
+        :param size: Size of the region of the record, in bytes
+        """
+        if storage is not None and offset + size > len(storage):
+            storage = None
+        self.__storage = storage
+        self.__offset = offset
+        self.__size = size
@@ -0,0 +1,163 @@
+# SenseOS SynapseLink - Adaptive Keep Alive
+#
+# Chooses how often the MQTT client pings the broker and schedules the
+# heartbeats the device sends on its own
+#
+# The MQTT client pings the broker once every keep alive interval, from its
+# own clock, whatever was sent meanwhile, so the interval it pings at is
+# what the link pays for. The maximum is negotiated on each connection, so
+# the broker never drops a device pinging less often, and the client pings
+# at the adaptive interval: doubled, up to the maximum, each time the link
+# stays stable for a while, and halved, down to the minimum, when a
+# connection is lost before being stable, so flaky links are detected
+# sooner
+#
+# Heartbeats carry the health summary and are independent of the pings,
+# sent once every health interval whatever the traffic of the link
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# External Libraries
+from time import monotonic
+
+# ---------------------------------------------------------------------
+#                          Adaptive Keep Alive
+# ---------------------------------------------------------------------
+
+class SynapseLinkKeepAlive:
+    # ---------------------------------------------------------------
+    #                         Internal Fields
+    # ---------------------------------------------------------------
+
+    __minimum: int = 15
+    """Internal field that contains the shortest interval, in seconds"""
+
+    __maximum: int = 120
+    """Internal field that contains the longest interval, negotiated on each connection, in seconds"""
+
+    __interval: int = 60
+    """Internal field that contains the interval the MQTT client pings the broker at, in seconds"""
+
+    __stable_after: float = 600.0
+    """Internal field that contains how long a link must stay up to be considered stable, in seconds"""
+
+    __health_interval: float = 300.0
+    """Internal field that contains the time between heartbeats, in seconds"""
+
+    __connected_at: float = None
+    """Internal field that contains the time the current connection was established"""
+
+    __stable_since: float = None
+    """Internal field that contains the time the interval last changed on the current connection"""
+
+    __last_heartbeat: float = 0.0
+    """Internal field that contains the time the last heartbeat was sent"""
+
+    __losses: int = 0
+    """Internal field that contains the number of connections lost"""
+
+    # ---------------------------------------------------------------
+    #                         Properties
+    # ---------------------------------------------------------------
+
+    @property
+    def interval(self) -> int:
+        """
+        Interval the MQTT client pings the broker at, adapted to the stability of the link
+        :return: The interval, in seconds
+        """
+        return self.__interval
+
+    @property
+    def negotiated(self) -> int:
+        """
+        Keep alive negotiated on each connection, the longest interval the client may ping at
+        :return: The keep alive, in seconds
+        """
+        return self.__maximum
+
+    @property
+    def losses(self) -> int:
+        """
+        Number of connections lost
+        :return: The number of connections lost
+        """
+        return self.__losses
+
+    @property
+    def heartbeat_due(self) -> bool:
+        """
+        Indicates if a heartbeat should be sent now, as the last health summary is a health interval old
+        :return: True if a heartbeat is due, False otherwise
+        """
+        if self.__connected_at is None:
+            return False
+        return monotonic() - self.__last_heartbeat >= self.__health_interval
+
+    # ---------------------------------------------------------------
+    #                         Methods
+    # ---------------------------------------------------------------
+
+    def connected(self):
+        """
+        Records a connection established
+        """
+        self.__connected_at = monotonic()
+        self.__stable_since = self.__connected_at
+        self.__last_heartbeat = self.__connected_at
+
+    def adapt(self) -> int:
+        """
+        Doubles the interval, up to the maximum, each time the link stays stable for a while
+        :return: The interval, in seconds
+        """
+        if self.__connected_at is not None and self.__interval < self.__maximum:
+            now = monotonic()
+            if now - self.__stable_since >= self.__stable_after:
+                self.__interval = min(self.__maximum, self.__interval * 2)
+                self.__stable_since = now
+        return self.__interval
+
+    def lost(self):
+        """
+        Records a connection lost, halving the interval if the link was not stable
+        """
+        if self.__connected_at is None:
+            return
+        if monotonic() - self.__connected_at < self.__stable_after:
+            self.__interval = max(self.__minimum, self.__interval // 2)
+        self.__connected_at = None
+        self.__losses += 1
+
+    def closed(self):
+        """
+        Records a connection closed by the device, which says nothing about the link
+        """
+        self.__connected_at = None
+
+    def beat(self):
+        """
+        Records a heartbeat sent
+        """
+        self.__last_heartbeat = monotonic()
+
+    # ---------------------------------------------------------------
+    #                         Constructor
+    # ---------------------------------------------------------------
+
+    def __init__(self, minimum: int = 15, maximum: int = 120, initial: int = 60, stable_after: float = 600.0,
+                 health_interval: float = 300.0):
+        """
+        :param minimum: Shortest interval, in seconds
+        :param maximum: Longest interval, negotiated on each connection, in seconds
+        :param initial: Interval of the first connection, in seconds
+        :param stable_after: How long a link must stay up to be considered stable, in seconds
+        :param health_interval: Time between heartbeats, in seconds
+        """
+        self.__minimum = minimum
+        self.__maximum = max(minimum, maximum)
+        self.__interval = min(self.__maximum, max(minimum, initial))
+        self.__stable_after = stable_after
+        self.__health_interval = health_interval
@@ -0,0 +1,167 @@
+# SenseOS SynapseLink - Priority Lanes
+#
+# Inbound commands are classified into lanes, such as control, I/O and UI,
+# each limited by its own token bucket, so a flood of commands of one lane
+# is rejected with a busy reply instead of starving the commands of the
+# other lanes, which keep their own budget
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# External Libraries
+from time import monotonic
+
+# ---------------------------------------------------------------------
+#                               Lane
+# ---------------------------------------------------------------------
+
+class SynapseLinkLane:
+    # ---------------------------------------------------------------
+    #                         Internal Fields
+    # ---------------------------------------------------------------
+
+    __name: str = None
+    """Internal field that contains the name of the lane"""
+
+    __rate: float = 0.0
+    """Internal field that contains the commands admitted per second"""
+
+    __burst: float = 0.0
+    """Internal field that contains the commands admitted at once, the capacity of the bucket"""
+
+    __tokens: float = 0.0
+    """Internal field that contains the commands that can be admitted now"""
+
+    __last_refill: float = 0.0
+    """Internal field that contains the time the bucket was last refilled"""
+
+    __admitted: int = 0
+    """Internal field that contains the number of commands admitted"""
+
+    __rejected: int = 0
+    """Internal field that contains the number of commands rejected as busy"""
+
+    # ---------------------------------------------------------------
+    #                         Properties
+    # ---------------------------------------------------------------
+
+    @property
+    def name(self) -> str:
+        """
+        Name of the lane
+        :return: The name
+        """
+        return self.__name
+
+    @property
+    def rate(self) -> float:
+        """
+        Commands admitted per second
+        :return: The rate
+        """
+        return self.__rate
+
+    @property
+    def burst(self) -> float:
+        """
+        Commands admitted at once after the lane has been idle
+        :return: The burst
+        """
+        return self.__burst
+
+    @property
+    def admitted(self) -> int:
+        """
+        Number of commands admitted since the counters were reset
+        :return: The number of commands admitted
+        """
+        return self.__admitted
+
+    @property
+    def rejected(self) -> int:
+        """
+        Number of commands rejected as busy since the counters were reset
+        :return: The number of commands rejected
+        """
+        return self.__rejected
+
+    @property
+    def retry_after(self) -> int:
+        """
+        Time until the lane admits another command
+        :return: Time in milliseconds, 0 if a command would be admitted now
+        """
+        self.__refill()
+        if self.__tokens >= 1 or self.__rate <= 0:
+            return 0
+        return int((1 - self.__tokens) / self.__rate * 1000) + 1
+
+    @property
+    def statistics(self) -> dict:
+        """
+        Configuration and counters of the lane
+        :return: Dictionary with the rate, burst, admitted and rejected commands
+        """
+        return {
+            "rate": self.__rate,
+            "burst": self.__burst,
+            "admitted": self.__admitted,
+            "rejected": self.__rejected,
+        }
+
+    # ---------------------------------------------------------------
+    #                         Methods
+    # ---------------------------------------------------------------
+
+    def admit(self) -> bool:
+        """
+        Takes a token for a command
+        :return: True if the command is admitted, False if the lane is busy
+        """
+        self.__refill()
+        if self.__tokens >= 1:
+            self.__tokens -= 1
+            self.__admitted += 1
+            return True
+
+        self.__rejected += 1
+        return False
+
+    def configure(self, rate: float, burst: float = None):
+        """
+        Changes the limit of the lane
+        :param rate: Commands admitted per second
+        :param burst: Commands admitted at once, defaults to one second of commands
+        """
+        self.__refill()
+        self.__rate = rate
+        self.__burst = max(1.0, burst if burst is not None else rate)
+        self.__tokens = min(self.__tokens, self.__burst)
+
+    def reset_statistics(self):
+        """
+        Resets the counters of the lane
+        """
+        self.__admitted = 0
+        self.__rejected = 0
+
+    def __refill(self):
+        now = monotonic()
+        self.__tokens = min(self.__burst, self.__tokens + (now - self.__last_refill) * self.__rate)
+        self.__last_refill = now
+
+    # ---------------------------------------------------------------
+    #                         Constructor
+    # ---------------------------------------------------------------
+
+    def __init__(self, name: str, rate: float, burst: float = None):
+        """
+        :param name: Name of the lane
+        :param rate: Commands admitted per second
+        :param burst: Commands admitted at once, defaults to one second of commands
+        """
+        self.__name = name
+        self.__last_refill = monotonic()
+        self.configure(rate, burst)
+        self.__tokens = self.__burst
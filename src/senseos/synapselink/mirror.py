@@ -0,0 +1,317 @@
+# SenseOS SynapseLink - Display Mirror
+#
+# Streams what the display shows to the support console while someone is
+# watching, sending only the bands of rows that changed since the last frame
+#
+# Frames are rendered in steps from the main loop, each bounded by a time
+# budget and resuming mid-band where the last one stopped, as rendering a
+# whole band in Python takes longer than a refresh on microcontrollers, and
+# each band is compared with the checksum of the same band of the previous frame
+# instead of a copy of it, so the memory used is a single band. The frame
+# rate adapts to the bandwidth budget and to the time spent rendering, and
+# a display reporting its refreshes is only scanned after one, or at the
+# minimum frame rate
+#
+# Watching is a lease renewed by the console, mirroring stops on its own
+# once every console stopped renewing it
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# External Libraries
+from binascii import b2a_base64, crc32
+from time import monotonic, monotonic_ns
+
+# SenseOS Libraries
+from senseos.display.raster import SenseBand, SenseRasterizer
+
+CPU_SHARE = 4
+"""Inverse of the share of the time of the main loop spent rendering frames"""
+
+# ---------------------------------------------------------------------
+#                            Display Mirror
+# ---------------------------------------------------------------------
+
+class SynapseLinkMirror:
+    # ---------------------------------------------------------------
+    #                         Internal Fields
+    # ---------------------------------------------------------------
+
+    __rows: int = 16
+    """Internal field that contains the number of rows of a band"""
+
+    __min_fps: float = 0.2
+    """Internal field that contains the frame rate of displays reporting their refreshes while they do not refresh"""
+
+    __max_fps: float = 5.0
+    """Internal field that contains the highest frame rate"""
+
+    __bandwidth: int = 8192
+    """Internal field that contains the bytes per second the frames may use"""
+
+    __budget_ns: int = 5000000
+    """Internal field that contains the time a step may spend rendering and encoding, in nanoseconds"""
+
+    __lease_end: float = 0.0
+    """Internal field that contains the time the lease of the consoles ends"""
+
+    __display = None
+    """Internal field that contains the display mirrored"""
+
+    __rasterizer: SenseRasterizer = None
+    """Internal field that contains the rasterizer of the display mirrored"""
+
+    __band: SenseBand = None
+    """Internal field that contains the band being captured"""
+
+    __checksums: list = None
+    """Internal field that contains the checksum of each band of the last frame, None for bands not sent yet"""
+
+    __dirty: bool = True
+    """Internal field that contains if the display refreshed since the last frame started"""
+
+    __refreshes: bool = False
+    """Internal field that contains if the display reports its refreshes"""
+
+    __next_y: int = None
+    """Internal field that contains the first row of the next band of the frame, None between frames"""
+
+    __next_frame: float = 0.0
+    """Internal field that contains the time the next frame is due"""
+
+    __frame_start: float = 0.0
+    """Internal field that contains the time the current frame started"""
+
+    __frame_ns: int = 0
+    """Internal field that contains the time spent rendering the current frame, in nanoseconds"""
+
+    __frame_bytes: int = 0
+    """Internal field that contains the bytes sent for the current frame"""
+
+    __frame: int = 0
+    """Internal field that contains the number of the current frame"""
+
+    __bands_sent: int = 0
+    """Internal field that contains the number of bands sent"""
+
+    __bands_skipped: int = 0
+    """Internal field that contains the number of bands not sent as they did not change"""
+
+    __bytes_sent: int = 0
+    """Internal field that contains the number of bytes sent"""
+
+    __fps: float = 0.0
+    """Internal field that contains the frame rate allowed by the last frame"""
+
+    __step_ns: int = 0
+    """Internal field that contains the longest time spent by a step, in nanoseconds"""
+
+    # ---------------------------------------------------------------
+    #                         Properties
+    # ---------------------------------------------------------------
+
+    @property
+    def active(self) -> bool:
+        """
+        Indicates if a console is watching
+        :return: True if the lease did not end, False otherwise
+        """
+        return monotonic() < self.__lease_end
+
+    @property
+    def rows(self) -> int:
+        """
+        Number of rows of a band
+        :return: The number of rows
+        """
+        return self.__rows
+
+    @property
+    def statistics(self) -> dict:
+        """
+        Counters of the mirror
+        :return: Dictionary with the frames scanned, bands sent and skipped, bytes sent, the frame rate allowed
+                 by the last frame and the longest step, in nanoseconds
+        """
+        return {
+            "frames": self.__frame,
+            "sent": self.__bands_sent,
+            "skipped": self.__bands_skipped,
+            "bytes": self.__bytes_sent,
+            "fps": self.__fps,
+            "step_ns": self.__step_ns,
+        }
+
+    # ---------------------------------------------------------------
+    #                         Methods
+    # ---------------------------------------------------------------
+
+    def start(self, lease: float, max_fps: float = None, bandwidth: int = None, keyframe: bool = True):
+        """
+        Starts or renews the lease of the consoles
+        :param lease: Time the consoles watch unless renewed, in seconds
+        :param max_fps: Highest frame rate, None keeps the current one
+        :param bandwidth: Bytes per second the frames may use, None keeps the current one
+        :param keyframe: Should every band of the next frame be sent, for a console that just started watching,
+                         always the case when no console was watching
+        :raises ValueError: When the lease, frame rate or bandwidth are not positive
+        """
+        if lease <= 0 or (max_fps is not None and max_fps <= 0) or (bandwidth is not None and bandwidth <= 0):
+            raise ValueError((lease, max_fps, bandwidth))
+        if max_fps is not None:
+            self.__max_fps = max_fps
+        if bandwidth is not None:
+            self.__bandwidth = bandwidth
+        if keyframe or not self.active:
+            self.__checksums = None
+            self.__next_y = None
+            self.__next_frame = 0.0
+        self.__lease_end = monotonic() + lease
+
+    def stop(self):
+        """
+        Ends the lease of the consoles
+        """
+        self.__lease_end = 0.0
+        self.__next_y = None
+        self.__band = None
+
+    def invalidate(self):
+        """
+        Notes the display refreshed, called by the display on every refresh
+        """
+        self.__dirty = True
+        self.__refreshes = True
+
+    def step(self, display, publish) -> int:
+        """
+        Renders and encodes the next rows of the frame within the budget if a frame is due, publishing the band once
+        captured if it changed
+        :param display: Display mirrored
+        :param publish: Function publishing a message, called with the parameters of the message
+        :return: Number of bytes published
+        """
+        if not self.active:
+            if self.__band is not None:
+                self.stop()
+            return 0
+
+        if display is not self.__display:
+            self.__attach(display)
+        if self.__next_y is None:
+            now = monotonic()
+            if now < self.__next_frame:
+                return 0
+            if self.__refreshes and not self.__dirty and self.__checksums is not None and \
+                    now < self.__frame_start + 1 / self.__min_fps:
+                return 0
+            self.__dirty = False
+            self.__frame += 1
+            self.__frame_start = now
+            self.__frame_ns = 0
+            self.__frame_bytes = 0
+            self.__next_y = 0
+            if self.__band is None:
+                self.__band = SenseBand(self.__rasterizer, self.__rows)
+            self.__band.start(0, self.__rows)
+
+        band = self.__band
+        start = monotonic_ns()
+        deadline = start + self.__budget_ns
+        index = band.y // self.__rows
+        if not band.rendered:
+            # Bands that did not change are never encoded
+            if not band.render(display.screen, deadline):
+                self.__spent(start)
+                return 0
+            if self.__checksums is not None and self.__checksums[index] == band.checksum:
+                self.__bands_skipped += 1
+                self.__spent(start)
+                self.__next_band(display, publish)
+                return 0
+            if monotonic_ns() >= deadline:
+                self.__spent(start)
+                return 0
+
+        if not band.encode(deadline):
+            self.__spent(start)
+            return 0
+
+        data = b2a_base64(band.data, newline=False).decode()
+        self.__spent(start)
+        publish("band", self.__frame, display.width, display.height, band.y, band.rows, band.encoding, data)
+        if self.__checksums is None:
+            self.__checksums = [None] * ((display.height + self.__rows - 1) // self.__rows)
+        self.__checksums[index] = band.checksum
+        sent = len(data)
+        self.__bands_sent += 1
+        self.__frame_bytes += sent
+        self.__bytes_sent += sent
+        self.__next_band(display, publish)
+        return sent
+
+    def __spent(self, start: int):
+        """
+        Accounts the time spent by a step to the frame
+        """
+        elapsed = monotonic_ns() - start
+        self.__frame_ns += elapsed
+        if elapsed > self.__step_ns:
+            self.__step_ns = elapsed
+
+    def __next_band(self, display, publish):
+        """
+        Moves on to the next band of the frame, ending the frame after the last one
+        """
+        self.__next_y = self.__band.y + self.__band.rows
+        if self.__next_y >= display.height:
+            self.__finish(publish)
+        else:
+            self.__band.start(self.__next_y, self.__rows)
+
+    def __finish(self, publish):
+        """
+        Ends the frame, scheduling the next one within the bandwidth and rendering budgets
+        """
+        self.__next_y = None
+        if self.__frame_bytes:
+            publish("frame", self.__frame, self.__frame_bytes)
+        interval = max(1 / self.__max_fps, self.__frame_bytes / self.__bandwidth,
+                       self.__frame_ns * CPU_SHARE / 1000000000)
+        self.__fps = 1 / interval
+        self.__next_frame = self.__frame_start + interval
+
+    def __attach(self, display):
+        """
+        Starts mirroring a display, following its refreshes
+        """
+        if self.__display is not None and hasattr(self.__display, "remove_refresh_listener"):
+            self.__display.remove_refresh_listener(self.invalidate)
+        self.__display = display
+        self.__rasterizer = SenseRasterizer(display.width, display.height)
+        self.__refreshes = False
+        self.__checksums = None
+        self.__next_y = None
+        self.__band = None
+        if hasattr(display, "add_refresh_listener"):
+            display.add_refresh_listener(self.invalidate)
+
+    # ---------------------------------------------------------------
+    #                         Constructor
+    # ---------------------------------------------------------------
+
+    def __init__(self, rows: int = 16, min_fps: float = 0.2, max_fps: float = 5.0, bandwidth: int = 8192,
+                 budget: float = 0.005):
+        """
+        :param rows: Number of rows of a band
+        :param min_fps: Frame rate of displays reporting their refreshes while they do not refresh
+        :param max_fps: Highest frame rate
+        :param bandwidth: Bytes per second the frames may use
+        :param budget: Time a step may spend rendering and encoding, in seconds, exceeded by at most a row
+        """
+        self.__rows = rows
+        self.__min_fps = min_fps
+        self.__max_fps = max_fps
+        self.__bandwidth = bandwidth
+        self.__budget_ns = int(budget * 1000000000)
@@ -0,0 +1,365 @@
+# SenseOS SynapseLink - Offline Queue
+#
+# Store-and-forward queue for the telemetry and events published while the
+# device is offline, kept in an append-only log on the flash so it survives
+# outages of hours and reboots, and drained at a controlled rate once the
+# device is back online
+#
+# Records are buffered in memory and written in batches to save flash wear.
+# The log is split in two segments, the one being appended to and an older
+# one being drained, each capped at half of the maximum size: when the
+# segment being appended to is full, the older segment is dropped, so the
+# oldest records are lost first. When the flash cannot be written, such as
+# when CIRCUITPY is mounted read-only, the records are kept in memory only,
+# within the same maximum size, and the mode of the queue tells which one
+# is in use
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# External Libraries
+import json
+import os
+from time import monotonic
+
+MODE_FLASH = "flash"
+"""Mode of a queue writing its records to the log on the flash"""
+MODE_MEMORY = "memory"
+"""Mode of a queue keeping its records in memory only, lost on a reboot"""
+
+
+# ---------------------------------------------------------------------
+#                           Offline Queue
+# ---------------------------------------------------------------------
+
+class SynapseLinkOfflineQueue:
+    # ---------------------------------------------------------------
+    #                         Internal Fields
+    # ---------------------------------------------------------------
+
+    __path: str = None
+    """Internal field that contains the path of the log, None keeps the records in memory only"""
+
+    __max_bytes: int = 64 * 1024
+    """Internal field that contains the maximum size of the queue, in bytes"""
+
+    __batch_bytes: int = 512
+    """Internal field that contains the size of the memory buffer written to the log at once, in bytes"""
+
+    __flush_interval: float = 30.0
+    """Internal field that contains the maximum time records are kept in the memory buffer, in seconds"""
+
+    __drain_rate: float = 5.0
+    """Internal field that contains the records published per second while draining"""
+
+    __drain_burst: int = 10
+    """Internal field that contains the records published at once while draining"""
+
+    __buffer: list = None
+    """Internal field that contains the records not written to the log yet"""
+
+    __buffer_bytes: int = 0
+    """Internal field that contains the size of the records not written to the log yet, in bytes"""
+
+    __last_flush: float = 0.0
+    """Internal field that contains the time the memory buffer was last written to the log"""
+
+    __offset: int = 0
+    """Internal field that contains the position of the next record to drain in the older segment, in bytes"""
+
+    __saved_offset: int = 0
+    """Internal field that contains the position last saved to the flash"""
+
+    __tokens: float = 0.0
+    """Internal field that contains the records that can be published now while draining"""
+
+    __last_drain: float = None
+    """Internal field that contains the time the queue was last drained"""
+
+    __dropped: int = 0
+    """Internal field that contains the number of records dropped because the queue was full"""
+
+    __stored: bool = False
+    """Internal field that indicates if the log may contain records, to avoid checking the flash on every message"""
+
+    __writable: bool = True
+    """Internal field that indicates if the last write to the log succeeded"""
+
+    # ---------------------------------------------------------------
+    #                         Properties
+    # ---------------------------------------------------------------
+
+    @property
+    def path(self) -> str:
+        """
+        Path of the log on the flash
+        :return: The path, None when the records are kept in memory only
+        """
+        return self.__path
+
+    @property
+    def mode(self) -> str:
+        """
+        Where the records are kept, memory when there is no log or the last write to it failed
+        :return: MODE_FLASH or MODE_MEMORY
+        """
+        return MODE_FLASH if self.__path is not None and self.__writable else MODE_MEMORY
+
+    @property
+    def size(self) -> int:
+        """
+        Size of the records waiting to be published
+        :return: Size in bytes, in memory and on the flash
+        """
+        size = self.__buffer_bytes
+        if self.__path is not None:
+            size += max(0, self.__file_size(self.__backlog_path) - self.__offset)
+            size += self.__file_size(self.__path)
+        return size
+
+    @property
+    def pending(self) -> bool:
+        """
+        Indicates if there are records waiting to be published
+        :return: True if there are records waiting, False otherwise
+        """
+        return bool(self.__buffer) or self.__stored
+
+    @property
+    def dropped(self) -> int:
+        """
+        Number of records dropped because the queue was full, since the queue was created
+        :return: The number of records dropped
+        """
+        return self.__dropped
+
+    @property
+    def __backlog_path(self) -> str:
+        return self.__path + ".1"
+
+    @property
+    def __offset_path(self) -> str:
+        return self.__path + ".pos"
+
+    # ---------------------------------------------------------------
+    #                         Methods
+    # ---------------------------------------------------------------
+
+    def append(self, topic: str, message: str):
+        """
+        Queues a message, written to the log once the memory buffer is full
+        :param topic: Topic the message is published to
+        :param message: The message
+        """
+        record = json.dumps([topic, message]) + "\n"
+        self.__buffer.append(record)
+        self.__buffer_bytes += len(record)
+
+        if self.__buffer_bytes >= self.__batch_bytes:
+            self.flush()
+
+    def maintain(self):
+        """
+        Writes the memory buffer to the log when it has been waiting for longer than the flush interval,
+        to be called periodically while offline
+        """
+        if self.__buffer and monotonic() - self.__last_flush >= self.__flush_interval:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the memory buffer to the log
+        """
+        self.__last_flush = monotonic()
+        if not self.__buffer:
+            return
+
+        if self.__path is not None:
+            data = "".join(self.__buffer)
+            try:
+                if self.__file_size(self.__path) + len(data) > self.__max_bytes // 2:
+                    self.__rotate()
+                with open(self.__path, "a") as file:
+                    file.write(data)
+                self.__stored = True
+            except OSError:
+                self.__writable = False
+            else:
+                self.__writable = True
+                self.__buffer = []
+                self.__buffer_bytes = 0
+                return
+
+        # Records that cannot be written stay in memory, dropping the oldest ones beyond the maximum size
+        while self.__buffer_bytes > self.__max_bytes and self.__buffer:
+            self.__buffer_bytes -= len(self.__buffer.pop(0))
+            self.__dropped += 1
+
+    def drain(self, publish) -> int:
+        """
+        Publishes the queued records, oldest first, no faster than the drain rate
+        A record is only removed from the queue once published, an exception raised by publish stops the drain
+        :param publish: Function publishing a message, called with the topic and the message
+        :return: Number of records published
+        """
+        now = monotonic()
+        if self.__last_drain is not None:
+            self.__tokens = min(self.__drain_burst, self.__tokens + (now - self.__last_drain) * self.__drain_rate)
+        self.__last_drain = now
+
+        sent = 0
+        try:
+            if self.__stored:
+                sent = self.__drain_log(publish)
+
+            while self.__tokens >= 1 and self.__buffer:
+                record = self.__buffer[0]
+                publish(*json.loads(record))
+                self.__buffer.pop(0)
+                self.__buffer_bytes -= len(record)
+                self.__tokens -= 1
+                sent += 1
+        finally:
+            self.__save_offset()
+
+        return sent
+
+    def clear(self):
+        """
+        Drops every queued record
+        """
+        self.__buffer = []
+        self.__buffer_bytes = 0
+        if self.__path is not None:
+            for path in (self.__path, self.__backlog_path, self.__offset_path):
+                self.__remove(path)
+        self.__offset = 0
+        self.__saved_offset = 0
+        self.__stored = False
+
+    def __drain_log(self, publish) -> int:
+        """
+        Publishes the records of the log, moving the segment being appended to into the older segment once the
+        older segment is drained
+        :param publish: Function publishing a message, called with the topic and the message
+        :return: Number of records published
+        """
+        sent = 0
+        while self.__tokens >= 1:
+            if self.__file_size(self.__backlog_path) == 0:
+                if self.__file_size(self.__path) == 0:
+                    self.__stored = False
+                    break
+                self.__remove(self.__backlog_path)
+                os.rename(self.__path, self.__backlog_path)
+                self.__offset = 0
+
+            with open(self.__backlog_path, "rb") as file:
+                file.seek(self.__offset)
+                while self.__tokens >= 1:
+                    line = file.readline()
+                    if not line:
+                        break
+                    if line.endswith(b"\n"):
+                        try:
+                            topic, message = json.loads(line.decode())
+                        except ValueError:
+                            pass
+                        else:
+                            publish(topic, message)
+                            self.__tokens -= 1
+                            sent += 1
+                    self.__offset += len(line)
+                else:
+                    return sent
+
+            # The older segment is drained
+            self.__remove(self.__backlog_path)
+            self.__remove(self.__offset_path)
+            self.__offset = 0
+            self.__saved_offset = 0
+
+        return sent
+
+    def __rotate(self):
+        """
+        Moves the segment being appended to into the older segment, dropping the records left in the older one
+        """
+        if self.__file_size(self.__backlog_path):
+            with open(self.__backlog_path, "rb") as file:
+                file.seek(self.__offset)
+                while file.readline():
+                    self.__dropped += 1
+            self.__remove(self.__backlog_path)
+        self.__remove(self.__offset_path)
+        self.__offset = 0
+        self.__saved_offset = 0
+        if self.__file_size(self.__path):
+            os.rename(self.__path, self.__backlog_path)
+
+    def __load_offset(self):
+        """
+        Restores the drain position saved before a reboot
+        """
+        try:
+            with open(self.__offset_path) as file:
+                self.__offset = int(file.read())
+        except (OSError, ValueError):
+            self.__offset = 0
+        self.__saved_offset = self.__offset
+
+    def __save_offset(self):
+        """
+        Saves the drain position, at most once per batch of records drained to save flash wear
+        """
+        if self.__path is None or self.__offset - self.__saved_offset < self.__batch_bytes:
+            return
+        try:
+            with open(self.__offset_path, "w") as file:
+                file.write(str(self.__offset))
+        except OSError:
+            return
+        self.__saved_offset = self.__offset
+
+    @staticmethod
+    def __file_size(path: str) -> int:
+        try:
+            return os.stat(path)[6]
+        except OSError:
+            return 0
+
+    @staticmethod
+    def __remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    # ---------------------------------------------------------------
+    #                         Constructor
+    # ---------------------------------------------------------------
+
+    def __init__(self, path: str = None, max_bytes: int = 64 * 1024, batch_bytes: int = 512,
+                 flush_interval: float = 30.0, drain_rate: float = 5.0, drain_burst: int = 10):
+        """
+        :param path: Path of the log on the flash, None keeps the records in memory only
+        :param max_bytes: Maximum size of the queue, in bytes
+        :param batch_bytes: Size of the memory buffer written to the log at once, in bytes
+        :param flush_interval: Maximum time records are kept in the memory buffer, in seconds
+        :param drain_rate: Records published per second while draining
+        :param drain_burst: Records published at once while draining
+        """
+        self.__path = path
+        self.__max_bytes = max_bytes
+        self.__batch_bytes = batch_bytes
+        self.__flush_interval = flush_interval
+        self.__drain_rate = drain_rate
+        self.__drain_burst = max(1, drain_burst)
+        self.__tokens = float(self.__drain_burst)
+        self.__buffer = []
+        self.__last_flush = monotonic()
+
+        if self.__path is not None:
+            self.__load_offset()
+            self.__stored = self.size > 0
@@ -0,0 +1,147 @@
+# SenseOS SynapseLink - Read Cache
+#
+# Keeps the last value read from each pin for a short freshness window, so
+# the reads of several dashboards watching the same device within that
+# window are answered from a single sample instead of each reconfiguring
+# and reading the pin again
+#
+# Each pin may have its own freshness window, 0 disabling the cache for the
+# pin, and the value of a pin is forgotten as soon as it is written or
+# reconfigured
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# External Libraries
+from time import monotonic_ns
+
+# ---------------------------------------------------------------------
+#                            Read Cache
+# ---------------------------------------------------------------------
+
+class SynapseLinkReadCache:
+    # ---------------------------------------------------------------
+    #                         Internal Fields
+    # ---------------------------------------------------------------
+
+    __freshness_ns: int = 100000000
+    """Internal field that contains how long a value is reused on pins without their own window, in nanoseconds"""
+
+    __pin_freshness_ns: dict = None
+    """Internal field that contains the freshness window of the pins with their own, in nanoseconds"""
+
+    __values: dict = None
+    """Internal field that contains the last value read from each pin, as pin to (time read, value)"""
+
+    __hits: int = 0
+    """Internal field that contains the number of reads answered from the cache"""
+
+    __misses: int = 0
+    """Internal field that contains the number of reads of the hardware"""
+
+    # ---------------------------------------------------------------
+    #                         Properties
+    # ---------------------------------------------------------------
+
+    @property
+    def freshness(self) -> float:
+        """
+        How long a value is reused on pins without their own window
+        :return: Time in seconds
+        """
+        return self.__freshness_ns / 1000000000
+
+    @property
+    def hits(self) -> int:
+        """
+        Number of reads answered from the cache since the counters were reset
+        :return: The number of hits
+        """
+        return self.__hits
+
+    @property
+    def misses(self) -> int:
+        """
+        Number of reads of the hardware since the counters were reset
+        :return: The number of misses
+        """
+        return self.__misses
+
+    @property
+    def statistics(self) -> dict:
+        """
+        Counters of the cache
+        :return: Dictionary with the hits, misses and the share of reads answered from the cache
+        """
+        reads = self.__hits + self.__misses
+        return {
+            "hits": self.__hits,
+            "misses": self.__misses,
+            "hit_ratio": self.__hits / reads if reads else 0.0,
+        }
+
+    # ---------------------------------------------------------------
+    #                         Methods
+    # ---------------------------------------------------------------
+
+    def configure(self, pin: int, freshness: float = None):
+        """
+        Changes the freshness window of a pin
+        :param pin: SynapseLink pin number
+        :param freshness: How long a value is reused, in seconds, 0 disables the cache for the pin, None restores
+                          the default window
+        """
+        if freshness is None:
+            self.__pin_freshness_ns.pop(pin, None)
+        else:
+            self.__pin_freshness_ns[pin] = int(freshness * 1000000000)
+        self.__values.pop(pin, None)
+
+    def read(self, pin: int, read):
+        """
+        Reads a pin through the cache
+        :param pin: SynapseLink pin number
+        :param read: Function reading the hardware, called with the pin number when the cached value is not fresh
+        :return: The value of the pin
+        """
+        now = monotonic_ns()
+        entry = self.__values.get(pin)
+        if entry is not None and now - entry[0] < self.__pin_freshness_ns.get(pin, self.__freshness_ns):
+            self.__hits += 1
+            return entry[1]
+
+        self.__misses += 1
+        value = read(pin)
+        if self.__pin_freshness_ns.get(pin, self.__freshness_ns) > 0:
+            self.__values[pin] = (now, value)
+        return value
+
+    def invalidate(self, pin: int = None):
+        """
+        Forgets the value of a pin, after it is written or reconfigured
+        :param pin: SynapseLink pin number, None forgets every pin
+        """
+        if pin is None:
+            self.__values.clear()
+        else:
+            self.__values.pop(pin, None)
+
+    def reset_statistics(self):
+        """
+        Resets the hit and miss counters
+        """
+        self.__hits = 0
+        self.__misses = 0
+
+    # ---------------------------------------------------------------
+    #                         Constructor
+    # ---------------------------------------------------------------
+
+    def __init__(self, freshness: float = 0.1):
+        """
+        :param freshness: How long a value is reused on pins without their own window, in seconds
+        """
+        self.__freshness_ns = int(freshness * 1000000000)
+        self.__pin_freshness_ns = {}
+        self.__values = {}
@@ -0,0 +1,254 @@
+# SenseOS SynapseLink - Rules Engine
+#
+# Local condition -> action rules pushed by the cloud, evaluated from the
+# main loop, so reactions such as turning on a relay when an input goes low
+# take milliseconds instead of a cloud round trip
+#
+# Rules are written as condition?action&action..., with the conditions
+#   d<pin>=<0|1>     digital pin has the value
+#   a<pin><<value>   analog pin below the value
+#   a<pin>><value>   analog pin above the value
+#   t<ms>            every ms milliseconds
+# and the actions
+#   w<pin>=<0|1>     write the value to a digital pin
+#   x<pin>           toggle a digital pin
+#   e                report the rule fired to the cloud
+#
+# Pin conditions fire when they become true, not while they stay true, and
+# every rule is compiled into a tuple of small integers, so the table stays
+# compact and cheap to evaluate. The time spent evaluating the table on
+# each tick is measured
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# External Libraries
+from time import monotonic_ns
+
+RULE_DIGITAL = 0
+"""Condition on the value of a digital pin"""
+RULE_BELOW = 1
+"""Condition on an analog pin below a threshold"""
+RULE_ABOVE = 2
+"""Condition on an analog pin above a threshold"""
+RULE_TIMER = 3
+"""Condition true every period"""
+
+ACTION_WRITE = 0
+"""Action writing a value to a digital pin"""
+ACTION_TOGGLE = 1
+"""Action toggling a digital pin"""
+ACTION_EVENT = 2
+"""Action reporting the rule fired"""
+
+# ---------------------------------------------------------------------
+#                            Rules Engine
+# ---------------------------------------------------------------------
+
+class SynapseLinkRules:
+    # ---------------------------------------------------------------
+    #                         Internal Fields
+    # ---------------------------------------------------------------
+
+    __rules: list = None
+    """Internal field that contains the compiled rules, as (condition, pin, threshold, actions) tuples"""
+
+    __states: list = None
+    """Internal field that contains the state of each rule, the last truth of pin conditions or the next due time
+    of timers"""
+
+    __source: list = None
+    """Internal field that contains the rules as written"""
+
+    __evaluations: int = 0
+    """Internal field that contains the number of evaluations of the table"""
+
+    __total_ns: int = 0
+    """Internal field that contains the time spent evaluating the table, in nanoseconds"""
+
+    __max_ns: int = 0
+    """Internal field that contains the longest evaluation of the table, in nanoseconds"""
+
+    __last_ns: int = 0
+    """Internal field that contains the time spent on the last evaluation of the table, in nanoseconds"""
+
+    __fired: int = 0
+    """Internal field that contains the number of times rules fired"""
+
+    # ---------------------------------------------------------------
+    #                         Properties
+    # ---------------------------------------------------------------
+
+    @property
+    def rules(self) -> list:
+        """
+        Rules loaded, as written
+        :return: List of rules
+        """
+        return list(self.__source)
+
+    @property
+    def statistics(self) -> dict:
+        """
+        Evaluation cost of the table
+        :return: Dictionary with the number of rules, evaluations, rules fired and the mean, maximum and last time
+                 spent evaluating the table, in nanoseconds
+        """
+        return {
+            "rules": len(self.__rules),
+            "evaluations": self.__evaluations,
+            "fired": self.__fired,
+            "mean_ns": self.__total_ns // self.__evaluations if self.__evaluations else 0,
+            "max_ns": self.__max_ns,
+            "last_ns": self.__last_ns,
+        }
+
+    def __len__(self) -> int:
+        return len(self.__rules)
+
+    # ---------------------------------------------------------------
+    #                         Methods
+    # ---------------------------------------------------------------
+
+    @staticmethod
+    def compile(source: str) -> tuple:
+        """
+        Compiles a rule
+        :param source: The rule, such as d3=0?w0=1&e
+        :return: Tuple of condition, pin, threshold and actions
+        :raises ValueError: When the rule is not valid
+        """
+        condition, separator, actions = source.partition("?")
+        if not separator or not condition or not actions:
+            raise ValueError(source)
+
+        kind = condition[0]
+        if kind == "d":
+            pin, _, value = condition[1:].partition("=")
+            compiled = (RULE_DIGITAL, int(pin), int(value))
+            if compiled[2] not in (0, 1):
+                raise ValueError(source)
+        elif kind == "a" and "<" in condition:
+            pin, _, value = condition[1:].partition("<")
+            compiled = (RULE_BELOW, int(pin), int(value))
+        elif kind == "a" and ">" in condition:
+            pin, _, value = condition[1:].partition(">")
+            compiled = (RULE_ABOVE, int(pin), int(value))
+        elif kind == "t":
+            compiled = (RULE_TIMER, -1, int(condition[1:]) * 1000000)
+            if compiled[2] <= 0:
+                raise ValueError(source)
+        else:
+            raise ValueError(source)
+
+        compiled_actions = []
+        for action in actions.split("&"):
+            if action.startswith("w"):
+                pin, _, value = action[1:].partition("=")
+                if int(value) not in (0, 1):
+                    raise ValueError(source)
+                compiled_actions.append((ACTION_WRITE, int(pin), int(value)))
+            elif action.startswith("x"):
+                compiled_actions.append((ACTION_TOGGLE, int(action[1:]), 0))
+            elif action == "e":
+                compiled_actions.append((ACTION_EVENT, -1, 0))
+            else:
+                raise ValueError(source)
+
+        return compiled + (tuple(compiled_actions),)
+
+    def load(self, sources: list):
+        """
+        Replaces the rules, keeping the current ones if any rule is not valid
+        :param sources: The rules, as written
+        :raises ValueError: When a rule is not valid, with the index of the first invalid rule
+        """
+        rules = []
+        for index, source in enumerate(sources):
+            try:
+                rules.append(self.compile(source))
+            except (ValueError, IndexError):
+                raise ValueError(index)
+
+        now = monotonic_ns()
+        self.__rules = rules
+        self.__states = [now + rule[2] if rule[0] == RULE_TIMER else None for rule in rules]
+        self.__source = list(sources)
+
+    def clear(self):
+        """
+        Removes every rule
+        """
+        self.load([])
+
+    def evaluate(self, read, write, fire) -> int:
+        """
+        Evaluates the table, running the actions of the rules whose condition became true
+        :param read: Function reading a pin, called with the pin number
+        :param write: Function writing a digital pin, called with the pin number and the value
+        :param fire: Function reporting a rule fired, called with the index of the rule
+        :return: Number of rules fired
+        """
+        if not self.__rules:
+            return 0
+
+        start = monotonic_ns()
+        fired = 0
+        states = self.__states
+        for index, (condition, pin, threshold, actions) in enumerate(self.__rules):
+            if condition == RULE_TIMER:
+                if start < states[index]:
+                    continue
+                # Timers keep their period even when the evaluation runs late
+                states[index] += threshold * ((start - states[index]) // threshold + 1)
+            else:
+                if condition == RULE_DIGITAL:
+                    truth = int(read(pin)) == threshold
+                elif condition == RULE_BELOW:
+                    truth = read(pin) < threshold
+                else:
+                    truth = read(pin) > threshold
+                previous = states[index]
+                states[index] = truth
+                if not truth or previous is None or previous:
+                    continue
+
+            fired += 1
+            for action, action_pin, value in actions:
+                if action == ACTION_WRITE:
+                    write(action_pin, value)
+                elif action == ACTION_TOGGLE:
+                    write(action_pin, not read(action_pin))
+                else:
+                    fire(index)
+
+        elapsed = monotonic_ns() - start
+        self.__evaluations += 1
+        self.__total_ns += elapsed
+        self.__last_ns = elapsed
+        if elapsed > self.__max_ns:
+            self.__max_ns = elapsed
+        self.__fired += fired
+        return fired
+
+    def reset_statistics(self):
+        """
+        Resets the evaluation cost measurements
+        """
+        self.__evaluations = 0
+        self.__total_ns = 0
+        self.__max_ns = 0
+        self.__last_ns = 0
+        self.__fired = 0
+
+    # ---------------------------------------------------------------
+    #                         Constructor
+    # ---------------------------------------------------------------
+
+    def __init__(self, sources: list = None):
+        """
+        :param sources: Rules loaded initially, as written
+        :raises ValueError: When a rule is not valid, with the index of the first invalid rule
+        """
+        self.load(sources or [])
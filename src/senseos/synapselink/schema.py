@@ -0,0 +1,445 @@
+# SenseOS SynapseLink - Protocol Schema
+#
+# Single definition of the arguments of every SynapseLink command and of
+# the values of its replies, shared by the device and the host
+#
+# Fields are written as name:type, with the types int, float, str and hex,
+# a RRGGBB color, a trailing ? for optional fields, decoded as None when
+# missing or empty, and a trailing * for a last field taking the remaining
+# parameters. Composite fields join the types of their parts with commas,
+# such as int,int,int for a step of a sequence, and are decoded as tuples.
+# A dictionary as the last field selects the remaining fields by the value
+# of the field before it, such as the operations of the canvas. Each field
+# list is compiled once, when the module is imported, into a decoder and an
+# encoder holding the converters of its fields, so decoding a message does
+# no lookups in the schema
+#
+# verify round trips sample values through the codecs of every command and
+# checks the schema against the command constants and lanes, see
+# python -m simulator schema and the tests
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+def decode_hex(value: str) -> int:
+    """
+    Decodes a RRGGBB color
+    :param value: Color as hexadecimal digits
+    :return: The color as an integer
+    :raises ValueError: When the color is not valid
+    """
+    color = int(value, 16)
+    if not 0 <= color <= 0xFFFFFF:
+        raise ValueError(value)
+    return color
+
+
+def encode_hex(value: int) -> str:
+    """
+    Encodes a RRGGBB color
+    :param value: Color as an integer
+    :return: The color as six hexadecimal digits
+    :raises ValueError: When the color is not valid
+    """
+    color = int(value)
+    if not 0 <= color <= 0xFFFFFF:
+        raise ValueError(value)
+    return "{:06X}".format(color)
+
+
+TYPES = {
+    "int": (int, lambda value: str(int(value))),
+    "float": (float, lambda value: str(float(value))),
+    "str": (str, str),
+    "hex": (decode_hex, encode_hex),
+}
+"""Decoder and encoder of the field types"""
+
+COMPOSITE_SEPARATOR = ","
+"""Separator of the parts of a composite field, only types that never contain it can be parts"""
+
+SCHEMA = (
+    (0x00, "hello", (), ()),
+    (0x01, "goodbye", (), ()),
+    (0x02, "maxversion", ("codecs:str*",), ("version:int", "codecs:str*")),
+    (0x03, "heartbeat", (), ("health:str*",)),
+    (0x04, "acknowledge", ("parameters:str*",), ("command:int", "parameters:str*")),
+    (0x05, "reboot", (), ()),
+    (0x06, "digitalread", ("pin:int",), ("pin:int", "value:int")),
+    (0x07, "digitalwrite", ("pin:int", "value:int"), ("pin:int", "value:int")),
+    (0x08, "analogread", ("pin:int",), ("pin:int", "value:int")),
+    (0x0A, "displayread", (), ("text:str*",)),
+    (0x0B, "displaywrite", ("text:str",), ("text:str",)),
+    (0x0C, "busy", (), ("command:int", "lane:str", "retry_after_ms:int")),
+    (0x0D, "sequence", ("runs:int?", "steps:int,int,int*"), ("status:str", "values:str*")),
+    (0x0E, "rules", ("rules:str*",), ("status:str", "value:int")),
+    (0x0F, "aggregate", ("window:int?", "interval_ms:int?"), ("status:str", "values:str*")),
+    (0x10, "timesync", ("t1:int?", "t2:int?", "t3:int?"), ("time_ns:int?",)),
+    (0x11, "canvas", ("operation:str?", {
+        None: (),
+        "info": (),
+        "palette": ("start:int", "colors:hex*"),
+        "fill": ("index:int",),
+        "raw": ("region:int,int,int,int", "data:str"),
+        "rle": ("region:int,int,int,int", "data:str"),
+    }), ("status:str", "values:str*")),
+    (0x12, "screenshot", ("y:int?", "rows:int?"),
+     ("width:int", "height:int", "y:int", "rows:int", "encoding:str", "data:str")),
+    (0x13, "mirror", ("operation:str?", "lease:float?", "max_fps:float?", "bandwidth:int?"),
+     ("operation:str", "width:int", "height:int", "lease:float", "rows:int")),
+)
+"""Commands of the protocol, as (number, name, argument fields, reply fields)"""
+
+# ---------------------------------------------------------------------
+#                             Compiler
+# ---------------------------------------------------------------------
+
+def compile_composite(kinds: list) -> tuple:
+    """
+    Compiles the converters of a composite type
+    :param kinds: Types of the parts
+    :return: Tuple of the decoder, converting a string into a tuple with a value per part, and the encoder,
+             converting a tuple, or a string checked by the decoder, into a string; both raise ValueError when
+             the number of parts does not match
+    :raises ValueError: When a part is not a known type or may contain the separator
+    """
+    parts = []
+    for kind in kinds:
+        if kind not in TYPES or kind == "str":
+            raise ValueError(kind)
+        parts.append(TYPES[kind])
+    parts = tuple(parts)
+    count = len(parts)
+
+    def decode(value: str) -> tuple:
+        values = value.split(COMPOSITE_SEPARATOR)
+        if len(values) != count:
+            raise ValueError(value)
+        return tuple(parts[index][0](values[index]) for index in range(count))
+
+    def encode(value) -> str:
+        values = decode(value) if isinstance(value, str) else tuple(value)
+        if len(values) != count:
+            raise ValueError(value)
+        return COMPOSITE_SEPARATOR.join(parts[index][1](values[index]) for index in range(count))
+
+    return decode, encode
+
+
+def parse_fields(fields: tuple) -> tuple:
+    """
+    Parses field definitions
+    :param fields: Fields written as name:type, with a trailing ? for optional fields or * for the remaining ones
+    :return: Tuple of (name, type, decoder, encoder, optional, variadic) tuples
+    :raises ValueError: When a field is not valid or a variadic field is not the last one
+    """
+    parsed = []
+    for index, field in enumerate(fields):
+        name, _, kind = field.partition(":")
+        optional = kind.endswith("?")
+        variadic = kind.endswith("*")
+        kind = kind.rstrip("?*")
+        if COMPOSITE_SEPARATOR in kind:
+            converters = compile_composite(kind.split(COMPOSITE_SEPARATOR))
+        else:
+            converters = TYPES.get(kind)
+        if not name or converters is None or (variadic and index != len(fields) - 1):
+            raise ValueError(field)
+        parsed.append((name, kind, converters[0], converters[1], optional, variadic))
+    return tuple(parsed)
+
+
+def split_variants(fields: tuple) -> tuple:
+    """
+    Splits the fields selecting the remaining fields by value from the ones they select
+    :param fields: Fields written as name:type, optionally followed by a dictionary of value to fields
+    :return: Tuple of the fields before the dictionary and the dictionary, None when there is none
+    :raises ValueError: When the fields before the dictionary are empty or end with a variadic field
+    """
+    if not fields or not isinstance(fields[-1], dict):
+        return fields, None
+    head = fields[:-1]
+    if not head or head[-1].endswith("*"):
+        raise ValueError(fields)
+    return head, fields[-1]
+
+
+def compile_decoder(fields: tuple):
+    """
+    Compiles the decoder of a field list
+    :param fields: Fields written as name:type, optionally followed by a dictionary of value to fields
+    :return: Function converting the parameters of a message into a list with a value per fixed field, None for
+             missing optional fields, followed by the remaining parameters when the last field is variadic, or by
+             the values of the fields selected; it raises ValueError when a parameter is not valid, a required one
+             is missing or no fields are selected by the value
+    """
+    fields, variants = split_variants(fields)
+    if variants is not None:
+        head = compile_decoder(fields)
+        selected = {value: compile_decoder(variant) for value, variant in variants.items()}
+        length = len(fields)
+
+        def decode_variant(parameters: list) -> list:
+            values = head(parameters[:length])
+            decoder = selected.get(values[-1])
+            if decoder is None:
+                raise ValueError(values[-1])
+            return values + decoder(parameters[length:])
+
+        return decode_variant
+
+    parsed = parse_fields(fields)
+    variadic = parsed[-1][2] if parsed and parsed[-1][5] else None
+    fixed = tuple((decoder, optional) for _, _, decoder, _, optional, is_variadic in parsed if not is_variadic)
+    required = sum(1 for _, optional in fixed if not optional)
+    count = len(fixed)
+
+    def decode(parameters: list) -> list:
+        if len(parameters) < required or (variadic is None and len(parameters) > count):
+            raise ValueError(len(parameters))
+        values = []
+        for index in range(count):
+            decoder, optional = fixed[index]
+            if index >= len(parameters) or (optional and parameters[index] == ""):
+                values.append(None)
+            else:
+                values.append(decoder(parameters[index]))
+        if variadic is not None:
+            values.extend(variadic(parameter) for parameter in parameters[count:])
+        return values
+
+    return decode
+
+
+def compile_encoder(fields: tuple):
+    """
+    Compiles the encoder of a field list
+    :param fields: Fields written as name:type, optionally followed by a dictionary of value to fields
+    :return: Function converting values into the parameters of a message, with a value per fixed field, None for
+             missing optional fields, followed by the remaining values when the last field is variadic, or by the
+             values of the fields selected; trailing missing values are left out, and it raises ValueError when a
+             value is not valid or no fields are selected by the value
+    """
+    fields, variants = split_variants(fields)
+    if variants is not None:
+        head = compile_encoder(fields)
+        selected = {value: compile_encoder(variant) for value, variant in variants.items()}
+        length = len(fields)
+
+        def encode_variant(values) -> list:
+            values = list(values)
+            key = values[length - 1] if len(values) >= length else None
+            encoder = selected.get(key)
+            if encoder is None:
+                raise ValueError(key)
+            parameters = head(values[:length])
+            tail = encoder(values[length:])
+            if tail:
+                parameters.extend([""] * (length - len(parameters)))
+            return parameters + tail
+
+        return encode_variant
+
+    parsed = parse_fields(fields)
+    variadic = parsed[-1][3] if parsed and parsed[-1][5] else None
+    fixed = tuple((encoder, optional) for _, _, _, encoder, optional, is_variadic in parsed if not is_variadic)
+    required = sum(1 for _, optional in fixed if not optional)
+    count = len(fixed)
+
+    def encode(values) -> list:
+        values = list(values)
+        if len(values) < required or (variadic is None and len(values) > count):
+            raise ValueError(len(values))
+        parameters = []
+        for index in range(min(count, len(values))):
+            encoder, optional = fixed[index]
+            value = values[index]
+            if value is None:
+                if not optional:
+                    raise ValueError(index)
+                parameters.append("")
+            else:
+                parameters.append(encoder(value))
+        if variadic is not None:
+            parameters.extend(variadic(value) for value in values[count:])
+        while parameters and parameters[-1] == "" and len(parameters) > required and \
+                (variadic is None or len(values) <= count):
+            parameters.pop()
+        return parameters
+
+    return encode
+
+
+# ---------------------------------------------------------------------
+#                              Codecs
+# ---------------------------------------------------------------------
+
+NAMES = {number: name for number, name, _, _ in SCHEMA}
+"""Name of each command"""
+
+REQUEST_DECODERS = {number: compile_decoder(arguments) for number, _, arguments, _ in SCHEMA}
+"""Decoder of the arguments of each command"""
+
+REQUEST_ENCODERS = {number: compile_encoder(arguments) for number, _, arguments, _ in SCHEMA}
+"""Encoder of the arguments of each command"""
+
+REPLY_DECODERS = {number: compile_decoder(replies) for number, _, _, replies in SCHEMA}
+"""Decoder of the values of the replies of each command"""
+
+REPLY_ENCODERS = {number: compile_encoder(replies) for number, _, _, replies in SCHEMA}
+"""Encoder of the values of the replies of each command"""
+
+
+def decode_request(command: int, parameters: list) -> list:
+    """
+    Decodes the arguments of a command
+    :param command: Command number
+    :param parameters: Parameters of the message
+    :return: The arguments, see compile_decoder, the parameters as they are for commands not in the schema
+    :raises ValueError: When the parameters do not match the schema
+    """
+    decoder = REQUEST_DECODERS.get(command)
+    return parameters if decoder is None else decoder(parameters)
+
+
+def encode_request(command: int, values) -> list:
+    """
+    Encodes the arguments of a command
+    :param command: Command number
+    :param values: Arguments of the command
+    :return: The parameters of the message, the values as strings for commands not in the schema
+    :raises ValueError: When the values do not match the schema
+    """
+    encoder = REQUEST_ENCODERS.get(command)
+    return [str(value) for value in values] if encoder is None else encoder(values)
+
+
+def decode_reply(command: int, parameters: list) -> list:
+    """
+    Decodes the values of a reply
+    :param command: Command number
+    :param parameters: Parameters of the reply
+    :return: The values, see compile_decoder, the parameters as they are for commands not in the schema
+    :raises ValueError: When the parameters do not match the schema, such as the error replies
+    """
+    decoder = REPLY_DECODERS.get(command)
+    return parameters if decoder is None else decoder(parameters)
+
+
+def encode_reply(command: int, values) -> list:
+    """
+    Encodes the values of a reply
+    :param command: Command number
+    :param values: Values of the reply
+    :return: The parameters of the reply, the values as strings for commands not in the schema
+    :raises ValueError: When the values do not match the schema
+    """
+    encoder = REPLY_ENCODERS.get(command)
+    return [str(value) for value in values] if encoder is None else encoder(values)
+
+
+# ---------------------------------------------------------------------
+#                            Verification
+# ---------------------------------------------------------------------
+
+SAMPLES = {
+    "int": (0, 7, -3, 1700000000000000000),
+    "float": (0.5, 30.0),
+    "str": ("text", "a,b", "x"),
+    "hex": (0, 0xFF8000, 0xFFFFFF),
+}
+"""Sample values of each type used by verify"""
+
+
+def sample(kind: str, variant: int = 0):
+    """
+    Picks a sample value of a type
+    :param kind: Type of the field, composite types included
+    :param variant: Index of the sample, each part of a composite type takes the next one
+    :return: The sample value
+    """
+    if COMPOSITE_SEPARATOR in kind:
+        return tuple(sample(part, variant + index) for index, part in enumerate(kind.split(COMPOSITE_SEPARATOR)))
+    samples = SAMPLES[kind]
+    return samples[variant % len(samples)]
+
+
+def sample_values(fields: tuple, variant: int = 0) -> list:
+    """
+    Builds sample values of a field list, the fields selected by value taking the first value that has fields
+    :param fields: Fields written as name:type, optionally followed by a dictionary of value to fields
+    :param variant: Index of the samples, also the number of values of a variadic field
+    :return: The sample values
+    """
+    fields, variants = split_variants(fields)
+    if variants is not None:
+        key = next((value for value, selected in variants.items() if selected), next(iter(variants)))
+        return sample_values(fields, variant)[:-1] + [key] + sample_values(variants[key], variant)
+    parsed = parse_fields(fields)
+    values = [sample(kind, variant) for _, kind, _, _, _, is_variadic in parsed if not is_variadic]
+    if parsed and parsed[-1][5]:
+        values.extend(sample(parsed[-1][1], index) for index in range(variant))
+    return values
+
+
+def verify(constants: dict = None, lanes: dict = None) -> list:
+    """
+    Round trips sample values through the codecs of every command, and checks the schema against the command
+    constants and the lanes
+    :param constants: Dictionary of constant name to value, such as vars(senseos.synapselink), checks every
+                      COMMAND_ constant has the number of the command of the same name
+    :param lanes: Lane of each command, such as COMMAND_LANES, checks every inbound command has a lane
+    :return: List of problems found, empty if none
+    """
+    problems = []
+    numbers = set()
+    for number, name, arguments, replies in SCHEMA:
+        if number in numbers:
+            problems.append("{}: command number {} repeated".format(name, number))
+        numbers.add(number)
+
+        for kind, fields in (("arguments", arguments), ("reply", replies)):
+            encode = compile_encoder(fields)
+            decode = compile_decoder(fields)
+            head, variants = split_variants(fields)
+            cases = []
+            for variant in range(3):
+                if variants is None:
+                    cases.append(sample_values(fields, variant))
+                else:
+                    cases.extend(sample_values(head, variant)[:-1] + [value] + sample_values(selected, variant)
+                                 for value, selected in variants.items())
+            for values in cases:
+                try:
+                    decoded = decode(encode(values))
+                except ValueError as error:
+                    problems.append("{} {}: {} failed to round trip ({})".format(name, kind, values, error))
+                    continue
+                if decoded != values:
+                    problems.append("{} {}: {} decoded as {}".format(name, kind, values, decoded))
+
+            # Optional fields left out must decode as missing
+            parsed = parse_fields(head)
+            if parsed and parsed[0][4] and (variants is None or None in variants):
+                if decode(encode([])) != [None] * sum(1 for field in parsed if not field[5]):
+                    problems.append("{} {}: missing optional fields not decoded as None".format(name, kind))
+
+    if constants is not None:
+        for constant, value in constants.items():
+            if not constant.startswith("COMMAND_") or not isinstance(value, int):
+                continue
+            name = constant[len("COMMAND_"):].lower()
+            if NAMES.get(value) != name:
+                problems.append("{} = {} is {} in the schema".format(constant, value, NAMES.get(value)))
+        for number, name in NAMES.items():
+            if constants.get("COMMAND_" + name.upper()) != number:
+                problems.append("{} has no COMMAND_{} constant".format(name, name.upper()))
+
+    if lanes is not None:
+        outbound = ("hello", "goodbye", "busy")
+        for number, name in NAMES.items():
+            if name not in outbound and number not in lanes:
+                problems.append("{} has no lane".format(name))
+
+    return problems
@@ -0,0 +1,177 @@
+# SenseOS SynapseLink - Sequencer
+#
+# Executes timed sequences of pin writes uploaded by the cloud, so pulse
+# trains and other time-critical actuation do not depend on the jitter of
+# a network round trip per write
+#
+# Every step writes a value to a pin and waits a delay before the next
+# step. Steps are scheduled against the start of the run, so delays do not
+# accumulate drift, and are timed with monotonic_ns, sleeping most of the
+# wait and spinning through the end of it. Waits shorter than the yield
+# threshold, a few milliseconds, are done in place, longer ones return
+# control to the main loop, which resumes the sequence on its next poll.
+# The error between the scheduled and the actual time of every step is
+# measured and reported once the sequence completes. A single call never
+# blocks for longer than the yield threshold, even for sequences repeated
+# until stopped
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# External Libraries
+from time import monotonic_ns, sleep
+
+SPIN_NS = 2000000
+"""Final part of every wait spent spinning instead of sleeping, in nanoseconds"""
+
+# ---------------------------------------------------------------------
+#                             Sequence
+# ---------------------------------------------------------------------
+
+class SynapseLinkSequence:
+    """
+    Sequence of pin writes being executed, with its timing measurements
+    """
+
+    def __init__(self, steps: list, runs: int = 1, sender: str = None, event_id: int = None):
+        """
+        :param steps: Steps of the sequence, as (pin, value, delay in nanoseconds) tuples
+        :param runs: Number of times the sequence is executed, 0 repeats it until stopped
+        :param sender: Topic the sequence was received on
+        :param event_id: Event id of the command that uploaded the sequence
+        """
+        self.steps = steps
+        self.runs = runs
+        self.sender = sender
+        self.event_id = event_id
+        self.duration = sum(step[2] for step in steps)
+        self.run = 0
+        self.step = 0
+        self.start = None
+        self.offset = 0
+        self.executed = 0
+        self.error_total = 0
+        self.error_max = 0
+        self.status = None
+
+    @property
+    def error_mean(self) -> int:
+        """Mean timing error of the steps executed, in nanoseconds"""
+        return self.error_total // self.executed if self.executed else 0
+
+
+# ---------------------------------------------------------------------
+#                             Sequencer
+# ---------------------------------------------------------------------
+
+class SynapseLinkSequencer:
+    # ---------------------------------------------------------------
+    #                         Internal Fields
+    # ---------------------------------------------------------------
+
+    __write = None
+    """Internal field that contains the function writing a value to a pin"""
+
+    __yield_ns: int = 20000000
+    """Internal field that contains the shortest wait returning control to the main loop, in nanoseconds"""
+
+    __sequence: SynapseLinkSequence = None
+    """Internal field that contains the sequence being executed"""
+
+    # ---------------------------------------------------------------
+    #                         Properties
+    # ---------------------------------------------------------------
+
+    @property
+    def sequence(self) -> SynapseLinkSequence:
+        """
+        Sequence being executed
+        :return: The sequence, None when idle
+        """
+        return self.__sequence
+
+    @property
+    def running(self) -> bool:
+        """
+        Indicates if a sequence is being executed
+        :return: True if a sequence is being executed, False otherwise
+        """
+        return self.__sequence is not None
+
+    # ---------------------------------------------------------------
+    #                         Methods
+    # ---------------------------------------------------------------
+
+    def start(self, sequence: SynapseLinkSequence) -> SynapseLinkSequence:
+        """
+        Starts executing a sequence, stopping the one being executed; its steps are scheduled from the first
+        call to run, so the time until the main loop runs it does not count as timing error
+        :param sequence: The sequence
+        :return: The sequence stopped, None if the sequencer was idle
+        """
+        stopped = self.stop()
+        sequence.start = None
+        self.__sequence = sequence
+        return stopped
+
+    def stop(self) -> SynapseLinkSequence:
+        """
+        Stops the sequence being executed
+        :return: The sequence stopped, None if the sequencer was idle
+        """
+        sequence = self.__sequence
+        if sequence is not None:
+            sequence.status = "stopped"
+            self.__sequence = None
+        return sequence
+
+    def run(self) -> SynapseLinkSequence:
+        """
+        Executes the steps that are due, waiting in place for the ones due before the yield threshold
+        :return: The sequence if it completed, None if it is still running or the sequencer is idle
+        """
+        sequence = self.__sequence
+        entered = monotonic_ns()
+        if sequence is not None and sequence.start is None:
+            sequence.start = entered
+        while sequence is not None:
+            pin, value, delay = sequence.steps[sequence.step]
+            due = sequence.start + sequence.offset
+            if due - entered >= self.__yield_ns:
+                return None
+            remaining = due - monotonic_ns()
+            if remaining > SPIN_NS:
+                sleep((remaining - SPIN_NS) / 1000000000)
+            while monotonic_ns() < due:
+                pass
+
+            self.__write(pin, value)
+            error = monotonic_ns() - due
+            sequence.executed += 1
+            sequence.error_total += error
+            if error > sequence.error_max:
+                sequence.error_max = error
+
+            sequence.offset += delay
+            sequence.step += 1
+            if sequence.step == len(sequence.steps):
+                sequence.step = 0
+                sequence.run += 1
+                if sequence.runs and sequence.run >= sequence.runs:
+                    sequence.status = "done"
+                    self.__sequence = None
+                    return sequence
+        return None
+
+    # ---------------------------------------------------------------
+    #                         Constructor
+    # ---------------------------------------------------------------
+
+    def __init__(self, write, yield_ns: int = 20000000):
+        """
+        :param write: Function writing a value to a pin, called with the pin number and the value
+        :param yield_ns: Shortest wait returning control to the main loop, in nanoseconds
+        """
+        self.__write = write
+        self.__yield_ns = yield_ns
@@ -0,0 +1,215 @@
+# SenseOS SynapseLink - Time Synchronization
+#
+# Estimates the wall clock from NTP-style exchanges with the time server of
+# the backend, so the timestamps of every device can be correlated
+#
+# The device sends its monotonic time t1, the server answers with the wall
+# time t2 it received the request and t3 it sent the answer, and the device
+# notes the monotonic time t4 the answer arrived. Each exchange gives the
+# offset between the wall and the monotonic clocks and the round trip delay;
+# the exchanges of a burst are reduced to the one with the shortest delay,
+# the least disturbed by the network, and the drift of the oscillator is the
+# slope of the offsets of the last bursts
+#
+# Every message of the device is stamped with the disciplined wall clock at
+# the time it was built, after its event id, so summaries, rules fired,
+# heartbeats and replies queued while offline keep the time they happened
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# External Libraries
+from time import monotonic_ns
+
+TIME_SEPARATOR = "#"
+"""Separator of the event id and of the wall clock of the device in its messages, such as 42#1700000000000000000,
+left out while the clock was never synchronized"""
+MAX_DRIFT_PPB = 500000
+"""Largest drift accepted, in parts per billion, larger estimates come from noise rather than the oscillator"""
+MIN_DRIFT_SPAN_NS = 600000000000
+"""Shortest time the estimates must span for the drift to be estimated, in nanoseconds, so the jitter of the
+network is small compared to the drift accumulated"""
+
+# ---------------------------------------------------------------------
+#                          Time Synchronization
+# ---------------------------------------------------------------------
+
+class SynapseLinkTimeSync:
+    # ---------------------------------------------------------------
+    #                         Internal Fields
+    # ---------------------------------------------------------------
+
+    __rounds: int = 8
+    """Internal field that contains the number of exchanges of a burst"""
+
+    __interval_ns: int = 3600000000000
+    """Internal field that contains the time between bursts, in nanoseconds"""
+
+    __timeout_ns: int = 2000000000
+    """Internal field that contains how long an answer is waited for, in nanoseconds"""
+
+    __history: int = 8
+    """Internal field that contains the number of bursts the drift is estimated from"""
+
+    __next_burst: int = 0
+    """Internal field that contains the monotonic time the next burst starts, in nanoseconds"""
+
+    __attempts: int = 0
+    """Internal field that contains the number of exchanges started in the current burst"""
+
+    __pending: int = None
+    """Internal field that contains the monotonic time of the request waiting for an answer, None if there is none"""
+
+    __samples: list = None
+    """Internal field that contains the exchanges of the current burst, as (delay, reference, offset) tuples"""
+
+    __estimates: list = None
+    """Internal field that contains the estimate of each of the last bursts, as (reference, offset) tuples"""
+
+    __offset_ns: int = None
+    """Internal field that contains the offset of the wall clock from the monotonic clock, in nanoseconds"""
+
+    __delay_ns: int = None
+    """Internal field that contains the round trip delay of the last estimate, in nanoseconds"""
+
+    __drift_ppb: int = 0
+    """Internal field that contains the drift of the monotonic clock, in parts per billion"""
+
+    __lost: int = 0
+    """Internal field that contains the number of requests never answered"""
+
+    # ---------------------------------------------------------------
+    #                         Properties
+    # ---------------------------------------------------------------
+
+    @property
+    def synchronized(self) -> bool:
+        """
+        Indicates if a burst completed
+        :return: True if the offset is known, False otherwise
+        """
+        return self.__offset_ns is not None
+
+    @property
+    def statistics(self) -> dict:
+        """
+        Last estimate of the clock
+        :return: Dictionary with the offset, round trip delay in nanoseconds, drift in parts per billion, bursts
+                 completed and requests lost
+        """
+        return {
+            "offset_ns": self.__offset_ns,
+            "delay_ns": self.__delay_ns,
+            "drift_ppb": self.__drift_ppb,
+            "bursts": len(self.__estimates),
+            "lost": self.__lost,
+        }
+
+    # ---------------------------------------------------------------
+    #                         Methods
+    # ---------------------------------------------------------------
+
+    def start(self):
+        """
+        Starts a burst now, without waiting for the answer to the request in flight
+        """
+        self.__next_burst = monotonic_ns()
+        self.__pending = None
+
+    def request(self) -> int:
+        """
+        Starts an exchange if one is due
+        :return: Monotonic time to send to the server as t1, None if no exchange is due
+        """
+        now = monotonic_ns()
+        if now < self.__next_burst:
+            return None
+        if self.__pending is not None:
+            if now - self.__pending < self.__timeout_ns:
+                return None
+            self.__pending = None
+            self.__lost += 1
+        if self.__attempts >= self.__rounds:
+            self.__finish()
+            return None
+
+        self.__attempts += 1
+        self.__pending = now
+        return now
+
+    def response(self, t1: int, t2: int, t3: int, t4: int) -> tuple:
+        """
+        Records the answer of the server
+        :param t1: Monotonic time the request was sent, in nanoseconds
+        :param t2: Wall time the server received the request, in nanoseconds since the epoch
+        :param t3: Wall time the server sent the answer, in nanoseconds since the epoch
+        :param t4: Monotonic time the answer arrived, in nanoseconds
+        :return: Tuple of monotonic reference, wall time at the reference and drift in parts per billion when the
+                 burst completed, None otherwise
+        """
+        if t1 != self.__pending:
+            # Answer to a request already given up on
+            return None
+        self.__pending = None
+        self.__samples.append(((t4 - t1) - (t3 - t2), (t1 + t4) // 2, ((t2 - t1) + (t3 - t4)) // 2))
+        if self.__attempts >= self.__rounds:
+            return self.__finish()
+        return None
+
+    def __finish(self) -> tuple:
+        """
+        Reduces the exchanges of the burst to an estimate and schedules the next burst
+        :return: Tuple of monotonic reference, wall time at the reference and drift in parts per billion, None if no
+                 exchange was answered
+        """
+        samples = self.__samples
+        self.__samples = []
+        self.__attempts = 0
+        self.__next_burst = monotonic_ns() + self.__interval_ns
+        if not samples:
+            return None
+
+        delay, reference, offset = min(samples)
+        self.__estimates.append((reference, offset))
+        if len(self.__estimates) > self.__history:
+            self.__estimates.pop(0)
+        self.__offset_ns = offset
+        self.__delay_ns = delay
+
+        # Least squares slope of the offsets, relative to the first estimate to keep the numbers small
+        first_reference, first_offset = self.__estimates[0]
+        if reference - first_reference >= MIN_DRIFT_SPAN_NS:
+            n = len(self.__estimates)
+            sx = sy = sxx = sxy = 0
+            for estimate_reference, estimate_offset in self.__estimates:
+                x = estimate_reference - first_reference
+                y = estimate_offset - first_offset
+                sx += x
+                sy += y
+                sxx += x * x
+                sxy += x * y
+            denominator = n * sxx - sx * sx
+            if denominator:
+                drift = (n * sxy - sx * sy) * 1000000000 // denominator
+                self.__drift_ppb = max(-MAX_DRIFT_PPB, min(MAX_DRIFT_PPB, drift))
+
+        return reference, reference + offset, self.__drift_ppb
+
+    # ---------------------------------------------------------------
+    #                         Constructor
+    # ---------------------------------------------------------------
+
+    def __init__(self, rounds: int = 8, interval: float = 3600, timeout: float = 2, history: int = 8):
+        """
+        :param rounds: Number of exchanges of a burst
+        :param interval: Time between bursts, in seconds
+        :param timeout: How long an answer is waited for, in seconds
+        :param history: Number of bursts the drift is estimated from
+        """
+        self.__rounds = rounds
+        self.__interval_ns = int(interval * 1000000000)
+        self.__timeout_ns = int(timeout * 1000000000)
+        self.__history = history
+        self.__samples = []
+        self.__estimates = []
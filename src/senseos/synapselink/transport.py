@@ -0,0 +1,190 @@
+# SenseOS SynapseLink - Transport
+#
+# Wraps the sockets of the MQTT client so waiting for messages is done in
+# short slices, letting the sequence and the rules run between them, while
+# a packet that already started is always read to its end, however slowly
+# its bytes arrive over a slow link
+#
+# The MQTT client applies a single timeout to every read of its socket,
+# both while waiting for a packet and while reading the rest of a packet
+# already started, so a short timeout drops the session whenever the rest
+# of a large message arrives late. The sockets wrapped follow the framing
+# of the MQTT packets read through them: between packets they wait no
+# longer than the slice, and within a packet they wait at least the packet
+# timeout, whatever the client asked for
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+HEADER = 0
+"""State of a socket waiting for the first byte of a packet"""
+LENGTH = 1
+"""State of a socket reading the remaining length of a packet"""
+BODY = 2
+"""State of a socket reading the rest of a packet"""
+
+
+# ---------------------------------------------------------------------
+#                              Socket
+# ---------------------------------------------------------------------
+
+class SynapseLinkSocket:
+    # ---------------------------------------------------------------
+    #                         Internal Fields
+    # ---------------------------------------------------------------
+
+    __socket = None
+    """Internal field that contains the socket wrapped"""
+
+    __slice: float = 0.01
+    """Internal field that contains the longest wait between packets, in seconds"""
+
+    __packet_timeout: float = 1.0
+    """Internal field that contains the shortest wait for the rest of a packet already started, in seconds"""
+
+    __requested: float = None
+    """Internal field that contains the timeout asked for by the client, None blocks"""
+
+    __applied = -1
+    """Internal field that contains the timeout set on the socket wrapped, -1 before any is set"""
+
+    __state: int = HEADER
+    """Internal field that contains the part of the packet being read"""
+
+    __remaining: int = 0
+    """Internal field that contains the bytes left of the length or of the body of the packet being read"""
+
+    __shift: int = 0
+    """Internal field that contains the shift of the next byte of the remaining length being read"""
+
+    # ---------------------------------------------------------------
+    #                         Methods
+    # ---------------------------------------------------------------
+
+    def settimeout(self, value: float):
+        """
+        Sets the timeout asked for by the client, applied to connecting and sending, and bounded by the slice
+        and the packet timeout while reading
+        :param value: The timeout, None blocks forever and 0 never blocks
+        """
+        self.__requested = value
+        self.__apply(value)
+
+    def recv_into(self, buffer, bufsize: int = 0) -> int:
+        """
+        Reads some bytes, waiting no longer than the slice between packets and at least the packet timeout
+        within a packet
+        :param buffer: Buffer written
+        :param bufsize: Largest number of bytes read, 0 for the size of the buffer
+        :return: The number of bytes read
+        """
+        requested = self.__requested
+        if self.__state == HEADER:
+            timeout = self.__slice if requested is None or requested > self.__slice else requested
+        else:
+            timeout = self.__packet_timeout if requested is not None and requested < self.__packet_timeout \
+                else requested
+        self.__apply(timeout)
+
+        received = self.__socket.recv_into(buffer, bufsize)
+        if received:
+            self.__follow(buffer, received)
+        return received
+
+    def __follow(self, buffer, received: int):
+        """
+        Follows the framing of the packets through the bytes read
+        """
+        index = 0
+        while index < received:
+            if self.__state == HEADER:
+                self.__state = LENGTH
+                self.__remaining = 0
+                self.__shift = 0
+                index += 1
+            elif self.__state == LENGTH:
+                value = buffer[index]
+                self.__remaining |= (value & 0x7F) << self.__shift
+                self.__shift += 7
+                index += 1
+                if not value & 0x80:
+                    self.__state = BODY if self.__remaining else HEADER
+            else:
+                taken = min(self.__remaining, received - index)
+                self.__remaining -= taken
+                index += taken
+                if not self.__remaining:
+                    self.__state = HEADER
+
+    def __apply(self, timeout: float):
+        """
+        Sets a timeout on the socket wrapped, only when it changes
+        """
+        if timeout != self.__applied:
+            self.__socket.settimeout(timeout)
+            self.__applied = timeout
+
+    def __getattr__(self, name: str):
+        return getattr(self.__socket, name)
+
+    # ---------------------------------------------------------------
+    #                         Constructor
+    # ---------------------------------------------------------------
+
+    def __init__(self, socket, slice_timeout: float, packet_timeout: float):
+        """
+        :param socket: Socket wrapped
+        :param slice_timeout: Longest wait between packets, in seconds
+        :param packet_timeout: Shortest wait for the rest of a packet already started, in seconds
+        """
+        self.__socket = socket
+        self.__slice = slice_timeout
+        self.__packet_timeout = packet_timeout
+
+
+# ---------------------------------------------------------------------
+#                            Socket Pool
+# ---------------------------------------------------------------------
+
+class SynapseLinkSocketPool:
+    # ---------------------------------------------------------------
+    #                         Internal Fields
+    # ---------------------------------------------------------------
+
+    __pool = None
+    """Internal field that contains the socket pool wrapped"""
+
+    __slice: float = 0.01
+    """Internal field that contains the longest wait between packets of the sockets, in seconds"""
+
+    __packet_timeout: float = 1.0
+    """Internal field that contains the shortest wait for the rest of a packet of the sockets, in seconds"""
+
+    # ---------------------------------------------------------------
+    #                         Methods
+    # ---------------------------------------------------------------
+
+    def socket(self, *args, **kwargs) -> SynapseLinkSocket:
+        """
+        Creates a new socket of the pool wrapped, following the framing of the MQTT packets read
+        :return: The socket
+        """
+        return SynapseLinkSocket(self.__pool.socket(*args, **kwargs), self.__slice, self.__packet_timeout)
+
+    def __getattr__(self, name: str):
+        return getattr(self.__pool, name)
+
+    # ---------------------------------------------------------------
+    #                         Constructor
+    # ---------------------------------------------------------------
+
+    def __init__(self, pool, slice_timeout: float, packet_timeout: float):
+        """
+        :param pool: Socket pool wrapped, such as the socketpool of the wifi radio
+        :param slice_timeout: Longest wait between packets, in seconds
+        :param packet_timeout: Shortest wait for the rest of a packet already started, in seconds
+        """
+        self.__pool = pool
+        self.__slice = slice_timeout
+        self.__packet_timeout = packet_timeout
@@ -0,0 +1,21 @@
+# SenseOS Simulator
+#
+# Runs SenseOS on a regular computer, replacing the circuitpython platform
+# modules with simulated ones, so the operating system and its cloud
+# connectivity can be developed and measured without the real device
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# Simulator Libraries
+from simulator.hal import install, installed
+
+# ---------------------------------------------------------------------
+#                             Exports
+# ---------------------------------------------------------------------
+
+__all__ = [
+    "install",
+    "installed"
+]
@@ -0,0 +1,236 @@
+# SenseOS Simulator - Command Line
+#
+# Boots the SynapsePod Crystal firmware on the simulated platform, runs a
+# local MQTT broker, measures SynapseLink with the load generator or a
+# fleet of simulated devices, or checks the SynapseLink protocol schema
+#
+# Usage:
+#   python -m simulator [boot] [--offline] [--broker HOST:PORT]
+#   python -m simulator broker [--host HOST] [--port PORT]
+#   python -m simulator loadgen [--rate N] [--duration S] [--mix NAME=WEIGHT,...] [--json PATH]
+#   python -m simulator fleet [--devices N] [--workers N] [--duration S] [--json PATH]
+#   python -m simulator schema [--iterations N]
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# External Libraries
+import argparse
+import sys
+import time
+
+# Simulator Libraries
+from simulator.hal import install
+
+
+# ---------------------------------------------------------------------
+#                             Commands
+# ---------------------------------------------------------------------
+
+def parse_address(value: str) -> tuple[str, int]:
+    """
+    Parses an address written as HOST:PORT or PORT
+    :param value: Address to parse
+    :return: Tuple of host and port
+    """
+    host, _, port = value.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def boot(arguments):
+    """
+    Installs the simulated platform and boots the firmware
+    """
+    install(connected=not arguments.offline, broker=arguments.broker)
+
+    try:
+        import firmware.synapsepod_crystal
+    except KeyboardInterrupt:
+        pass
+
+
+def broker(arguments):
+    """
+    Runs a local MQTT broker until interrupted
+    """
+    from simulator.broker import Broker
+
+    with Broker(arguments.host, arguments.port) as server:
+        print("MQTT broker listening on {}:{}".format(*server.address))
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+def loadgen(arguments):
+    """
+    Runs the load generator, against a simulated device on a local broker unless a broker is given
+    """
+    from simulator.broker import Broker
+    from simulator.device import SimulatedDevice
+    from simulator.loadgen import LoadGenerator, parse_mix
+
+    server = None
+    device = None
+    address = arguments.broker
+    if address is not None and arguments.topic is None:
+        raise SystemExit("--topic is required with --broker")
+    if address is None:
+        server = Broker()
+        address = server.start()
+        install(broker=address)
+        device = SimulatedDevice(render=not arguments.no_render)
+        device.start()
+
+    try:
+        generator = LoadGenerator(
+            address,
+            topic=arguments.topic or device.device_id,
+            rate=arguments.rate,
+            duration=arguments.duration,
+            mix=parse_mix(arguments.mix) if arguments.mix else None,
+            timeout=arguments.timeout,
+            seed=arguments.seed,
+        )
+        report = generator.run(device)
+    finally:
+        if device is not None:
+            device.stop()
+        if server is not None:
+            server.stop()
+
+    print(report.format())
+    if server is not None:
+        print("broker: {} received, {} delivered, {} dropped".format(server.received, server.delivered,
+                                                                       server.dropped))
+    if arguments.json:
+        with open(arguments.json, "w") as file:
+            file.write(report.to_json())
+
+
+def fleet(arguments):
+    """
+    Runs a fleet of simulated devices, against a local broker unless a broker is given
+    """
+    from simulator.broker import Broker
+    from simulator.fleet import Fleet
+
+    server = None
+    address = arguments.broker
+    if address is None:
+        server = Broker()
+        address = server.start()
+
+    try:
+        report = Fleet(
+            address,
+            devices=arguments.devices,
+            workers=arguments.workers,
+            sites=arguments.sites,
+            duration=arguments.duration,
+            timeout=arguments.timeout,
+            seed=arguments.seed,
+        ).run()
+    finally:
+        if server is not None:
+            server.stop()
+
+    print(report.format())
+    if server is not None:
+        print("broker: {} received, {} delivered, {} dropped".format(server.received, server.delivered,
+                                                                       server.dropped))
+    if arguments.json:
+        with open(arguments.json, "w") as file:
+            file.write(report.to_json())
+
+
+def schema(arguments):
+    """
+    Checks the SynapseLink protocol schema against the command constants and lanes, and measures its decoders
+    """
+    install(connected=False)
+
+    import senseos.synapselink
+    from senseos.synapselink.schema import SCHEMA, decode_request, encode_request, sample_values, verify
+
+    problems = verify(vars(senseos.synapselink), senseos.synapselink.COMMAND_LANES)
+    for problem in problems:
+        print("error: {}".format(problem))
+
+    print("{:<14} {:>12}".format("command", "decode ns"))
+    for number, name, fields, _ in SCHEMA:
+        parameters = encode_request(number, sample_values(fields, 1))
+        start = time.perf_counter_ns()
+        for _ in range(arguments.iterations):
+            decode_request(number, parameters)
+        print("{:<14} {:>12.0f}".format(name, (time.perf_counter_ns() - start) / arguments.iterations))
+
+    if problems:
+        sys.exit(1)
+
+
+# ---------------------------------------------------------------------
+#                            Entry Point
+# ---------------------------------------------------------------------
+
+def main(argv: list = None):
+    """
+    Parses the command line and runs the requested command
+    :param argv: Command line arguments, defaults to sys.argv
+    """
+    parser = argparse.ArgumentParser(prog="simulator", description="Runs SenseOS on the simulated platform")
+    commands = parser.add_subparsers(dest="command")
+
+    boot_parser = commands.add_parser("boot", help="boot the firmware (default)")
+    boot_parser.add_argument("--offline", action="store_true", help="start with the wifi radio disconnected")
+    boot_parser.add_argument("--broker", metavar="HOST:PORT", type=parse_address,
+                             help="local MQTT broker used instead of the cloud broker")
+    boot_parser.set_defaults(handler=boot)
+
+    broker_parser = commands.add_parser("broker", help="run a local MQTT broker")
+    broker_parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    broker_parser.add_argument("--port", type=int, default=1883, help="port to listen on")
+    broker_parser.set_defaults(handler=broker)
+
+    loadgen_parser = commands.add_parser("loadgen", help="measure SynapseLink latency under load")
+    loadgen_parser.add_argument("--broker", metavar="HOST:PORT", type=parse_address,
+                                help="broker of an already running device, a simulated device is started otherwise")
+    loadgen_parser.add_argument("--topic", help="SynapseLink topic of the device, required with --broker")
+    loadgen_parser.add_argument("--rate", type=float, default=20.0, help="commands sent per second")
+    loadgen_parser.add_argument("--duration", type=float, default=10.0, help="seconds spent sending commands")
+    loadgen_parser.add_argument("--mix", help="relative weight of each command, such as heartbeat=3,digitalread=1")
+    loadgen_parser.add_argument("--timeout", type=float, default=5.0, help="seconds to wait for the last results")
+    loadgen_parser.add_argument("--seed", type=int, help="seed of the command choices, for repeatable runs")
+    loadgen_parser.add_argument("--no-render", action="store_true", help="do not render the simulated display")
+    loadgen_parser.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    loadgen_parser.set_defaults(handler=loadgen)
+
+    fleet_parser = commands.add_parser("fleet", help="measure SynapseLink with many simulated devices")
+    fleet_parser.add_argument("--broker", metavar="HOST:PORT", type=parse_address,
+                              help="broker used by the fleet, a local broker is started otherwise")
+    fleet_parser.add_argument("--devices", type=int, default=100, help="number of simulated devices")
+    fleet_parser.add_argument("--workers", type=int, help="worker processes hosting the devices")
+    fleet_parser.add_argument("--sites", type=int, default=1, help="SynapseLink groups the devices are spread over")
+    fleet_parser.add_argument("--duration", type=float, default=30.0, help="seconds spent replaying traffic")
+    fleet_parser.add_argument("--timeout", type=float, default=5.0, help="seconds to wait for the last results")
+    fleet_parser.add_argument("--seed", type=int, help="seed of the traffic, for repeatable runs")
+    fleet_parser.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    fleet_parser.set_defaults(handler=fleet)
+
+    schema_parser = commands.add_parser("schema", help="check the SynapseLink protocol schema")
+    schema_parser.add_argument("--iterations", type=int, default=10000, help="decodes measured per command")
+    schema_parser.set_defaults(handler=schema)
+
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0].startswith("-"):
+        argv = ["boot"] + list(argv)
+
+    arguments = parser.parse_args(argv)
+    arguments.handler(arguments)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+# SenseOS Simulator - MQTT Broker
+#
+# Local stand-in for the SynapseLink MQTT broker (mqtt.evoluxiot.pt)
+# Runs an asyncio MQTT 3.1.1 broker on a background thread, counting the
+# messages received, delivered and dropped, so the protocol can be measured
+# without the cloud broker
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# External Libraries
+import asyncio
+import socket
+import struct
+import threading
+
+# SynapseLink Host Libraries
+from synapselink.mqtt import CONNECT, CONNACK, PUBLISH, PUBACK, SUBSCRIBE, SUBACK, UNSUBSCRIBE, UNSUBACK, PINGREQ, \
+    PINGRESP, DISCONNECT, MQTTError, packet, read_packet, parse_connect, publish_packet, parse_publish, \
+    parse_subscribe, parse_unsubscribe, topic_matches
+
+
+# ---------------------------------------------------------------------
+#                              Session
+# ---------------------------------------------------------------------
+
+class BrokerSession:
+    """
+    Connection of a client to the broker
+    """
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.client_id = None
+        self.keep_alive = 0
+        self.will = None
+        self.subscriptions = {}
+        self.packet_id = 0
+
+    def next_packet_id(self) -> int:
+        """Returns the next packet identifier used for QoS 1 deliveries"""
+        self.packet_id = self.packet_id % 0xFFFF + 1
+        return self.packet_id
+
+
+# ---------------------------------------------------------------------
+#                               Broker
+# ---------------------------------------------------------------------
+
+class Broker:
+    """
+    Local MQTT broker, running on its own thread and event loop
+    """
+
+    # ---------------------------------------------------------------
+    #                         Internal Fields
+    # ---------------------------------------------------------------
+
+    __host: str = "127.0.0.1"
+    """Address the broker listens on"""
+
+    __port: int = 0
+    """Port the broker listens on, 0 picks a free port"""
+
+    __max_buffer: int = 1 << 20
+    """Bytes queued for a client before further messages to it are dropped"""
+
+    __loop: asyncio.AbstractEventLoop = None
+    """Event loop of the broker thread"""
+
+    __thread: threading.Thread = None
+    """Thread running the broker"""
+
+    __server: asyncio.AbstractServer = None
+    """Listening server"""
+
+    __sessions: dict = None
+    """Connected sessions, by client identifier"""
+
+    __retained: dict = None
+    """Retained messages, by topic"""
+
+    # ---------------------------------------------------------------
+    #                           Statistics
+    # ---------------------------------------------------------------
+
+    received: int = 0
+    """Messages published to the broker"""
+
+    delivered: int = 0
+    """Messages delivered to subscribers"""
+
+    dropped: int = 0
+    """Messages not delivered because the subscriber was not reading them fast enough"""
+
+    connections: int = 0
+    """Connections accepted since the broker started"""
+
+    # ---------------------------------------------------------------
+    #                           Properties
+    # ---------------------------------------------------------------
+
+    @property
+    def address(self) -> tuple[str, int]:
+        """
+        Address the broker is listening on
+        :return: Tuple of host and port
+        """
+        return self.__host, self.__port
+
+    @property
+    def running(self) -> bool:
+        """
+        Indicates if the broker is running
+        :return: True if running, False otherwise
+        """
+        return self.__server is not None
+
+    @property
+    def clients(self) -> list[str]:
+        """
+        Identifiers of the connected clients
+        :return: List of client identifiers
+        """
+        return list(self.__sessions)
+
+    # ---------------------------------------------------------------
+    #                           Methods
+    # ---------------------------------------------------------------
+
+    def start(self) -> tuple[str, int]:
+        """
+        Starts the broker on a background thread
+        :return: Address the broker is listening on
+        """
+        if self.running:
+            return self.address
+
+        started = threading.Event()
+        self.__loop = asyncio.new_event_loop()
+        self.__thread = threading.Thread(target=self.__run, args=(started,), name="mqtt-broker", daemon=True)
+        self.__thread.start()
+        started.wait()
+        return self.address
+
+    def stop(self):
+        """
+        Stops the broker, closing every connection
+        """
+        if not self.running:
+            return
+        asyncio.run_coroutine_threadsafe(self.__shutdown(), self.__loop).result()
+        self.__loop.call_soon_threadsafe(self.__loop.stop)
+        self.__thread.join()
+        self.__loop.close()
+        self.__server = None
+
+    def reset_statistics(self):
+        """
+        Resets the message counters
+        """
+        self.received = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def __run(self, started: threading.Event):
+        asyncio.set_event_loop(self.__loop)
+        self.__server = self.__loop.run_until_complete(
+            asyncio.start_server(self.__handle_client, self.__host, self.__port)
+        )
+        self.__port = self.__server.sockets[0].getsockname()[1]
+        started.set()
+        self.__loop.run_forever()
+
+    async def __shutdown(self):
+        self.__server.close()
+        for session in list(self.__sessions.values()):
+            session.will = None
+            session.writer.close()
+        await self.__server.wait_closed()
+
+    async def __handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        # Packets are forwarded at once, as the clients wait for each of them
+        connection = writer.get_extra_info("socket")
+        if connection is not None:
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        session = BrokerSession(writer)
+        graceful = False
+
+        try:
+            kind, _, body = await asyncio.wait_for(read_packet(reader), 10)
+            if kind != CONNECT:
+                return
+            self.__accept(session, parse_connect(body))
+
+            while True:
+                if session.keep_alive:
+                    kind, flags, body = await asyncio.wait_for(read_packet(reader), session.keep_alive * 1.5)
+                else:
+                    kind, flags, body = await read_packet(reader)
+
+                if kind == PUBLISH:
+                    topic, payload, qos, packet_id, retain = parse_publish(flags, body)
+                    if qos == 1:
+                        writer.write(packet(PUBACK, 0, struct.pack("!H", packet_id)))
+                    self.__publish(topic, payload, qos, retain)
+                elif kind == SUBSCRIBE:
+                    self.__subscribe(session, *parse_subscribe(body))
+                elif kind == UNSUBSCRIBE:
+                    packet_id, topics = parse_unsubscribe(body)
+                    for topic in topics:
+                        session.subscriptions.pop(topic, None)
+                    writer.write(packet(UNSUBACK, 0, struct.pack("!H", packet_id)))
+                elif kind == PINGREQ:
+                    writer.write(packet(PINGRESP, 0))
+                elif kind == DISCONNECT:
+                    graceful = True
+                    return
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError, MQTTError, struct.error):
+            pass
+        finally:
+            if session.client_id is not None and self.__sessions.get(session.client_id) is session:
+                del self.__sessions[session.client_id]
+                if not graceful and session.will is not None:
+                    self.__publish(*session.will)
+            writer.close()
+
+    def __accept(self, session: BrokerSession, connect: dict):
+        session.client_id = connect["client_id"]
+        session.keep_alive = connect["keep_alive"]
+        session.will = connect["will"]
+
+        # A new connection with the same client identifier takes over the session
+        previous = self.__sessions.get(session.client_id)
+        if previous is not None:
+            previous.will = None
+            previous.writer.close()
+        self.__sessions[session.client_id] = session
+
+        session.writer.write(packet(CONNACK, 0, b"\x00\x00"))
+
+    def __subscribe(self, session: BrokerSession, packet_id: int, topics: list[tuple[str, int]]):
+        granted = bytearray()
+        for topic, qos in topics:
+            qos = min(qos, 1)
+            session.subscriptions[topic] = qos
+            granted.append(qos)
+        session.writer.write(packet(SUBACK, 0, struct.pack("!H", packet_id) + granted))
+
+        for topic, (payload, qos) in self.__retained.items():
+            for topic_filter, maximum in session.subscriptions.items():
+                if topic_matches(topic_filter, topic):
+                    self.__deliver(session, topic, payload, min(qos, maximum), True)
+                    break
+
+    def __publish(self, topic: str, payload: bytes, qos: int, retain: bool):
+        self.received += 1
+
+        if retain:
+            if payload:
+                self.__retained[topic] = (payload, qos)
+            else:
+                self.__retained.pop(topic, None)
+
+        for session in list(self.__sessions.values()):
+            granted = -1
+            for topic_filter, maximum in session.subscriptions.items():
+                if maximum > granted and topic_matches(topic_filter, topic):
+                    granted = maximum
+            if granted >= 0:
+                self.__deliver(session, topic, payload, min(qos, granted), False)
+
+    def __deliver(self, session: BrokerSession, topic: str, payload: bytes, qos: int, retain: bool):
+        transport = session.writer.transport
+        if transport.is_closing() or transport.get_write_buffer_size() > self.__max_buffer:
+            self.dropped += 1
+            return
+        packet_id = session.next_packet_id() if qos else 0
+        session.writer.write(publish_packet(topic, payload, qos, packet_id, retain))
+        self.delivered += 1
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    # ---------------------------------------------------------------
+    #                           Constructor
+    # ---------------------------------------------------------------
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, max_buffer: int = 1 << 20):
+        """
+        :param host: Address to listen on
+        :param port: Port to listen on, 0 picks a free port
+        :param max_buffer: Bytes queued for a client before further messages to it are dropped
+        """
+        self.__host = host
+        self.__port = port
+        self.__max_buffer = max_buffer
+        self.__sessions = {}
+        self.__retained = {}
@@ -0,0 +1,201 @@
+# SenseOS Simulator - Simulated Device
+#
+# Runs a headless SenseOS instance on a background thread, rendering the
+# main screen into a framebuffer display while SynapseLink talks to the
+# MQTT broker routed by the simulated platform
+#
+# The simulated platform modules must be installed (simulator.hal.install)
+# before a device is started
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# External Libraries
+import threading
+
+
+# ---------------------------------------------------------------------
+#                          Simulated Device
+# ---------------------------------------------------------------------
+
+class SimulatedDevice:
+    """
+    SenseOS instance running the main screen loop of the firmware on a background thread
+    """
+
+    # ---------------------------------------------------------------
+    #                         Internal Fields
+    # ---------------------------------------------------------------
+
+    __os = None
+    """SenseOS instance of the device"""
+
+    __display = None
+    """Framebuffer display of the device"""
+
+    __thread: threading.Thread = None
+    """Thread running the main loop of the device"""
+
+    __running: bool = False
+    """Should the main loop keep running"""
+
+    __online: threading.Event = None
+    """Set once the main loop completes an iteration connected to the broker"""
+
+    __error: BaseException = None
+    """Exception that stopped the main loop, if any"""
+
+    __render: bool = True
+    """Should the display be refreshed on each iteration of the main loop"""
+
+    __device_id: str = None
+    """SynapseLink device id used when the processor has no unique id"""
+
+    __uid: bytes = None
+    """Unique id of the processor of the device, None keeps the one of the simulated processor"""
+
+    __groups: list = None
+    """SynapseLink groups joined by the device"""
+
+    __queue_path: str = None
+    """Path of the SynapseLink offline queue log, None keeps the queue in memory only"""
+
+    # ---------------------------------------------------------------
+    #                           Properties
+    # ---------------------------------------------------------------
+
+    @property
+    def os(self):
+        """SenseOS instance of the device, None before the device starts"""
+        return self.__os
+
+    @property
+    def display(self):
+        """Framebuffer display of the device"""
+        return self.__display
+
+    @property
+    def running(self) -> bool:
+        """Indicates if the main loop of the device is running"""
+        return self.__thread is not None and self.__thread.is_alive()
+
+    @property
+    def connected(self) -> bool:
+        """Indicates if the device is connected to the SynapseLink broker"""
+        return self.__os is not None and self.__os.synapselink.initialized and self.__os.synapselink.connected
+
+    @property
+    def device_id(self) -> str:
+        """SynapseLink device id of the device"""
+        return self.__os.synapselink.device_id if self.__os is not None else self.__device_id
+
+    @property
+    def error(self) -> BaseException:
+        """Exception that stopped the main loop, None while running normally"""
+        return self.__error
+
+    @property
+    def statistics(self) -> dict:
+        """Handling statistics of the SynapseLink commands received by the device"""
+        return self.__os.synapselink.statistics
+
+    # ---------------------------------------------------------------
+    #                           Methods
+    # ---------------------------------------------------------------
+
+    def start(self, timeout: float = 10.0, wait: bool = True):
+        """
+        Starts the device and waits until it is connected to the broker
+        :param timeout: Time to wait for the connection, in seconds
+        :param wait: Should the connection be waited for, use wait_connected otherwise
+        :raises TimeoutError: When the device does not connect in time
+        """
+        self.__running = True
+        self.__online = threading.Event()
+        self.__thread = threading.Thread(target=self.__run, name="senseos-device", daemon=True)
+        self.__thread.start()
+
+        if wait and not self.wait_connected(timeout):
+            raise TimeoutError("Device did not connect to the broker") from self.__error
+
+    def wait_connected(self, timeout: float = 10.0) -> bool:
+        """
+        Waits until the device is connected to the broker and subscribed to its topic
+        :param timeout: Time to wait, in seconds
+        :return: True if connected, False otherwise
+        """
+        self.__online.wait(timeout)
+        return self.connected
+
+    def stop(self, wait: bool = True):
+        """
+        Stops the main loop of the device and shuts down the operating system
+        :param wait: Should the main loop be waited for, as it only stops at the end of a tick
+        """
+        self.__running = False
+        if wait and self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def __boot(self):
+        # Imported here, as SenseOS imports the platform modules installed by the simulator
+        from senseos import SenseOS
+        from senseos.hardware.display.framebuffer import SenseFramebufferDisplay
+        from senseos.display.screen.mainscreen import SenseMainScreen
+        from simulator.hal import microcontroller
+
+        microcontroller.cpu.assign_thread_uid(self.__uid)
+
+        self.__display = SenseFramebufferDisplay(name="internal-builtin-display")
+        self.__os = SenseOS()
+        self.__os.synapselink.device_id = self.__device_id
+        self.__os.synapselink.groups = self.__groups
+        self.__os.synapselink.queue_path = self.__queue_path
+        self.__os.network.profile_path = None
+        self.__os.network.profile_storage = None
+        self.__os.hardware.connect(self.__display.name, self.__display)
+        self.__os.initialize()
+        self.__os.display.primary_display = self.__display.name
+
+        screen = self.__os.display.screens.show("main", SenseMainScreen, self.__render)
+        screen.senseos = self.__os
+
+    def __run(self):
+        try:
+            self.__boot()
+
+            # The connection is only usable once the tick that connected returns, as the
+            # subscription to the device topic is made by the connection callback
+            screen = self.__os.display.primary_display.screen
+            while self.__running:
+                screen.tick()
+                if self.__render:
+                    self.__display.refresh()
+                if self.connected:
+                    self.__online.set()
+        except BaseException as error:
+            self.__error = error
+        finally:
+            self.__online.set()
+            if self.__os is not None:
+                self.__os.deinitialize()
+
+    # ---------------------------------------------------------------
+    #                           Constructor
+    # ---------------------------------------------------------------
+
+    def __init__(self, render: bool = True, device_id: str = None, uid: bytes = None, groups: list = None,
+                 queue_path: str = None):
+        """
+        :param render: Should the display be refreshed on each iteration of the main loop
+        :param device_id: SynapseLink device id used when the processor has no unique id
+        :param uid: Unique id of the processor of the device, None keeps the one of the simulated processor
+        :param groups: SynapseLink groups joined by the device
+        :param queue_path: Path of the SynapseLink offline queue log, None keeps the queue in memory only
+        """
+        self.__render = render
+        self.__device_id = device_id
+        self.__uid = uid
+        self.__groups = list(groups) if groups else []
+        self.__queue_path = queue_path
@@ -0,0 +1,365 @@
+# SenseOS Simulator - Fleet
+#
+# Runs many simulated SynapsePods against one broker to size the broker and
+# the backend. Devices are spread over worker processes, each hosting its
+# devices on threads with their own SenseOS instance and processor unique
+# id, while a driver replays heartbeat, telemetry and command traffic to
+# every device, and site-wide commands to the group of each site, over a
+# single MQTT connection and aggregates fleet-wide latency, device handling
+# time and memory statistics
+#
+# Devices sharing a worker process share the simulated pins and wifi radio
+# of that process
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# External Libraries
+import asyncio
+import heapq
+import multiprocessing
+import os
+import random
+import time
+
+# SenseOS Libraries
+from senseos.synapselink import GROUP_TOPIC
+
+# Simulator Libraries
+from simulator.loadgen import COMMANDS, LoadReport, merge_statistics
+
+# SynapseLink Host Libraries
+from synapselink.client import encode_command, decode_reply
+from synapselink.mqtt import MQTTClient
+
+UID_PREFIX = b"\xfe\x11"
+"""Prefix of the processor unique ids of the fleet, followed by the index of each device"""
+
+# ---------------------------------------------------------------------
+#                          Traffic Patterns
+# ---------------------------------------------------------------------
+
+DEFAULT_PATTERNS = {
+    "heartbeat": (15.0, {"heartbeat": 1}),
+    "telemetry": (5.0, {"analogread": 2, "digitalread": 1}),
+    "command": (60.0, {"digitalwrite": 3, "displaywrite": 1}),
+}
+"""Traffic replayed to each device, by pattern, as (mean interval in seconds, command mix)"""
+
+DEFAULT_SITE_PATTERNS = {
+    "site": (30.0, {"digitalwrite": 1, "heartbeat": 1}),
+}
+"""Traffic published to the group of each site, by pattern, as (mean interval in seconds, command mix)"""
+
+
+def resident_memory() -> int:
+    """
+    Returns the resident memory of the current process
+    :return: Resident memory, in bytes
+    """
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        # Peak instead of current resident memory, in kilobytes on Linux and bytes on macOS
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if usage > 1 << 32 else usage * 1024
+
+
+# ---------------------------------------------------------------------
+#                              Worker
+# ---------------------------------------------------------------------
+
+def worker(broker: tuple[str, int], devices: list[tuple[bytes, str]], connection, timeout: float):
+    """
+    Hosts simulated devices until the fleet asks it to stop, runs in its own process
+    :param broker: Address of the MQTT broker, as (host, port)
+    :param devices: Processor unique id and site of each device hosted by the worker
+    :param connection: Pipe connection to the fleet
+    :param timeout: Time to wait for the devices to connect, in seconds
+    """
+    from simulator.hal import install
+    install(broker=broker)
+    from simulator.device import SimulatedDevice
+
+    baseline = resident_memory()
+    start = time.monotonic()
+
+    devices = [SimulatedDevice(render=False, uid=uid, groups=[site]) for uid, site in devices]
+    for device in devices:
+        device.start(wait=False)
+    connected = sum(1 for device in devices if device.wait_connected(max(0.0, start + timeout - time.monotonic())))
+
+    connection.send({
+        "device_ids": [(device.device_id, device.os.synapselink.groups) for device in devices if device.connected],
+        "devices": len(devices),
+        "connected": connected,
+        "boot_seconds": time.monotonic() - start,
+        "baseline_memory": baseline,
+        "memory": resident_memory(),
+    })
+
+    # Statistics are reset once the fleet starts replaying traffic
+    connection.recv()
+    for device in devices:
+        if device.connected:
+            device.os.synapselink.reset_statistics()
+
+    connection.recv()
+    statistics = {}
+    for device in devices:
+        if device.os is not None:
+            merge_statistics(statistics, device.statistics)
+    connection.send({"statistics": statistics, "memory": resident_memory()})
+
+    for device in devices:
+        device.stop(wait=False)
+    for device in devices:
+        device.stop()
+
+
+# ---------------------------------------------------------------------
+#                               Report
+# ---------------------------------------------------------------------
+
+class FleetReport(LoadReport):
+    """
+    Measurements of a fleet run, adding the fleet size and memory to the load measurements
+    """
+
+    def __init__(self, devices: int, duration: float):
+        super().__init__(0.0, duration)
+        self.devices = devices
+        self.connected = 0
+        self.boot_seconds = 0.0
+        self.workers = []
+
+    @property
+    def device_ids(self) -> list[str]:
+        """Device ids of the connected devices, as reported by the workers"""
+        return [device_id for worker in self.workers for device_id, _ in worker["device_ids"]]
+
+    @property
+    def device_memory(self) -> float:
+        """Mean resident memory used by each device, in bytes"""
+        used = sum(worker["memory"] - worker["baseline_memory"] for worker in self.workers)
+        devices = sum(worker["devices"] for worker in self.workers)
+        return used / devices if devices else 0.0
+
+    @property
+    def memory(self) -> int:
+        """Resident memory of every worker process combined, in bytes"""
+        return sum(worker["memory"] for worker in self.workers)
+
+    def to_dict(self) -> dict:
+        result = super().to_dict()
+        workers = [{key: value for key, value in worker.items() if key != "device_ids"} for worker in self.workers]
+        result.update({
+            "devices": self.devices,
+            "connected": self.connected,
+            "boot_seconds": self.boot_seconds,
+            "memory": self.memory,
+            "device_memory": self.device_memory,
+            "workers": workers,
+        })
+        return result
+
+    def format(self) -> str:
+        lines = [
+            "SynapseLink fleet: {} devices on {} workers, {} connected in {:.1f} s".format(
+                self.devices, len(self.workers), self.connected, self.boot_seconds
+            ),
+            "memory: {:.1f} MiB resident, {:.1f} KiB per device".format(
+                self.memory / (1 << 20), self.device_memory / (1 << 10)
+            ),
+            super().format(),
+        ]
+        return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------
+#                               Fleet
+# ---------------------------------------------------------------------
+
+class Fleet:
+    """
+    Spawns simulated devices on worker processes and replays traffic to them
+    """
+
+    # ---------------------------------------------------------------
+    #                         Internal Fields
+    # ---------------------------------------------------------------
+
+    __report: FleetReport = None
+    """Measurements of the current run"""
+
+    __event_id: int = 0
+    """Last event id used"""
+
+    # ---------------------------------------------------------------
+    #                           Properties
+    # ---------------------------------------------------------------
+
+    @property
+    def sites(self) -> list[str]:
+        """
+        Groups the devices of the fleet are spread over
+        :return: List of group names
+        """
+        return ["site-{}".format(index) for index in range(self.site_count)]
+
+    @property
+    def uids(self) -> list[bytes]:
+        """
+        Processor unique ids of every device of the fleet
+        :return: List of unique ids
+        """
+        return [UID_PREFIX + index.to_bytes(6, "big") for index in range(self.devices)]
+
+    # ---------------------------------------------------------------
+    #                           Methods
+    # ---------------------------------------------------------------
+
+    def run(self) -> FleetReport:
+        """
+        Boots the fleet, replays the traffic for the configured duration and shuts the fleet down
+        :return: Measurements of the run
+        """
+        self.__report = FleetReport(self.devices, self.duration)
+        # Devices ignore event ids they handled recently, each run starts at a random one
+        self.__event_id = random.getrandbits(24)
+
+        sites = self.sites
+        devices = [(uid, sites[index % len(sites)]) for index, uid in enumerate(self.uids)]
+        workers = min(self.workers, len(devices)) or 1
+        context = multiprocessing.get_context("spawn")
+        processes = []
+        connections = []
+        for index in range(workers):
+            parent, child = context.Pipe()
+            process = context.Process(
+                target=worker, args=(self.broker, devices[index::workers], child, self.boot_timeout),
+                name="fleet-worker-{}".format(index), daemon=True,
+            )
+            process.start()
+            processes.append(process)
+            connections.append(parent)
+
+        try:
+            start = time.monotonic()
+            self.__report.workers = [connection.recv() for connection in connections]
+            self.__report.boot_seconds = time.monotonic() - start
+            self.__report.connected = sum(worker["connected"] for worker in self.__report.workers)
+
+            for connection in connections:
+                connection.send("start")
+            members = {}
+            for worker_report in self.__report.workers:
+                for device_id, groups in worker_report["device_ids"]:
+                    for group in groups:
+                        members.setdefault(group, []).append(device_id)
+            asyncio.run(self.__replay(self.__report.device_ids, members))
+
+            statistics = {}
+            for index, connection in enumerate(connections):
+                connection.send("stop")
+                result = connection.recv()
+                merge_statistics(statistics, result["statistics"])
+                self.__report.workers[index]["memory"] = result["memory"]
+            self.__report.apply_device_statistics(statistics)
+        finally:
+            for process in processes:
+                process.join(30)
+                if process.is_alive():
+                    process.terminate()
+
+        return self.__report
+
+    async def __replay(self, device_ids: list[str], members: dict):
+        client = MQTTClient("synapselink-fleet-{}".format(random.getrandbits(32)))
+        client.on_message = self.__on_message
+        await client.connect(*self.broker, username="evoluxiot", password="evoluxiot")
+        await client.subscribe("+")
+
+        generator = random.Random(self.seed)
+        start = time.monotonic()
+        end = start + self.duration
+
+        # Each device replays every device pattern and each site every site pattern, as poisson processes
+        schedule = []
+        for device_id in device_ids:
+            for pattern, (interval, _) in self.patterns.items():
+                heapq.heappush(schedule, (start + generator.expovariate(1.0 / interval), device_id, pattern, False))
+        for site in members:
+            for pattern, (interval, _) in self.site_patterns.items():
+                heapq.heappush(schedule, (start + generator.expovariate(1.0 / interval), site, pattern, True))
+
+        while schedule and schedule[0][0] < end:
+            due, target, pattern, site = heapq.heappop(schedule)
+            delay = due - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            interval, mix = (self.site_patterns if site else self.patterns)[pattern]
+            name = generator.choices(list(mix), list(mix.values()))[0]
+            command, parameters = COMMANDS[name]
+            self.__event_id += 1
+            message = encode_command(command, parameters(generator), self.__event_id)
+
+            # A site command is a single publish, answered by every member of the site
+            if site:
+                for device_id in members[target]:
+                    self.__report.sent((device_id, self.__event_id), name)
+                client.publish_nowait(GROUP_TOPIC.format(target), message)
+            else:
+                self.__report.sent((target, self.__event_id), name)
+                client.publish_nowait(target, message)
+            await client.drain()
+
+            heapq.heappush(schedule, (due + generator.expovariate(1.0 / interval), target, pattern, site))
+
+        deadline = time.monotonic() + self.timeout
+        while self.__report.pending and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        self.__report.elapsed = time.monotonic() - start
+        self.__report.rate = self.__report.total.sent / self.duration
+
+        await client.disconnect()
+
+    def __on_message(self, topic: str, payload: bytes):
+        reply = decode_reply(payload)
+        if reply is not None:
+            command, parameters, event_id, _ = reply
+            self.__report.received((topic, event_id), command, parameters)
+
+    # ---------------------------------------------------------------
+    #                           Constructor
+    # ---------------------------------------------------------------
+
+    def __init__(self, broker: tuple[str, int], devices: int = 100, workers: int = None, sites: int = 1,
+                 duration: float = 30.0, patterns: dict = None, site_patterns: dict = None, timeout: float = 5.0,
+                 boot_timeout: float = 60.0, seed: int = None):
+        """
+        :param broker: Address of the MQTT broker, as (host, port)
+        :param devices: Number of devices of the fleet
+        :param workers: Number of worker processes hosting the devices, defaults to the number of processors
+        :param sites: Number of sites, each a SynapseLink group, the devices are spread over
+        :param duration: Time spent replaying traffic, in seconds
+        :param patterns: Traffic replayed to each device, defaults to DEFAULT_PATTERNS
+        :param site_patterns: Traffic published to the group of each site, defaults to DEFAULT_SITE_PATTERNS
+        :param timeout: Time to wait for the results after the replay ends, in seconds
+        :param boot_timeout: Time to wait for the devices of each worker to connect, in seconds
+        :param seed: Seed of the traffic, for repeatable runs
+        """
+        self.broker = broker
+        self.devices = devices
+        self.workers = workers or os.cpu_count() or 1
+        self.site_count = max(1, sites)
+        self.duration = duration
+        self.patterns = patterns if patterns is not None else dict(DEFAULT_PATTERNS)
+        self.site_patterns = site_patterns if site_patterns is not None else dict(DEFAULT_SITE_PATTERNS)
+        self.timeout = timeout
+        self.boot_timeout = boot_timeout
+        self.seed = seed
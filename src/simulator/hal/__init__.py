@@ -0,0 +1,94 @@
+# SenseOS Simulator HAL - Hardware Abstraction Layer
+#
+# Simulated implementations of the circuitpython platform modules used by
+# SenseOS (board, microcontroller, digitalio, analogio, pwmio, busio, wifi
+# and socketpool), allowing the operating system to run on a regular computer
+#
+# The modules replace the platform modules imported by the operating system,
+# SenseOS modules imported before the installation are imported again
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# External Libraries
+import sys
+
+# Simulator Libraries
+from simulator.hal import microcontroller, board, digitalio, analogio, pwmio, busio, wifi, socketpool, waveform
+
+MODULES = {
+    "microcontroller": microcontroller,
+    "board": board,
+    "digitalio": digitalio,
+    "analogio": analogio,
+    "pwmio": pwmio,
+    "busio": busio,
+    "wifi": wifi,
+    "socketpool": socketpool,
+}
+"""Platform modules provided by the simulator"""
+
+DEFAULT_NETWORK = wifi.SimulatedNetwork("EvoluxIoT", "evoluxiot", channel=6, rssi=-42)
+"""Network available to the simulated radio by default"""
+
+
+# ---------------------------------------------------------------------
+#                            Installation
+# ---------------------------------------------------------------------
+
+def install(connected: bool = True, broker: tuple = None, networks: list = None):
+    """
+    Installs the simulated platform modules, replacing the ones of the host
+    :param connected: Should the radio start connected to the first network
+    :param broker: Local (address, port) pair used instead of the SynapseLink MQTT broker
+    :param networks: Simulated networks within reach of the radio, defaults to DEFAULT_NETWORK
+    """
+    # SenseOS modules imported before the installation probed the host platform, such as the protocol constants
+    # imported by the host client, and are imported again against the simulated one
+    if not installed():
+        for name in [name for name in sys.modules if name == "senseos" or name.startswith("senseos.")]:
+            del sys.modules[name]
+
+    for name, module in MODULES.items():
+        sys.modules[name] = module
+
+    from simulator.hal import display
+    display.install()
+
+    if not wifi.radio.networks:
+        wifi.radio.networks.extend(networks if networks is not None else [DEFAULT_NETWORK])
+
+    if connected and not wifi.radio.connected:
+        network = wifi.radio.networks[0]
+        wifi.radio.connect(network.ssid, network.password, channel=network.channel, bssid=network.bssid)
+
+    if broker is not None:
+        socketpool.route("mqtt.evoluxiot.pt", *broker)
+
+
+def installed() -> bool:
+    """
+    Indicates if the simulated platform modules are installed
+    :return: True if installed, False otherwise
+    """
+    return all(sys.modules.get(name) is module for name, module in MODULES.items())
+
+
+# ---------------------------------------------------------------------
+#                             Exports
+# ---------------------------------------------------------------------
+
+__all__ = [
+    "install",
+    "installed",
+    "microcontroller",
+    "board",
+    "digitalio",
+    "analogio",
+    "pwmio",
+    "busio",
+    "wifi",
+    "socketpool",
+    "waveform"
+]
@@ -0,0 +1,85 @@
+# SenseOS Simulator HAL - analogio
+#
+# Simulated implementation of the circuitpython analogio module
+# Analog inputs read the waveform driven into the pin as a 16-bit value
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# Simulator Libraries
+from simulator.hal.waveform import simulation_time, ANALOG_MAX
+
+
+# ---------------------------------------------------------------------
+#                             Analog In
+# ---------------------------------------------------------------------
+
+class AnalogIn:
+    """
+    Simulated analog input of a pin
+    """
+
+    reference_voltage: float = 3.3
+    """The maximum voltage measurable"""
+
+    def __init__(self, pin):
+        self.__pin = pin
+        pin.claims += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.deinit()
+
+    def deinit(self):
+        """Releases the pin"""
+        if self.__pin is not None:
+            self.__pin.claims -= 1
+            self.__pin = None
+
+    @property
+    def value(self) -> int:
+        """The value on the analog pin between 0 and 65535 inclusive"""
+        sample = self.__pin.sample(simulation_time())
+        if sample is None:
+            return 0
+        return max(0, min(ANALOG_MAX, int(sample)))
+
+
+# ---------------------------------------------------------------------
+#                             Analog Out
+# ---------------------------------------------------------------------
+
+class AnalogOut:
+    """
+    Simulated analog output of a pin
+    """
+
+    def __init__(self, pin):
+        self.__pin = pin
+        self.__value = 0
+        pin.claims += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.deinit()
+
+    def deinit(self):
+        """Releases the pin"""
+        if self.__pin is not None:
+            self.__pin.claims -= 1
+            self.__pin = None
+
+    @property
+    def value(self) -> int:
+        """The value on the analog pin between 0 and 65535 inclusive"""
+        return self.__value
+
+    @value.setter
+    def value(self, value: int):
+        self.__value = max(0, min(ANALOG_MAX, int(value)))
+        self.__pin.level = self.__value
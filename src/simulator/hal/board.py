@@ -0,0 +1,53 @@
+# SenseOS Simulator HAL - board
+#
+# Simulated implementation of the circuitpython board module
+# Exposes the pins of a Raspberry PI Pico W, the board used by the SynapsePod Crystal
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# Simulator Libraries
+from simulator.hal.microcontroller import Pin
+
+# ---------------------------------------------------------------------
+#                                Pins
+# ---------------------------------------------------------------------
+
+board_id = "raspberry_pi_pico_w"
+"""Identifier of the simulated board"""
+
+GP0 = Pin("GP0")
+GP1 = Pin("GP1")
+GP2 = Pin("GP2")
+GP3 = Pin("GP3")
+GP4 = Pin("GP4")
+GP5 = Pin("GP5")
+GP6 = Pin("GP6")
+GP7 = Pin("GP7")
+GP8 = Pin("GP8")
+GP9 = Pin("GP9")
+GP10 = Pin("GP10")
+GP11 = Pin("GP11")
+GP12 = Pin("GP12")
+GP13 = Pin("GP13")
+GP14 = Pin("GP14")
+GP15 = Pin("GP15")
+GP16 = Pin("GP16")
+GP17 = Pin("GP17")
+GP18 = Pin("GP18")
+GP19 = Pin("GP19")
+GP20 = Pin("GP20")
+GP21 = Pin("GP21")
+GP22 = Pin("GP22")
+GP26 = Pin("GP26")
+GP27 = Pin("GP27")
+GP28 = Pin("GP28")
+
+A0 = GP26_A0 = GP26
+A1 = GP27_A1 = GP27
+A2 = GP28_A2 = GP28
+A3 = VOLTAGE_MONITOR = Pin("A3")
+
+LED = Pin("LED")
+SMPS_MODE = Pin("SMPS_MODE")
@@ -0,0 +1,67 @@
+# SenseOS Simulator HAL - busio
+#
+# Simulated implementation of the circuitpython busio module
+# The SPI bus counts the bytes written into it, reads return zeros
+
+# ---------------------------------------------------------------------
+#                                SPI
+# ---------------------------------------------------------------------
+
+class SPI:
+    """
+    Simulated serial peripheral interface bus
+    """
+
+    bytes_written: int = 0
+    """Number of bytes written into the bus"""
+
+    def __init__(self, clock, MOSI=None, MISO=None, half_duplex: bool = False):
+        self.__pins = [pin for pin in (clock, MOSI, MISO) if pin is not None]
+        self.__locked = False
+        self.frequency = 250000
+        for pin in self.__pins:
+            pin.claims += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.deinit()
+
+    def deinit(self):
+        """Releases the pins of the bus"""
+        for pin in self.__pins:
+            pin.claims -= 1
+        self.__pins = []
+
+    def configure(self, *, baudrate: int = 100000, polarity: int = 0, phase: int = 0, bits: int = 8):
+        """Configures the SPI bus"""
+        self.frequency = baudrate
+
+    def try_lock(self) -> bool:
+        """Attempts to grab the SPI lock"""
+        if self.__locked:
+            return False
+        self.__locked = True
+        return True
+
+    def unlock(self):
+        """Releases the SPI lock"""
+        self.__locked = False
+
+    def write(self, buffer, *, start: int = 0, end: int = None):
+        """Writes the data contained in buffer"""
+        end = len(buffer) if end is None else end
+        self.bytes_written += end - start
+
+    def readinto(self, buffer, *, start: int = 0, end: int = None, write_value: int = 0):
+        """Reads into buffer while writing write_value for each byte read"""
+        end = len(buffer) if end is None else end
+        for index in range(start, end):
+            buffer[index] = 0
+
+    def write_readinto(self, out_buffer, in_buffer, *, out_start: int = 0, out_end: int = None, in_start: int = 0,
+                       in_end: int = None):
+        """Writes out the data in out_buffer while simultaneously reading data into in_buffer"""
+        self.write(out_buffer, start=out_start, end=out_end)
+        self.readinto(in_buffer, start=in_start, end=in_end)
@@ -0,0 +1,141 @@
+# SenseOS Simulator HAL - digitalio
+#
+# Simulated implementation of the circuitpython digitalio module
+# Inputs read the waveform driven into the pin (or the pull resistor),
+# outputs record the values written into the pin
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# Simulator Libraries
+from simulator.hal.waveform import simulation_time
+
+
+# ---------------------------------------------------------------------
+#                             Enumerations
+# ---------------------------------------------------------------------
+
+class Direction:
+    """Defines the direction of a digital pin"""
+
+    INPUT = "INPUT"
+    """Read digital data in"""
+
+    OUTPUT = "OUTPUT"
+    """Write digital data out"""
+
+
+class Pull:
+    """Defines the pull of a digital input pin"""
+
+    UP = "UP"
+    """When the input line isn't being driven the pull up can pull the state of the line high so it reads as true"""
+
+    DOWN = "DOWN"
+    """When the input line isn't being driven the pull down can pull the state of the line low so it reads as false"""
+
+
+class DriveMode:
+    """Defines the drive mode of a digital output pin"""
+
+    PUSH_PULL = "PUSH_PULL"
+    """Output both high and low digital values"""
+
+    OPEN_DRAIN = "OPEN_DRAIN"
+    """Output low digital values but go into high z for digital high"""
+
+
+# ---------------------------------------------------------------------
+#                           Digital In/Out
+# ---------------------------------------------------------------------
+
+class DigitalInOut:
+    """
+    Simulated digital input and output of a pin
+    """
+
+    def __init__(self, pin):
+        self.__pin = pin
+        self.__direction = Direction.INPUT
+        self.__pull = None
+        self.__drive_mode = DriveMode.PUSH_PULL
+        self.__value = False
+        pin.claims += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.deinit()
+
+    def deinit(self):
+        """Releases the pin"""
+        if self.__pin is not None:
+            self.__pin.claims -= 1
+            self.__pin = None
+
+    def switch_to_output(self, value: bool = False, drive_mode: str = DriveMode.PUSH_PULL):
+        """Sets the pin to be a digital output"""
+        self.__direction = Direction.OUTPUT
+        self.__drive_mode = drive_mode
+        self.__pull = None
+        self.value = value
+
+    def switch_to_input(self, pull: str = None):
+        """Sets the pin to be a digital input"""
+        self.__direction = Direction.INPUT
+        self.__pull = pull
+        self.__pin.level = None
+
+    @property
+    def direction(self) -> str:
+        """Direction of the pin"""
+        return self.__direction
+
+    @direction.setter
+    def direction(self, value: str):
+        if value == Direction.OUTPUT:
+            self.switch_to_output(self.__value, self.__drive_mode)
+        else:
+            self.switch_to_input(None)
+
+    @property
+    def value(self) -> bool:
+        """The digital logic level of the pin"""
+        if self.__direction == Direction.OUTPUT:
+            return self.__value
+
+        sample = self.__pin.sample(simulation_time())
+        if sample is not None:
+            return bool(sample)
+        return self.__pull == Pull.UP
+
+    @value.setter
+    def value(self, value: bool):
+        if self.__direction != Direction.OUTPUT:
+            raise AttributeError("Cannot set value when direction is input.")
+        self.__value = bool(value)
+        self.__pin.level = self.__value
+
+    @property
+    def pull(self) -> str:
+        """The pull of the pin, None when the pin is an output or has no pull"""
+        return self.__pull
+
+    @pull.setter
+    def pull(self, value: str):
+        if self.__direction == Direction.OUTPUT:
+            raise AttributeError("Pull not used when direction is output.")
+        self.__pull = value
+
+    @property
+    def drive_mode(self) -> str:
+        """The drive mode of the pin"""
+        return self.__drive_mode
+
+    @drive_mode.setter
+    def drive_mode(self, value: str):
+        if self.__direction != Direction.OUTPUT:
+            raise AttributeError("Drive mode not used when direction is input.")
+        self.__drive_mode = value
@@ -0,0 +1,144 @@
+# SenseOS Simulator HAL - Display Controllers
+#
+# Simulated display buses and controllers, completing the displayio
+# implementation available on the host (Adafruit Blinka displayio) with the
+# circuitpython 8 classes used by SenseOS, and replacing the ILI9341 driver
+# It also corrects the bitmaptools functions that behave differently from
+# circuitpython
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# External Libraries
+import sys
+import types
+
+import bitmaptools
+import displayio
+
+
+# ---------------------------------------------------------------------
+#                             Display Bus
+# ---------------------------------------------------------------------
+
+class FourWire:
+    """
+    Simulated four wire display bus, counts the bytes sent to the display
+    """
+
+    def __init__(self, spi_bus, *, command=None, chip_select=None, reset=None, baudrate: int = 24000000,
+                 polarity: int = 0, phase: int = 0):
+        self.spi_bus = spi_bus
+        self.bytes_sent = 0
+
+    def reset(self):
+        """Performs a hardware reset via the reset pin"""
+
+    def send(self, command: int, data, *, toggle_every_byte: bool = False):
+        """Sends the given command value followed by the full set of data"""
+        self.bytes_sent += 1 + len(data)
+
+
+# ---------------------------------------------------------------------
+#                          Display Controller
+# ---------------------------------------------------------------------
+
+class Display:
+    """
+    Simulated display controller, keeps the root group and counts the refreshes
+    Use SenseFramebufferDisplay to render the pixels of the screens
+    """
+
+    def __init__(self, display_bus=None, init_sequence=b"", *, width: int = 320, height: int = 240, rotation: int = 0,
+                 auto_refresh: bool = True, **kwargs):
+        self.bus = display_bus
+        self.width = width
+        self.height = height
+        self.rotation = rotation
+        self.auto_refresh = auto_refresh
+        self.brightness = 1.0
+        self.root_group = None
+        self.refreshes = 0
+
+    def show(self, group):
+        """Switches to displaying the given group of layers"""
+        self.root_group = group
+
+    def refresh(self, *, target_frames_per_second: int = None, minimum_frames_per_second: int = 0) -> bool:
+        """Refreshes the display"""
+        self.refreshes += 1
+        return True
+
+
+class ILI9341(Display):
+    """
+    Simulated ILI9341 display controller
+    """
+
+    def __init__(self, bus, **kwargs):
+        kwargs.setdefault("width", 320)
+        kwargs.setdefault("height", 240)
+        super().__init__(bus, b"", **kwargs)
+
+
+# ---------------------------------------------------------------------
+#                               Shape
+# ---------------------------------------------------------------------
+
+class Shape(displayio.Bitmap):
+    """
+    Circuitpython 8 shape, a bitmap with two values defined by row boundaries
+    """
+
+    def __init__(self, width: int, height: int, *, mirror_x: bool = False, mirror_y: bool = False):
+        super().__init__(width, height, 2)
+        self.mirror_x = mirror_x
+        self.mirror_y = mirror_y
+
+    def set_boundary(self, y: int, start_x: int, end_x: int):
+        """Loads pre-packed data into the given row"""
+        for x in range(self.width):
+            self[x, y] = 1 if start_x <= x <= end_x else 0
+
+
+# ---------------------------------------------------------------------
+#                            Bitmap Tools
+# ---------------------------------------------------------------------
+
+def arrayblit(bitmap, data, x1: int = 0, y1: int = 0, x2: int = None, y2: int = None, skip_index: int = None):
+    """
+    Circuitpython arrayblit, inserts the pixels of data into the rectangle, row by row, the first pixel of data
+    going to (x1, y1) rather than to (0, 0) as in Blinka
+    """
+    if x2 is None:
+        x2 = bitmap.width
+    if y2 is None:
+        y2 = bitmap.height
+
+    value_count = 2 ** bitmap._bits_per_value
+    index = 0
+    for y in range(y1, y2):
+        for x in range(x1, x2):
+            value = int(data[index] % value_count)
+            if skip_index is None or value != skip_index:
+                bitmap[x, y] = value
+            index += 1
+
+
+# ---------------------------------------------------------------------
+#                            Installation
+# ---------------------------------------------------------------------
+
+def install():
+    """
+    Completes the displayio module with the simulated classes, corrects bitmaptools and replaces the ILI9341 driver
+    """
+    for name, value in (("FourWire", FourWire), ("Display", Display), ("Shape", Shape)):
+        if not hasattr(displayio, name):
+            setattr(displayio, name, value)
+    bitmaptools.arrayblit = arrayblit
+
+    driver = types.ModuleType("adafruit_ili9341")
+    driver.ILI9341 = ILI9341
+    sys.modules["adafruit_ili9341"] = driver
@@ -0,0 +1,209 @@
+# SenseOS Simulator HAL - microcontroller
+#
+# Simulated implementation of the circuitpython microcontroller module
+# Provides the pin objects, the processor information and the reset
+# behaviour of a simulated Raspberry PI Pico W
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# External Libraries
+import threading
+from collections import deque
+from time import monotonic_ns, sleep
+
+PIN_TRACE_LENGTH = 1024
+"""Number of output transitions kept by each simulated pin"""
+
+
+# ---------------------------------------------------------------------
+#                                Pin
+# ---------------------------------------------------------------------
+
+class Pin:
+    """
+    Represents a simulated pin of the microcontroller, holds the value driven
+    by the operating system and the waveform driven by the simulated world
+    """
+
+    # ---------------------------------------------------------------
+    #                         Internal Fields
+    # ---------------------------------------------------------------
+
+    __name: str = None
+    """Internal field that represents the name of the pin"""
+
+    __level = None
+    """Internal field that represents the value driven by the operating system, None when not driven"""
+
+    __waveform = None
+    """Internal field that represents the waveform driven into the pin by the simulated world"""
+
+    __trace: deque = None
+    """Internal field that contains the last output transitions of the pin"""
+
+    claims: int = 0
+    """Number of drivers (DigitalInOut, AnalogIn, ...) currently using the pin"""
+
+    # ---------------------------------------------------------------
+    #                           Properties
+    # ---------------------------------------------------------------
+
+    @property
+    def name(self) -> str:
+        """Name of the pin"""
+        return self.__name
+
+    @property
+    def level(self):
+        """Value driven by the operating system, None when the pin is not driven"""
+        return self.__level
+
+    @level.setter
+    def level(self, value):
+        """Drives a value into the pin, recording the transition"""
+        if value != self.__level:
+            self.__trace.append((monotonic_ns(), value))
+        self.__level = value
+
+    @property
+    def waveform(self):
+        """Waveform driven into the pin by the simulated world"""
+        return self.__waveform
+
+    @property
+    def trace(self) -> list[tuple[int, object]]:
+        """
+        Returns the last output transitions of the pin
+        :return: List of (monotonic_ns, value) tuples
+        """
+        return list(self.__trace)
+
+    # ---------------------------------------------------------------
+    #                           Methods
+    # ---------------------------------------------------------------
+
+    def drive(self, waveform):
+        """
+        Drives a waveform into the pin, read by inputs and analog inputs
+        :param waveform: Callable receiving the simulation time in seconds, a constant value, or None to release the pin
+        """
+        if waveform is not None and not callable(waveform):
+            constant = waveform
+            waveform = lambda t: constant
+        self.__waveform = waveform
+
+    def sample(self, t: float):
+        """
+        Samples the waveform driven into the pin
+        :param t: Simulation time in seconds
+        :return: Value of the waveform, or None when the pin is not driven
+        """
+        if self.__waveform is None:
+            return None
+        return self.__waveform(t)
+
+    def clear_trace(self):
+        """
+        Clears the output transitions recorded by the pin
+        """
+        self.__trace.clear()
+
+    def __hash__(self):
+        return hash(self.__name)
+
+    def __repr__(self):
+        return "board.{}".format(self.__name)
+
+    def __init__(self, name: str):
+        self.__name = name
+        self.__trace = deque((), PIN_TRACE_LENGTH)
+
+
+# ---------------------------------------------------------------------
+#                             Processor
+# ---------------------------------------------------------------------
+
+class Processor:
+    """
+    Represents the simulated processor of the microcontroller
+    """
+
+    __uid: bytearray = None
+    """Unique identifier of the processor"""
+
+    __threads: threading.local = None
+    """Unique identifiers assigned to threads, so each simulated device of a process has its own"""
+
+    frequency: int = 125_000_000
+    """Clock frequency of the processor, in Hz"""
+
+    temperature: float = 27.0
+    """Temperature of the processor, in degrees Celsius"""
+
+    voltage: float = 3.3
+    """Supply voltage of the processor, in volts"""
+
+    reset_reason = None
+    """Reason of the last reset of the processor"""
+
+    @property
+    def uid(self) -> bytearray:
+        """Unique identifier of the processor, as seen by the current thread"""
+        return getattr(self.__threads, "uid", self.__uid)
+
+    def assign_thread_uid(self, uid: bytes):
+        """
+        Assigns a unique identifier to the current thread, used when several simulated devices share a process
+        :param uid: Unique identifier reported to the current thread, None reports the one of the processor
+        """
+        if uid is None:
+            self.__threads.__dict__.pop("uid", None)
+        else:
+            self.__threads.uid = bytearray(uid)
+
+    def __init__(self, uid: bytes = b"\xe6\x61\x41\x04\x03\x5a\x2b\x21"):
+        self.__uid = bytearray(uid)
+        self.__threads = threading.local()
+
+
+cpu = Processor()
+"""The simulated processor"""
+
+cpus = (cpu,)
+"""All the simulated processors"""
+
+nvm = bytearray(4096)
+"""Simulated non-volatile memory"""
+
+resets: int = 0
+"""Number of resets requested by the operating system"""
+
+reset_handler = None
+"""Called instead of terminating the simulation when the operating system requests a reset"""
+
+
+# ---------------------------------------------------------------------
+#                              Methods
+# ---------------------------------------------------------------------
+
+def reset():
+    """
+    Resets the simulated microcontroller, terminating the simulation unless a reset handler is set
+    """
+    global resets
+    resets += 1
+
+    if reset_handler is not None:
+        reset_handler()
+    else:
+        raise SystemExit(0)
+
+
+def delay_us(delay: int):
+    """
+    Waits for the specified number of microseconds
+    :param delay: Delay in microseconds
+    """
+    sleep(delay / 1_000_000)
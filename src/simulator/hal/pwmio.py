@@ -0,0 +1,55 @@
+# SenseOS Simulator HAL - pwmio
+#
+# Simulated implementation of the circuitpython pwmio module
+# The duty cycle written into the output is recorded as the level of the pin
+
+# ---------------------------------------------------------------------
+#                             PWM Out
+# ---------------------------------------------------------------------
+
+class PWMOut:
+    """
+    Simulated pulse width modulation output of a pin
+    """
+
+    def __init__(self, pin, *, duty_cycle: int = 0, frequency: int = 500, variable_frequency: bool = False):
+        self.__pin = pin
+        self.__frequency = frequency
+        self.__variable_frequency = variable_frequency
+        pin.claims += 1
+        self.duty_cycle = duty_cycle
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.deinit()
+
+    def deinit(self):
+        """Releases the pin"""
+        if self.__pin is not None:
+            self.__pin.claims -= 1
+            self.__pin = None
+
+    @property
+    def duty_cycle(self) -> int:
+        """16 bit value that dictates how much of one cycle is high (1) versus low (0)"""
+        return self.__duty_cycle
+
+    @duty_cycle.setter
+    def duty_cycle(self, value: int):
+        if not 0 <= value <= 65535:
+            raise ValueError("duty_cycle must be between 0 and 65535 inclusive")
+        self.__duty_cycle = value
+        self.__pin.level = value
+
+    @property
+    def frequency(self) -> int:
+        """32 bit value that dictates the PWM frequency in Hertz"""
+        return self.__frequency
+
+    @frequency.setter
+    def frequency(self, value: int):
+        if not self.__variable_frequency:
+            raise AttributeError("PWM frequency not writable when variable_frequency is False.")
+        self.__frequency = value
@@ -0,0 +1,172 @@
+# SenseOS Simulator HAL - socketpool
+#
+# Simulated implementation of the circuitpython socketpool module
+# Sockets are backed by real sockets of the host, and host names can be
+# routed to local addresses so the cloud services can run on localhost
+#
+# Connected TCP sockets disable the Nagle algorithm, as the MQTT client
+# writes each packet in several sends, which would otherwise wait for the
+# delayed acknowledgement of the host on every round trip, so the latency
+# measured is the one of SynapseLink rather than of the host TCP stack
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# External Libraries
+import errno
+import socket as host_socket
+
+routes: dict = {}
+"""Host names routed to local (address, port) pairs, port None keeps the requested port"""
+
+
+def route(host: str, address: str = "127.0.0.1", port: int = None):
+    """
+    Routes a host name to a local address
+    :param host: Host name used by the operating system, such as mqtt.evoluxiot.pt
+    :param address: Local address to connect to instead
+    :param port: Local port to connect to instead, None keeps the requested port
+    """
+    routes[host] = (address, port)
+
+
+# ---------------------------------------------------------------------
+#                              Socket
+# ---------------------------------------------------------------------
+
+class Socket:
+    """
+    Simulated TCP/IP socket, raising the same errors as the circuitpython sockets
+    """
+
+    def __init__(self, pool, family: int, type: int, proto: int):
+        self.__pool = pool
+        self.__socket = host_socket.socket(family, type, proto)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __check_link(self):
+        if not self.__pool.radio.connected:
+            raise OSError(errno.ENOTCONN, "Network is down")
+
+    def __call(self, method, *args):
+        self.__check_link()
+        try:
+            return method(*args)
+        except host_socket.timeout:
+            raise OSError(errno.ETIMEDOUT, "timed out")
+        except BlockingIOError:
+            raise OSError(errno.EAGAIN, "would block")
+
+    def connect(self, address: tuple):
+        """Connects a socket to a remote address, applying the simulated routes"""
+        host, port = address
+        if host in routes:
+            host, routed_port = routes[host]
+            if routed_port is not None:
+                port = routed_port
+        self.__call(self.__socket.connect, (host, port))
+        self.__no_delay()
+
+    def bind(self, address: tuple):
+        """Binds a socket to an address"""
+        self.__socket.setsockopt(host_socket.SOL_SOCKET, host_socket.SO_REUSEADDR, 1)
+        self.__call(self.__socket.bind, address)
+
+    def listen(self, backlog: int = 1):
+        """Sets socket to listen for incoming connections"""
+        self.__call(self.__socket.listen, backlog)
+
+    def accept(self) -> tuple:
+        """Accept a connection on a listening socket"""
+        connection, address = self.__call(self.__socket.accept)
+        accepted = Socket.__new__(Socket)
+        accepted.__pool = self.__pool
+        accepted.__socket = connection
+        accepted.__no_delay()
+        return accepted, address
+
+    def __no_delay(self):
+        """Sends small writes of a connected TCP socket at once, instead of waiting to coalesce them"""
+        if self.__socket.type == host_socket.SOCK_STREAM:
+            self.__socket.setsockopt(host_socket.IPPROTO_TCP, host_socket.TCP_NODELAY, 1)
+
+    def send(self, data) -> int:
+        """Send some bytes to the connected remote address"""
+        return self.__call(self.__socket.send, data)
+
+    def sendall(self, data):
+        """Send all the bytes to the connected remote address"""
+        return self.__call(self.__socket.sendall, data)
+
+    def recv_into(self, buffer, bufsize: int = 0) -> int:
+        """Reads some bytes from the connected remote address, writing into the provided buffer"""
+        return self.__call(self.__socket.recv_into, buffer, bufsize)
+
+    def recv(self, bufsize: int) -> bytes:
+        """Reads some bytes from the connected remote address"""
+        return self.__call(self.__socket.recv, bufsize)
+
+    def settimeout(self, value: float):
+        """Set the timeout value for this socket, None blocks forever and 0 never blocks"""
+        self.__socket.settimeout(value)
+
+    def setblocking(self, flag: bool):
+        """Set the blocking behaviour of this socket"""
+        self.__socket.setblocking(flag)
+
+    def setsockopt(self, level: int, optname: int, value: int):
+        """Sets socket options"""
+        self.__socket.setsockopt(level, optname, value)
+
+    def close(self):
+        """Closes this Socket and makes its resources available to its SocketPool"""
+        self.__socket.close()
+
+
+# ---------------------------------------------------------------------
+#                            Socket Pool
+# ---------------------------------------------------------------------
+
+class SocketPool:
+    """
+    Simulated pool of sockets provided by the wifi radio
+    """
+
+    AF_INET = host_socket.AF_INET
+    AF_INET6 = host_socket.AF_INET6
+    SOCK_STREAM = host_socket.SOCK_STREAM
+    SOCK_DGRAM = host_socket.SOCK_DGRAM
+    SOCK_RAW = host_socket.SOCK_RAW
+    IPPROTO_IP = host_socket.IPPROTO_IP
+    IPPROTO_TCP = host_socket.IPPROTO_TCP
+    IPPROTO_UDP = host_socket.IPPROTO_UDP
+    SOL_SOCKET = host_socket.SOL_SOCKET
+    SO_REUSEADDR = host_socket.SO_REUSEADDR
+    TCP_NODELAY = host_socket.TCP_NODELAY
+    EAI_NONAME = -2
+
+    def __init__(self, radio):
+        self.radio = radio
+
+    def socket(self, family: int = AF_INET, type: int = SOCK_STREAM, proto: int = IPPROTO_TCP) -> Socket:
+        """Create a new socket"""
+        return Socket(self, family, type, proto)
+
+    def getaddrinfo(self, host: str, port: int, family: int = 0, type: int = 0, proto: int = 0, flags: int = 0):
+        """
+        Gets the address information for a hostname and port, applying the simulated routes
+        """
+        if not self.radio.connected:
+            raise OSError(errno.ENOTCONN, "Network is down")
+
+        # Routed host names are resolved by the sockets when connecting
+        if host not in routes and host != "localhost" and not host.replace(".", "").isdigit():
+            raise OSError(self.EAI_NONAME, "Name or service not known")
+
+        return [(self.AF_INET, type or self.SOCK_STREAM, proto, "", (host, port))]
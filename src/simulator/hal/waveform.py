@@ -0,0 +1,140 @@
+# SenseOS Simulator HAL - Waveforms
+#
+# Scriptable waveforms that can be driven into the simulated pins
+# Every waveform is a callable receiving the simulation time in seconds
+# and returning the value seen by the digital or analog input reading it
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# External Libraries
+from math import sin, pi
+from time import monotonic_ns
+
+ANALOG_MAX = 65535
+"""Maximum value read from an analog input"""
+
+EPOCH_NS = monotonic_ns()
+"""Instant at which the simulation started"""
+
+
+def simulation_time() -> float:
+    """
+    Returns the time elapsed since the simulation started
+    :return: Floating-point number of seconds since the simulation started
+    """
+    return (monotonic_ns() - EPOCH_NS) / 1_000_000_000
+
+
+# ---------------------------------------------------------------------
+#                             Waveforms
+# ---------------------------------------------------------------------
+
+class Constant:
+    """
+    Waveform with a constant value
+    """
+
+    def __init__(self, value):
+        self.value = value
+
+    def __call__(self, t: float):
+        return self.value
+
+
+class Square:
+    """
+    Square waveform alternating between a high and a low value
+    """
+
+    def __init__(self, period: float, duty: float = 0.5, high=True, low=False, phase: float = 0.0):
+        """
+        :param period: Period of the waveform, in seconds
+        :param duty: Fraction of the period spent on the high value
+        :param high: High value of the waveform
+        :param low: Low value of the waveform
+        :param phase: Offset of the waveform, in seconds
+        """
+        self.period = period
+        self.duty = duty
+        self.high = high
+        self.low = low
+        self.phase = phase
+
+    def __call__(self, t: float):
+        return self.high if ((t + self.phase) % self.period) < self.period * self.duty else self.low
+
+
+class Sine:
+    """
+    Sine waveform, used to simulate analog signals
+    """
+
+    def __init__(self, period: float, amplitude: float = ANALOG_MAX / 2, offset: float = ANALOG_MAX / 2,
+                 phase: float = 0.0):
+        """
+        :param period: Period of the waveform, in seconds
+        :param amplitude: Amplitude of the waveform
+        :param offset: Value around which the waveform oscillates
+        :param phase: Offset of the waveform, in seconds
+        """
+        self.period = period
+        self.amplitude = amplitude
+        self.offset = offset
+        self.phase = phase
+
+    def __call__(self, t: float):
+        return int(self.offset + self.amplitude * sin(2 * pi * (t + self.phase) / self.period))
+
+
+class Sequence:
+    """
+    Waveform following a script of (time, value) steps, holding each value until the next step
+    """
+
+    def __init__(self, steps: list, repeat: bool = False, initial=None):
+        """
+        :param steps: List of (time in seconds, value) tuples, ordered by time
+        :param repeat: Should the script restart after the last step
+        :param initial: Value before the first step
+        """
+        self.steps = list(steps)
+        self.repeat = repeat
+        self.initial = initial
+
+    def __call__(self, t: float):
+        if not self.steps:
+            return self.initial
+        if self.repeat and self.steps[-1][0] > 0:
+            t = t % self.steps[-1][0]
+
+        value = self.initial
+        for time, step in self.steps:
+            if time > t:
+                break
+            value = step
+        return value
+
+
+class Keypress:
+    """
+    Simulates a key of a button matrix, connecting a row input to a column output
+    while pressed. Idle rows are pulled up, so they read True unless the key is
+    pressed and the column is driven low
+    """
+
+    def __init__(self, column, start: float, duration: float = 0.1):
+        """
+        :param column: Column pin of the key
+        :param start: Simulation time at which the key is pressed, in seconds
+        :param duration: Time during which the key is held, in seconds
+        """
+        self.column = column
+        self.start = start
+        self.duration = duration
+
+    def __call__(self, t: float):
+        if self.start <= t < self.start + self.duration and self.column.level is not None:
+            return bool(self.column.level)
+        return True
@@ -0,0 +1,215 @@
+# SenseOS Simulator HAL - wifi
+#
+# Simulated implementation of the circuitpython wifi module
+# The radio scans and connects to a configurable list of simulated
+# networks, with configurable delays, and can simulate link outages
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# External Libraries
+from time import sleep
+
+
+# ---------------------------------------------------------------------
+#                           Authentication
+# ---------------------------------------------------------------------
+
+class AuthMode:
+    """The authentication protocols used by WiFi"""
+
+    OPEN = "OPEN"
+    WEP = "WEP"
+    WPA = "WPA"
+    WPA2 = "WPA2"
+    WPA3 = "WPA3"
+    PSK = "PSK"
+    ENTERPRISE = "ENTERPRISE"
+
+
+# ---------------------------------------------------------------------
+#                              Network
+# ---------------------------------------------------------------------
+
+class Network:
+    """
+    A wifi network provided by a nearby access point, as seen by a scan
+    """
+
+    def __init__(self, ssid: str, bssid: bytes, rssi: int, channel: int, authmode: list, country: str = "PT"):
+        self.ssid = ssid
+        self.bssid = bssid
+        self.rssi = rssi
+        self.channel = channel
+        self.authmode = authmode
+        self.country = country
+
+    def __repr__(self):
+        return "<Network {} ({} dBm, channel {})>".format(self.ssid, self.rssi, self.channel)
+
+
+class SimulatedNetwork(Network):
+    """
+    A simulated access point, which the radio can find and connect to
+    """
+
+    def __init__(self, ssid: str, password: str = "", bssid: bytes = None, rssi: int = -50, channel: int = 6,
+                 country: str = "PT"):
+        """
+        :param ssid: Name of the network
+        :param password: Password of the network, empty for open networks
+        :param bssid: MAC address of the access point, derived from the ssid when not specified
+        :param rssi: Signal strength seen by the radio, in dBm
+        :param channel: Channel of the access point
+        :param country: Country code of the access point
+        """
+        if bssid is None:
+            bssid = bytes((0x02,)) + (hash(ssid) & 0xFFFFFFFFFF).to_bytes(5, "big")
+        authmode = [AuthMode.WPA2, AuthMode.PSK] if password else [AuthMode.OPEN]
+        super().__init__(ssid, bssid, rssi, channel, authmode, country)
+        self.password = password
+
+    def advertised(self) -> Network:
+        """
+        Returns the network as seen by a scan, without the password
+        """
+        return Network(self.ssid, self.bssid, self.rssi, self.channel, self.authmode, self.country)
+
+
+# ---------------------------------------------------------------------
+#                               Radio
+# ---------------------------------------------------------------------
+
+class Radio:
+    """
+    Simulated native wifi radio
+    """
+
+    # ---------------------------------------------------------------
+    #                     Simulation Parameters
+    # ---------------------------------------------------------------
+
+    networks: list = None
+    """Simulated access points within reach of the radio"""
+
+    scan_delay: float = 0.05
+    """Time needed to find each network while scanning, in seconds"""
+
+    connect_delay: float = 0.2
+    """Time needed to associate with a network, in seconds"""
+
+    channel_search_delay: float = 0.5
+    """Additional time needed to connect when the channel or bssid of the network is not given, in seconds"""
+
+    # ---------------------------------------------------------------
+    #                           Constructor
+    # ---------------------------------------------------------------
+
+    def __init__(self):
+        self.networks = []
+        self.enabled = True
+        self.hostname = "synapsepod"
+        self.mac_address = bytes((0x28, 0xCD, 0xC1, 0x00, 0x00, 0x01))
+        self.tx_power = 20.0
+        self.__network = None
+        self.__scanning = False
+        self.__outage = False
+
+    # ---------------------------------------------------------------
+    #                           Properties
+    # ---------------------------------------------------------------
+
+    @property
+    def connected(self) -> bool:
+        """True when connected to an access point"""
+        return self.enabled and self.__network is not None and not self.__outage
+
+    @property
+    def ipv4_address(self):
+        """IP v4 address of the station when connected to an access point, None otherwise"""
+        return "127.0.0.1" if self.connected else None
+
+    @property
+    def ipv4_gateway(self):
+        """IP v4 address of the gateway when connected to an access point, None otherwise"""
+        return "127.0.0.1" if self.connected else None
+
+    @property
+    def ap_info(self) -> Network:
+        """Network object containing information about the access point, None when not connected"""
+        return self.__network.advertised() if self.connected else None
+
+    # ---------------------------------------------------------------
+    #                           Methods
+    # ---------------------------------------------------------------
+
+    def start_scanning_networks(self, *, start_channel: int = 1, stop_channel: int = 11):
+        """
+        Scans for available wifi networks over the given channel range
+        :return: Iterator yielding each network as it is found
+        """
+        if self.__scanning:
+            raise RuntimeError("Already scanning for wifi networks")
+        self.__scanning = True
+        return self.__scan(start_channel, stop_channel)
+
+    def __scan(self, start_channel: int, stop_channel: int):
+        for network in list(self.networks):
+            if not self.__scanning:
+                return
+            if not start_channel <= network.channel <= stop_channel:
+                continue
+            sleep(self.scan_delay)
+            yield network.advertised()
+
+    def stop_scanning_networks(self):
+        """Stops any ongoing scan"""
+        self.__scanning = False
+
+    def connect(self, ssid: str, password: str = "", *, channel: int = 0, bssid: bytes = None, timeout: float = None):
+        """
+        Connects to the given ssid and password
+        """
+        if not self.enabled:
+            raise ConnectionError("Wifi is not enabled")
+
+        candidates = [network for network in self.networks if network.ssid == ssid]
+        if bssid:
+            candidates = [network for network in candidates if network.bssid == bytes(bssid)]
+        if channel:
+            candidates = [network for network in candidates if network.channel == channel]
+
+        delay = self.connect_delay
+        if not (channel and bssid):
+            delay += self.channel_search_delay
+        sleep(delay if timeout is None else min(delay, timeout))
+
+        if not candidates:
+            raise ConnectionError("No network with that ssid")
+        if candidates[0].password != password:
+            raise ConnectionError("Authentication failure")
+
+        self.__network = candidates[0]
+
+    def disconnect(self):
+        """Disconnects from the access point"""
+        self.__network = None
+
+    def ping(self, ip, *, timeout: float = 0.5):
+        """
+        Pings an IP to test connectivity
+        :return: Round trip time in seconds, or None when not connected
+        """
+        return 0.001 if self.connected else None
+
+    def outage(self, active: bool = True):
+        """
+        Simulates a link outage, the radio reports itself as disconnected while active
+        :param active: Should the outage start or stop
+        """
+        self.__outage = active
+
+
+radio = Radio()
+"""The simulated native wifi radio"""
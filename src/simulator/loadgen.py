@@ -0,0 +1,406 @@
+# SenseOS Simulator - SynapseLink Load Generator
+#
+# Drives SynapseLink commands into a device at a configurable rate and mix,
+# measuring the latency of the acknowledgement and of the result of each
+# command, the commands dropped and, for simulated devices, the time the
+# device spent handling each command
+#
+# Commands are sent open loop: the send schedule does not wait for replies,
+# so a slow device shows up as growing latency and drops instead of a
+# lower send rate
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# External Libraries
+import asyncio
+import json
+import random
+import time
+
+# SenseOS Libraries
+from senseos.synapselink import COMMAND_MAXVERSION, COMMAND_HEARTBEAT, COMMAND_ACKNOWLEDGE, COMMAND_REBOOT, \
+    COMMAND_DIGITALREAD, COMMAND_DIGITALWRITE, COMMAND_ANALOGREAD, COMMAND_DISPLAYREAD, COMMAND_DISPLAYWRITE, \
+    COMMAND_BUSY
+
+# SynapseLink Host Libraries
+from synapselink.client import encode_command, decode_reply
+from synapselink.mqtt import MQTTClient
+
+# ---------------------------------------------------------------------
+#                              Commands
+# ---------------------------------------------------------------------
+
+COMMANDS = {
+    "maxversion": (COMMAND_MAXVERSION, lambda generator: []),
+    "heartbeat": (COMMAND_HEARTBEAT, lambda generator: []),
+    "digitalread": (COMMAND_DIGITALREAD, lambda generator: [generator.randrange(8)]),
+    "digitalwrite": (COMMAND_DIGITALWRITE, lambda generator: [generator.randrange(8), generator.randrange(2)]),
+    "analogread": (COMMAND_ANALOGREAD, lambda generator: [generator.choice((8, 9))]),
+    "displayread": (COMMAND_DISPLAYREAD, lambda generator: []),
+    "displaywrite": (COMMAND_DISPLAYWRITE, lambda generator: ["load {}".format(generator.randrange(1000))]),
+    "reboot": (COMMAND_REBOOT, lambda generator: []),
+}
+"""Commands the load generator can send, by name, as (command, parameter generator)"""
+
+DEFAULT_MIX = {
+    "heartbeat": 4,
+    "maxversion": 1,
+    "digitalread": 2,
+    "digitalwrite": 2,
+    "analogread": 2,
+    "displaywrite": 1,
+}
+"""Default relative weight of each command"""
+
+PERCENTILES = (50, 90, 99, 99.9)
+"""Latency percentiles reported"""
+
+
+def parse_mix(value: str) -> dict:
+    """
+    Parses a command mix written as name=weight pairs separated by commas
+    :param value: Command mix, such as "heartbeat=3,digitalread=1"
+    :return: Dictionary of command name to weight
+    """
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.strip().partition("=")
+        if name not in COMMANDS:
+            raise ValueError("Unknown command {}".format(name))
+        mix[name] = float(weight) if weight else 1.0
+    return mix
+
+
+def percentile(values: list, p: float) -> float:
+    """
+    Calculates a percentile using the nearest rank method
+    :param values: Sorted values
+    :param p: Percentile, between 0 and 100
+    :return: Value at the percentile, None if there are no values
+    """
+    if not values:
+        return None
+    rank = max(1, int(len(values) * p / 100 + 0.999999))
+    return values[min(rank, len(values)) - 1]
+
+
+def merge_statistics(target: dict, statistics: dict) -> dict:
+    """
+    Merges the command handling statistics of a device into the statistics of a group of devices
+    :param target: Statistics of the group, updated in place
+    :param statistics: Statistics of a device, as returned by SimulatedDevice.statistics
+    :return: The updated statistics of the group
+    """
+    for command, (count, total, maximum) in statistics.items():
+        merged = target.get(command)
+        if merged is None:
+            target[command] = [count, total, maximum]
+        else:
+            merged[0] += count
+            merged[1] += total
+            merged[2] = max(merged[2], maximum)
+    return target
+
+
+# ---------------------------------------------------------------------
+#                               Report
+# ---------------------------------------------------------------------
+
+class CommandReport:
+    """
+    Measurements of a single command of the mix
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.sent = 0
+        self.acknowledged = 0
+        self.completed = 0
+        self.busy = 0
+        self.ack_latency = []
+        self.result_latency = []
+        self.device_count = 0
+        self.device_time = 0
+        self.device_max = 0
+
+    @property
+    def dropped(self) -> int:
+        """Commands sent without a result or a busy reply"""
+        return self.sent - self.completed - self.busy
+
+    @property
+    def device_mean(self) -> float:
+        """Mean time spent by the device handling the command, in nanoseconds"""
+        return self.device_time / self.device_count if self.device_count else None
+
+    def summary(self) -> dict:
+        """
+        Summarises the measurements
+        :return: Dictionary of the counters, latency percentiles in milliseconds and device time in microseconds
+        """
+        ack = sorted(self.ack_latency)
+        result = sorted(self.result_latency)
+        summary = {
+            "sent": self.sent,
+            "acknowledged": self.acknowledged,
+            "completed": self.completed,
+            "busy": self.busy,
+            "dropped": self.dropped,
+        }
+        for p in PERCENTILES:
+            value = percentile(ack, p)
+            summary["ack_p{}".format(p)] = None if value is None else value / 1e6
+        for p in PERCENTILES:
+            value = percentile(result, p)
+            summary["result_p{}".format(p)] = None if value is None else value / 1e6
+        summary["device_mean_us"] = None if self.device_mean is None else self.device_mean / 1e3
+        summary["device_max_us"] = self.device_max / 1e3 if self.device_count else None
+        return summary
+
+
+class LoadReport:
+    """
+    Measurements of a load generator run
+    """
+
+    def __init__(self, rate: float, duration: float):
+        self.rate = rate
+        self.duration = duration
+        self.elapsed = 0.0
+        self.commands = {}
+        self.unexpected = 0
+        self.pending = {}
+
+    def sent(self, key, name: str):
+        """
+        Records a command sent
+        :param key: Key matching the replies to the command, such as its event id
+        :param name: Name of the command
+        """
+        self.pending[key] = (name, COMMANDS[name][0], time.monotonic_ns())
+        self.command(name).sent += 1
+
+    def received(self, key, command: int, parameters: list):
+        """
+        Records a reply, matching it to the command sent with the same key
+        :param key: Key matching the reply to the command, such as its event id
+        :param command: Command number of the reply
+        :param parameters: Parameters of the reply
+        """
+        pending = self.pending.get(key)
+        if pending is None:
+            return
+        name, sent_command, sent = pending
+        report = self.command(name)
+        elapsed = time.monotonic_ns() - sent
+
+        if command == COMMAND_ACKNOWLEDGE and parameters and parameters[0] == str(sent_command):
+            report.acknowledged += 1
+            report.ack_latency.append(elapsed)
+        elif command == sent_command:
+            report.completed += 1
+            report.result_latency.append(elapsed)
+            del self.pending[key]
+        elif command == COMMAND_BUSY and parameters and parameters[0] == str(sent_command):
+            report.busy += 1
+            del self.pending[key]
+        else:
+            self.unexpected += 1
+
+    def command(self, name: str) -> CommandReport:
+        """Returns the measurements of a command, creating them on first use"""
+        report = self.commands.get(name)
+        if report is None:
+            report = self.commands[name] = CommandReport(name)
+        return report
+
+    @property
+    def total(self) -> CommandReport:
+        """Measurements of every command combined"""
+        total = CommandReport("total")
+        for report in self.commands.values():
+            total.sent += report.sent
+            total.acknowledged += report.acknowledged
+            total.completed += report.completed
+            total.busy += report.busy
+            total.ack_latency.extend(report.ack_latency)
+            total.result_latency.extend(report.result_latency)
+            total.device_count += report.device_count
+            total.device_time += report.device_time
+            total.device_max = max(total.device_max, report.device_max)
+        return total
+
+    def apply_device_statistics(self, statistics: dict):
+        """
+        Records the time the devices spent handling each command
+        :param statistics: Command handling statistics, as returned by SimulatedDevice.statistics
+        """
+        for name, (command, _) in COMMANDS.items():
+            if name in self.commands and command in statistics:
+                count, total, maximum = statistics[command]
+                report = self.commands[name]
+                report.device_count = count
+                report.device_time = total
+                report.device_max = maximum
+
+    def to_dict(self) -> dict:
+        """
+        Converts the report into a dictionary suitable for JSON
+        :return: Dictionary with the run parameters and the summary of each command
+        """
+        return {
+            "rate": self.rate,
+            "duration": self.duration,
+            "elapsed": self.elapsed,
+            "throughput": self.total.completed / self.elapsed if self.elapsed else 0.0,
+            "unexpected": self.unexpected,
+            "commands": {name: report.summary() for name, report in sorted(self.commands.items())},
+            "total": self.total.summary(),
+        }
+
+    def to_json(self) -> str:
+        """Converts the report into JSON"""
+        return json.dumps(self.to_dict(), indent=2)
+
+    def format(self) -> str:
+        """
+        Formats the report as a table
+        :return: Table with a row for each command and the total
+        """
+        def value(number, width):
+            return "{:>{}}".format("-" if number is None else "{:.2f}".format(number), width)
+
+        header = "{:<13}{:>7}{:>7}{:>7}{:>9}{:>9}{:>9}{:>9}{:>9}{:>11}".format(
+            "command", "sent", "busy", "drop", "ack p50", "ack p99", "res p50", "res p90", "res p99", "device us"
+        )
+        lines = [
+            "SynapseLink load: {:.1f} cmd/s target, {:.1f} s, {:.1f} cmd/s completed".format(
+                self.rate, self.elapsed, self.to_dict()["throughput"]
+            ),
+            "latency in ms, device time is the mean time spent handling each command",
+            header,
+            "-" * len(header),
+        ]
+        rows = [self.commands[name] for name in sorted(self.commands)] + [self.total]
+        for report in rows:
+            summary = report.summary()
+            lines.append("{:<13}{:>7}{:>7}{:>7}{}{}{}{}{}{}".format(
+                report.name, summary["sent"], summary["busy"], summary["dropped"],
+                value(summary["ack_p50"], 9), value(summary["ack_p99"], 9),
+                value(summary["result_p50"], 9), value(summary["result_p90"], 9),
+                value(summary["result_p99"], 9), value(summary["device_mean_us"], 11),
+            ))
+        return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------
+#                           Load Generator
+# ---------------------------------------------------------------------
+
+class LoadGenerator:
+    """
+    Sends SynapseLink commands to a device at a fixed rate and measures its replies
+    """
+
+    # ---------------------------------------------------------------
+    #                         Internal Fields
+    # ---------------------------------------------------------------
+
+    __report: LoadReport = None
+    """Measurements of the current run"""
+
+    __event_id: int = 0
+    """Last event id used"""
+
+    # ---------------------------------------------------------------
+    #                           Methods
+    # ---------------------------------------------------------------
+
+    def run(self, device=None) -> LoadReport:
+        """
+        Runs the load generator until the duration elapses and the pending commands complete or time out
+        :param device: Simulated device receiving the commands, used to measure the device time per command
+        :return: Measurements of the run
+        """
+        return asyncio.run(self.run_async(device))
+
+    async def run_async(self, device=None) -> LoadReport:
+        """
+        Runs the load generator on the current event loop
+        :param device: Simulated device receiving the commands, used to measure the device time per command
+        :return: Measurements of the run
+        """
+        self.__report = LoadReport(self.rate, self.duration)
+        # Devices ignore event ids they handled recently, each run starts at a random one
+        self.__event_id = random.getrandbits(24)
+
+        client = MQTTClient("synapselink-loadgen-{}".format(random.getrandbits(32)))
+        client.on_message = self.__on_message
+        await client.connect(*self.broker, username="evoluxiot", password="evoluxiot")
+        await client.subscribe(self.topic)
+
+        if device is not None:
+            device.os.synapselink.reset_statistics()
+
+        names = list(self.mix)
+        weights = [self.mix[name] for name in names]
+        generator = random.Random(self.seed)
+
+        start = time.monotonic()
+        interval = 1.0 / self.rate
+        count = int(self.rate * self.duration)
+        for index in range(count):
+            delay = start + index * interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            name = generator.choices(names, weights)[0]
+            command, parameters = COMMANDS[name]
+            self.__event_id += 1
+
+            self.__report.sent(self.__event_id, name)
+            client.publish_nowait(self.topic, encode_command(command, parameters(generator), self.__event_id))
+            await client.drain()
+
+        deadline = time.monotonic() + self.timeout
+        while self.__report.pending and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        self.__report.elapsed = time.monotonic() - start
+
+        await client.disconnect()
+
+        if device is not None:
+            self.__report.apply_device_statistics(device.statistics)
+
+        return self.__report
+
+    def __on_message(self, topic: str, payload: bytes):
+        reply = decode_reply(payload)
+        if reply is not None:
+            command, parameters, event_id, _ = reply
+            self.__report.received(event_id, command, parameters)
+
+    # ---------------------------------------------------------------
+    #                           Constructor
+    # ---------------------------------------------------------------
+
+    def __init__(self, broker: tuple[str, int], topic: str = "synapsepod-crystal", rate: float = 20.0,
+                 duration: float = 10.0, mix: dict = None, timeout: float = 5.0, seed: int = None):
+        """
+        :param broker: Address of the MQTT broker, as (host, port)
+        :param topic: SynapseLink topic of the device
+        :param rate: Commands sent per second
+        :param duration: Time spent sending commands, in seconds
+        :param mix: Relative weight of each command, by name, defaults to DEFAULT_MIX
+        :param timeout: Time to wait for the results after the last command is sent, in seconds
+        :param seed: Seed of the command and parameter choices, for repeatable runs
+        """
+        self.broker = broker
+        self.topic = topic
+        self.rate = rate
+        self.duration = duration
+        self.mix = mix or dict(DEFAULT_MIX)
+        self.timeout = timeout
+        self.seed = seed
@@ -0,0 +1,39 @@
+# SynapseLink Host
+#
+# Host side of the SynapseLink protocol, used by the backend and the tools
+# running on regular computers to talk to SynapsePods through the MQTT broker
+# The protocol constants are shared with the device, see senseos.synapselink
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# SynapseLink Host Libraries
+from synapselink.client import SynapseLinkClient, SynapseDevice, Reply, SynapseLinkError, SynapseLinkTimeout, \
+    SynapseLinkBusy, encode_command, decode_reply, decode_health, decode_summary, compress_parameters, \
+    expand_parameters
+from synapselink.canvas import changed_regions, encode_region, encode_update
+from synapselink.mirror import MirrorView
+
+# ---------------------------------------------------------------------
+#                             Exports
+# ---------------------------------------------------------------------
+
+__all__ = [
+    "SynapseLinkClient",
+    "SynapseDevice",
+    "Reply",
+    "SynapseLinkError",
+    "SynapseLinkTimeout",
+    "SynapseLinkBusy",
+    "encode_command",
+    "decode_reply",
+    "decode_health",
+    "decode_summary",
+    "compress_parameters",
+    "expand_parameters",
+    "changed_regions",
+    "encode_region",
+    "encode_update",
+    "MirrorView"
+]
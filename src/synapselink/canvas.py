@@ -0,0 +1,134 @@
+# SynapseLink Host - Remote Canvas
+#
+# Encodes images for the remote canvas of the display of a SynapsePod
+#
+# Images are bytes of palette indexes, one per pixel, row by row. Only the
+# tiles that changed since the previous image are sent, adjacent changed
+# tiles of a row of tiles merged into one region, and each region is sent
+# either raw or run-length encoded as (count, index) pairs, whichever is
+# smaller, so the device decodes it straight into the canvas bitmap
+#
+# Regions that do not fit a message are split in halves, by rows, until
+# every message stays below the payload limit of the device. The pixels
+# travel as base64 text because the device handles messages as text
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# External Libraries
+import base64
+
+MAX_PAYLOAD = 768
+"""Largest number of encoded pixel bytes sent in one message, before base64"""
+
+# ---------------------------------------------------------------------
+#                             Encoding
+# ---------------------------------------------------------------------
+
+def crop(image: bytes, width: int, x: int, y: int, region_width: int, region_height: int) -> bytes:
+    """
+    Extracts a region of an image
+    :param image: Palette indexes of the image, one byte per pixel, row by row
+    :param width: Width of the image
+    :param x: Left of the region
+    :param y: Top of the region
+    :param region_width: Width of the region
+    :param region_height: Height of the region
+    :return: Palette indexes of the region, row by row
+    """
+    return b"".join(image[(y + row) * width + x:(y + row) * width + x + region_width] for row in range(region_height))
+
+
+def encode_rle(pixels: bytes) -> bytes:
+    """
+    Run-length encodes palette indexes
+    :param pixels: Palette indexes, one byte per pixel
+    :return: Pairs of count, from 1 to 255, and palette index
+    """
+    encoded = bytearray()
+    index = 0
+    while index < len(pixels):
+        value = pixels[index]
+        run = 1
+        while run < 255 and index + run < len(pixels) and pixels[index + run] == value:
+            run += 1
+        encoded.append(run)
+        encoded.append(value)
+        index += run
+    return bytes(encoded)
+
+
+def encode_region(pixels: bytes) -> tuple:
+    """
+    Encodes the pixels of a region with the smaller of the raw and run-length encodings
+    :param pixels: Palette indexes of the region, one byte per pixel
+    :return: Tuple of the encoding, raw or rle, and the encoded pixels
+    """
+    rle = encode_rle(pixels)
+    if len(rle) < len(pixels):
+        return "rle", rle
+    return "raw", bytes(pixels)
+
+
+def changed_regions(previous: bytes, current: bytes, width: int, height: int, tile: int = 16) -> list:
+    """
+    Finds the regions of an image that changed, comparing tile by tile and merging adjacent changed tiles of a row
+    of tiles
+    :param previous: Previous image, None when the whole image changed
+    :param current: Current image
+    :param width: Width of the images
+    :param height: Height of the images
+    :param tile: Side of the tiles compared, in pixels
+    :return: List of (x, y, width, height) regions
+    """
+    if previous is None:
+        return [(0, 0, width, height)]
+
+    regions = []
+    for y in range(0, height, tile):
+        tile_height = min(tile, height - y)
+        start = None
+        for x in range(0, width + tile, tile):
+            changed = False
+            if x < width:
+                tile_width = min(tile, width - x)
+                for row in range(y, y + tile_height):
+                    offset = row * width + x
+                    if previous[offset:offset + tile_width] != current[offset:offset + tile_width]:
+                        changed = True
+                        break
+            if changed and start is None:
+                start = x
+            elif not changed and start is not None:
+                regions.append((start, y, min(x, width) - start, tile_height))
+                start = None
+    return regions
+
+
+def encode_update(previous: bytes, current: bytes, width: int, height: int, tile: int = 16,
+                  max_payload: int = MAX_PAYLOAD) -> list:
+    """
+    Encodes the messages updating the canvas from the previous image to the current one
+    :param previous: Image the canvas shows, None to send the whole image
+    :param current: Image to show
+    :param width: Width of the images
+    :param height: Height of the images
+    :param tile: Side of the tiles compared, in pixels
+    :param max_payload: Largest number of encoded pixel bytes of a message
+    :return: List of (encoding, (x, y, width, height), base64 pixels) command parameters
+    """
+    messages = []
+    for x, y, region_width, region_height in changed_regions(previous, current, width, height, tile):
+        bands = [(y, region_height)]
+        while bands:
+            band, band_height = bands.pop(0)
+            encoding, encoded = encode_region(crop(current, width, x, band, region_width, band_height))
+            if len(encoded) > max_payload and band_height > 1:
+                # Halves of the band are tried until they fit, so regions that compress well stay in one message
+                half = band_height // 2
+                bands[0:0] = [(band, half), (band + half, band_height - half)]
+                continue
+            messages.append((encoding, (x, band, region_width, band_height),
+                             base64.b64encode(encoded).decode("ascii")))
+    return messages
@@ -0,0 +1,846 @@
+# SynapseLink Host - Client
+#
+# Asyncio client for the SynapseLink protocol, used by the backend to talk to
+# SynapsePods through the MQTT broker
+#
+# Every request gets an event id, echoed by the device in its acknowledgement
+# and in its result, so requests are matched to replies by (device, event id)
+# instead of by order. The event id carries the client id, so devices keep
+# the event ids of each backend apart and replies to other backends sharing
+# the topic of the device are ignored. Many requests can be in flight per
+# device and many devices can be driven over a single broker connection
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# External Libraries
+import asyncio
+import base64
+import random
+import time
+import zlib
+
+# SenseOS Libraries
+from senseos.synapselink import COMMAND_MAXVERSION, COMMAND_HEARTBEAT, \
+    COMMAND_ACKNOWLEDGE, COMMAND_REBOOT, COMMAND_DIGITALREAD, COMMAND_DIGITALWRITE, COMMAND_ANALOGREAD, \
+    COMMAND_DISPLAYREAD, COMMAND_DISPLAYWRITE, COMMAND_BUSY, COMMAND_SEQUENCE, COMMAND_RULES, COMMAND_AGGREGATE, \
+    COMMAND_TIMESYNC, COMMAND_CANVAS, COMMAND_SCREENSHOT, COMMAND_MIRROR, \
+    GROUP_TOPIC, BROADCAST_TOPIC, TIME_TOPIC
+from senseos.synapselink.compression import CODEC_ZLIB, CODEC_LZ, CODEC_SEPARATOR, lz_compress, lz_decompress
+from senseos.synapselink.eventcache import SENDER_SEPARATOR
+from senseos.synapselink.timesync import TIME_SEPARATOR
+from senseos.synapselink.schema import encode_request, decode_reply as decode_values
+from senseos.display.raster import decode_rle565
+
+# SynapseLink Host Libraries
+from synapselink.canvas import encode_update
+from synapselink.mqtt import MQTTClient
+
+SEPARATOR = ":,:"
+"""Separator of the fields of a SynapseLink message"""
+
+REPLY_PREFIX = "!"
+"""Prefix of the messages sent by devices"""
+
+CODECS = [CODEC_ZLIB, CODEC_LZ]
+"""Codecs the host decompresses, advertised to the devices with COMMAND_MAXVERSION, the preferred one first"""
+
+EXPAND_LIMIT = 1048576
+"""Largest size of the decompressed parameters of a message, in bytes"""
+
+
+class SynapseLinkError(Exception):
+    """
+    Raised when a request cannot be completed
+    """
+
+
+class SynapseLinkTimeout(SynapseLinkError, asyncio.TimeoutError):
+    """
+    Raised when a device does not reply to a request in time
+    """
+
+
+class SynapseLinkBusy(SynapseLinkError):
+    """
+    Raised when a device rejects a request because the lane of the command is over its rate limit
+    """
+
+    def __init__(self, device_id: str, command: int, lane: str, retry_after: float):
+        super().__init__("{} is busy, lane {} rejected command {}, retry after {:.3f} s".format(
+            device_id, lane, command, retry_after
+        ))
+        self.device_id = device_id
+        self.command = command
+        self.lane = lane
+        self.retry_after = retry_after
+
+
+# ---------------------------------------------------------------------
+#                               Codec
+# ---------------------------------------------------------------------
+
+def encode_command(command: int, parameters: list, event_id: int, threshold: int = None, sender: str = None,
+                   codec: str = CODEC_ZLIB) -> str:
+    """
+    Encodes a SynapseLink command
+    :param command: Command number
+    :param parameters: Parameters of the command
+    :param event_id: Event id echoed by the device in its replies
+    :param threshold: Smallest size of the parameters compressed, in bytes, None never compresses
+    :param sender: Id of the sender carried with the event id, so devices tell apart the senders publishing on
+                   the same topic, None sends the event id alone
+    :param codec: Codec of the compressed parameters, one the device advertised
+    :return: The command message
+    """
+    parameters = [str(parameter) for parameter in parameters]
+    head = str(command)
+    if threshold is not None:
+        codec, parameters = compress_parameters(parameters, threshold, codec)
+        if codec is not None:
+            head += CODEC_SEPARATOR + codec
+    event = str(event_id) if sender is None else "{}{}{}".format(event_id, SENDER_SEPARATOR, sender)
+    return SEPARATOR.join([head] + parameters + [event])
+
+
+def compress_parameters(parameters: list, threshold: int, codec: str = CODEC_ZLIB) -> tuple:
+    """
+    Compresses the parameters of a message, if large enough and worth it
+    :param parameters: Parameters of the message, as strings
+    :param threshold: Smallest size of the parameters compressed, in bytes
+    :param codec: Codec of the compressed parameters
+    :return: The codec to name in the command field, None if not compressed, and the parameters to send, the size
+             and the compressed stream or the parameters as they were
+    """
+    text = SEPARATOR.join(parameters)
+    if len(text) < threshold:
+        return None, parameters
+    raw = text.encode()
+    packed = zlib.compress(raw, 9) if codec == CODEC_ZLIB else lz_compress(raw)
+    packed = [str(len(raw)), base64.b64encode(packed).decode("ascii")]
+    if len(packed[0]) + len(SEPARATOR) + len(packed[1]) + len(CODEC_SEPARATOR) + len(codec) >= len(text):
+        return None, parameters
+    return codec, packed
+
+
+def expand_parameters(parameters: list, codec: str = None, limit: int = EXPAND_LIMIT) -> list:
+    """
+    Decompresses the parameters of a message, if compressed
+    :param parameters: Parameters of the message
+    :param codec: Codec named in the command field of the message, None if not compressed
+    :param limit: Largest size of the decompressed parameters, in bytes
+    :return: The parameters as sent
+    :raises ValueError: When the codec is unknown or the compressed parameters are corrupt or larger than the limit
+    """
+    if codec is None:
+        return parameters
+    if codec not in CODECS or len(parameters) != 2:
+        raise ValueError("Unknown compressed parameters {}".format(codec))
+    size = int(parameters[0])
+    if size < 0 or size > limit:
+        raise ValueError("Compressed parameters of {} bytes over the limit".format(size))
+    try:
+        data = base64.b64decode(parameters[1])
+        raw = zlib.decompressobj().decompress(data, size + 1) if codec == CODEC_ZLIB else lz_decompress(data, size)
+    except (zlib.error, ValueError) as error:
+        raise ValueError("Corrupt compressed parameters") from error
+    if len(raw) != size:
+        raise ValueError("Compressed parameters of {} bytes instead of {}".format(len(raw), size))
+    return raw.decode().split(SEPARATOR)
+
+
+def decode_reply(payload, sender: str = None) -> tuple:
+    """
+    Decodes a SynapseLink reply of a device
+    :param payload: Message received, as string or bytes
+    :param sender: Id of the sender, replies to the commands of other senders are ignored, None keeps every reply
+    :return: Tuple of command number, parameters, event id and wall clock of the device when it sent the message, in
+             nanoseconds since the epoch, None if its clock is not synchronized, None if the message is not a valid
+             reply
+    """
+    try:
+        if isinstance(payload, bytes):
+            payload = payload.decode()
+        if not payload.startswith(REPLY_PREFIX):
+            return None
+        fields = payload[len(REPLY_PREFIX):].split(SEPARATOR)
+        if len(fields) < 2:
+            return None
+        event, _, time_ns = fields[-1].partition(TIME_SEPARATOR)
+        event_id, separator, recipient = event.partition(SENDER_SEPARATOR)
+        if separator and sender is not None and recipient != sender:
+            return None
+        command, _, codec = fields[0].partition(CODEC_SEPARATOR)
+        return int(command), expand_parameters(fields[1:-1], codec or None), int(event_id), \
+            int(time_ns) if time_ns else None
+    except (UnicodeDecodeError, ValueError):
+        return None
+
+
+def decode_health(parameters: list) -> dict:
+    """
+    Decodes the health summary carried by the heartbeats of a device
+    :param parameters: Parameters of the heartbeat, as key=value pairs
+    :return: Dictionary of key to value, numbers converted to int, None for unknown values
+    """
+    health = {}
+    for parameter in parameters:
+        key, separator, value = parameter.partition("=")
+        if not separator:
+            continue
+        try:
+            health[key] = int(value) if value else None
+        except ValueError:
+            health[key] = value
+    return health
+
+
+def decode_summary(parameters: list) -> dict:
+    """
+    Decodes the summary of an aggregation window sent by a device
+    :param parameters: Parameters of the summary message, starting with the summary marker
+    :return: Dictionary with the window length in seconds and, by pin number, a dictionary of the sample count,
+             minimum, maximum, mean and RMS
+    """
+    pins = {}
+    for parameter in parameters[2:]:
+        pin, count, minimum, maximum, mean, rms = (int(value) for value in parameter.split(","))
+        pins[pin] = {"count": count, "min": minimum, "max": maximum, "mean": mean, "rms": rms}
+    return {"window": int(parameters[1]) / 1000, "pins": pins}
+
+
+# ---------------------------------------------------------------------
+#                               Reply
+# ---------------------------------------------------------------------
+
+class Reply:
+    """
+    Result of a request, with the time the device took to acknowledge and to complete it, and the wall clock of the
+    device when it completed it, in nanoseconds since the epoch, None while its clock is not synchronized
+    """
+
+    def __init__(self, device_id: str, command: int, parameters: list, event_id: int, ack_latency: float,
+                 latency: float, time_ns: int = None):
+        self.device_id = device_id
+        self.command = command
+        self.parameters = parameters
+        self.event_id = event_id
+        self.ack_latency = ack_latency
+        self.latency = latency
+        self.time_ns = time_ns
+
+    @property
+    def values(self) -> list:
+        """
+        Values of the reply, converted by the protocol schema
+        :raises ValueError: When the reply does not match the schema, such as error replies
+        """
+        return decode_values(self.command, self.parameters)
+
+    @property
+    def acknowledged(self) -> bool:
+        """Indicates if the device acknowledged the request before completing it"""
+        return self.ack_latency is not None
+
+    def __repr__(self):
+        return "<Reply {} {} {} in {:.1f} ms>".format(self.device_id, self.command, self.parameters,
+                                                      self.latency * 1000)
+
+
+class PendingRequest:
+    """
+    Request waiting for the result of a device
+    """
+
+    def __init__(self, device_id: str, command: int, event_id: int, future: asyncio.Future):
+        self.device_id = device_id
+        self.command = command
+        self.event_id = event_id
+        self.future = future
+        self.sent = time.monotonic()
+        self.ack_latency = None
+
+
+# ---------------------------------------------------------------------
+#                               Device
+# ---------------------------------------------------------------------
+
+class SynapseDevice:
+    """
+    A SynapsePod reachable through a SynapseLink client, exposes each command as a coroutine, and keeps the health
+    summary of its last heartbeat with the wall clock of the device when it sent it, None while not synchronized
+    """
+
+    def __init__(self, client, device_id: str):
+        self.client = client
+        self.device_id = device_id
+        self.health = None
+        self.health_time_ns = None
+        self.last_seen = None
+        self.codecs = []
+
+    async def request(self, command: int, *parameters, timeout: float = None) -> Reply:
+        """
+        Sends a command to the device and waits for its result
+        :param command: Command number
+        :param parameters: Parameters of the command
+        :param timeout: Time to wait for the result, in seconds, defaults to the timeout of the client
+        :return: The result
+        """
+        return await self.client.request(self.device_id, command, *parameters, timeout=timeout)
+
+    async def maxversion(self, timeout: float = None) -> int:
+        """
+        Maximum version of the protocol supported by the device, also exchanges the codecs each end decompresses,
+        so the larger commands sent to the device are compressed from then on
+        :return: The maximum version
+        """
+        reply = await self.request(COMMAND_MAXVERSION, *CODECS, timeout=timeout)
+        version, *self.codecs = reply.values
+        return version
+
+    async def heartbeat(self, timeout: float = None) -> float:
+        """
+        Checks the device is responding
+        :return: Round trip time, in seconds
+        """
+        reply = await self.request(COMMAND_HEARTBEAT, timeout=timeout)
+        return reply.latency
+
+    async def reboot(self, timeout: float = None):
+        """Reboots the device"""
+        await self.request(COMMAND_REBOOT, timeout=timeout)
+
+    async def digitalread(self, pin: int, timeout: float = None) -> int:
+        """Reads the value of a digital pin"""
+        reply = await self.request(COMMAND_DIGITALREAD, pin, timeout=timeout)
+        return reply.values[1]
+
+    async def digitalwrite(self, pin: int, value: int, timeout: float = None):
+        """Writes a value to a digital pin"""
+        await self.request(COMMAND_DIGITALWRITE, pin, int(value), timeout=timeout)
+
+    async def analogread(self, pin: int, timeout: float = None) -> int:
+        """Reads the value of an analog pin"""
+        reply = await self.request(COMMAND_ANALOGREAD, pin, timeout=timeout)
+        return reply.values[1]
+
+    async def displayread(self, timeout: float = None) -> str:
+        """Reads the message shown on the display"""
+        reply = await self.request(COMMAND_DISPLAYREAD, timeout=timeout)
+        return SEPARATOR.join(reply.parameters)
+
+    async def displaywrite(self, text: str, timeout: float = None):
+        """Writes a message to the display"""
+        await self.request(COMMAND_DISPLAYWRITE, text, timeout=timeout)
+
+    async def sequence(self, steps: list, runs: int = 1, timeout: float = None) -> dict:
+        """
+        Executes a timed sequence of digital pin writes on the device, without a round trip per write
+        :param steps: Steps of the sequence, as (pin, value, delay in seconds before the next step) tuples
+        :param runs: Number of times the sequence is executed, 0 repeats it until stopped
+        :param timeout: Time to wait for the sequence to complete, in seconds, defaults to the duration of the
+                        sequence plus the timeout of the client
+        :return: Dictionary with the status, runs and steps executed and the maximum and mean timing error in seconds
+        """
+        if timeout is None and runs:
+            timeout = sum(step[2] for step in steps) * runs + self.client.timeout
+        parameters = [(pin, int(value), int(delay * 1000000)) for pin, value, delay in steps]
+        reply = await self.request(COMMAND_SEQUENCE, runs, *parameters, timeout=timeout)
+        if reply.parameters[0] == "error":
+            raise SynapseLinkError("{} rejected the sequence".format(self.device_id))
+        status, executed_runs, executed_steps, error_max, error_mean = reply.parameters[:5]
+        return {
+            "status": status,
+            "runs": int(executed_runs),
+            "steps": int(executed_steps),
+            "error_max": int(error_max) / 1000000,
+            "error_mean": int(error_mean) / 1000000,
+        }
+
+    async def stop_sequence(self, timeout: float = None):
+        """Stops the sequence being executed by the device"""
+        await self.request(COMMAND_SEQUENCE, 0, timeout=timeout)
+
+    async def rules(self, rules: list, timeout: float = None) -> int:
+        """
+        Replaces the condition -> action rules evaluated on the device, rules firing an e action are reported to
+        the on_event callback of the client as fired events
+        :param rules: Rules such as "d3=0?w0=1&e", an empty list clears them
+        :param timeout: Time to wait for the result, in seconds, defaults to the timeout of the client
+        :return: Number of rules loaded
+        :raises SynapseLinkError: When the device rejects a rule
+        """
+        reply = await self.request(COMMAND_RULES, *rules, timeout=timeout)
+        status, value = reply.parameters[:2]
+        if status == "error":
+            raise SynapseLinkError("{} rejected rule {}: {}".format(self.device_id, value, rules[int(value)]))
+        return int(value)
+
+    async def aggregate(self, window: int = None, interval: float = None, timeout: float = None) -> dict:
+        """
+        Configures the aggregation of the analog pins of the device, summaries are reported to the on_event callback
+        of the client, see decode_summary
+        :param window: Length of a window, in seconds, 0 disables aggregation, None keeps the current configuration
+        :param interval: Time between samples, in seconds, None keeps the current one
+        :param timeout: Time to wait for the result, in seconds, defaults to the timeout of the client
+        :return: Dictionary with the window in seconds, the interval in seconds and the pins sampled
+        :raises SynapseLinkError: When the device rejects the configuration
+        """
+        parameters = []
+        if window is not None:
+            parameters.append(int(window))
+            if interval is not None:
+                parameters.append(int(interval * 1000))
+        reply = await self.request(COMMAND_AGGREGATE, *parameters, timeout=timeout)
+        if reply.parameters[0] == "error":
+            raise SynapseLinkError("{} rejected the aggregation configuration".format(self.device_id))
+        return {
+            "window": int(reply.parameters[1]),
+            "interval": int(reply.parameters[2]) / 1000,
+            "pins": [int(pin) for pin in reply.parameters[3:]],
+        }
+
+    async def timesync(self, timeout: float = None) -> float:
+        """
+        Starts a time synchronization of the device with the time server
+        :param timeout: Time to wait for the result, in seconds, defaults to the timeout of the client
+        :return: Difference between the wall clock of the device and the one of this host, in seconds, adjusted for
+                 half the round trip, None if the device was never synchronized
+        """
+        sent = time.time_ns()
+        reply = await self.request(COMMAND_TIMESYNC, timeout=timeout)
+        if not reply.parameters or not reply.parameters[0]:
+            return None
+        return (int(reply.parameters[0]) - (sent + time.time_ns()) // 2) / 1000000000
+
+    async def canvas_info(self, timeout: float = None) -> tuple:
+        """
+        Reads the size of the remote canvas of the display of the device
+        :param timeout: Time to wait for the result, in seconds, defaults to the timeout of the client
+        :return: Tuple of the width, height and number of palette colors
+        :raises SynapseLinkError: When the screen of the device has no remote canvas
+        """
+        reply = await self.request(COMMAND_CANVAS, "info", timeout=timeout)
+        if reply.parameters[0] != "info":
+            raise SynapseLinkError("{} has no remote canvas".format(self.device_id))
+        return tuple(int(value) for value in reply.parameters[1:4])
+
+    async def canvas_palette(self, colors: list, start: int = 0, timeout: float = None):
+        """
+        Changes colors of the palette of the remote canvas
+        :param colors: Colors as 0xRRGGBB integers
+        :param start: Palette index of the first color
+        :param timeout: Time to wait for the result, in seconds, defaults to the timeout of the client
+        :raises SynapseLinkError: When the device rejects the colors
+        """
+        await self.__canvas("palette", start, *colors, timeout=timeout)
+
+    async def canvas_fill(self, index: int = 0, timeout: float = None):
+        """
+        Fills the remote canvas with a color
+        :param index: Palette index of the color
+        :param timeout: Time to wait for the result, in seconds, defaults to the timeout of the client
+        :raises SynapseLinkError: When the device rejects the fill
+        """
+        await self.__canvas("fill", index, timeout=timeout)
+
+    async def canvas_update(self, image: bytes, previous: bytes = None, width: int = None, height: int = None,
+                            tile: int = 16, timeout: float = None) -> int:
+        """
+        Shows an image on the remote canvas, sending only the tiles that changed since the previous image
+        :param image: Palette indexes of the image, one byte per pixel, row by row
+        :param previous: Image the canvas shows, None to send the whole image
+        :param width: Width of the image, defaults to the width of the canvas
+        :param height: Height of the image, defaults to the height of the canvas
+        :param tile: Side of the tiles compared, in pixels
+        :param timeout: Time to wait for the result of each region, in seconds, defaults to the timeout of the client
+        :return: Number of regions sent
+        :raises SynapseLinkError: When the device rejects a region
+        """
+        if width is None or height is None:
+            width, height, _ = await self.canvas_info(timeout=timeout)
+        messages = encode_update(previous, image, width, height, tile)
+        # Regions are sent one at a time, so the display lane of the device is not flooded
+        for message in messages:
+            await self.__canvas(*message, timeout=timeout)
+        return len(messages)
+
+    async def screenshot(self, rows: int = 16, window: int = 2, timeout: float = None) -> tuple:
+        """
+        Reads the pixels shown by the display of the device, band by band, with at most window bands requested at
+        once so the device renders and holds a single band at a time
+        :param rows: Number of rows of each band, the device may send smaller bands
+        :param window: Number of bands requested at once
+        :param timeout: Time to wait for each band, in seconds, defaults to the timeout of the client
+        :return: Tuple of the width, height and RGB565 pixels, two bytes per pixel in big-endian order, row by row
+        :raises SynapseLinkError: When the device rejects the request
+        """
+        width, height, y, first_rows, band = await self.__screenshot_band(0, rows, timeout)
+        rows = first_rows
+        pixels = bytearray(width * height * 2)
+        pixels[0:len(band)] = band
+        slots = asyncio.Semaphore(window)
+
+        async def fetch(band_y: int):
+            async with slots:
+                _, _, band_y, _, band_pixels = await self.__screenshot_band(band_y, rows, timeout)
+            pixels[band_y * width * 2:band_y * width * 2 + len(band_pixels)] = band_pixels
+
+        await asyncio.gather(*(fetch(band_y) for band_y in range(rows, height, rows)))
+        return width, height, pixels
+
+    async def mirror(self, lease: float = 30, max_fps: float = None, bandwidth: int = None, renew: bool = False,
+                     timeout: float = None) -> tuple:
+        """
+        Starts mirroring the display of the device, the bands that changed are reported to the on_event callback of
+        the client, see MirrorView; the device stops once the lease ends, so it must be renewed while watching
+        :param lease: Time the device mirrors its display unless renewed, in seconds
+        :param max_fps: Highest frame rate, None keeps the one of the device
+        :param bandwidth: Bytes per second the frames may use, None keeps the one of the device
+        :param renew: Extends the lease without the device sending its whole display again
+        :param timeout: Time to wait for the result, in seconds, defaults to the timeout of the client
+        :return: Tuple of the width and height of the display
+        :raises SynapseLinkError: When the device rejects the request
+        """
+        parameters = ["renew" if renew else "start", lease]
+        if max_fps is not None or bandwidth is not None:
+            parameters.append(max_fps)
+        if bandwidth is not None:
+            parameters.append(int(bandwidth))
+        reply = await self.request(COMMAND_MIRROR, *parameters, timeout=timeout)
+        if reply.parameters[0] == "error":
+            raise SynapseLinkError("{} rejected mirroring its display".format(self.device_id))
+        return tuple(reply.values[1:3])
+
+    async def stop_mirror(self, timeout: float = None):
+        """Stops mirroring the display of the device"""
+        await self.request(COMMAND_MIRROR, "stop", timeout=timeout)
+
+    async def __screenshot_band(self, y: int, rows: int, timeout: float) -> tuple:
+        reply = await self.__request_paced(COMMAND_SCREENSHOT, y, rows, timeout=timeout)
+        if reply.parameters[0] == "error":
+            raise SynapseLinkError("{} rejected the screenshot band at row {}".format(self.device_id, y))
+        width, height, y, rows, encoding, data = reply.values
+        data = base64.b64decode(data)
+        band = decode_rle565(data) if encoding == "rle" else data
+        if len(band) != width * rows * 2:
+            raise SynapseLinkError("{} sent a corrupt screenshot band at row {}".format(self.device_id, y))
+        return width, height, y, rows, band
+
+    async def __canvas(self, operation: str, *parameters, timeout: float = None):
+        reply = await self.__request_paced(COMMAND_CANVAS, operation, *parameters, timeout=timeout)
+        if reply.parameters[0] != "ok":
+            raise SynapseLinkError("{} rejected the canvas {}".format(self.device_id, operation))
+
+    async def __request_paced(self, command: int, *parameters, timeout: float = None) -> Reply:
+        # Bulk transfers wait as told when the lane of the device is full, instead of failing
+        while True:
+            try:
+                return await self.request(command, *parameters, timeout=timeout)
+            except SynapseLinkBusy as error:
+                await asyncio.sleep(error.retry_after)
+
+    def __repr__(self):
+        return "<SynapseDevice {}>".format(self.device_id)
+
+
+# ---------------------------------------------------------------------
+#                               Client
+# ---------------------------------------------------------------------
+
+class SynapseLinkClient:
+    """
+    Asyncio SynapseLink client, driving any number of devices over one broker connection
+    """
+
+    # ---------------------------------------------------------------
+    #                         Internal Fields
+    # ---------------------------------------------------------------
+
+    __mqtt: MQTTClient = None
+    """Connection to the broker"""
+
+    __pending: dict = None
+    """Requests waiting for their result, by (device id, event id)"""
+
+    __devices: dict = None
+    """Devices used by the client, by device id"""
+
+    __subscriptions: dict = None
+    """Subscriptions to the topics of the devices, by device id, as futures completed once acknowledged"""
+
+    __limits: dict = None
+    """Semaphores limiting the requests in flight, by device id"""
+
+    __event_id: int = 0
+    """Last event id used, starting at a random one"""
+
+    __time_server: bool = False
+    """Indicates if the client answers the time synchronization requests of the devices"""
+
+    on_event = None
+    """Called with the device id, command, parameters and wall clock of the device, in nanoseconds since the epoch or
+    None while its clock is not synchronized, of messages the device sends on its own, such as hello"""
+
+    # ---------------------------------------------------------------
+    #                           Properties
+    # ---------------------------------------------------------------
+
+    @property
+    def connected(self) -> bool:
+        """
+        Indicates if the client is connected to the broker
+        :return: True if connected, False otherwise
+        """
+        return self.__mqtt is not None and self.__mqtt.connected
+
+    @property
+    def in_flight(self) -> int:
+        """
+        Number of requests waiting for their result
+        :return: Requests in flight over every device
+        """
+        return len(self.__pending)
+
+    # ---------------------------------------------------------------
+    #                           Methods
+    # ---------------------------------------------------------------
+
+    async def connect(self):
+        """
+        Connects to the broker
+        """
+        self.__mqtt = MQTTClient(self.client_id)
+        self.__mqtt.on_message = self.__on_message
+        self.__mqtt.on_disconnect = self.__on_disconnect
+        await self.__mqtt.connect(self.host, self.port, self.username, self.password, self.keep_alive)
+
+    async def close(self):
+        """
+        Fails the requests in flight and disconnects from the broker
+        """
+        self.__fail_pending(SynapseLinkError("Client closed"))
+        if self.__mqtt is not None:
+            await self.__mqtt.disconnect()
+        self.__subscriptions.clear()
+
+    async def serve_time(self):
+        """
+        Answers the time synchronization requests of every device with the wall clock of this host, which should
+        itself be synchronized with NTP; call it again after reconnecting
+        """
+        self.__time_server = True
+        await self.watch(TIME_TOPIC)
+
+    def device(self, device_id: str) -> SynapseDevice:
+        """
+        Returns a device reachable through the client
+        :param device_id: Device id, which is also the SynapseLink topic of the device
+        :return: The device
+        """
+        device = self.__devices.get(device_id)
+        if device is None:
+            device = self.__devices[device_id] = SynapseDevice(self, device_id)
+        return device
+
+    async def watch(self, device_id: str):
+        """
+        Subscribes to the topic of a device, done automatically by the first request to the device
+        :param device_id: Device id
+        """
+        subscription = self.__subscriptions.get(device_id)
+        if subscription is None:
+            subscription = self.__subscriptions[device_id] = asyncio.ensure_future(self.__mqtt.subscribe(device_id))
+        try:
+            await asyncio.shield(subscription)
+        except BaseException:
+            if subscription.done():
+                self.__subscriptions.pop(device_id, None)
+            raise
+
+    async def request(self, device_id: str, command: int, *parameters, timeout: float = None) -> Reply:
+        """
+        Sends a command to a device and waits for its result, other requests can be sent meanwhile
+        :param device_id: Device id
+        :param command: Command number
+        :param parameters: Parameters of the command
+        :param timeout: Time to wait for the result, in seconds, defaults to the timeout of the client
+        :return: The result
+        :raises SynapseLinkTimeout: When the device does not reply in time
+        :raises SynapseLinkBusy: When the device rejects the command as busy
+        :raises ValueError: When the parameters do not match the protocol schema
+        """
+        timeout = self.timeout if timeout is None else timeout
+        await self.watch(device_id)
+
+        limit = self.__limits.get(device_id)
+        if limit is None:
+            limit = self.__limits[device_id] = asyncio.Semaphore(self.max_in_flight)
+
+        device = self.__devices.get(device_id)
+        codec = None
+        if self.compression_threshold is not None and device is not None:
+            codec = next((codec for codec in CODECS if codec in device.codecs), None)
+        async with limit:
+            request = self.__send(device_id, device_id, command, parameters, codec)
+            try:
+                await self.__mqtt.drain()
+                return await asyncio.wait_for(request.future, timeout)
+            except asyncio.TimeoutError:
+                raise SynapseLinkTimeout("{} did not reply to command {} in time".format(device_id, command))
+            finally:
+                self.__pending.pop((device_id, request.event_id), None)
+
+    async def request_group(self, group: str, members: list[str], command: int, *parameters,
+                            timeout: float = None) -> dict:
+        """
+        Sends a command to a group of devices with a single publish and waits for the result of every member
+        :param group: Name of the group, None for every device connected to the broker
+        :param members: Device ids expected to reply
+        :param command: Command number
+        :param parameters: Parameters of the command
+        :param timeout: Time to wait for the results, in seconds, defaults to the timeout of the client
+        :return: Dictionary of device id to Reply, or to the exception raised for that member
+        """
+        timeout = self.timeout if timeout is None else timeout
+        await asyncio.gather(*[self.watch(member) for member in members])
+
+        topic = BROADCAST_TOPIC if group is None else GROUP_TOPIC.format(group)
+        requests = self.__send(topic, members, command, parameters)
+        try:
+            await self.__mqtt.drain()
+            done, _ = await asyncio.wait([request.future for request in requests], timeout=timeout)
+        finally:
+            for request in requests:
+                self.__pending.pop((request.device_id, request.event_id), None)
+
+        results = {}
+        for request in requests:
+            if request.future in done:
+                error = request.future.exception()
+                results[request.device_id] = request.future.result() if error is None else error
+            else:
+                request.future.cancel()
+                results[request.device_id] = SynapseLinkTimeout(
+                    "{} did not reply to command {} in time".format(request.device_id, command)
+                )
+        return results
+
+    def __send(self, topic: str, devices, command: int, parameters: tuple, codec: str = None):
+        """
+        Publishes a command, registering the requests expecting its replies
+        :param topic: Topic the command is published to
+        :param devices: Device id, or list of device ids for group commands
+        :param codec: Codec of the large parameters, one the device advertised, None never compresses
+        :return: The request, or the list of requests for group commands
+        :raises ValueError: When the parameters do not match the protocol schema
+        """
+        if not self.connected:
+            raise SynapseLinkError("Not connected to the broker")
+        parameters = encode_request(command, parameters)
+
+        self.__event_id += 1
+        loop = asyncio.get_running_loop()
+        requests = []
+        for device_id in ([devices] if isinstance(devices, str) else devices):
+            request = PendingRequest(device_id, command, self.__event_id, loop.create_future())
+            self.__pending[(device_id, self.__event_id)] = request
+            requests.append(request)
+
+        self.__mqtt.publish_nowait(topic, encode_command(command, parameters, self.__event_id,
+                                                         self.compression_threshold if codec else None,
+                                                         self.client_id, codec))
+        return requests[0] if isinstance(devices, str) else requests
+
+    def __on_message(self, topic: str, payload: bytes):
+        received = time.time_ns()
+        reply = decode_reply(payload, self.client_id)
+        if reply is None:
+            return
+        command, parameters, event_id, time_ns = reply
+
+        if topic == TIME_TOPIC:
+            if self.__time_server and command == COMMAND_TIMESYNC and len(parameters) == 2:
+                device_id, t1 = parameters
+                self.__mqtt.publish_nowait(device_id, encode_command(COMMAND_TIMESYNC, [t1, received, time.time_ns()],
+                                                                     event_id))
+            return
+
+        # Any message proves the device is alive, heartbeats also carry its health summary
+        device = self.__devices.get(topic)
+        if device is not None:
+            device.last_seen = time.monotonic()
+            if command == COMMAND_HEARTBEAT and parameters:
+                device.health = decode_health(parameters)
+                device.health_time_ns = time_ns
+
+        request = self.__pending.get((topic, event_id))
+        if request is None:
+            if self.on_event is not None:
+                self.on_event(topic, command, parameters, time_ns)
+            return
+
+        if command == COMMAND_ACKNOWLEDGE and parameters and parameters[0] == str(request.command):
+            request.ack_latency = time.monotonic() - request.sent
+        elif command == COMMAND_BUSY and parameters and parameters[0] == str(request.command):
+            if not request.future.done():
+                lane = parameters[1] if len(parameters) > 1 else None
+                retry_after = int(parameters[2]) / 1000 if len(parameters) > 2 else 0.0
+                request.future.set_exception(SynapseLinkBusy(topic, request.command, lane, retry_after))
+        elif command == request.command and not request.future.done():
+            request.future.set_result(Reply(topic, command, parameters, event_id, request.ack_latency,
+                                            time.monotonic() - request.sent, time_ns))
+
+    def __on_disconnect(self):
+        self.__subscriptions.clear()
+        self.__fail_pending(SynapseLinkError("Connection to the broker lost"))
+
+    def __fail_pending(self, error: Exception):
+        for request in self.__pending.values():
+            if not request.future.done():
+                request.future.set_exception(error)
+        self.__pending.clear()
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    # ---------------------------------------------------------------
+    #                           Constructor
+    # ---------------------------------------------------------------
+
+    def __init__(self, host: str = "mqtt.evoluxiot.pt", port: int = 1883, username: str = "evoluxiot",
+                 password: str = "evoluxiot", client_id: str = None, timeout: float = 5.0, max_in_flight: int = 32,
+                 keep_alive: int = 60, compression_threshold: int = 256):
+        """
+        :param host: Address of the broker
+        :param port: Port of the broker
+        :param username: User name used to connect to the broker
+        :param password: Password used to connect to the broker
+        :param client_id: MQTT client id, a random one when not specified
+        :param timeout: Default time to wait for the result of a request, in seconds
+        :param max_in_flight: Requests in flight per device, further requests wait for a slot
+        :param keep_alive: Keep alive interval of the broker connection, in seconds
+        :param compression_threshold: Smallest size of the parameters compressed, in bytes, for devices that
+                                      advertised compression with maxversion, None never compresses
+        """
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.client_id = client_id or "synapselink-host-{:08x}".format(random.getrandbits(32))
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self.keep_alive = keep_alive
+        self.compression_threshold = compression_threshold
+        self.__pending = {}
+        self.__devices = {}
+        self.__subscriptions = {}
+        self.__limits = {}
+        # Devices ignore event ids they handled recently, a restarted client must not reuse the previous ones
+        self.__event_id = random.getrandbits(24)
@@ -0,0 +1,63 @@
+# SynapseLink Host - Display Mirror
+#
+# Rebuilds the display of a SynapsePod from the bands of rows it sends while
+# mirrored, see SynapseDevice.mirror
+#
+# The device only sends the bands that changed since its previous frame, so
+# the view keeps the whole frame and patches the bands as they arrive; a
+# frame message closes every frame that changed something
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# External Libraries
+import base64
+
+# SenseOS Libraries
+from senseos.display.raster import decode_rle565
+
+
+# ---------------------------------------------------------------------
+#                            Mirror View
+# ---------------------------------------------------------------------
+
+class MirrorView:
+    """
+    Display of a mirrored device, as RGB565 pixels, two bytes per pixel in big-endian order, row by row
+    """
+
+    def __init__(self, width: int = 0, height: int = 0):
+        self.width = width
+        self.height = height
+        self.pixels = bytearray(width * height * 2)
+        self.frame = 0
+        self.bands = 0
+        self.bytes = 0
+
+    def apply(self, parameters: list) -> bool:
+        """
+        Applies a message of the display mirror, as received by the on_event callback of the client
+        :param parameters: Parameters of the message
+        :return: True when the message completes a frame, False otherwise
+        """
+        if parameters[0] == "frame":
+            self.frame = int(parameters[1])
+            return True
+        if parameters[0] != "band":
+            return False
+
+        width, height, y, rows = (int(value) for value in parameters[2:6])
+        if width != self.width or height != self.height:
+            self.__init__(width, height)
+        data = base64.b64decode(parameters[7])
+        band = decode_rle565(data) if parameters[6] == "rle" else data
+        if len(band) != width * rows * 2:
+            return False
+        self.pixels[y * width * 2:(y + rows) * width * 2] = band
+        self.bands += 1
+        self.bytes += len(parameters[7])
+        return False
+
+    def __repr__(self):
+        return "<MirrorView {}x{} frame {}>".format(self.width, self.height, self.frame)
@@ -0,0 +1,527 @@
+# SynapseLink Host - MQTT
+#
+# Minimal MQTT 3.1.1 packet codec and asyncio client, used by the SynapseLink
+# host client and by the local broker of the simulator
+# Only the features used by SynapseLink are implemented: QoS 0 and 1,
+# retained messages, last will and keep alive
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# External Libraries
+import asyncio
+import struct
+
+# ---------------------------------------------------------------------
+#                            Packet Types
+# ---------------------------------------------------------------------
+
+CONNECT = 0x01
+"""Client request to connect to the broker"""
+CONNACK = 0x02
+"""Connection acknowledgement"""
+PUBLISH = 0x03
+"""Publish message"""
+PUBACK = 0x04
+"""Publish acknowledgement (QoS 1)"""
+SUBSCRIBE = 0x08
+"""Subscribe request"""
+SUBACK = 0x09
+"""Subscribe acknowledgement"""
+UNSUBSCRIBE = 0x0A
+"""Unsubscribe request"""
+UNSUBACK = 0x0B
+"""Unsubscribe acknowledgement"""
+PINGREQ = 0x0C
+"""Ping request"""
+PINGRESP = 0x0D
+"""Ping response"""
+DISCONNECT = 0x0E
+"""Client is disconnecting"""
+
+PROTOCOL_NAME = b"MQTT"
+"""Protocol name of MQTT 3.1.1"""
+PROTOCOL_LEVEL = 4
+"""Protocol level of MQTT 3.1.1"""
+
+MAX_PACKET_SIZE = 268435455
+"""Largest remaining length that can be encoded by MQTT"""
+
+
+class MQTTError(Exception):
+    """
+    Raised when a malformed packet is received or the connection is refused
+    """
+
+
+# ---------------------------------------------------------------------
+#                               Codec
+# ---------------------------------------------------------------------
+
+def encode_length(length: int) -> bytes:
+    """
+    Encodes the remaining length of a packet
+    :param length: Remaining length, in bytes
+    :return: Variable length encoding of the length
+    """
+    if not 0 <= length <= MAX_PACKET_SIZE:
+        raise MQTTError("Packet too large")
+
+    result = bytearray()
+    while True:
+        digit = length & 0x7F
+        length >>= 7
+        if length:
+            result.append(digit | 0x80)
+        else:
+            result.append(digit)
+            return bytes(result)
+
+
+def encode_string(value) -> bytes:
+    """
+    Encodes a length prefixed string
+    :param value: String or bytes to encode
+    :return: Encoded string
+    """
+    if isinstance(value, str):
+        value = value.encode()
+    return struct.pack("!H", len(value)) + value
+
+
+def decode_string(data: bytes, offset: int) -> tuple[bytes, int]:
+    """
+    Decodes a length prefixed string
+    :param data: Buffer holding the string
+    :param offset: Offset of the string in the buffer
+    :return: Tuple of the string and the offset after it
+    """
+    if offset + 2 > len(data):
+        raise MQTTError("Truncated string")
+    length = struct.unpack_from("!H", data, offset)[0]
+    offset += 2
+    if offset + length > len(data):
+        raise MQTTError("Truncated string")
+    return data[offset:offset + length], offset + length
+
+
+def packet(kind: int, flags: int, body: bytes = b"") -> bytes:
+    """
+    Builds a packet from its type, flags and body
+    :param kind: Packet type
+    :param flags: Packet flags (lower nibble of the fixed header)
+    :param body: Variable header and payload
+    :return: Encoded packet
+    """
+    return bytes(((kind << 4) | flags,)) + encode_length(len(body)) + body
+
+
+async def read_packet(reader: asyncio.StreamReader) -> tuple[int, int, bytes]:
+    """
+    Reads a packet from a stream
+    :param reader: Stream to read from
+    :return: Tuple of packet type, flags and body
+    :raises asyncio.IncompleteReadError: When the stream is closed
+    """
+    header = (await reader.readexactly(1))[0]
+
+    length = 0
+    shift = 0
+    while True:
+        digit = (await reader.readexactly(1))[0]
+        length |= (digit & 0x7F) << shift
+        if not digit & 0x80:
+            break
+        shift += 7
+        if shift > 21:
+            raise MQTTError("Malformed remaining length")
+
+    body = await reader.readexactly(length) if length else b""
+    return header >> 4, header & 0x0F, body
+
+
+def connect_packet(client_id: str, keep_alive: int = 60, username: str = None, password: str = None,
+                   clean_session: bool = True, will: tuple = None) -> bytes:
+    """
+    Builds a CONNECT packet
+    :param client_id: Client identifier
+    :param keep_alive: Keep alive interval, in seconds
+    :param username: User name, None for anonymous connections
+    :param password: Password, only sent with a user name
+    :param clean_session: Should the broker discard any previous session
+    :param will: Last will as (topic, payload, qos, retain), None for no will
+    :return: Encoded packet
+    """
+    flags = 0x02 if clean_session else 0x00
+    payload = encode_string(client_id)
+
+    if will is not None:
+        topic, message, qos, retain = will
+        flags |= 0x04 | (qos << 3) | (0x20 if retain else 0x00)
+        payload += encode_string(topic) + encode_string(message)
+    if username is not None:
+        flags |= 0x80
+        payload += encode_string(username)
+        if password is not None:
+            flags |= 0x40
+            payload += encode_string(password)
+
+    header = encode_string(PROTOCOL_NAME) + struct.pack("!BBH", PROTOCOL_LEVEL, flags, keep_alive)
+    return packet(CONNECT, 0, header + payload)
+
+
+def parse_connect(body: bytes) -> dict:
+    """
+    Parses the body of a CONNECT packet
+    :param body: Packet body
+    :return: Dictionary with client_id, keep_alive, clean_session, username, password and will
+    """
+    name, offset = decode_string(body, 0)
+    if name != PROTOCOL_NAME or offset + 4 > len(body):
+        raise MQTTError("Unsupported protocol")
+    level, flags, keep_alive = struct.unpack_from("!BBH", body, offset)
+    offset += 4
+
+    client_id, offset = decode_string(body, offset)
+    result = {
+        "level": level,
+        "client_id": client_id.decode(),
+        "keep_alive": keep_alive,
+        "clean_session": bool(flags & 0x02),
+        "username": None,
+        "password": None,
+        "will": None,
+    }
+
+    if flags & 0x04:
+        topic, offset = decode_string(body, offset)
+        message, offset = decode_string(body, offset)
+        result["will"] = (topic.decode(), message, (flags >> 3) & 0x03, bool(flags & 0x20))
+    if flags & 0x80:
+        username, offset = decode_string(body, offset)
+        result["username"] = username.decode()
+    if flags & 0x40:
+        password, offset = decode_string(body, offset)
+        result["password"] = password.decode()
+
+    return result
+
+
+def publish_packet(topic: str, payload, qos: int = 0, packet_id: int = 0, retain: bool = False,
+                   dup: bool = False) -> bytes:
+    """
+    Builds a PUBLISH packet
+    :param topic: Topic of the message
+    :param payload: Message, as string or bytes
+    :param qos: Quality of service, 0 or 1
+    :param packet_id: Packet identifier, required for QoS 1
+    :param retain: Should the broker retain the message
+    :param dup: Is this a retransmission
+    :return: Encoded packet
+    """
+    if isinstance(payload, str):
+        payload = payload.encode()
+    flags = (0x08 if dup else 0x00) | (qos << 1) | (0x01 if retain else 0x00)
+    body = encode_string(topic)
+    if qos:
+        body += struct.pack("!H", packet_id)
+    return packet(PUBLISH, flags, body + payload)
+
+
+def parse_publish(flags: int, body: bytes) -> tuple[str, bytes, int, int, bool]:
+    """
+    Parses a PUBLISH packet
+    :param flags: Packet flags
+    :param body: Packet body
+    :return: Tuple of topic, payload, qos, packet identifier and retain flag
+    """
+    topic, offset = decode_string(body, 0)
+    qos = (flags >> 1) & 0x03
+    packet_id = 0
+    if qos:
+        packet_id = struct.unpack_from("!H", body, offset)[0]
+        offset += 2
+    return topic.decode(), body[offset:], qos, packet_id, bool(flags & 0x01)
+
+
+def subscribe_packet(packet_id: int, topics: list[tuple[str, int]]) -> bytes:
+    """
+    Builds a SUBSCRIBE packet
+    :param packet_id: Packet identifier
+    :param topics: List of (topic filter, qos) pairs
+    :return: Encoded packet
+    """
+    body = struct.pack("!H", packet_id)
+    for topic, qos in topics:
+        body += encode_string(topic) + bytes((qos,))
+    return packet(SUBSCRIBE, 0x02, body)
+
+
+def parse_subscribe(body: bytes) -> tuple[int, list[tuple[str, int]]]:
+    """
+    Parses a SUBSCRIBE packet
+    :param body: Packet body
+    :return: Tuple of packet identifier and list of (topic filter, qos) pairs
+    """
+    packet_id = struct.unpack_from("!H", body, 0)[0]
+    offset = 2
+    topics = []
+    while offset < len(body):
+        topic, offset = decode_string(body, offset)
+        topics.append((topic.decode(), body[offset] & 0x03))
+        offset += 1
+    return packet_id, topics
+
+
+def parse_unsubscribe(body: bytes) -> tuple[int, list[str]]:
+    """
+    Parses an UNSUBSCRIBE packet
+    :param body: Packet body
+    :return: Tuple of packet identifier and list of topic filters
+    """
+    packet_id = struct.unpack_from("!H", body, 0)[0]
+    offset = 2
+    topics = []
+    while offset < len(body):
+        topic, offset = decode_string(body, offset)
+        topics.append(topic.decode())
+    return packet_id, topics
+
+
+def topic_matches(topic_filter: str, topic: str) -> bool:
+    """
+    Checks if a topic matches a topic filter, supporting the + and # wildcards
+    :param topic_filter: Topic filter of a subscription
+    :param topic: Topic of a message
+    :return: True if the topic matches the filter, False otherwise
+    """
+    if topic_filter == topic:
+        return True
+
+    filter_levels = topic_filter.split("/")
+    topic_levels = topic.split("/")
+    for index, level in enumerate(filter_levels):
+        if level == "#":
+            return True
+        if index >= len(topic_levels):
+            return False
+        if level != "+" and level != topic_levels[index]:
+            return False
+    return len(filter_levels) == len(topic_levels)
+
+
+# ---------------------------------------------------------------------
+#                               Client
+# ---------------------------------------------------------------------
+
+class MQTTClient:
+    """
+    Minimal asyncio MQTT client, delivering received messages to a callback
+    """
+
+    # ---------------------------------------------------------------
+    #                         Internal Fields
+    # ---------------------------------------------------------------
+
+    __reader: asyncio.StreamReader = None
+    """Stream receiving the packets of the broker"""
+
+    __writer: asyncio.StreamWriter = None
+    """Stream sending packets to the broker"""
+
+    __tasks: list = None
+    """Background tasks reading packets and keeping the connection alive"""
+
+    __pending: dict = None
+    """Futures waiting for acknowledgements, by packet type and identifier"""
+
+    __packet_id: int = 0
+    """Last packet identifier used"""
+
+    __keep_alive: int = 60
+    """Keep alive interval, in seconds"""
+
+    __connected: bool = False
+    """Is the client connected to the broker"""
+
+    on_message = None
+    """Called with the topic and payload of each message received"""
+
+    on_disconnect = None
+    """Called when the connection to the broker is lost"""
+
+    # ---------------------------------------------------------------
+    #                           Properties
+    # ---------------------------------------------------------------
+
+    @property
+    def connected(self) -> bool:
+        """
+        Indicates if the client is connected to the broker
+        :return: True if connected, False otherwise
+        """
+        return self.__connected
+
+    @property
+    def client_id(self) -> str:
+        """
+        Client identifier used when connecting
+        :return: The client identifier
+        """
+        return self.__client_id
+
+    # ---------------------------------------------------------------
+    #                           Methods
+    # ---------------------------------------------------------------
+
+    async def connect(self, host: str, port: int = 1883, username: str = None, password: str = None,
+                      keep_alive: int = 60, will: tuple = None, timeout: float = 5.0):
+        """
+        Connects to a broker
+        :param host: Address of the broker
+        :param port: Port of the broker
+        :param username: User name, None for anonymous connections
+        :param password: Password
+        :param keep_alive: Keep alive interval, in seconds
+        :param will: Last will as (topic, payload, qos, retain), None for no will
+        :param timeout: Time to wait for the connection acknowledgement, in seconds
+        :raises MQTTError: When the broker refuses the connection
+        """
+        self.__reader, self.__writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        self.__keep_alive = keep_alive
+        self.__pending = {}
+
+        self.__writer.write(connect_packet(self.__client_id, keep_alive, username, password, will=will))
+        kind, _, body = await asyncio.wait_for(read_packet(self.__reader), timeout)
+        if kind != CONNACK or len(body) < 2:
+            raise MQTTError("Expected CONNACK")
+        if body[1] != 0:
+            raise MQTTError("Connection refused ({})".format(body[1]))
+
+        self.__connected = True
+        self.__tasks = [asyncio.ensure_future(self.__read_loop())]
+        if keep_alive:
+            self.__tasks.append(asyncio.ensure_future(self.__keep_alive_loop()))
+
+    async def disconnect(self):
+        """
+        Disconnects gracefully from the broker, the last will is not published
+        """
+        if self.__connected:
+            self.__writer.write(packet(DISCONNECT, 0))
+            try:
+                await self.__writer.drain()
+            except ConnectionError:
+                pass
+        await self.__close()
+
+    async def subscribe(self, topic: str, qos: int = 0, timeout: float = 5.0) -> int:
+        """
+        Subscribes to a topic filter
+        :param topic: Topic filter
+        :param qos: Maximum quality of service requested
+        :param timeout: Time to wait for the acknowledgement, in seconds
+        :return: Quality of service granted by the broker
+        """
+        packet_id = self.__next_packet_id()
+        future = self.__expect(SUBACK, packet_id)
+        self.__writer.write(subscribe_packet(packet_id, [(topic, qos)]))
+        body = await asyncio.wait_for(future, timeout)
+        return body[2]
+
+    def publish_nowait(self, topic: str, payload, retain: bool = False):
+        """
+        Queues a QoS 0 message for sending, without waiting for the stream to drain
+        :param topic: Topic of the message
+        :param payload: Message, as string or bytes
+        :param retain: Should the broker retain the message
+        """
+        self.__writer.write(publish_packet(topic, payload, retain=retain))
+
+    async def publish(self, topic: str, payload, qos: int = 0, retain: bool = False, timeout: float = 5.0):
+        """
+        Publishes a message, waiting for the acknowledgement of the broker on QoS 1
+        :param topic: Topic of the message
+        :param payload: Message, as string or bytes
+        :param qos: Quality of service, 0 or 1
+        :param retain: Should the broker retain the message
+        :param timeout: Time to wait for the acknowledgement, in seconds
+        """
+        if qos == 0:
+            self.publish_nowait(topic, payload, retain)
+            await self.__writer.drain()
+            return
+
+        packet_id = self.__next_packet_id()
+        future = self.__expect(PUBACK, packet_id)
+        self.__writer.write(publish_packet(topic, payload, qos, packet_id, retain))
+        await asyncio.wait_for(future, timeout)
+
+    async def drain(self):
+        """
+        Waits until the queued packets can be written to the broker
+        """
+        await self.__writer.drain()
+
+    def __next_packet_id(self) -> int:
+        self.__packet_id = self.__packet_id % 0xFFFF + 1
+        return self.__packet_id
+
+    def __expect(self, kind: int, packet_id: int) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self.__pending[(kind, packet_id)] = future
+        return future
+
+    async def __read_loop(self):
+        try:
+            while True:
+                kind, flags, body = await read_packet(self.__reader)
+                if kind == PUBLISH:
+                    topic, payload, qos, packet_id, _ = parse_publish(flags, body)
+                    if qos == 1:
+                        self.__writer.write(packet(PUBACK, 0, struct.pack("!H", packet_id)))
+                    if self.on_message is not None:
+                        self.on_message(topic, payload)
+                elif kind in (PUBACK, SUBACK, UNSUBACK):
+                    future = self.__pending.pop((kind, struct.unpack_from("!H", body, 0)[0]), None)
+                    if future is not None and not future.done():
+                        future.set_result(body)
+        except (asyncio.IncompleteReadError, ConnectionError, MQTTError):
+            pass
+        finally:
+            lost = self.__connected
+            self.__connected = False
+            for future in self.__pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Connection to the broker lost"))
+            self.__pending.clear()
+            if lost and self.on_disconnect is not None:
+                self.on_disconnect()
+
+    async def __keep_alive_loop(self):
+        while self.__connected:
+            await asyncio.sleep(self.__keep_alive / 2)
+            self.__writer.write(packet(PINGREQ, 0))
+
+    async def __close(self):
+        self.__connected = False
+        for task in self.__tasks or []:
+            task.cancel()
+        self.__tasks = []
+        if self.__writer is not None:
+            self.__writer.close()
+            try:
+                await self.__writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    # ---------------------------------------------------------------
+    #                           Constructor
+    # ---------------------------------------------------------------
+
+    def __init__(self, client_id: str):
+        """
+        :param client_id: Client identifier used when connecting
+        """
+        self.__client_id = client_id
@@ -0,0 +1,15 @@
+# SenseOS Tests - Configuration
+#
+# Makes the packages of src importable by the tests. The directory is added
+# after the standard library, as src/code.py, the entry point of the
+# firmware, would otherwise shadow the code module of the standard library
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# External Libraries
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
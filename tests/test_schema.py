@@ -0,0 +1,114 @@
+# SenseOS SynapseLink - Protocol Schema Tests
+#
+# Round trips the arguments and replies of every command through the codecs
+# compiled from the schema, and the composite arguments built by the host
+# through the decoders the device uses
+
+# ---------------------------------------------------------------------
+#                      Libraries and References
+# ---------------------------------------------------------------------
+
+# External Libraries
+import pytest
+
+# SenseOS Libraries
+import senseos.synapselink
+from senseos.synapselink import COMMAND_CANVAS, COMMAND_LANES, COMMAND_SEQUENCE
+from senseos.synapselink.schema import SCHEMA, decode_request, encode_request, sample_values, verify
+from synapselink.canvas import encode_update
+from synapselink.client import SEPARATOR, encode_command
+
+
+# ---------------------------------------------------------------------
+#                              Schema
+# ---------------------------------------------------------------------
+
+def test_verify():
+    assert verify(vars(senseos.synapselink), COMMAND_LANES) == []
+
+
+@pytest.mark.parametrize("number, name, arguments", [(number, name, arguments)
+                                                     for number, name, arguments, _ in SCHEMA])
+def test_arguments_round_trip(number, name, arguments):
+    for variant in range(3):
+        values = sample_values(arguments, variant)
+        assert decode_request(number, encode_request(number, values)) == values
+
+
+# ---------------------------------------------------------------------
+#                             Sequence
+# ---------------------------------------------------------------------
+
+def test_sequence_steps():
+    steps = [(4, 1, 250000), (4, 0, 0)]
+    parameters = encode_request(COMMAND_SEQUENCE, [0] + steps)
+    assert parameters == ["0", "4,1,250000", "4,0,0"]
+    assert decode_request(COMMAND_SEQUENCE, parameters) == [0] + steps
+
+
+def test_sequence_runs_missing():
+    assert decode_request(COMMAND_SEQUENCE, ["", "1,1,5"]) == [None, (1, 1, 5)]
+
+
+@pytest.mark.parametrize("step", ["1,1", "1,1,5,6", "1,x,5", ""])
+def test_sequence_step_rejected(step):
+    with pytest.raises(ValueError):
+        decode_request(COMMAND_SEQUENCE, ["1", step])
+
+
+def test_sequence_command_from_host():
+    message = encode_command(COMMAND_SEQUENCE, encode_request(COMMAND_SEQUENCE, [2, (3, 1, 1000)]), 42)
+    fields = message.split(SEPARATOR)
+    assert decode_request(int(fields[0]), fields[1:-1]) == [2, (3, 1, 1000)]
+
+
+# ---------------------------------------------------------------------
+#                              Canvas
+# ---------------------------------------------------------------------
+
+@pytest.mark.parametrize("values", [
+    [None],
+    ["info"],
+    ["palette", 2, 0x000000, 0xFF8000, 0xFFFFFF],
+    ["fill", 3],
+    ["raw", (0, 16, 32, 8), "AAEC"],
+    ["rle", (8, 0, 16, 16), "BQE="],
+])
+def test_canvas_operations(values):
+    assert decode_request(COMMAND_CANVAS, encode_request(COMMAND_CANVAS, values)) == values
+
+
+def test_canvas_region_as_text():
+    assert encode_request(COMMAND_CANVAS, ["rle", "0,0,4,4", "AQE="]) == ["rle", "0,0,4,4", "AQE="]
+    with pytest.raises(ValueError):
+        encode_request(COMMAND_CANVAS, ["rle", "0,0,4", "AQE="])
+
+
+def test_canvas_palette_colors():
+    assert encode_request(COMMAND_CANVAS, ["palette", 0, 0xFF8000]) == ["palette", "0", "FF8000"]
+    assert decode_request(COMMAND_CANVAS, ["palette", "0", "ff8000"]) == ["palette", 0, 0xFF8000]
+
+
+@pytest.mark.parametrize("parameters", [
+    ["erase"],
+    ["fill"],
+    ["fill", "x"],
+    ["palette", "0", "GG0000"],
+    ["palette", "0", "1000000"],
+    ["raw", "0,0,8", "AAAA"],
+    ["raw", "0,0,8,8"],
+    ["info", "1"],
+])
+def test_canvas_rejected(parameters):
+    with pytest.raises(ValueError):
+        decode_request(COMMAND_CANVAS, parameters)
+
+
+def test_canvas_update_regions():
+    width, height = 32, 16
+    image = bytes((x // 8 + y) % 4 for y in range(height) for x in range(width))
+    messages = encode_update(None, image, width, height, 16)
+    assert messages
+    for message in messages:
+        decoded = decode_request(COMMAND_CANVAS, encode_request(COMMAND_CANVAS, message))
+        assert decoded == list(message)